@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+
+"""
+benchmark_api_token_policy.py [num_entries]
+
+Benchmarks the per-request overhead of checking an API token's policy,
+for policies with large allow and block lists (1000 entries by default),
+comparing ResourceAPITokenMixin.is_resource_method_allowed against the
+compiled policies in reviewboard.webapi.token_policy.
+
+Each simulated request loads the token's policy from JSON (as happens when
+the token is fetched from the database) and checks several resources, as
+happens when expanding links. Only the time spent checking is reported.
+"""
+
+from __future__ import print_function, unicode_literals
+
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+scripts_dir = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(scripts_dir, '..', '..')))
+
+# These must be imported after the source tree is added to the path.
+from djblets.webapi.resources.mixins.api_tokens import (  # noqa: E402
+    ResourceAPITokenMixin)
+
+from reviewboard.webapi.token_policy import (  # noqa: E402
+    clear_compiled_policy_cache,
+    get_compiled_policy)
+
+
+NUM_REQUESTS = 2000
+
+RESOURCES = ['review_request', 'review', 'diff', 'repository', 'user']
+
+METHODS = ['GET', 'PUT', 'POST', 'DELETE']
+
+
+class Resource(ResourceAPITokenMixin):
+    def __init__(self, name):
+        self.name = name
+
+
+class Token(object):
+    def __init__(self, policy_json):
+        self.pk = 1
+        self.last_updated = datetime(2018, 1, 1)
+        self.policy = json.loads(policy_json)
+
+
+def build_policy(num_entries):
+    methods = ['METHOD%d' % i for i in range(num_entries)]
+    resources_policy = {
+        '*': {
+            'allow': methods + ['GET'],
+            'block': methods + ['*'],
+        },
+    }
+
+    for name in RESOURCES:
+        resource_policy = {
+            '*': {
+                'allow': methods + ['PUT'],
+                'block': methods,
+            },
+        }
+
+        for i in range(num_entries):
+            resource_policy[str(i)] = {
+                'allow': ['GET'],
+                'block': ['DELETE'],
+            }
+
+        resources_policy[name] = resource_policy
+
+    return json.dumps({'resources': resources_policy})
+
+
+def build_checks():
+    return [
+        (Resource(name), method, str(i * 7))
+        for i, name in enumerate(RESOURCES)
+        for method in METHODS
+    ]
+
+
+def check_uncompiled(token, checks):
+    resources_policy = token.policy['resources']
+
+    for resource, method, object_id in checks:
+        resource.is_resource_method_allowed(resources_policy, method,
+                                            object_id)
+
+
+def check_compiled(token, checks):
+    for resource, method, object_id in checks:
+        get_compiled_policy(token).is_allowed(resource.policy_id, method,
+                                              object_id)
+
+
+def run(func, policy_json, checks):
+    total_secs = 0.0
+
+    for i in range(NUM_REQUESTS):
+        # Loading the token isn't counted, since it's the same either way.
+        token = Token(policy_json)
+
+        start = time.time()
+        func(token, checks)
+        total_secs += time.time() - start
+
+    return total_secs
+
+
+def main():
+    num_entries = 1000
+
+    if len(sys.argv) > 1:
+        num_entries = int(sys.argv[1])
+
+    policy_json = build_policy(num_entries)
+    checks = build_checks()
+
+    print('%d requests, %d checks each, %d-entry allow/block lists:'
+          % (NUM_REQUESTS, len(checks), num_entries))
+
+    for label, func in (('ResourceAPITokenMixin', check_uncompiled),
+                        ('Compiled policy', check_compiled)):
+        clear_compiled_policy_cache()
+        secs = run(func, policy_json, checks)
+
+        print('  %-26s %.3fs (%.1fus per request)'
+              % (label + ':', secs, secs * 1000000 / NUM_REQUESTS))
+
+
+if __name__ == '__main__':
+    main()
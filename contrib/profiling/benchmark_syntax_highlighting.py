@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+
+"""
+benchmark_syntax_highlighting.py [num_files]
+
+Benchmarks lexer lookup and syntax highlighting for the files in a
+simulated diffset (500 files by default), comparing
+pygments.lexers.guess_lexer_for_filename against the cached lookup in
+reviewboard.diffviewer.lexers.
+"""
+
+from __future__ import print_function, unicode_literals
+
+import os
+import sys
+import time
+
+scripts_dir = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(scripts_dir, '..', '..')))
+
+# These must be imported after the source tree is added to the path.
+from pygments import highlight  # noqa: E402
+from pygments.formatters import HtmlFormatter  # noqa: E402
+from pygments.lexers import guess_lexer_for_filename  # noqa: E402
+from pygments.util import ClassNotFound  # noqa: E402
+
+from reviewboard.diffviewer.lexers import (  # noqa: E402
+    clear_lexer_cache,
+    get_lexer_for_filename)
+
+
+# A mix of common extensions, including ones that match several lexers
+# (which requires analyzing the content).
+FILE_TYPES = [
+    ('py', 'def func%d(arg):\n    return arg * 2  # TODO: fix\n'),
+    ('js', 'function func%d(arg) {\n    return arg * 2;\n}\n'),
+    ('c', 'int func%d(int arg)\n{\n    return arg * 2;\n}\n'),
+    ('h', '#include <stdio.h>\nint func%d(int arg);\n'),
+    ('m', '@interface Class%d : NSObject\n@end\n'),
+    ('pl', 'sub func%d {\n    return $_[0] * 2;\n}\n'),
+    ('inc', '<?php\nfunction func%d($arg) { return $arg * 2; }\n'),
+    ('html', '<div class="item%d">\n  <p>Text</p>\n</div>\n'),
+    ('txt', 'Line %d of a text file.\n'),
+]
+
+
+def build_files(num_files):
+    files = []
+
+    for i in range(num_files):
+        ext, template = FILE_TYPES[i % len(FILE_TYPES)]
+        data = ''.join(template % j for j in range(20))
+        files.append(('src/dir%d/file%d.%s' % (i % 10, i, ext), data))
+
+    return files
+
+
+def guess_lexer(filename, data):
+    try:
+        lexer = guess_lexer_for_filename(filename, data, stripnl=False,
+                                         encoding='utf-8')
+    except ClassNotFound:
+        return None
+
+    lexer.add_filter('codetagify')
+
+    return lexer
+
+
+def run(files, get_lexer, render):
+    formatter = HtmlFormatter()
+    start = time.time()
+
+    # Each file is highlighted twice, for the original and modified
+    # versions.
+    for filename, data in files:
+        for i in range(2):
+            lexer = get_lexer(filename, data)
+
+            if render and lexer is not None:
+                highlight(data, lexer, formatter)
+
+    return time.time() - start
+
+
+def main():
+    num_files = 500
+
+    if len(sys.argv) > 1:
+        num_files = int(sys.argv[1])
+
+    files = build_files(num_files)
+
+    # Load all lexer modules up-front, so that this isn't counted in
+    # either run.
+    guess_lexer('test.py', '')
+    get_lexer_for_filename('test.py', '')
+    clear_lexer_cache()
+
+    for render in (False, True):
+        if render:
+            print('Lexer lookup and highlighting (%d files):' % num_files)
+        else:
+            print('Lexer lookup only (%d files):' % num_files)
+
+        print('  guess_lexer_for_filename: %.3fs'
+              % run(files, guess_lexer, render))
+        print('  get_lexer_for_filename:   %.3fs (cold)'
+              % run(files, get_lexer_for_filename, render))
+        print('  get_lexer_for_filename:   %.3fs (warm)'
+              % run(files, get_lexer_for_filename, render))
+
+        clear_lexer_cache()
+
+
+if __name__ == '__main__':
+    main()
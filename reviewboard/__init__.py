@@ -69,6 +69,36 @@ def get_manual_url():
     return 'https://www.reviewboard.org/docs/manual/%s/' % manual_ver
 
 
+#: Whether Review Board has been fully initialized in this process.
+_initialized = False
+
+#: The time spent in each phase of the last initialization.
+_init_timings = {}
+
+
+def is_initialized():
+    """Return whether Review Board has been fully initialized.
+
+    This is only ``True`` once :py:func:`initialize` has been called with
+    extensions and templates set up, as is done when serving requests.
+
+    Returns:
+        bool:
+        Whether Review Board has been fully initialized in this process.
+    """
+    return _initialized
+
+
+def get_init_timings():
+    """Return the time spent in each phase of the last initialization.
+
+    Returns:
+        collections.OrderedDict:
+        A mapping of phase names to the time spent in them, in seconds.
+    """
+    return _init_timings
+
+
 def initialize(load_extensions=True,
                setup_logging=True,
                setup_templates=True):
@@ -105,6 +135,18 @@ def initialize(load_extensions=True,
     import importlib
     import logging
     import os
+    import time
+    from collections import OrderedDict
+
+    global _initialized, _init_timings
+
+    timings = OrderedDict()
+    phase_start = [time.time()]
+
+    def _end_phase(name):
+        now = time.time()
+        timings[name] = now - phase_start[0]
+        phase_start[0] = now
 
     os.environ.setdefault(str('DJANGO_SETTINGS_MODULE'),
                           str('reviewboard.settings'))
@@ -127,6 +169,8 @@ def initialize(load_extensions=True,
         # Django < 1.7
         pass
 
+    _end_phase('django-setup')
+
     from django.conf import settings
     from django.db import DatabaseError
     from djblets import log
@@ -145,13 +189,18 @@ def initialize(load_extensions=True,
         #       move to a newer release.
         importlib.import_module('reviewboard.site.templatetags')
 
+    _end_phase('imports')
+
     is_running_test = getattr(settings, 'RUNNING_TEST', False)
 
     if setup_logging and not is_running_test:
         # Set up logging.
         log.init_logging()
 
+    _end_phase('logging')
+
     load_site_config()
+    _end_phase('site-config')
 
     if (setup_templates or load_extensions) and not is_running_test:
         if settings.DEBUG:
@@ -173,6 +222,8 @@ def initialize(load_extensions=True,
         if not getattr(settings, 'TEMPLATE_SERIAL', None):
             settings.TEMPLATE_SERIAL = settings.AJAX_SERIAL
 
+    _end_phase('serials')
+
     siteconfig = SiteConfiguration.objects.get_current()
 
     if (load_extensions and
@@ -181,7 +232,15 @@ def initialize(load_extensions=True,
         # Load all extensions
         get_extension_manager().load()
 
+    _end_phase('extensions')
+
     signals.initializing.send(sender=None)
+    _end_phase('initializing-signal')
+
+    _init_timings = timings
+
+    if load_extensions and setup_templates:
+        _initialized = True
 
 
 #: An alias for the the version information from :py:data:`VERSION`.
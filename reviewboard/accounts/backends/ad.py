@@ -16,6 +16,9 @@ except ImportError:
     ldap = None
 
 from reviewboard.accounts.backends.base import BaseAuthBackend
+from reviewboard.accounts.backends.ldap_pool import (LDAPConnection,
+                                                     get_cached_lookup,
+                                                     get_ldap_connection_pool)
 from reviewboard.accounts.forms.auth import ActiveDirectorySettingsForm
 
 
@@ -98,6 +101,10 @@ class ActiveDirectoryBackend(BaseAuthBackend):
         boolean.
 
         This is ``auth_ad_use_tls`` in the site configuration.
+
+    Connections to each domain controller are pooled and reused across
+    logins, and the results of group membership lookups are cached for a
+    short time (see :py:mod:`reviewboard.accounts.backends.ldap_pool`).
     """
 
     backend_id = 'ad'
@@ -257,14 +264,7 @@ class ActiveDirectoryBackend(BaseAuthBackend):
                     if group in old_seen:
                         continue
 
-                    # Search for groups with the specified CN. Use the CN
-                    # rather than The sAMAccountName so that behavior is
-                    # correct when the values differ (e.g. if a
-                    # "pre-Windows 2000" group name is set in AD)
-                    group_data = self.search_ad(
-                        con,
-                        filter_format('(&(objectClass=group)(cn=%s))',
-                                      (group,)))
+                    group_data = self.search_groups(con, group)
                     seen.update(self.get_member_of(con, group_data,
                                                    seen=seen, depth=depth))
             else:
@@ -274,14 +274,47 @@ class ActiveDirectoryBackend(BaseAuthBackend):
 
         return seen
 
+    def search_groups(self, con, group):
+        """Search for the groups with the given name.
+
+        The results are cached for a short time, so that the groups of users
+        sharing group memberships don't need to be looked up on every login.
+
+        Args:
+            con (ldap.LDAPObject):
+                The LDAP connection to search.
+
+            group (bytes):
+                The CN of the group.
+
+        Returns:
+            list of tuple:
+            The list of search results, in the form returned by
+            :py:meth:`search_ad`.
+        """
+        # Search for groups with the specified CN. Use the CN rather than
+        # The sAMAccountName so that behavior is correct when the values
+        # differ (e.g. if a "pre-Windows 2000" group name is set in AD)
+        filterstr = filter_format('(&(objectClass=group)(cn=%s))', (group,))
+
+        return get_cached_lookup(
+            ('ad-group', self.get_ldap_search_root(), filterstr),
+            lambda: self.search_ad(con, filterstr))
+
     def get_ldap_connections(self, userdomain=None):
         """Return all LDAP connections used for Active Directory.
 
         This returns an iterable of connections to the LDAP servers specified
         in :setting:`AD_DOMAIN_CONTROLLER`.
 
+        Connections come from a pool, and may have been bound by a previous
+        user, so they must be bound before being used. They should be
+        returned to the pool using :py:meth:`release_ldap_connection` when
+        no longer needed.
+
         Yields:
-            tuple of (unicode, ldap.LDAPObject):
+            tuple of (unicode, reviewboard.accounts.backends.ldap_pool.
+            LDAPConnection):
             The connections to the configured LDAP servers.
         """
         if settings.AD_FIND_DC_FROM_DNS:
@@ -301,25 +334,24 @@ class ActiveDirectoryBackend(BaseAuthBackend):
         for dc in dcs:
             port, host = dc
             ldap_uri = 'ldap://%s:%s' % (host, port)
-            connection = ldap.initialize(ldap_uri)
-
-            if settings.AD_USE_TLS:
-                try:
-                    connection.start_tls_s()
-                except ldap.UNAVAILABLE:
-                    logger.warning('Domain controller "%s:%d" for domain "%s" '
-                                   'unavailable',
-                                   host, int(port), userdomain)
-                    continue
-                except ldap.CONNECT_ERROR:
-                    logger.warning('Could not connect to domain controller '
-                                   '"%s:%d" for domain "%s". The certificate '
-                                   'may not be verifiable.',
-                                   host, int(port), userdomain)
-                    continue
-
-            connection.set_option(ldap.OPT_REFERRALS, 0)
-            yield ldap_uri, connection
+            connection = self._get_connection_pool(ldap_uri).acquire(
+                lambda: self._connect(host, port, userdomain))
+
+            if connection is not None:
+                yield ldap_uri, connection
+
+    def release_ldap_connection(self, uri, connection):
+        """Return a connection to the pool.
+
+        Args:
+            uri (unicode):
+                The URI of the domain controller.
+
+            connection (reviewboard.accounts.backends.ldap_pool.
+                        LDAPConnection):
+                The connection returned by :py:meth:`get_ldap_connections`.
+        """
+        self._get_connection_pool(uri).release(connection)
 
     def authenticate(self, username, password, **kwargs):
         """Authenticate a user against Active Directory.
@@ -413,11 +445,67 @@ class ActiveDirectoryBackend(BaseAuthBackend):
                 logger.warning('Failed login for user "%s" on controller "%s"',
                                username, uri)
                 return None
+            finally:
+                self.release_ldap_connection(uri, connection)
 
         logger.error('Could not contact any domain controller servers')
 
         return None
 
+    def _connect(self, host, port, userdomain):
+        """Connect to a domain controller.
+
+        Args:
+            host (unicode):
+                The host of the domain controller.
+
+            port (unicode):
+                The port of the domain controller.
+
+            userdomain (unicode):
+                The domain being authenticated against, for logging.
+
+        Returns:
+            reviewboard.accounts.backends.ldap_pool.LDAPConnection:
+            The connection, or ``None`` if the domain controller was
+            unavailable.
+        """
+        connection = LDAPConnection(
+            ldap.initialize('ldap://%s:%s' % (host, port)))
+
+        if settings.AD_USE_TLS:
+            try:
+                connection.start_tls_s()
+            except ldap.UNAVAILABLE:
+                logger.warning('Domain controller "%s:%d" for domain "%s" '
+                               'unavailable',
+                               host, int(port), userdomain)
+                return None
+            except ldap.CONNECT_ERROR:
+                logger.warning('Could not connect to domain controller '
+                               '"%s:%d" for domain "%s". The certificate '
+                               'may not be verifiable.',
+                               host, int(port), userdomain)
+                return None
+
+        connection.set_option(ldap.OPT_REFERRALS, 0)
+
+        return connection
+
+    def _get_connection_pool(self, uri):
+        """Return the connection pool for a domain controller.
+
+        Args:
+            uri (unicode):
+                The URI of the domain controller.
+
+        Returns:
+            reviewboard.accounts.backends.ldap_pool.LDAPConnectionPool:
+            The connection pool.
+        """
+        return get_ldap_connection_pool(('ad', uri,
+                                         bool(settings.AD_USE_TLS)))
+
     def get_or_create_user(self, username, request=None, ad_user_data=None):
         """Return an existing user or create one if it doesn't exist.
 
@@ -16,6 +16,10 @@ except ImportError:
     ldap = None
 
 from reviewboard.accounts.backends.base import BaseAuthBackend
+from reviewboard.accounts.backends.ldap_pool import (LDAPConnection,
+                                                     get_cached_lookup,
+                                                     get_ldap_connection_pool,
+                                                     invalidate_cached_lookup)
 from reviewboard.accounts.forms.auth import LDAPSettingsForm
 
 
@@ -84,6 +88,10 @@ class LDAPBackend(BaseAuthBackend):
 
     ``LDAP_URI``:
         The URI to the LDAP server to connect to for all communication.
+
+    Connections bound as the service account are pooled and reused across
+    logins, and the DNs found for usernames are cached for a short time
+    (see :py:mod:`reviewboard.accounts.backends.ldap_pool`).
     """
 
     backend_id = 'ldap'
@@ -124,7 +132,7 @@ class LDAPBackend(BaseAuthBackend):
                             username)
             return None
 
-        ldapo = self._connect()
+        ldapo = self._acquire_connection()
 
         if ldapo is None:
             return None
@@ -137,9 +145,9 @@ class LDAPBackend(BaseAuthBackend):
         if isinstance(password, six.text_type):
             password = password.encode('utf-8')
 
-        userdn = self._get_user_dn(ldapo, username)
-
         try:
+            userdn = self._get_user_dn(ldapo, username)
+
             # Now that we have the user, attempt to bind to verify
             # authentication.
             logging.debug('Attempting to authenticate user DN "%s" '
@@ -154,6 +162,9 @@ class LDAPBackend(BaseAuthBackend):
             logging.warning('Error authenticating user "%s" in LDAP: The '
                             'credentials provided were invalid',
                             username)
+
+            # The DN may be out of date, so look it up again next time.
+            invalidate_cached_lookup(self._get_user_dn_lookup_key(username))
         except ldap.LDAPError as e:
             logging.warning('Error authenticating user "%s" in LDAP: %s',
                             username, e)
@@ -161,6 +172,8 @@ class LDAPBackend(BaseAuthBackend):
             logging.exception('Unexpected error authenticating user "%s" '
                               'in LDAP: %s',
                               username, e)
+        finally:
+            self._release_connection(ldapo)
 
         return None
 
@@ -181,7 +194,7 @@ class LDAPBackend(BaseAuthBackend):
 
             ldapo (ldap.LDAPObject, optional):
                 The existing LDAP connection, if the caller has one. If not
-                provided, a new connection will be created.
+                provided, a pooled connection will be used.
 
             userdn (unicode, optional):
                 The DN for the user being looked up, if the caller knows it.
@@ -207,13 +220,17 @@ class LDAPBackend(BaseAuthBackend):
                           username)
             return None
 
+        pooled_ldapo = None
+
         try:
             if ldapo is None:
-                ldapo = self._connect(request=request)
+                ldapo = self._acquire_connection(request=request)
 
                 if ldapo is None:
                     return None
 
+                pooled_ldapo = ldapo
+
             if userdn is None:
                 userdn = self._get_user_dn(ldapo=ldapo,
                                            username=username,
@@ -289,9 +306,69 @@ class LDAPBackend(BaseAuthBackend):
                             exc_info=1)
         except ldap.LDAPError as e:
             logging.warning("LDAP error: %s", e, exc_info=1)
+        finally:
+            if pooled_ldapo is not None:
+                self._release_connection(pooled_ldapo)
 
         return None
 
+    def _acquire_connection(self, request=None):
+        """Return a pooled LDAP connection bound as the service account.
+
+        The connection must be returned using :py:meth:`_release_connection`
+        once the caller is finished with it.
+
+        Args:
+            request (django.http.HttpRequest, optional):
+                The optional HTTP request used for logging context.
+
+        Returns:
+            reviewboard.accounts.backends.ldap_pool.LDAPConnection:
+            The connection, or ``None`` if a connection couldn't be opened or
+            bound.
+        """
+        if ldap is None:
+            return None
+
+        pool = self._get_connection_pool()
+        ldapo = pool.acquire(lambda: self._connect(request=request))
+
+        if (ldapo is not None and
+            ldapo.bound_dn != (settings.LDAP_ANON_BIND_UID or '')):
+            # The connection was last used to authenticate a user, so it
+            # needs to be bound as the service account again.
+            if self._run_service_operation(
+                    lambda: self._bind_service_account(ldapo),
+                    request=request) is None:
+                pool.release(ldapo)
+                ldapo = None
+
+        return ldapo
+
+    def _release_connection(self, ldapo):
+        """Return a connection to the pool.
+
+        Args:
+            ldapo (reviewboard.accounts.backends.ldap_pool.LDAPConnection):
+                The connection returned by :py:meth:`_acquire_connection`.
+        """
+        self._get_connection_pool().release(ldapo)
+
+    def _get_connection_pool(self):
+        """Return the connection pool for the current LDAP settings.
+
+        Returns:
+            reviewboard.accounts.backends.ldap_pool.LDAPConnectionPool:
+            The connection pool.
+        """
+        return get_ldap_connection_pool((
+            'ldap',
+            settings.LDAP_URI,
+            bool(settings.LDAP_TLS),
+            settings.LDAP_ANON_BIND_UID,
+            settings.LDAP_ANON_BIND_PASSWD,
+        ))
+
     def _connect(self, request=None):
         """Connect to LDAP.
 
@@ -303,7 +380,7 @@ class LDAPBackend(BaseAuthBackend):
                 The optional HTTP request used for logging context.
 
         Returns:
-            ldap.LDAPObject:
+            reviewboard.accounts.backends.ldap_pool.LDAPConnection:
             The resulting LDAP connection, if it could connect. If LDAP
             support isn't available, or there was an error, this will return
             ``None``.
@@ -311,23 +388,65 @@ class LDAPBackend(BaseAuthBackend):
         if ldap is None:
             return None
 
-        try:
-            ldapo = ldap.initialize(settings.LDAP_URI)
+        def _open_connection():
+            ldapo = LDAPConnection(ldap.initialize(settings.LDAP_URI))
             ldapo.set_option(ldap.OPT_REFERRALS, 0)
             ldapo.set_option(ldap.OPT_PROTOCOL_VERSION, 3)
 
             if settings.LDAP_TLS:
                 ldapo.start_tls_s()
 
-            if settings.LDAP_ANON_BIND_UID:
-                # Log in as the service account before searching.
-                ldapo.simple_bind_s(settings.LDAP_ANON_BIND_UID,
-                                    settings.LDAP_ANON_BIND_PASSWD)
-            else:
-                # Bind anonymously to the server.
-                ldapo.simple_bind_s()
+            self._bind_service_account(ldapo)
 
             return ldapo
+
+        return self._run_service_operation(_open_connection, request=request)
+
+    def _bind_service_account(self, ldapo):
+        """Bind a connection as the service account.
+
+        If no service account is configured, this will bind anonymously.
+
+        Args:
+            ldapo (reviewboard.accounts.backends.ldap_pool.LDAPConnection):
+                The connection to bind.
+
+        Returns:
+            reviewboard.accounts.backends.ldap_pool.LDAPConnection:
+            The bound connection.
+
+        Raises:
+            ldap.LDAPError:
+                The bind failed.
+        """
+        if settings.LDAP_ANON_BIND_UID:
+            # Log in as the service account before searching.
+            ldapo.simple_bind_s(settings.LDAP_ANON_BIND_UID,
+                                settings.LDAP_ANON_BIND_PASSWD)
+        else:
+            # Bind anonymously to the server.
+            ldapo.simple_bind_s()
+
+        return ldapo
+
+    def _run_service_operation(self, func, request=None):
+        """Run an operation that connects or binds as the service account.
+
+        Any errors will be logged.
+
+        Args:
+            func (callable):
+                The function to run.
+
+            request (django.http.HttpRequest, optional):
+                The optional HTTP request used for logging context.
+
+        Returns:
+            object:
+            The result of the function, or ``None`` if there was an error.
+        """
+        try:
+            return func()
         except ldap.INVALID_CREDENTIALS:
             if settings.LDAP_ANON_BIND_UID:
                 logging.warning('Error authenticating with LDAP: The '
@@ -375,24 +494,25 @@ class LDAPBackend(BaseAuthBackend):
         assert ldapo is not None
 
         try:
-            # If the UID mask has been explicitly set, use it instead of
-            # computing a search filter.
-            if settings.LDAP_UID_MASK:
-                uidfilter = settings.LDAP_UID_MASK % username
-            else:
-                uidfilter = '(%(userattr)s=%(username)s)' % {
-                    'userattr': settings.LDAP_UID,
-                    'username': username,
-                }
+            uidfilter = self._get_uid_filter(username)
+
+            def _search_user_dn():
+                # Search for the user with the given base DN and uid. If the
+                # user is found, a fully qualified DN is returned.
+                search = ldapo.search_s(settings.LDAP_BASE_DN,
+                                        ldap.SCOPE_SUBTREE,
+                                        uidfilter)
+
+                if search:
+                    return search[0][0]
+
+                return None
 
-            # Search for the user with the given base DN and uid. If the user
-            # is found, a fully qualified DN is returned.
-            search = ldapo.search_s(settings.LDAP_BASE_DN,
-                                    ldap.SCOPE_SUBTREE,
-                                    uidfilter)
+            userdn = get_cached_lookup(self._get_user_dn_lookup_key(username),
+                                       _search_user_dn)
 
-            if search:
-                return search[0][0]
+            if userdn is not None:
+                return userdn
 
             logging.warning('LDAP error: The specified object does '
                             'not exist in the Directory: %s',
@@ -409,3 +529,39 @@ class LDAPBackend(BaseAuthBackend):
                               request=request)
 
         return None
+
+    def _get_uid_filter(self, username):
+        """Return the search filter used to find a user.
+
+        Args:
+            username (unicode):
+                The username to look up in the directory.
+
+        Returns:
+            unicode:
+            The search filter.
+        """
+        # If the UID mask has been explicitly set, use it instead of
+        # computing a search filter.
+        if settings.LDAP_UID_MASK:
+            return settings.LDAP_UID_MASK % username
+        else:
+            return '(%(userattr)s=%(username)s)' % {
+                'userattr': settings.LDAP_UID,
+                'username': username,
+            }
+
+    def _get_user_dn_lookup_key(self, username):
+        """Return the key used to cache the DN for a username.
+
+        Args:
+            username (unicode):
+                The username to look up in the directory.
+
+        Returns:
+            tuple:
+            The key for :py:func:`~reviewboard.accounts.backends.ldap_pool.
+            get_cached_lookup`.
+        """
+        return ('ldap-user-dn', settings.LDAP_URI, settings.LDAP_BASE_DN,
+                self._get_uid_filter(username))
@@ -0,0 +1,581 @@
+"""Connection pooling, lookup caching, and metrics for LDAP backends.
+
+Connecting to an LDAP server (and possibly starting TLS and binding a
+service account) for every login is slow when the directory is remote.
+Connections are instead kept open in a per-process pool and reused by later
+logins. Lookups that rarely change, such as a user's DN or a group's
+memberships, are cached for a short time.
+
+Timing information on connections, binds, and searches is collected in
+:py:data:`ldap_metrics`.
+"""
+
+from __future__ import absolute_import, unicode_literals
+
+import hashlib
+import logging
+import os
+import threading
+import time
+
+from django.core.cache import cache
+from django.utils import six
+from django.utils.encoding import force_bytes
+from djblets.cache.backend import make_cache_key
+
+try:
+    import ldap
+except ImportError:
+    ldap = None
+
+
+logger = logging.getLogger(__name__)
+
+
+#: The number of seconds that cached directory lookups are kept.
+LOOKUP_CACHE_EXPIRATION = 5 * 60
+
+
+class LDAPMetrics(object):
+    """Collects timing information on LDAP operations.
+
+    Timings are recorded per operation (``connect``, ``bind``, and
+    ``search``), along with counters for connection reuse and cached
+    lookups. This is thread-safe.
+    """
+
+    def __init__(self):
+        """Initialize the metrics."""
+        self._lock = threading.Lock()
+        self.reset()
+
+    def record(self, operation, duration, failed=False):
+        """Record the time taken by an operation.
+
+        Args:
+            operation (unicode):
+                The name of the operation.
+
+            duration (float):
+                The time taken, in seconds.
+
+            failed (bool, optional):
+                Whether the operation raised an exception.
+        """
+        with self._lock:
+            stats = self._operations.setdefault(operation, {
+                'count': 0,
+                'failures': 0,
+                'total_secs': 0.0,
+                'max_secs': 0.0,
+            })
+            stats['count'] += 1
+            stats['total_secs'] += duration
+            stats['max_secs'] = max(stats['max_secs'], duration)
+
+            if failed:
+                stats['failures'] += 1
+
+        logger.debug('LDAP %s took %.3f seconds%s',
+                     operation, duration, ' (failed)' if failed else '')
+
+    def increment(self, counter):
+        """Increment a counter.
+
+        Args:
+            counter (unicode):
+                The name of the counter.
+        """
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + 1
+
+    def get_stats(self):
+        """Return the collected metrics.
+
+        Returns:
+            dict:
+            A dictionary with the following keys:
+
+            ``operations`` (dict):
+                A dictionary mapping operation names to dictionaries
+                containing ``count``, ``failures``, ``total_secs``,
+                ``max_secs``, and ``avg_secs`` keys.
+
+            ``counters`` (dict):
+                A dictionary mapping counter names to their values.
+        """
+        with self._lock:
+            operations = {}
+
+            for operation, stats in six.iteritems(self._operations):
+                stats = dict(stats)
+                stats['avg_secs'] = stats['total_secs'] / stats['count']
+                operations[operation] = stats
+
+            return {
+                'operations': operations,
+                'counters': dict(self._counters),
+            }
+
+    def reset(self):
+        """Reset all collected metrics."""
+        with self._lock:
+            self._operations = {}
+            self._counters = {}
+
+
+#: The metrics for LDAP operations in this process.
+ldap_metrics = LDAPMetrics()
+
+
+class LDAPConnection(object):
+    """An LDAP connection, managed by a pool.
+
+    This wraps an :py:class:`ldap.ldapobject.LDAPObject`, recording metrics
+    for binds and searches, and tracking which DN the connection is bound
+    as. Any other attributes are passed through to the wrapped object.
+
+    Attributes:
+        ldapo (ldap.ldapobject.LDAPObject):
+            The wrapped LDAP connection.
+
+        bound_dn (unicode):
+            The DN the connection was last successfully bound as. This will
+            be an empty string for anonymous binds, and ``None`` if the
+            connection isn't bound.
+
+        is_usable (bool):
+            Whether the connection can be returned to the pool. This is
+            set to ``False`` if the connection to the server fails.
+
+        last_used (float):
+            The time the connection was last released to the pool.
+
+        last_checked (float):
+            The time the connection's health was last checked.
+    """
+
+    def __init__(self, ldapo):
+        """Initialize the connection.
+
+        Args:
+            ldapo (ldap.ldapobject.LDAPObject):
+                The LDAP connection to wrap.
+        """
+        self.ldapo = ldapo
+        self.bound_dn = None
+        self.is_usable = True
+        self.last_used = time.time()
+        self.last_checked = self.last_used
+
+    def __getattr__(self, name):
+        """Return an attribute from the wrapped connection.
+
+        Args:
+            name (unicode):
+                The name of the attribute.
+
+        Returns:
+            object:
+            The attribute's value.
+        """
+        return getattr(self.ldapo, name)
+
+    def simple_bind_s(self, who='', cred='', *args, **kwargs):
+        """Bind to the server, recording metrics.
+
+        Args:
+            who (unicode, optional):
+                The DN to bind as. An empty value binds anonymously.
+
+            cred (unicode, optional):
+                The password for the DN.
+
+            *args (tuple):
+                Additional positional arguments for the bind.
+
+            **kwargs (dict):
+                Additional keyword arguments for the bind.
+
+        Returns:
+            object:
+            The result of the bind.
+        """
+        result = self._run_bind(self.ldapo.simple_bind_s, who, cred,
+                                *args, **kwargs)
+        self.bound_dn = who or ''
+
+        return result
+
+    def bind_s(self, who, cred, *args, **kwargs):
+        """Bind to the server, recording metrics.
+
+        Args:
+            who (unicode):
+                The DN to bind as.
+
+            cred (unicode):
+                The credentials for the DN.
+
+            *args (tuple):
+                Additional positional arguments for the bind.
+
+            **kwargs (dict):
+                Additional keyword arguments for the bind.
+
+        Returns:
+            object:
+            The result of the bind.
+        """
+        result = self._run_bind(self.ldapo.bind_s, who, cred,
+                                *args, **kwargs)
+        self.bound_dn = who or ''
+
+        return result
+
+    def search_s(self, *args, **kwargs):
+        """Search the directory, recording metrics.
+
+        Args:
+            *args (tuple):
+                Positional arguments for the search.
+
+            **kwargs (dict):
+                Keyword arguments for the search.
+
+        Returns:
+            list of tuple:
+            The search results.
+        """
+        return self._run('search', self.ldapo.search_s, *args, **kwargs)
+
+    def check_health(self):
+        """Check that the server still responds on this connection.
+
+        Returns:
+            bool:
+            Whether the connection is healthy.
+        """
+        try:
+            self.ldapo.whoami_s()
+        except Exception:
+            return False
+
+        self.last_checked = time.time()
+
+        return True
+
+    def close(self):
+        """Close the connection."""
+        try:
+            self.ldapo.unbind_s()
+        except Exception:
+            pass
+
+    def _run_bind(self, func, *args, **kwargs):
+        """Run a bind operation.
+
+        The connection is considered unbound until the bind succeeds.
+
+        Args:
+            func (callable):
+                The bind function.
+
+            *args (tuple):
+                Positional arguments for the function.
+
+            **kwargs (dict):
+                Keyword arguments for the function.
+
+        Returns:
+            object:
+            The result of the bind.
+        """
+        self.bound_dn = None
+
+        return self._run('bind', func, *args, **kwargs)
+
+    def _run(self, operation, func, *args, **kwargs):
+        """Run an operation, recording metrics.
+
+        If the connection to the server fails, the connection will be marked
+        as unusable.
+
+        Args:
+            operation (unicode):
+                The name of the operation, for metrics.
+
+            func (callable):
+                The function to call.
+
+            *args (tuple):
+                Positional arguments for the function.
+
+            **kwargs (dict):
+                Keyword arguments for the function.
+
+        Returns:
+            object:
+            The result of the function.
+        """
+        start = time.time()
+
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            ldap_metrics.record(operation, time.time() - start, failed=True)
+
+            if not _is_recoverable_error(e):
+                self.is_usable = False
+
+            raise
+
+        ldap_metrics.record(operation, time.time() - start)
+
+        return result
+
+
+class LDAPConnectionPool(object):
+    """A pool of connections to an LDAP server.
+
+    Idle connections are closed once they've been unused for
+    :py:attr:`IDLE_TIMEOUT_SECS`, and connections that have been idle for
+    more than :py:attr:`HEALTH_CHECK_SECS` are checked before being reused.
+
+    Connections keep whatever bind they last had, so callers must check
+    :py:attr:`LDAPConnection.bound_dn` (or bind again) before using them.
+    """
+
+    #: The number of seconds before an idle connection is closed.
+    IDLE_TIMEOUT_SECS = 5 * 60
+
+    #: The number of idle seconds before a connection is checked for health.
+    HEALTH_CHECK_SECS = 30
+
+    #: The maximum number of idle connections to keep open.
+    MAX_IDLE_CONNECTIONS = 4
+
+    def __init__(self):
+        """Initialize the pool."""
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def acquire(self, connect):
+        """Return a connection from the pool, opening one if needed.
+
+        The connection is exclusively owned by the caller until it's passed
+        to :py:meth:`release`.
+
+        Args:
+            connect (callable):
+                A function used to open a new connection. This must return
+                a :py:class:`LDAPConnection`, or ``None`` if a connection
+                couldn't be opened.
+
+        Returns:
+            LDAPConnection:
+            The connection, or ``None`` if a new connection was needed and
+            couldn't be opened.
+        """
+        now = time.time()
+        expired = []
+        connection = None
+
+        with self._lock:
+            while self._idle:
+                candidate = self._idle.pop()
+
+                if now - candidate.last_used > self.IDLE_TIMEOUT_SECS:
+                    expired.append(candidate)
+                else:
+                    connection = candidate
+                    break
+
+            # The remaining connections were used less recently than this
+            # one, so they may also be ready to expire.
+            expired += [
+                idle
+                for idle in self._idle
+                if now - idle.last_used > self.IDLE_TIMEOUT_SECS
+            ]
+            self._idle = [
+                idle
+                for idle in self._idle
+                if idle not in expired
+            ]
+
+        for idle in expired:
+            idle.close()
+
+        if connection is not None:
+            if (now - connection.last_checked <= self.HEALTH_CHECK_SECS or
+                connection.check_health()):
+                ldap_metrics.increment('connections_reused')
+
+                return connection
+
+            connection.close()
+
+        start = time.time()
+        connection = connect()
+        ldap_metrics.record('connect', time.time() - start,
+                            failed=connection is None)
+
+        return connection
+
+    def release(self, connection):
+        """Return a connection to the pool.
+
+        Connections to servers that failed are closed instead of being
+        reused.
+
+        Args:
+            connection (LDAPConnection):
+                The connection to return.
+        """
+        if connection.is_usable:
+            connection.last_used = time.time()
+
+            with self._lock:
+                if len(self._idle) < self.MAX_IDLE_CONNECTIONS:
+                    self._idle.append(connection)
+                    return
+
+        connection.close()
+
+    def close(self):
+        """Close all idle connections in the pool."""
+        with self._lock:
+            idle = self._idle
+            self._idle = []
+
+        for connection in idle:
+            connection.close()
+
+
+_connection_pools = {}
+_connection_pools_lock = threading.Lock()
+_connection_pools_pid = None
+
+
+def get_ldap_connection_pool(key):
+    """Return the connection pool for a server configuration.
+
+    Pools inherited from a parent process are discarded, since their
+    connections can't be shared across processes.
+
+    Args:
+        key (tuple):
+            A key identifying the server and the settings used to connect
+            to it. A new pool is used whenever these change.
+
+    Returns:
+        LDAPConnectionPool:
+        The connection pool.
+    """
+    global _connection_pools, _connection_pools_pid
+
+    pid = os.getpid()
+
+    with _connection_pools_lock:
+        if _connection_pools_pid != pid:
+            _connection_pools = {}
+            _connection_pools_pid = pid
+
+        try:
+            return _connection_pools[key]
+        except KeyError:
+            pool = LDAPConnectionPool()
+            _connection_pools[key] = pool
+
+            return pool
+
+
+def close_ldap_connection_pools():
+    """Close all idle pooled LDAP connections in this process."""
+    with _connection_pools_lock:
+        pools = list(six.itervalues(_connection_pools))
+        _connection_pools.clear()
+
+    for pool in pools:
+        pool.close()
+
+
+def get_cached_lookup(key_parts, lookup_func):
+    """Return the result of a directory lookup, caching it for a short time.
+
+    Results are cached for :py:data:`LOOKUP_CACHE_EXPIRATION` seconds. A
+    result of ``None`` (used for failed lookups) is never cached.
+
+    Args:
+        key_parts (tuple):
+            The values identifying the lookup. This should include anything
+            that affects the result, such as the server and search base.
+
+        lookup_func (callable):
+            The function performing the lookup.
+
+    Returns:
+        object:
+        The result of the lookup.
+    """
+    key = _make_lookup_cache_key(key_parts)
+    result = cache.get(key)
+
+    if result is not None:
+        ldap_metrics.increment('lookup_cache_hits')
+
+        return result
+
+    ldap_metrics.increment('lookup_cache_misses')
+    result = lookup_func()
+
+    if result is not None:
+        cache.set(key, result, LOOKUP_CACHE_EXPIRATION)
+
+    return result
+
+
+def invalidate_cached_lookup(key_parts):
+    """Remove the cached result of a directory lookup.
+
+    Args:
+        key_parts (tuple):
+            The values identifying the lookup, as passed to
+            :py:func:`get_cached_lookup`.
+    """
+    cache.delete(_make_lookup_cache_key(key_parts))
+
+
+def _make_lookup_cache_key(key_parts):
+    """Return the cache key for a directory lookup.
+
+    Args:
+        key_parts (tuple):
+            The values identifying the lookup.
+
+    Returns:
+        unicode:
+        The cache key.
+    """
+    return make_cache_key('ldap-lookup-%s' % hashlib.sha256(
+        b'\0'.join(force_bytes(part) for part in key_parts)).hexdigest())
+
+
+def _is_recoverable_error(e):
+    """Return whether a connection can still be used after an error.
+
+    Args:
+        e (Exception):
+            The error raised by an LDAP operation.
+
+    Returns:
+        bool:
+        ``True`` if the error was reported by the server (such as invalid
+        credentials or a missing entry), leaving the connection usable.
+        ``False`` if the connection itself failed.
+    """
+    return (ldap is not None and
+            isinstance(e, ldap.LDAPError) and
+            not isinstance(e, (ldap.SERVER_DOWN, ldap.CONNECT_ERROR,
+                               ldap.TIMEOUT)))
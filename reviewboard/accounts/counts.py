@@ -0,0 +1,535 @@
+"""Batch computation of dashboard review request counters.
+
+The counters on :py:class:`~reviewboard.accounts.models.LocalSiteProfile`
+and :py:class:`~reviewboard.reviews.models.group.Group` are normally
+initialized lazily, one query per counter per instance, the first time an
+instance with an empty counter is loaded. That's fine for a single user, but
+when counters are cleared for a large number of users at once (through
+group membership changes or :command:`rb-site manage fixreviewcounts`),
+every one of those users will recompute their counters on their next page
+load.
+
+This module computes the counters for many users at once, using a small
+number of grouped queries per batch of users, and stores the results
+directly. It also provides a consistency checker for comparing the stored
+counters against freshly-computed values.
+"""
+
+from __future__ import unicode_literals
+
+import logging
+from collections import defaultdict, namedtuple
+
+from django.db.models import Count
+from django.utils import six
+
+from reviewboard.accounts.models import LocalSiteProfile
+from reviewboard.reviews.models import Group, ReviewRequest
+
+
+logger = logging.getLogger(__name__)
+
+
+#: The counter fields on LocalSiteProfile that can be recomputed.
+SITE_PROFILE_COUNTER_FIELDS = (
+    'direct_incoming_request_count',
+    'total_incoming_request_count',
+    'pending_outgoing_request_count',
+    'total_outgoing_request_count',
+    'starred_public_request_count',
+)
+
+#: The default number of site profiles or groups to compute at once.
+DEFAULT_BATCH_SIZE = 500
+
+
+#: A mismatch found between a stored counter and its computed value.
+#:
+#: This contains the following attributes:
+#:
+#: ``model``:
+#:     The model class owning the counter.
+#:
+#: ``pk``:
+#:     The ID of the site profile or group.
+#:
+#: ``field_name``:
+#:     The name of the counter field.
+#:
+#: ``stored``:
+#:     The value currently stored in the database.
+#:
+#: ``expected``:
+#:     The freshly-computed value.
+CounterMismatch = namedtuple('CounterMismatch',
+                             ('model', 'pk', 'field_name', 'stored',
+                              'expected'))
+
+
+def _get_review_requests(local_site_id, **kwargs):
+    """Return the review requests used as the basis for counting.
+
+    This goes through :py:meth:`ReviewRequestManager.public
+    <reviewboard.reviews.managers.ReviewRequestManager.public>`, so that the
+    batch counts always match what the per-instance counter initializers
+    would compute.
+
+    Args:
+        local_site_id (int):
+            The ID of the Local Site to count review requests on, or ``None``
+            for the global site.
+
+        **kwargs (dict):
+            Additional keyword arguments to pass to
+            :py:meth:`~reviewboard.reviews.managers.ReviewRequestManager
+            .public`.
+
+    Returns:
+        django.db.models.query.QuerySet:
+        The queryset of review requests.
+    """
+    kwargs.setdefault('filter_private', False)
+
+    return ReviewRequest.objects.public(local_site=local_site_id, **kwargs)
+
+
+def _count_grouped(queryset, key_field):
+    """Return counts of distinct review requests grouped by a key.
+
+    This performs a single ``GROUP BY`` query.
+
+    Args:
+        queryset (django.db.models.query.QuerySet):
+            The filtered queryset of review requests.
+
+        key_field (unicode):
+            The field to group by.
+
+    Returns:
+        dict:
+        A dictionary mapping each key to a count.
+    """
+    return dict(
+        queryset
+        .order_by()
+        .values_list(key_field)
+        .annotate(count=Count('pk', distinct=True))
+    )
+
+
+def _collect_pairs(queryset, key_field, result, key_map=None):
+    """Collect the review request IDs associated with each key.
+
+    This is used for counters that are the union of several relations
+    (for instance, review requests either directly assigned to or starred
+    by a user), which can't be expressed as one grouped count.
+
+    Args:
+        queryset (django.db.models.query.QuerySet):
+            The filtered queryset of review requests.
+
+        key_field (unicode):
+            The field providing the key for each review request.
+
+        result (dict):
+            A dictionary mapping keys to sets of review request IDs. This
+            will be updated in place.
+
+        key_map (dict, optional):
+            A mapping used to translate the fetched keys into result keys.
+    """
+    pairs = (
+        queryset
+        .order_by()
+        .values_list(key_field, 'pk')
+        .distinct()
+    )
+
+    for key, review_request_id in pairs:
+        if key_map is not None:
+            key = key_map[key]
+
+        result[key].add(review_request_id)
+
+
+def _compute_site_profile_counts(local_site_id, profile_rows, fields):
+    """Compute counters for a batch of site profiles on one Local Site.
+
+    Args:
+        local_site_id (int):
+            The ID of the Local Site the profiles belong to, or ``None``.
+
+        profile_rows (list of tuple):
+            A list of ``(pk, user_id, profile_id)`` tuples.
+
+        fields (list of unicode):
+            The counter fields to compute.
+
+    Returns:
+        dict:
+        A dictionary mapping site profile IDs to dictionaries of counter
+        values.
+    """
+    user_ids = [row[1] for row in profile_rows]
+    profile_ids = [row[2] for row in profile_rows]
+    profile_id_to_user_id = dict((row[2], row[1]) for row in profile_rows)
+    values_by_user = defaultdict(dict)
+
+    if ('direct_incoming_request_count' in fields or
+        'total_incoming_request_count' in fields):
+        incoming = defaultdict(set)
+
+        _collect_pairs(
+            _get_review_requests(local_site_id)
+            .filter(target_people__in=user_ids),
+            'target_people',
+            incoming)
+        _collect_pairs(
+            _get_review_requests(local_site_id)
+            .filter(starred_by__in=profile_ids),
+            'starred_by',
+            incoming,
+            key_map=profile_id_to_user_id)
+
+        if 'direct_incoming_request_count' in fields:
+            for user_id in user_ids:
+                values_by_user[user_id]['direct_incoming_request_count'] = \
+                    len(incoming.get(user_id, ()))
+
+        if 'total_incoming_request_count' in fields:
+            _collect_pairs(
+                _get_review_requests(local_site_id)
+                .filter(target_groups__users__in=user_ids),
+                'target_groups__users',
+                incoming)
+
+            for user_id in user_ids:
+                values_by_user[user_id]['total_incoming_request_count'] = \
+                    len(incoming.get(user_id, ()))
+
+    for field_name, status in (('pending_outgoing_request_count', 'P'),
+                               ('total_outgoing_request_count', None)):
+        if field_name in fields:
+            counts = _count_grouped(
+                _get_review_requests(local_site_id,
+                                     status=status,
+                                     show_all_unpublished=True)
+                .filter(submitter__in=user_ids),
+                'submitter')
+
+            for user_id in user_ids:
+                values_by_user[user_id][field_name] = counts.get(user_id, 0)
+
+    if 'starred_public_request_count' in fields:
+        # This matches Profile.starred_review_requests.public(user=None),
+        # which filters out review requests on private repositories and
+        # invite-only groups.
+        counts = _count_grouped(
+            _get_review_requests(local_site_id, filter_private=True)
+            .filter(starred_by__in=profile_ids),
+            'starred_by')
+
+        for profile_id, user_id in six.iteritems(profile_id_to_user_id):
+            values_by_user[user_id]['starred_public_request_count'] = \
+                counts.get(profile_id, 0)
+
+    return dict(
+        (pk, values_by_user[user_id])
+        for pk, user_id, profile_id in profile_rows
+    )
+
+
+def _iter_site_profile_batches(queryset, batch_size):
+    """Yield batches of site profile rows, grouped by Local Site.
+
+    Site profiles are fetched as value tuples rather than model instances,
+    so that loading them doesn't trigger the counter initializers.
+
+    Args:
+        queryset (django.db.models.query.QuerySet):
+            The queryset of site profiles.
+
+        batch_size (int):
+            The maximum number of site profiles per batch.
+
+    Yields:
+        tuple:
+        A 2-tuple of the Local Site ID and a list of
+        ``(pk, user_id, profile_id)`` tuples.
+    """
+    rows_by_site = defaultdict(list)
+
+    for pk, user_id, profile_id, local_site_id in (
+            queryset
+            .order_by()
+            .values_list('pk', 'user_id', 'profile_id', 'local_site_id')):
+        rows = rows_by_site[local_site_id]
+        rows.append((pk, user_id, profile_id))
+
+        if len(rows) >= batch_size:
+            yield local_site_id, rows
+            rows_by_site[local_site_id] = []
+
+    for local_site_id, rows in six.iteritems(rows_by_site):
+        if rows:
+            yield local_site_id, rows
+
+
+def _normalize_fields(fields):
+    """Return a validated list of site profile counter field names.
+
+    Args:
+        fields (list of unicode):
+            The requested field names, or ``None`` for all counters.
+
+    Returns:
+        list of unicode:
+        The list of counter field names.
+
+    Raises:
+        ValueError:
+            An unknown field name was provided.
+    """
+    if fields is None:
+        return list(SITE_PROFILE_COUNTER_FIELDS)
+
+    for field_name in fields:
+        if field_name not in SITE_PROFILE_COUNTER_FIELDS:
+            raise ValueError('"%s" is not a LocalSiteProfile counter field'
+                             % field_name)
+
+    return list(fields)
+
+
+def _store_counts(model, counts_by_pk):
+    """Store computed counters, batching identical updates together.
+
+    Most users share the same small set of counter values (very often all
+    zeros), so grouping the rows by their values keeps the number of
+    ``UPDATE`` statements small.
+
+    Args:
+        model (type):
+            The model owning the counters.
+
+        counts_by_pk (dict):
+            A dictionary mapping primary keys to dictionaries of counter
+            values.
+    """
+    pks_by_values = defaultdict(list)
+
+    for pk, values in six.iteritems(counts_by_pk):
+        pks_by_values[tuple(sorted(six.iteritems(values)))].append(pk)
+
+    for values, pks in six.iteritems(pks_by_values):
+        model.objects.filter(pk__in=pks).update(**dict(values))
+
+
+def recount_site_profiles(queryset=None, fields=None,
+                          batch_size=DEFAULT_BATCH_SIZE):
+    """Recompute and store review request counters for site profiles.
+
+    Args:
+        queryset (django.db.models.query.QuerySet, optional):
+            The site profiles to recompute. This defaults to all site
+            profiles.
+
+        fields (list of unicode, optional):
+            The counter fields to recompute. This defaults to all counters
+            in :py:data:`SITE_PROFILE_COUNTER_FIELDS`.
+
+        batch_size (int, optional):
+            The maximum number of site profiles to compute at once.
+
+    Returns:
+        int:
+        The number of site profiles that were updated.
+
+    Raises:
+        ValueError:
+            An unknown field name was provided.
+    """
+    if queryset is None:
+        queryset = LocalSiteProfile.objects.all()
+
+    fields = _normalize_fields(fields)
+    num_updated = 0
+
+    for local_site_id, rows in _iter_site_profile_batches(queryset,
+                                                          batch_size):
+        counts = _compute_site_profile_counts(local_site_id, rows, fields)
+        _store_counts(LocalSiteProfile, counts)
+        num_updated += len(counts)
+
+    logger.debug('Recomputed %s for %d site profile(s)',
+                 ', '.join(fields), num_updated)
+
+    return num_updated
+
+
+def recount_groups(queryset=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Recompute and store incoming review request counters for groups.
+
+    Args:
+        queryset (django.db.models.query.QuerySet, optional):
+            The review groups to recompute. This defaults to all groups.
+
+        batch_size (int, optional):
+            The maximum number of groups to compute at once.
+
+    Returns:
+        int:
+        The number of groups that were updated.
+    """
+    if queryset is None:
+        queryset = Group.objects.all()
+
+    num_updated = 0
+
+    for local_site_id, group_ids in _iter_group_batches(queryset,
+                                                        batch_size):
+        counts = _compute_group_counts(local_site_id, group_ids)
+        _store_counts(Group, counts)
+        num_updated += len(counts)
+
+    return num_updated
+
+
+def _iter_group_batches(queryset, batch_size):
+    """Yield batches of group IDs, grouped by Local Site.
+
+    Args:
+        queryset (django.db.models.query.QuerySet):
+            The queryset of groups.
+
+        batch_size (int):
+            The maximum number of groups per batch.
+
+    Yields:
+        tuple:
+        A 2-tuple of the Local Site ID and a list of group IDs.
+    """
+    ids_by_site = defaultdict(list)
+
+    for pk, local_site_id in (queryset
+                              .order_by()
+                              .values_list('pk', 'local_site_id')):
+        group_ids = ids_by_site[local_site_id]
+        group_ids.append(pk)
+
+        if len(group_ids) >= batch_size:
+            yield local_site_id, group_ids
+            ids_by_site[local_site_id] = []
+
+    for local_site_id, group_ids in six.iteritems(ids_by_site):
+        if group_ids:
+            yield local_site_id, group_ids
+
+
+def _compute_group_counts(local_site_id, group_ids):
+    """Compute the incoming counters for a batch of groups.
+
+    Args:
+        local_site_id (int):
+            The ID of the Local Site the groups belong to, or ``None``.
+
+        group_ids (list of int):
+            The IDs of the groups.
+
+    Returns:
+        dict:
+        A dictionary mapping group IDs to dictionaries of counter values.
+    """
+    counts = _count_grouped(
+        _get_review_requests(local_site_id)
+        .filter(target_groups__in=group_ids),
+        'target_groups')
+
+    return dict(
+        (group_id, {'incoming_request_count': counts.get(group_id, 0)})
+        for group_id in group_ids
+    )
+
+
+def check_counts(site_profiles=None, groups=None,
+                 batch_size=DEFAULT_BATCH_SIZE):
+    """Compare stored counters against freshly-computed values.
+
+    Counters that have not yet been initialized (stored as ``NULL``) are
+    not considered mismatches, since they'll be computed on next access.
+
+    Args:
+        site_profiles (django.db.models.query.QuerySet, optional):
+            The site profiles to check. This defaults to all site profiles.
+
+        groups (django.db.models.query.QuerySet, optional):
+            The review groups to check. This defaults to all groups.
+
+        batch_size (int, optional):
+            The maximum number of site profiles or groups to compute at once.
+
+    Returns:
+        list of CounterMismatch:
+        The counters that don't match their computed values.
+    """
+    if site_profiles is None:
+        site_profiles = LocalSiteProfile.objects.all()
+
+    if groups is None:
+        groups = Group.objects.all()
+
+    mismatches = []
+    fields = list(SITE_PROFILE_COUNTER_FIELDS)
+
+    for local_site_id, rows in _iter_site_profile_batches(site_profiles,
+                                                          batch_size):
+        expected = _compute_site_profile_counts(local_site_id, rows, fields)
+        stored = LocalSiteProfile.objects.filter(
+            pk__in=[row[0] for row in rows]).values('pk', *fields)
+
+        mismatches += _find_mismatches(LocalSiteProfile, stored, expected)
+
+    for local_site_id, group_ids in _iter_group_batches(groups, batch_size):
+        expected = _compute_group_counts(local_site_id, group_ids)
+        stored = Group.objects.filter(pk__in=group_ids).values(
+            'pk', 'incoming_request_count')
+
+        mismatches += _find_mismatches(Group, stored, expected)
+
+    return mismatches
+
+
+def _find_mismatches(model, stored_rows, expected):
+    """Return the mismatches between stored and expected counters.
+
+    Args:
+        model (type):
+            The model owning the counters.
+
+        stored_rows (django.db.models.query.ValuesQuerySet):
+            The stored counter values, as dictionaries.
+
+        expected (dict):
+            A dictionary mapping primary keys to dictionaries of computed
+            counter values.
+
+    Returns:
+        list of CounterMismatch:
+        The counters that don't match their computed values.
+    """
+    mismatches = []
+
+    for row in stored_rows:
+        pk = row['pk']
+
+        for field_name, expected_value in six.iteritems(expected[pk]):
+            stored_value = row[field_name]
+
+            if stored_value is not None and stored_value != expected_value:
+                mismatches.append(CounterMismatch(model=model,
+                                                  pk=pk,
+                                                  field_name=field_name,
+                                                  stored=stored_value,
+                                                  expected=expected_value))
+
+    return mismatches
@@ -19,6 +19,7 @@ from djblets.siteconfig.models import SiteConfiguration
 from oauth2_provider.models import AccessToken
 
 from reviewboard.accounts.backends import get_enabled_auth_backends
+from reviewboard.accounts.middleware import TimezoneMiddleware
 from reviewboard.avatars import avatar_services
 from reviewboard.oauth.features import oauth2_service_feature
 from reviewboard.oauth.models import Application
@@ -141,6 +142,8 @@ class AccountSettingsForm(AccountPageForm):
             'timezone',
         ))
 
+        TimezoneMiddleware.clear_session_timezone(self.request)
+
         messages.add_message(self.request, messages.INFO,
                              _('Your settings have been saved.'))
 
@@ -0,0 +1,250 @@
+"""Write-behind updates of users' last login times.
+
+Users' last login times are updated as they use Review Board (see
+:py:class:`~reviewboard.accounts.middleware.UpdateLastLoginMiddleware`), so
+that they reflect recent activity. Saving these in the request path means
+a burst of single-row writes whenever many users return at once (for
+instance, at the start of a work day).
+
+Instead, updates are queued in the cache and written in bulk by
+:py:func:`flush_pending_last_logins`, using a single ``UPDATE`` statement
+for each batch of users. This is called periodically during requests, and
+can also be run by the :command:`flush-last-logins` management command.
+
+Queued updates are kept in the cache for :py:data:`PENDING_EXPIRATION_SECS`,
+so any not flushed in that time will be lost.
+"""
+
+from __future__ import unicode_literals
+
+import logging
+import time
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Case, DateTimeField, F, Q, Value, When
+from django.utils import six
+from djblets.cache.backend import make_cache_key
+
+
+logger = logging.getLogger(__name__)
+
+
+#: The number of seconds between flushes triggered by requests.
+FLUSH_INTERVAL_SECS = 5 * 60
+
+#: The number of seconds that queued updates are kept in the cache.
+PENDING_EXPIRATION_SECS = 60 * 60
+
+#: The maximum number of users updated in a single statement.
+FLUSH_BATCH_SIZE = 500
+
+#: The number of seconds before an abandoned flush lock expires.
+FLUSH_LOCK_TIMEOUT_SECS = 60
+
+
+_COUNTER_KEY = 'last-login-queue-counter'
+_FLUSHED_KEY = 'last-login-queue-flushed'
+_LAST_FLUSH_KEY = 'last-login-queue-last-flush'
+_LOCK_KEY = 'last-login-queue-lock'
+
+_next_flush_check = 0
+
+
+def queue_last_login_update(user, timestamp):
+    """Queue an update to a user's last login time.
+
+    Only the first update queued for a user will be kept until the queue is
+    flushed.
+
+    Args:
+        user (django.contrib.auth.models.User):
+            The user to update.
+
+        timestamp (datetime.datetime):
+            The new last login time.
+
+    Returns:
+        bool:
+        ``True`` if the update was queued. ``False`` if an update was
+        already pending for the user.
+    """
+    if not cache.add(_make_pending_key(user.pk), timestamp,
+                     PENDING_EXPIRATION_SECS):
+        return False
+
+    counter_key = make_cache_key(_COUNTER_KEY)
+
+    try:
+        index = cache.incr(counter_key)
+    except ValueError:
+        # The counter doesn't exist yet (or was evicted).
+        cache.add(counter_key, 0, None)
+        index = cache.incr(counter_key)
+
+    cache.set(_make_queue_key(index), user.pk, PENDING_EXPIRATION_SECS)
+
+    return True
+
+
+def get_pending_last_login(user):
+    """Return the queued last login time for a user.
+
+    Args:
+        user (django.contrib.auth.models.User):
+            The user.
+
+    Returns:
+        datetime.datetime:
+        The queued last login time, or ``None`` if there's no pending update.
+    """
+    return cache.get(_make_pending_key(user.pk))
+
+
+def flush_pending_last_logins():
+    """Write all queued last login times to the database.
+
+    Users are updated in batches of :py:data:`FLUSH_BATCH_SIZE`, each with a
+    single ``UPDATE`` statement. Stored times newer than the queued times
+    (for instance, from a login since the update was queued) are left alone.
+
+    If another flush is in progress, this does nothing.
+
+    Returns:
+        int:
+        The number of queued updates that were written.
+    """
+    lock_key = make_cache_key(_LOCK_KEY)
+
+    if not cache.add(lock_key, True, FLUSH_LOCK_TIMEOUT_SECS):
+        return 0
+
+    try:
+        cache.set(make_cache_key(_LAST_FLUSH_KEY), time.time(), None)
+
+        last_index = cache.get(make_cache_key(_COUNTER_KEY)) or 0
+        flushed_index = cache.get(make_cache_key(_FLUSHED_KEY)) or 0
+
+        if flushed_index > last_index:
+            # The counter was evicted and started again.
+            flushed_index = 0
+
+        num_flushed = 0
+
+        for start in range(flushed_index + 1, last_index + 1,
+                           FLUSH_BATCH_SIZE):
+            queue_keys = [
+                _make_queue_key(index)
+                for index in range(start,
+                                   min(start + FLUSH_BATCH_SIZE,
+                                       last_index + 1))
+            ]
+            user_ids = set(cache.get_many(queue_keys).values())
+            pending_keys = dict(
+                (_make_pending_key(user_id), user_id)
+                for user_id in user_ids
+            )
+            pending = dict(
+                (pending_keys[key], timestamp)
+                for key, timestamp in cache.get_many(
+                    list(pending_keys)).items()
+            )
+
+            if pending:
+                _update_last_logins(pending)
+                num_flushed += len(pending)
+
+            cache.delete_many(queue_keys + list(pending_keys))
+
+        cache.set(make_cache_key(_FLUSHED_KEY), last_index, None)
+
+        if num_flushed:
+            logger.debug('Flushed %d queued last login time(s)', num_flushed)
+
+        return num_flushed
+    finally:
+        cache.delete(lock_key)
+
+
+def flush_pending_last_logins_if_needed():
+    """Flush queued last login times if it's been a while since the last flush.
+
+    This is cheap enough to call on every request. The cache is only checked
+    at most once every few seconds per process.
+
+    Returns:
+        int:
+        The number of queued updates that were written.
+    """
+    global _next_flush_check
+
+    now = time.time()
+
+    if now < _next_flush_check:
+        return 0
+
+    _next_flush_check = now + min(FLUSH_INTERVAL_SECS, 10)
+    last_flush = cache.get(make_cache_key(_LAST_FLUSH_KEY))
+
+    if last_flush is None:
+        # Nothing has been flushed since the cache was cleared. Start the
+        # interval now, rather than flushing immediately.
+        cache.add(make_cache_key(_LAST_FLUSH_KEY), now, None)
+        return 0
+
+    if now - last_flush < FLUSH_INTERVAL_SECS:
+        return 0
+
+    try:
+        return flush_pending_last_logins()
+    except Exception as e:
+        logger.exception('Unable to flush queued last login times: %s', e)
+        return 0
+
+
+def _update_last_logins(pending):
+    """Update the last login times for users in a single statement.
+
+    Args:
+        pending (dict):
+            A dictionary mapping user IDs to new last login times.
+    """
+    whens = [
+        When(Q(pk=user_id) & (Q(last_login__isnull=True) |
+                              Q(last_login__lt=timestamp)),
+             then=Value(timestamp))
+        for user_id, timestamp in six.iteritems(pending)
+    ]
+
+    User.objects.filter(pk__in=list(pending)).update(
+        last_login=Case(*whens,
+                        default=F('last_login'),
+                        output_field=DateTimeField()))
+
+
+def _make_pending_key(user_id):
+    """Return the cache key for a user's queued last login time.
+
+    Args:
+        user_id (int):
+            The ID of the user.
+
+    Returns:
+        unicode:
+        The cache key.
+    """
+    return make_cache_key('last-login-pending-%s' % user_id)
+
+
+def _make_queue_key(index):
+    """Return the cache key for an entry in the queue of updated users.
+
+    Args:
+        index (int):
+            The index of the entry.
+
+    Returns:
+        unicode:
+        The cache key.
+    """
+    return make_cache_key('last-login-queue-%d' % index)
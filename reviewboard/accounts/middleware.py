@@ -9,21 +9,78 @@ from django.utils import timezone
 from djblets.siteconfig.models import SiteConfiguration
 
 from reviewboard.accounts.backends import X509Backend
-from reviewboard.accounts.models import Profile
+from reviewboard.accounts.last_login import (
+    flush_pending_last_logins_if_needed,
+    queue_last_login_update)
+from reviewboard.admin.request_timing import timed_middleware
 
 
 class TimezoneMiddleware(object):
-    """Middleware that activates the user's local timezone."""
+    """Middleware that activates the user's local timezone.
 
+    The timezone is stored in the user's session after it's first loaded from
+    their profile, so that the profile doesn't need to be fetched on every
+    request.
+    """
+
+    #: The session key storing the user ID and their timezone.
+    SESSION_KEY = 'rb_timezone'
+
+    @timed_middleware('timezone')
     def process_request(self, request):
         """Activate the user's selected timezone for this request."""
         if request.user.is_authenticated():
             try:
-                user = request.user.get_profile()
-                timezone.activate(pytz.timezone(user.timezone))
+                timezone.activate(pytz.timezone(
+                    self.get_user_timezone(request)))
             except pytz.UnknownTimeZoneError:
                 pass
 
+    def get_user_timezone(self, request):
+        """Return the name of the timezone for the user making a request.
+
+        Args:
+            request (django.http.HttpRequest):
+                The HTTP request from the client.
+
+        Returns:
+            unicode:
+            The name of the user's timezone.
+        """
+        user = request.user
+        session = getattr(request, 'session', None)
+
+        if session is not None:
+            stored = session.get(self.SESSION_KEY)
+
+            if stored and stored[0] == user.pk:
+                return stored[1]
+
+        tz_name = user.get_profile().timezone
+
+        # Only store this in established sessions. Clients that don't send
+        # cookies back would otherwise create a new session on every request.
+        if session is not None and session.session_key:
+            session[self.SESSION_KEY] = [user.pk, tz_name]
+
+        return tz_name
+
+    @classmethod
+    def clear_session_timezone(cls, request):
+        """Clear the timezone stored in the session.
+
+        This must be called when the user's timezone changes, so that the
+        new timezone is loaded on the next request.
+
+        Args:
+            request (django.http.HttpRequest):
+                The HTTP request from the client.
+        """
+        session = getattr(request, 'session', None)
+
+        if session is not None:
+            session.pop(cls.SESSION_KEY, None)
+
 
 class UpdateLastLoginMiddleware(object):
     """Middleware that updates a user's last login time more frequently.
@@ -32,11 +89,16 @@ class UpdateLastLoginMiddleware(object):
     minutes since they last made a request. This helps turn the login time into
     a recent activity time, providing a better sense of how often people are
     actively using Review Board.
+
+    Updates are queued and written to the database in bulk (see
+    :py:mod:`reviewboard.accounts.last_login`), rather than saved during the
+    request.
     """
 
     #: The smallest period of time between login time updates.
     UPDATE_PERIOD_SECS = 30 * 60  # 30 minutes
 
+    @timed_middleware('last-login')
     def process_request(self, request):
         """Process the request and update the login time.
 
@@ -48,11 +110,15 @@ class UpdateLastLoginMiddleware(object):
 
         if user.is_authenticated():
             now = timezone.now()
-            delta = now - request.user.last_login
+            last_login = user.last_login
 
-            if delta.total_seconds() >= self.UPDATE_PERIOD_SECS:
+            if (last_login is None or
+                (now - last_login).total_seconds() >=
+                self.UPDATE_PERIOD_SECS):
                 user.last_login = now
-                user.save(update_fields=('last_login',))
+                queue_last_login_update(user, now)
+
+            flush_pending_last_logins_if_needed()
 
 
 class X509AuthMiddleware(object):
@@ -69,6 +135,7 @@ class X509AuthMiddleware(object):
     username and password.
     """
 
+    @timed_middleware('x509-auth')
     def process_request(self, request):
         """Log in users by their certificate if using X.509 authentication.
 
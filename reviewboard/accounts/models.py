@@ -723,18 +723,24 @@ def _on_group_user_membership_changed(instance, action, pk_set, reverse,
 
     When a user is added to or removed from a review group, their
     :py:attr:`~LocalSiteProfile.total_incoming_request_count` counter will
-    be cleared, forcing it to be recomputed on next access. This ensures that
-    their incoming count will be correct when group memberships change.
+    be recomputed. This ensures that their incoming count will be correct
+    when group memberships change.
+
+    Counters for all affected users are computed together in a batch (see
+    :py:mod:`reviewboard.accounts.counts`), rather than being cleared and
+    then recomputed one user at a time on next access.
 
     Args:
         instance (django.db.models.Model):
             The instance that was updated. If ``reverse`` is ``True``, then
             this will be a :py:class:`~django.contrib.auth.models.User`.
-            Otherwise, it will be ignored.
+            Otherwise, it will be a :py:class:`~reviewboard.reviews.models.
+            group.Group`.
 
         action (unicode):
-            The membership change action. The incoming count is only cleared
-            if this ``post_add``, ``post_remove``, or ``pre_clear``.
+            The membership change action. The incoming count is only
+            recomputed if this is ``post_add``, ``post_remove``, or
+            ``post_clear``.
 
         pk_set (set of int):
             The user IDs added to the group. If ``reverse`` is ``True``,
@@ -749,16 +755,30 @@ def _on_group_user_membership_changed(instance, action, pk_set, reverse,
         **kwargs (dict):
             Additional keyword arguments passed to the signal.
     """
-    if action in ('post_add', 'post_remove', 'pre_clear'):
+    from reviewboard.accounts.counts import recount_site_profiles
+
+    if action == 'pre_clear':
+        if not reverse and instance is not None:
+            # The membership is about to be cleared, and the post_clear
+            # signal won't tell us who was removed, so remember it now.
+            instance._rb_cleared_user_ids = list(
+                instance.users.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove', 'post_clear'):
         q = None
 
         if reverse:
             if instance is not None:
                 q = Q(user=instance)
-        else:
-            if pk_set:
-                q = Q(user__in=pk_set)
+        elif action == 'post_clear':
+            user_ids = getattr(instance, '_rb_cleared_user_ids', None)
+
+            if user_ids:
+                q = Q(user__in=user_ids)
+                del instance._rb_cleared_user_ids
+        elif pk_set:
+            q = Q(user__in=pk_set)
 
         if q is not None:
-            LocalSiteProfile.objects.filter(q).update(
-                total_incoming_request_count=None)
+            recount_site_profiles(
+                LocalSiteProfile.objects.filter(q),
+                fields=['total_incoming_request_count'])
@@ -2,13 +2,20 @@
 
 from __future__ import unicode_literals
 
+import nose
 from django.contrib.auth.models import User
+from kgb import SpyAgency
+
+try:
+    import ldap
+except ImportError:
+    ldap = None
 
 from reviewboard.accounts.backends import ActiveDirectoryBackend
 from reviewboard.testing import TestCase
 
 
-class ActiveDirectoryBackendTests(TestCase):
+class ActiveDirectoryBackendTests(SpyAgency, TestCase):
     """Unit tests for ActiveDirectoryBackend."""
 
     def test_get_or_create_user_without_ad_user_data_and_with_user(self):
@@ -28,3 +35,39 @@ class ActiveDirectoryBackendTests(TestCase):
         backend = ActiveDirectoryBackend()
 
         self.assertIsNone(backend.get_or_create_user('test', None))
+
+    def test_get_member_of_caches_group_lookups(self):
+        """Testing ActiveDirectoryBackend.get_member_of caches group lookups
+        """
+        if ldap is None:
+            raise nose.SkipTest()
+
+        def _search_ad(backend, con, filterstr, userdomain=None):
+            searches.append(filterstr)
+
+            if 'cn=devs' in filterstr:
+                return [(
+                    'CN=devs,DC=example,DC=com',
+                    {'memberOf': [b'CN=staff,DC=example,DC=com']},
+                )]
+
+            return []
+
+        searches = []
+        backend = ActiveDirectoryBackend()
+        self.spy_on(backend.search_ad, call_fake=_search_ad)
+
+        user_data = [(
+            'CN=doc,DC=example,DC=com',
+            {'memberOf': [b'CN=devs,DC=example,DC=com']},
+        )]
+
+        with self.settings(AD_DOMAIN_NAME='example.com',
+                           AD_SEARCH_ROOT='DC=example,DC=com',
+                           AD_RECURSION_DEPTH=-1):
+            self.assertEqual(backend.get_member_of(None, user_data),
+                             {b'devs', b'staff'})
+            self.assertEqual(backend.get_member_of(None, user_data),
+                             {b'devs', b'staff'})
+
+        self.assertEqual(len(searches), 2)
@@ -0,0 +1,201 @@
+"""Unit tests for reviewboard.accounts.counts."""
+
+from __future__ import unicode_literals
+
+from django.contrib.auth.models import User
+
+from reviewboard.accounts.counts import (check_counts, recount_groups,
+                                         recount_site_profiles)
+from reviewboard.accounts.models import LocalSiteProfile
+from reviewboard.reviews.models import Group, ReviewRequest
+from reviewboard.testing import TestCase
+
+
+class RecountTests(TestCase):
+    """Unit tests for batch counter computation."""
+
+    fixtures = ['test_users', 'test_scmtools']
+
+    def setUp(self):
+        super(RecountTests, self).setUp()
+
+        self.submitter = User.objects.get(username='doc')
+        self.reviewer = User.objects.get(username='grumpy')
+        self.group_member = User.objects.get(username='dopey')
+
+        self.group = self.create_review_group(name='group1')
+        self.group.users.add(self.group_member)
+
+        self.review_request = self.create_review_request(
+            submitter=self.submitter,
+            target_people=[self.reviewer],
+            target_groups=[self.group],
+            publish=True)
+        self.create_review_request(submitter=self.submitter,
+                                   publish=True).close(
+            ReviewRequest.SUBMITTED)
+
+        self.reviewer.get_profile().star_review_request(self.review_request)
+
+        for user in (self.submitter, self.reviewer, self.group_member):
+            user.get_site_profile(None)
+
+        self._clear_counts()
+
+    def test_recount_site_profiles(self):
+        """Testing recount_site_profiles"""
+        self.assertEqual(recount_site_profiles(),
+                         LocalSiteProfile.objects.count())
+
+        submitter_profile = self._get_site_profile(self.submitter)
+        self.assertEqual(submitter_profile.pending_outgoing_request_count, 1)
+        self.assertEqual(submitter_profile.total_outgoing_request_count, 2)
+        self.assertEqual(submitter_profile.direct_incoming_request_count, 0)
+        self.assertEqual(submitter_profile.total_incoming_request_count, 0)
+        self.assertEqual(submitter_profile.starred_public_request_count, 0)
+
+        reviewer_profile = self._get_site_profile(self.reviewer)
+        self.assertEqual(reviewer_profile.pending_outgoing_request_count, 0)
+        self.assertEqual(reviewer_profile.direct_incoming_request_count, 1)
+        self.assertEqual(reviewer_profile.total_incoming_request_count, 1)
+        self.assertEqual(reviewer_profile.starred_public_request_count, 1)
+
+        member_profile = self._get_site_profile(self.group_member)
+        self.assertEqual(member_profile.direct_incoming_request_count, 0)
+        self.assertEqual(member_profile.total_incoming_request_count, 1)
+
+    def test_recount_site_profiles_with_fields(self):
+        """Testing recount_site_profiles with fields="""
+        recount_site_profiles(fields=['total_outgoing_request_count'])
+
+        values = LocalSiteProfile.objects.filter(user=self.submitter).values(
+            'total_outgoing_request_count', 'pending_outgoing_request_count')
+
+        self.assertEqual(
+            list(values),
+            [{
+                'total_outgoing_request_count': 2,
+                'pending_outgoing_request_count': None,
+            }])
+
+    def test_recount_site_profiles_with_invalid_field(self):
+        """Testing recount_site_profiles with an invalid field name"""
+        with self.assertRaises(ValueError):
+            recount_site_profiles(fields=['extra_data'])
+
+    def test_recount_site_profiles_matches_initializers(self):
+        """Testing recount_site_profiles computes the same values as the
+        CounterField initializers
+        """
+        fields = (
+            'direct_incoming_request_count',
+            'total_incoming_request_count',
+            'pending_outgoing_request_count',
+            'total_outgoing_request_count',
+            'starred_public_request_count',
+        )
+
+        # Loading the profiles will run the initializers.
+        expected = dict(
+            (site_profile.pk,
+             dict((field, getattr(site_profile, field)) for field in fields))
+            for site_profile in LocalSiteProfile.objects.all()
+        )
+
+        self._clear_counts()
+        recount_site_profiles(batch_size=1)
+
+        self.assertEqual(
+            dict(
+                (row.pop('pk'), row)
+                for row in LocalSiteProfile.objects.values('pk', *fields)
+            ),
+            expected)
+
+    def test_recount_groups(self):
+        """Testing recount_groups"""
+        self.create_review_group(name='group2')
+
+        self.assertEqual(recount_groups(), 2)
+        self.assertEqual(
+            dict(Group.objects.values_list('name', 'incoming_request_count')),
+            {
+                'group1': 1,
+                'group2': 0,
+            })
+
+    def test_check_counts(self):
+        """Testing check_counts"""
+        recount_site_profiles()
+        recount_groups()
+
+        self.assertEqual(check_counts(), [])
+
+        site_profile = self._get_site_profile(self.reviewer)
+        LocalSiteProfile.objects.filter(pk=site_profile.pk).update(
+            direct_incoming_request_count=5)
+
+        mismatches = check_counts()
+        self.assertEqual(len(mismatches), 1)
+
+        mismatch = mismatches[0]
+        self.assertIs(mismatch.model, LocalSiteProfile)
+        self.assertEqual(mismatch.pk, site_profile.pk)
+        self.assertEqual(mismatch.field_name, 'direct_incoming_request_count')
+        self.assertEqual(mismatch.stored, 5)
+        self.assertEqual(mismatch.expected, 1)
+
+    def test_check_counts_with_uninitialized(self):
+        """Testing check_counts ignores uninitialized counters"""
+        self.assertEqual(check_counts(), [])
+
+    def test_group_membership_add(self):
+        """Testing total_incoming_request_count is recomputed when adding
+        users to a group
+        """
+        self.group.users.add(self.submitter, self.reviewer)
+
+        self.assertEqual(
+            self._get_site_profile(self.submitter)
+            .total_incoming_request_count,
+            1)
+        self.assertEqual(
+            self._get_site_profile(self.reviewer)
+            .total_incoming_request_count,
+            1)
+
+    def test_group_membership_clear(self):
+        """Testing total_incoming_request_count is recomputed when clearing
+        group membership
+        """
+        recount_site_profiles()
+
+        self.group.users.clear()
+
+        self.assertEqual(
+            self._get_site_profile(self.group_member)
+            .total_incoming_request_count,
+            0)
+
+    def _clear_counts(self):
+        """Clear all stored counters."""
+        LocalSiteProfile.objects.update(
+            direct_incoming_request_count=None,
+            total_incoming_request_count=None,
+            pending_outgoing_request_count=None,
+            total_outgoing_request_count=None,
+            starred_public_request_count=None)
+        Group.objects.update(incoming_request_count=None)
+
+    def _get_site_profile(self, user):
+        """Return the stored site profile for a user.
+
+        Args:
+            user (django.contrib.auth.models.User):
+                The user owning the profile.
+
+        Returns:
+            reviewboard.accounts.models.LocalSiteProfile:
+            The site profile.
+        """
+        return LocalSiteProfile.objects.get(user=user, local_site=None)
@@ -14,6 +14,9 @@ except ImportError:
     ldap = None
 
 from reviewboard.accounts.backends import LDAPBackend
+from reviewboard.accounts.backends.ldap_pool import (
+    close_ldap_connection_pools,
+    ldap_metrics)
 from reviewboard.testing import TestCase
 
 
@@ -57,9 +60,19 @@ class LDAPAuthBackendTests(SpyAgency, TestCase):
         settings.LDAP_UID = 'uid'
         settings.LDAP_UID_MASK = None
         settings.LDAP_FULL_NAME_ATTRIBUTE = None
+        settings.LDAP_ANON_BIND_UID = None
+        settings.LDAP_ANON_BIND_PASSWD = None
+
+        # Connections from previous tests must not be reused.
+        close_ldap_connection_pools()
 
         self.backend = LDAPBackend()
 
+    def tearDown(self):
+        super(LDAPAuthBackendTests, self).tearDown()
+
+        close_ldap_connection_pools()
+
     @add_fixtures(['test_users'])
     def test_authenticate_with_valid_credentials(self):
         """Testing LDAPBackend.authenticate with valid credentials"""
@@ -282,6 +295,78 @@ class LDAPAuthBackendTests(SpyAgency, TestCase):
         self.assertEqual(user.first_name, 'Bob')
         self.assertEqual(user.last_name, '')
 
+    @add_fixtures(['test_users'])
+    def test_authenticate_reuses_connection(self):
+        """Testing LDAPBackend.authenticate reuses pooled connections and
+        rebinds them as the service account
+        """
+        class TestLDAPObject(BaseTestLDAPObject):
+            def simple_bind_s(ldapo, *args, **kwargs):
+                binds.append(('service',) + args)
+
+            def bind_s(ldapo, username, password):
+                binds.append(('user', username))
+
+            def search_s(ldapo, base, scope,
+                         filter_str=self.DEFAULT_FILTER_STR,
+                         *args, **kwargs):
+                searches.append(filter_str)
+
+                return [['CN=Doc Dwarf,OU=MyOrg,DC=example,DC=COM']]
+
+        binds = []
+        searches = []
+        settings.LDAP_ANON_BIND_UID = 'CN=service,DC=example,DC=com'
+        settings.LDAP_ANON_BIND_PASSWD = 'service-pass'
+
+        self._patch_ldap(TestLDAPObject)
+
+        self.assertIsNotNone(
+            self.backend.authenticate(username='doc', password='mypass'))
+        self.assertIsNotNone(
+            self.backend.authenticate(username='doc', password='mypass'))
+
+        self.assertEqual(len(ldap.initialize.calls), 1)
+        self.assertEqual(binds, [
+            ('service', 'CN=service,DC=example,DC=com', 'service-pass'),
+            ('user', 'CN=Doc Dwarf,OU=MyOrg,DC=example,DC=COM'),
+            ('service', 'CN=service,DC=example,DC=com', 'service-pass'),
+            ('user', 'CN=Doc Dwarf,OU=MyOrg,DC=example,DC=COM'),
+        ])
+
+        # The user's DN was only looked up once.
+        self.assertEqual(searches, ['(uid=doc)'])
+
+        stats = ldap_metrics.get_stats()
+        self.assertGreaterEqual(stats['operations']['bind']['count'], 4)
+        self.assertGreaterEqual(stats['counters']['connections_reused'], 1)
+
+    def test_authenticate_with_invalid_credentials_clears_dn(self):
+        """Testing LDAPBackend.authenticate with invalid credentials clears
+        the cached user DN
+        """
+        class TestLDAPObject(BaseTestLDAPObject):
+            def bind_s(ldapo, username, password):
+                raise ldap.INVALID_CREDENTIALS()
+
+            def search_s(ldapo, base, scope,
+                         filter_str=self.DEFAULT_FILTER_STR,
+                         *args, **kwargs):
+                searches.append(filter_str)
+
+                return [['CN=Doc Dwarf,OU=MyOrg,DC=example,DC=COM']]
+
+        searches = []
+
+        self._patch_ldap(TestLDAPObject)
+
+        self.assertIsNone(
+            self.backend.authenticate(username='doc', password='badpass'))
+        self.assertIsNone(
+            self.backend.authenticate(username='doc', password='badpass'))
+
+        self.assertEqual(searches, ['(uid=doc)', '(uid=doc)'])
+
     def _patch_ldap(self, cls):
         self.spy_on(ldap.initialize,
                     call_fake=lambda uri, *args, **kwargs: cls(uri))
@@ -0,0 +1,204 @@
+"""Unit tests for reviewboard.accounts.backends.ldap_pool."""
+
+from __future__ import unicode_literals
+
+import nose
+
+try:
+    import ldap
+except ImportError:
+    ldap = None
+
+from reviewboard.accounts.backends.ldap_pool import (LDAPConnection,
+                                                     LDAPConnectionPool,
+                                                     LDAPMetrics,
+                                                     get_cached_lookup,
+                                                     invalidate_cached_lookup)
+from reviewboard.testing import TestCase
+
+
+class StandInLDAPObject(object):
+    """A stand-in for an LDAP connection, recording the operations made."""
+
+    def __init__(self):
+        self.operations = []
+        self.is_down = False
+
+    def simple_bind_s(self, who='', cred=''):
+        self._run('simple_bind_s', who)
+
+    def search_s(self, base, scope, filterstr='(objectClass=*)'):
+        self._run('search_s', base)
+
+        return [(base, {})]
+
+    def whoami_s(self):
+        self._run('whoami_s')
+
+        return ''
+
+    def unbind_s(self):
+        self.operations.append(('unbind_s',))
+
+    def _run(self, name, *args):
+        self.operations.append((name,) + args)
+
+        if self.is_down:
+            raise ldap.SERVER_DOWN()
+
+
+class LDAPConnectionPoolTests(TestCase):
+    """Unit tests for LDAPConnectionPool."""
+
+    def setUp(self):
+        super(LDAPConnectionPoolTests, self).setUp()
+
+        if ldap is None:
+            raise nose.SkipTest()
+
+        self.pool = LDAPConnectionPool()
+
+    def test_acquire_reuses_connection(self):
+        """Testing LDAPConnectionPool.acquire reuses released connections"""
+        connection = self.pool.acquire(self._connect)
+        self.pool.release(connection)
+
+        self.assertIs(self.pool.acquire(self._connect), connection)
+
+    def test_acquire_with_idle_timeout(self):
+        """Testing LDAPConnectionPool.acquire closes expired idle connections
+        """
+        connection = self.pool.acquire(self._connect)
+        self.pool.release(connection)
+
+        connection.last_used -= LDAPConnectionPool.IDLE_TIMEOUT_SECS + 1
+
+        self.assertIsNot(self.pool.acquire(self._connect), connection)
+        self.assertEqual(connection.ldapo.operations[-1], ('unbind_s',))
+
+    def test_acquire_with_health_check(self):
+        """Testing LDAPConnectionPool.acquire checks the health of connections
+        idle for a while
+        """
+        connection = self.pool.acquire(self._connect)
+        self.pool.release(connection)
+
+        connection.last_checked -= LDAPConnectionPool.HEALTH_CHECK_SECS + 1
+        connection.ldapo.is_down = True
+
+        self.assertIsNot(self.pool.acquire(self._connect), connection)
+        self.assertEqual(connection.ldapo.operations,
+                         [('whoami_s',), ('unbind_s',)])
+
+    def test_acquire_with_failed_connect(self):
+        """Testing LDAPConnectionPool.acquire when a connection can't be
+        opened
+        """
+        self.assertIsNone(self.pool.acquire(lambda: None))
+
+    def test_release_with_server_down(self):
+        """Testing LDAPConnectionPool.release closes connections to servers
+        that went down
+        """
+        connection = self.pool.acquire(self._connect)
+        connection.ldapo.is_down = True
+
+        with self.assertRaises(ldap.SERVER_DOWN):
+            connection.search_s('dc=example,dc=com', ldap.SCOPE_BASE)
+
+        self.assertFalse(connection.is_usable)
+        self.pool.release(connection)
+
+        self.assertIsNot(self.pool.acquire(self._connect), connection)
+
+    def test_bound_dn(self):
+        """Testing LDAPConnection.bound_dn tracks binds"""
+        connection = self.pool.acquire(self._connect)
+        self.assertIsNone(connection.bound_dn)
+
+        connection.simple_bind_s('cn=service,dc=example,dc=com', 'pass')
+        self.assertEqual(connection.bound_dn, 'cn=service,dc=example,dc=com')
+
+        connection.simple_bind_s()
+        self.assertEqual(connection.bound_dn, '')
+
+        connection.ldapo.is_down = True
+
+        with self.assertRaises(ldap.SERVER_DOWN):
+            connection.simple_bind_s('cn=user,dc=example,dc=com', 'pass')
+
+        self.assertIsNone(connection.bound_dn)
+
+    def _connect(self):
+        """Return a new connection to a stand-in LDAP server.
+
+        Returns:
+            reviewboard.accounts.backends.ldap_pool.LDAPConnection:
+            The new connection.
+        """
+        return LDAPConnection(StandInLDAPObject())
+
+
+class LDAPLookupCacheTests(TestCase):
+    """Unit tests for get_cached_lookup and invalidate_cached_lookup."""
+
+    def test_get_cached_lookup(self):
+        """Testing get_cached_lookup caches results"""
+        results = ['uid=doc', 'uid=grumpy']
+
+        self.assertEqual(get_cached_lookup(('dn', 'doc'), results.pop),
+                         'uid=grumpy')
+        self.assertEqual(get_cached_lookup(('dn', 'doc'), results.pop),
+                         'uid=grumpy')
+        self.assertEqual(results, ['uid=doc'])
+
+    def test_get_cached_lookup_with_none(self):
+        """Testing get_cached_lookup doesn't cache failed lookups"""
+        results = ['uid=doc', None]
+
+        self.assertIsNone(get_cached_lookup(('dn', 'doc'), results.pop))
+        self.assertEqual(get_cached_lookup(('dn', 'doc'), results.pop),
+                         'uid=doc')
+
+    def test_invalidate_cached_lookup(self):
+        """Testing invalidate_cached_lookup"""
+        results = ['uid=doc', 'uid=grumpy']
+
+        get_cached_lookup(('dn', 'doc'), results.pop)
+        invalidate_cached_lookup(('dn', 'doc'))
+
+        self.assertEqual(get_cached_lookup(('dn', 'doc'), results.pop),
+                         'uid=doc')
+
+
+class LDAPMetricsTests(TestCase):
+    """Unit tests for LDAPMetrics."""
+
+    def test_get_stats(self):
+        """Testing LDAPMetrics.get_stats"""
+        metrics = LDAPMetrics()
+        metrics.record('bind', 0.5)
+        metrics.record('bind', 1.5, failed=True)
+        metrics.increment('connections_reused')
+
+        self.assertEqual(metrics.get_stats(), {
+            'operations': {
+                'bind': {
+                    'count': 2,
+                    'failures': 1,
+                    'total_secs': 2.0,
+                    'max_secs': 1.5,
+                    'avg_secs': 1.0,
+                },
+            },
+            'counters': {
+                'connections_reused': 1,
+            },
+        })
+
+        metrics.reset()
+
+        self.assertEqual(metrics.get_stats(), {
+            'operations': {},
+            'counters': {},
+        })
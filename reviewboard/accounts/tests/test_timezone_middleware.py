@@ -0,0 +1,97 @@
+"""Unit tests for reviewboard.accounts.middleware.TimezoneMiddleware."""
+
+from __future__ import unicode_literals
+
+from django.contrib.auth.models import User
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.test.client import RequestFactory
+from django.utils import timezone
+from kgb import SpyAgency
+
+from reviewboard.accounts.middleware import TimezoneMiddleware
+from reviewboard.testing import TestCase
+
+
+class TimezoneMiddlewareTests(SpyAgency, TestCase):
+    """Unit tests for TimezoneMiddleware."""
+
+    fixtures = ['test_users']
+
+    def setUp(self):
+        super(TimezoneMiddlewareTests, self).setUp()
+
+        self.middleware = TimezoneMiddleware()
+        self.user = User.objects.get(username='doc')
+
+        profile = self.user.get_profile()
+        profile.timezone = 'US/Pacific'
+        profile.save(update_fields=('timezone',))
+
+        self.request = RequestFactory().get('/')
+        self.request.user = self.user
+        SessionMiddleware().process_request(self.request)
+        self.request.session.save()
+
+    def tearDown(self):
+        timezone.deactivate()
+
+        super(TimezoneMiddlewareTests, self).tearDown()
+
+    def test_process_request(self):
+        """Testing TimezoneMiddleware.process_request activates the user's
+        timezone
+        """
+        self.middleware.process_request(self.request)
+
+        self.assertEqual(timezone.get_current_timezone_name(), 'US/Pacific')
+        self.assertEqual(
+            self.request.session[TimezoneMiddleware.SESSION_KEY],
+            [self.user.pk, 'US/Pacific'])
+
+    def test_process_request_with_session(self):
+        """Testing TimezoneMiddleware.process_request uses the timezone
+        stored in the session
+        """
+        self.middleware.process_request(self.request)
+
+        self.user = User.objects.get(pk=self.user.pk)
+        self.request.user = self.user
+        self.spy_on(self.user.get_profile)
+
+        self.middleware.process_request(self.request)
+
+        self.assertFalse(self.user.get_profile.called)
+        self.assertEqual(timezone.get_current_timezone_name(), 'US/Pacific')
+
+    def test_process_request_with_other_user_in_session(self):
+        """Testing TimezoneMiddleware.process_request ignores a timezone
+        stored in the session for another user
+        """
+        self.request.session[TimezoneMiddleware.SESSION_KEY] = [
+            self.user.pk + 1000,
+            'Europe/London',
+        ]
+
+        self.middleware.process_request(self.request)
+
+        self.assertEqual(timezone.get_current_timezone_name(), 'US/Pacific')
+
+    def test_process_request_without_session_key(self):
+        """Testing TimezoneMiddleware.process_request doesn't store the
+        timezone in new sessions
+        """
+        request = RequestFactory().get('/')
+        request.user = self.user
+        SessionMiddleware().process_request(request)
+
+        self.middleware.process_request(request)
+
+        self.assertEqual(timezone.get_current_timezone_name(), 'US/Pacific')
+        self.assertNotIn(TimezoneMiddleware.SESSION_KEY, request.session)
+
+    def test_clear_session_timezone(self):
+        """Testing TimezoneMiddleware.clear_session_timezone"""
+        self.middleware.process_request(self.request)
+        TimezoneMiddleware.clear_session_timezone(self.request)
+
+        self.assertNotIn(TimezoneMiddleware.SESSION_KEY, self.request.session)
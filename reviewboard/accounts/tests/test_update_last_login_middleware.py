@@ -9,6 +9,8 @@ from django.test.client import RequestFactory
 from django.utils import timezone
 from kgb import SpyAgency
 
+from reviewboard.accounts.last_login import (flush_pending_last_logins,
+                                             get_pending_last_login)
 from reviewboard.accounts.middleware import UpdateLastLoginMiddleware
 from reviewboard.testing import TestCase
 
@@ -42,10 +44,17 @@ class UpdateLastLoginMiddlewareTests(SpyAgency, TestCase):
         self.middleware.process_request(self.request)
 
         self.assertEqual(self.user.last_login, self.now)
+        self.assertEqual(get_pending_last_login(self.user), self.now)
+
+        # Make sure this is only saved once flushed.
+        user = User.objects.get(pk=self.user.pk)
+        self.assertIsNone(user.last_login)
+
+        self.assertEqual(flush_pending_last_logins(), 1)
 
-        # Make sure this has saved.
         user = User.objects.get(pk=self.user.pk)
         self.assertEqual(user.last_login, self.now)
+        self.assertIsNone(get_pending_last_login(self.user))
 
     def test_process_request_with_lt_30_mins(self):
         """Testing UpdateLastLoginMiddleware.process_request with last login
@@ -56,3 +65,34 @@ class UpdateLastLoginMiddlewareTests(SpyAgency, TestCase):
         self.middleware.process_request(self.request)
 
         self.assertEqual(self.user.last_login, cur_last_login)
+        self.assertIsNone(get_pending_last_login(self.user))
+
+    def test_process_request_with_pending_update(self):
+        """Testing UpdateLastLoginMiddleware.process_request with an update
+        already queued
+        """
+        self.user.last_login = self.now - timedelta(seconds=31 * 60)
+        self.middleware.process_request(self.request)
+
+        # The stored last login time hasn't been updated yet.
+        user = User.objects.get(pk=self.user.pk)
+        self.request.user = user
+        self.middleware.process_request(self.request)
+
+        self.assertEqual(get_pending_last_login(user), self.now)
+        self.assertEqual(flush_pending_last_logins(), 1)
+
+    def test_flush_with_newer_last_login(self):
+        """Testing flush_pending_last_logins doesn't overwrite newer last
+        login times
+        """
+        self.user.last_login = self.now - timedelta(seconds=31 * 60)
+        self.middleware.process_request(self.request)
+
+        later = self.now + timedelta(seconds=60)
+        User.objects.filter(pk=self.user.pk).update(last_login=later)
+
+        self.assertEqual(flush_pending_last_logins(), 1)
+
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(user.last_login, later)
@@ -0,0 +1,343 @@
+"""Daily activity rollups for the administration dashboard.
+
+The activity graph widget shows daily counts of created comments, reviews,
+change descriptions, and review requests. Computing these requires grouping
+each of those tables by date, which becomes expensive on large servers.
+
+Instead, daily counts are stored in
+:py:class:`~reviewboard.admin.models.DailyActivity` rows. These are
+incremented and decremented as objects are created and deleted, and can be
+rebuilt (fully, or for a recent window of days to correct for any drift)
+using :command:`rb-site manage rebuild-activity-rollups`.
+
+Until the rollups have been built for the first time, the widget will
+continue to compute counts directly from the source tables.
+"""
+
+from __future__ import unicode_literals
+
+import datetime
+import logging
+import time
+from collections import OrderedDict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.signals import post_delete, post_save
+from django.utils import six, timezone
+from djblets.siteconfig.models import SiteConfiguration
+
+from reviewboard.admin.models import DailyActivity
+
+
+logger = logging.getLogger(__name__)
+
+
+#: The siteconfig key indicating that rollups have been built.
+ROLLUPS_READY_SITECONFIG_KEY = 'admin_activity_rollups_ready'
+
+
+def _get_activity_types():
+    """Return the types of activity tracked by the rollups.
+
+    Returns:
+        collections.OrderedDict:
+        A dictionary mapping activity type IDs to tuples of
+        ``(model, timestamp_field)``.
+    """
+    from reviewboard.changedescs.models import ChangeDescription
+    from reviewboard.reviews.models import Comment, Review, ReviewRequest
+
+    return OrderedDict([
+        ('change_descriptions', (ChangeDescription, 'timestamp')),
+        ('comments', (Comment, 'timestamp')),
+        ('reviews', (Review, 'timestamp')),
+        ('review_requests', (ReviewRequest, 'time_added')),
+    ])
+
+
+def _get_rollup_date(timestamp):
+    """Return the date a timestamp is rolled up into.
+
+    Dates are in UTC, matching the ``date()`` of the timestamps as stored
+    in the database.
+
+    Args:
+        timestamp (datetime.datetime):
+            The timestamp.
+
+    Returns:
+        datetime.date:
+        The date for the rollup.
+    """
+    if timezone.is_aware(timestamp):
+        timestamp = timezone.localtime(timestamp, timezone.utc)
+
+    return timestamp.date()
+
+
+def rollups_ready():
+    """Return whether the rollups have been built.
+
+    Returns:
+        bool:
+        ``True`` if the activity rollups can be used for display.
+    """
+    siteconfig = SiteConfiguration.objects.get_current()
+
+    return bool(siteconfig.get(ROLLUPS_READY_SITECONFIG_KEY, False))
+
+
+def update_activity(activity_type, timestamp, delta=1):
+    """Update the rollup count for a day.
+
+    Args:
+        activity_type (unicode):
+            The type of activity.
+
+        timestamp (datetime.datetime):
+            The timestamp of the object being added or removed.
+
+        delta (int, optional):
+            The amount to add to the count. This may be negative.
+    """
+    if timestamp is None or delta == 0:
+        return
+
+    date = _get_rollup_date(timestamp)
+    q = DailyActivity.objects.filter(activity_type=activity_type, date=date)
+
+    if delta < 0:
+        q.filter(count__gte=-delta).update(count=F('count') + delta)
+        return
+
+    if q.update(count=F('count') + delta) == 0:
+        try:
+            with transaction.atomic():
+                DailyActivity.objects.create(activity_type=activity_type,
+                                             date=date,
+                                             count=delta)
+        except IntegrityError:
+            # Another process created the row first.
+            q.update(count=F('count') + delta)
+
+
+def compute_activity(activity_type, start=None, end=None):
+    """Compute daily counts for a type of activity from the source table.
+
+    Args:
+        activity_type (unicode):
+            The type of activity.
+
+        start (datetime.datetime, optional):
+            The start of the range to compute.
+
+        end (datetime.datetime, optional):
+            The end of the range to compute.
+
+    Returns:
+        list of tuple:
+        A list of ``(date, count)`` tuples, ordered by date.
+    """
+    model, timestamp_field = _get_activity_types()[activity_type]
+    q = model.objects.all()
+
+    if start is not None:
+        q = q.filter(**{'%s__gte' % timestamp_field: start})
+
+    if end is not None:
+        q = q.filter(**{'%s__lt' % timestamp_field: end})
+
+    q = (
+        q.extra({'day': 'date(%s)' % timestamp_field})
+        .values('day')
+        .annotate(created_count=Count('pk'))
+        .order_by('day')
+    )
+
+    result = []
+
+    for row in q:
+        day = row['day']
+
+        if not isinstance(day, datetime.date):
+            # SQLite returns dates as strings.
+            day = datetime.datetime.strptime(six.text_type(day),
+                                             '%Y-%m-%d').date()
+
+        result.append((day, row['created_count']))
+
+    return result
+
+
+def rebuild_activity(start_date=None):
+    """Rebuild the activity rollups from the source tables.
+
+    Args:
+        start_date (datetime.date, optional):
+            The first date to rebuild. Rollups for all dates on or after this
+            date will be replaced. If not provided, all rollups will be
+            rebuilt.
+
+    Returns:
+        int:
+        The number of rollup rows written.
+    """
+    if start_date is None:
+        start = None
+    else:
+        start = datetime.datetime.combine(start_date, datetime.time.min)
+
+        if timezone.is_naive(start):
+            start = timezone.make_aware(start, timezone.utc)
+
+    num_rows = 0
+
+    with transaction.atomic():
+        for activity_type in six.iterkeys(_get_activity_types()):
+            q = DailyActivity.objects.filter(activity_type=activity_type)
+
+            if start_date is not None:
+                q = q.filter(date__gte=start_date)
+
+            q.delete()
+
+            rows = [
+                DailyActivity(activity_type=activity_type,
+                              date=date,
+                              count=count)
+                for date, count in compute_activity(activity_type,
+                                                    start=start)
+            ]
+            DailyActivity.objects.bulk_create(rows)
+            num_rows += len(rows)
+
+    siteconfig = SiteConfiguration.objects.get_current()
+
+    if not siteconfig.get(ROLLUPS_READY_SITECONFIG_KEY, False):
+        siteconfig.set(ROLLUPS_READY_SITECONFIG_KEY, True)
+        siteconfig.save()
+
+    logger.info('Rebuilt %d activity rollup row(s)', num_rows)
+
+    return num_rows
+
+
+def get_activity_data(range_start, range_end):
+    """Return daily activity counts for the activity graph.
+
+    If the rollups have been built, they'll be used. Otherwise, counts will
+    be computed from the source tables.
+
+    Args:
+        range_start (datetime.datetime):
+            The start of the range.
+
+        range_end (datetime.datetime):
+            The end of the range.
+
+    Returns:
+        dict:
+        A dictionary mapping activity types to lists of
+        ``[timestamp_ms, count]`` pairs, ordered by date.
+    """
+    activity_types = list(_get_activity_types())
+    counts = dict(
+        (activity_type, [])
+        for activity_type in activity_types
+    )
+
+    if rollups_ready():
+        q = (
+            DailyActivity.objects
+            .filter(activity_type__in=activity_types,
+                    date__gte=_get_rollup_date(range_start),
+                    date__lte=_get_rollup_date(range_end),
+                    count__gt=0)
+            .order_by('date')
+            .values_list('activity_type', 'date', 'count')
+        )
+
+        for activity_type, date, count in q:
+            counts[activity_type].append((date, count))
+    else:
+        for activity_type in activity_types:
+            counts[activity_type] = compute_activity(activity_type,
+                                                     start=range_start,
+                                                     end=range_end)
+
+    return dict(
+        (activity_type, [
+            [time.mktime(date.timetuple()) * 1000, count]
+            for date, count in type_counts
+        ])
+        for activity_type, type_counts in six.iteritems(counts)
+    )
+
+
+def _on_object_saved(sender, instance, created, raw=False, **kwargs):
+    """Handle a tracked object being saved.
+
+    Args:
+        sender (type):
+            The model class.
+
+        instance (django.db.models.Model):
+            The saved object.
+
+        created (bool):
+            Whether the object was newly created.
+
+        raw (bool, optional):
+            Whether the object is being loaded from a fixture.
+
+        **kwargs (dict):
+            Additional keyword arguments from the signal.
+    """
+    if created and not raw:
+        activity_type, timestamp_field = _get_sender_info(sender)
+        update_activity(activity_type, getattr(instance, timestamp_field))
+
+
+def _on_object_deleted(sender, instance, **kwargs):
+    """Handle a tracked object being deleted.
+
+    Args:
+        sender (type):
+            The model class.
+
+        instance (django.db.models.Model):
+            The deleted object.
+
+        **kwargs (dict):
+            Additional keyword arguments from the signal.
+    """
+    activity_type, timestamp_field = _get_sender_info(sender)
+    update_activity(activity_type, getattr(instance, timestamp_field),
+                    delta=-1)
+
+
+def _get_sender_info(sender):
+    """Return the activity type and timestamp field for a model.
+
+    Args:
+        sender (type):
+            The model class.
+
+    Returns:
+        tuple:
+        A 2-tuple of the activity type and timestamp field name.
+    """
+    for activity_type, (model, timestamp_field) in \
+            six.iteritems(_get_activity_types()):
+        if model is sender:
+            return activity_type, timestamp_field
+
+    raise KeyError(sender)
+
+
+def init_activity_rollups():
+    """Begin tracking activity for the rollups."""
+    for model, timestamp_field in six.itervalues(_get_activity_types()):
+        post_save.connect(_on_object_saved, sender=model)
+        post_delete.connect(_on_object_deleted, sender=model)
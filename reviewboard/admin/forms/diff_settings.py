@@ -23,6 +23,13 @@ class DiffSettingsForm(SiteSettingsForm):
         required=False,
         widget=forms.TextInput(attrs={'size': '5'}))
 
+    diffviewer_lazy_syntax_highlighting = forms.BooleanField(
+        label=_('Highlight collapsed lines on demand'),
+        help_text=_('Only syntax-highlight the lines of a file that are '
+                    'shown, highlighting collapsed lines when they are '
+                    'expanded. This speeds up rendering of large files.'),
+        required=False)
+
     diffviewer_show_trailing_whitespace = forms.BooleanField(
         label=_('Show trailing whitespace'),
         help_text=_('Show excess trailing whitespace as red blocks. This '
@@ -30,6 +37,14 @@ class DiffSettingsForm(SiteSettingsForm):
                     'whitespace to the end of a line.'),
         required=False)
 
+    diffviewer_warm_chunk_cache = forms.BooleanField(
+        label=_('Pre-generate diffs after upload'),
+        help_text=_('Generate and cache the rendered contents of new diffs '
+                    'in the background once they are uploaded, so the first '
+                    'reviewer doesn\'t have to wait for them. This requires '
+                    'a cache backend shared by all server processes.'),
+        required=False)
+
     include_space_patterns = forms.CharField(
         label=_('Show all whitespace for'),
         required=False,
@@ -65,6 +80,32 @@ class DiffSettingsForm(SiteSettingsForm):
                     'to disable size restrictions.'),
         widget=forms.TextInput(attrs={'size': '15'}))
 
+    diffviewer_chunk_store_enabled = forms.BooleanField(
+        label=_('Store generated diffs on disk'),
+        help_text=_('Keep a compressed copy of generated diffs on disk, '
+                    'used when they are no longer in the cache. This avoids '
+                    'regenerating every diff after the cache server is '
+                    'restarted.'),
+        required=False)
+
+    diffviewer_chunk_store_path = forms.CharField(
+        label=_('Stored diffs directory'),
+        help_text=_('The directory for storing generated diffs. This must be '
+                    'writable by the web server, and shared by all servers. '
+                    'If empty, the "diff-chunks" directory in the site\'s '
+                    'data directory is used.'),
+        required=False,
+        widget=forms.TextInput(attrs={'size': '60'}))
+
+    diffviewer_chunk_store_max_size_mb = forms.IntegerField(
+        label=_('Max stored diffs size (MB)'),
+        help_text=_('The maximum total size of stored diffs. The least '
+                    'recently viewed diffs are removed when this is '
+                    'exceeded.'),
+        min_value=1,
+        initial=1024,
+        widget=forms.TextInput(attrs={'size': '5'}))
+
     def load(self):
         """Load settings from the form.
 
@@ -107,6 +148,11 @@ class DiffSettingsForm(SiteSettingsForm):
                 'classes': ('wide',),
                 'fields': ('diffviewer_max_diff_size',
                            'diffviewer_context_num_lines',
+                           'diffviewer_lazy_syntax_highlighting',
+                           'diffviewer_warm_chunk_cache',
+                           'diffviewer_chunk_store_enabled',
+                           'diffviewer_chunk_store_path',
+                           'diffviewer_chunk_store_max_size_mb',
                            'diffviewer_paginate_by',
                            'diffviewer_paginate_orphans')
             }
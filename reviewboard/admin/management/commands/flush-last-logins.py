@@ -0,0 +1,31 @@
+"""Management command to write queued last login times to the database."""
+
+from __future__ import unicode_literals
+
+from django.utils.translation import ugettext as _
+from djblets.util.compat.django.core.management.base import BaseCommand
+
+from reviewboard.accounts.last_login import flush_pending_last_logins
+
+
+class Command(BaseCommand):
+    """Management command to write queued last login times to the database.
+
+    Queued times are also written periodically while serving requests. This
+    can be run from a scheduled job to make sure they're written on servers
+    with little traffic.
+    """
+
+    help = _('Writes queued user activity times to the database.')
+
+    def handle(self, **options):
+        """Handle the command.
+
+        Args:
+            **options (dict):
+                Options parsed on the command line.
+        """
+        num_flushed = flush_pending_last_logins()
+
+        self.stdout.write(_('Wrote %d queued last login time(s).')
+                          % num_flushed)
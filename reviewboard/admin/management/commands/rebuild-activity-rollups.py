@@ -0,0 +1,66 @@
+"""Management command to rebuild the admin dashboard activity rollups."""
+
+from __future__ import unicode_literals
+
+import datetime
+
+from django.core.management.base import CommandError
+from django.utils import timezone
+from django.utils.translation import ugettext as _
+from djblets.util.compat.django.core.management.base import BaseCommand
+
+from reviewboard.admin.activity import rebuild_activity
+
+
+class Command(BaseCommand):
+    """Management command to rebuild the admin dashboard activity rollups.
+
+    This should be run once to backfill history. After that, rollups are
+    maintained as objects are created and deleted. Running this
+    periodically with ``--days`` will correct any drift for recent days
+    (for instance, from reviews whose timestamps change when published).
+    """
+
+    help = _('Rebuilds the daily activity counts shown in the '
+             'administration dashboard.')
+
+    def add_arguments(self, parser):
+        """Add arguments to the command.
+
+        Args:
+            parser (argparse.ArgumentParser):
+                The argument parser for the command.
+        """
+        parser.add_argument(
+            '--days',
+            action='store',
+            dest='days',
+            type=int,
+            default=None,
+            help=_('Only rebuild the given number of most recent days. By '
+                   'default, all history is rebuilt.'))
+
+    def handle(self, **options):
+        """Handle the command.
+
+        Args:
+            **options (dict):
+                Options parsed on the command line.
+
+        Raises:
+            django.core.management.CommandError:
+                The provided options were invalid.
+        """
+        days = options['days']
+
+        if days is None:
+            start_date = None
+        elif days < 1:
+            raise CommandError(_('--days must be a positive number.'))
+        else:
+            start_date = (timezone.localtime(timezone.now(), timezone.utc)
+                          .date() - datetime.timedelta(days=days - 1))
+
+        num_rows = rebuild_activity(start_date=start_date)
+
+        self.stdout.write(_('Rebuilt %d daily activity count(s).') % num_rows)
@@ -5,11 +5,12 @@ import logging
 from django.conf import settings
 from djblets.siteconfig.models import SiteConfiguration
 
-from reviewboard import initialize
+from reviewboard import initialize, is_initialized
 from reviewboard.accounts.backends.registry import get_enabled_auth_backends
 from reviewboard.accounts.backends.x509 import X509Backend
 from reviewboard.admin.checks import check_updates_required
-from reviewboard.admin.siteconfig import load_site_config
+from reviewboard.admin.request_timing import timed_middleware
+from reviewboard.admin.siteconfig import reload_site_config
 from reviewboard.admin.views import manual_updates_required
 
 
@@ -21,16 +22,24 @@ class InitReviewBoardMiddleware(object):
         super(InitReviewBoardMiddleware, self).__init__(*args, **kwargs)
         self._initialized = False
 
+    @timed_middleware('init')
     def process_request(self, request):
-        """Ensure that Review Board initialization code has run."""
+        """Ensure that Review Board initialization code has run.
+
+        This is skipped if Review Board was already initialized when the
+        process started (see :py:func:`reviewboard.warmup.warm_up`).
+        """
         if not self._initialized:
-            initialize()
+            if not is_initialized():
+                initialize()
+
             self._initialized = True
 
 
 class LoadSettingsMiddleware(object):
     """Middleware that loads the settings on each request."""
 
+    @timed_middleware('load-settings')
     def process_request(self, request):
         """Ensure that the latest siteconfig is loaded."""
         try:
@@ -43,8 +52,8 @@ class LoadSettingsMiddleware(object):
         # This will be unset if the SiteConfiguration expired, since we'll
         # have a new one in the cache.
         if not hasattr(siteconfig, '_rb_settings_loaded'):
-            # Load all site settings.
-            load_site_config(full_reload=True)
+            # Apply any settings that changed since they were last loaded.
+            reload_site_config(siteconfig)
             siteconfig._rb_settings_loaded = True
 
         if siteconfig.settings.get('site_domain_method', 'http') == 'https':
@@ -63,6 +72,7 @@ class CheckUpdatesRequiredMiddleware(object):
         settings.SITE_ROOT + 'jsi18n/',
     )
 
+    @timed_middleware('check-updates')
     def process_view(self, request, view_func, view_args, view_kwargs):
         """Check whether updates are required.
 
@@ -0,0 +1,40 @@
+"""Models for the administration UI."""
+
+from __future__ import unicode_literals
+
+from django.db import models
+from django.utils.encoding import python_2_unicode_compatible
+from django.utils.translation import ugettext_lazy as _
+
+
+@python_2_unicode_compatible
+class DailyActivity(models.Model):
+    """A daily count of objects created of a given type.
+
+    These rollups back the activity graph in the administration dashboard,
+    so that it doesn't have to scan and group the full tables for comments,
+    reviews, change descriptions, and review requests on every request.
+
+    Rollups are kept up-to-date as objects are created and deleted, and can
+    be rebuilt from the source tables using :command:`rb-site manage
+    rebuild-activity-rollups`.
+    """
+
+    activity_type = models.CharField(_('activity type'), max_length=32)
+    date = models.DateField(_('date'))
+    count = models.PositiveIntegerField(_('count'), default=0)
+
+    def __str__(self):
+        """Return a string representation of the rollup.
+
+        Returns:
+            unicode:
+            The string representation.
+        """
+        return '%s on %s: %d' % (self.activity_type, self.date, self.count)
+
+    class Meta:
+        db_table = 'reviewboard_admin_dailyactivity'
+        unique_together = (('activity_type', 'date'),)
+        verbose_name = _('Daily Activity')
+        verbose_name_plural = _('Daily Activity')
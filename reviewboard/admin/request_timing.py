@@ -0,0 +1,486 @@
+"""Opt-in timing instrumentation for requests.
+
+When ``REQUEST_TIMING_ENABLED`` is set in :file:`settings_local.py`,
+:py:class:`RequestTimingMiddleware` records where the time for each request
+goes:
+
+* Time spent in middleware before the view is called, broken down further
+  for middleware decorated with :py:func:`timed_middleware`.
+* Time spent in the view (including template rendering and response
+  middleware).
+* The number and duration of SQL queries.
+* Cache hits and misses, and the time spent in the cache.
+
+These are reported to the client in a ``Server-Timing`` header, and
+aggregated per view in the cache, so that they can be shown in the
+administration dashboard.
+
+SQL queries are timed using Django's debug cursors, which add a small amount
+of overhead to each query. This is meant for diagnosing slow servers, and
+shouldn't be left on all the time.
+"""
+
+from __future__ import unicode_literals
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils import six
+from djblets.cache.backend import make_cache_key
+
+
+logger = logging.getLogger(__name__)
+
+
+_local = threading.local()
+_cache_miss = object()
+
+
+def is_request_timing_enabled():
+    """Return whether request timing is enabled.
+
+    Returns:
+        bool:
+        ``True`` if ``REQUEST_TIMING_ENABLED`` is set in the settings.
+    """
+    return getattr(settings, 'REQUEST_TIMING_ENABLED', False)
+
+
+class RequestTimer(object):
+    """Timings for a single request.
+
+    Attributes:
+        cache_hits (int):
+            The number of keys found in the cache.
+
+        cache_misses (int):
+            The number of keys not found in the cache.
+
+        cache_secs (float):
+            The time spent in cache operations, in seconds.
+
+        phases (collections.OrderedDict):
+            A mapping of phase names to the time spent in them, in seconds.
+
+        sql_count (int):
+            The number of SQL queries made.
+
+        sql_secs (float):
+            The time spent in SQL queries, in seconds.
+
+        start_time (float):
+            The time the request started, in seconds since the epoch.
+    """
+
+    def __init__(self):
+        """Initialize the timer."""
+        self.start_time = time.time()
+        self.phases = OrderedDict()
+        self.sql_count = 0
+        self.sql_secs = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_secs = 0.0
+
+    def add_phase(self, name, secs):
+        """Add time spent in a phase of the request.
+
+        Time for phases entered more than once will be added together.
+
+        Args:
+            name (unicode):
+                The name of the phase.
+
+            secs (float):
+                The time spent in the phase, in seconds.
+        """
+        self.phases[name] = self.phases.get(name, 0.0) + secs
+
+    def get_server_timing(self, total_secs):
+        """Return the value for a ``Server-Timing`` header.
+
+        Args:
+            total_secs (float):
+                The total time spent on the request, in seconds.
+
+        Returns:
+            unicode:
+            The header value.
+        """
+        metrics = [
+            '%s;dur=%.1f' % (name, secs * 1000)
+            for name, secs in six.iteritems(self.phases)
+        ]
+        metrics += [
+            'sql;dur=%.1f;desc="%d queries"' % (self.sql_secs * 1000,
+                                                self.sql_count),
+            'cache;dur=%.1f;desc="%d hits, %d misses"'
+            % (self.cache_secs * 1000, self.cache_hits, self.cache_misses),
+            'total;dur=%.1f' % (total_secs * 1000),
+        ]
+
+        return ', '.join(metrics)
+
+
+def get_request_timer():
+    """Return the timer for the request being handled in this thread.
+
+    Returns:
+        RequestTimer:
+        The timer, or ``None`` if the request isn't being timed.
+    """
+    return getattr(_local, 'timer', None)
+
+
+@contextmanager
+def timed_phase(name):
+    """Time a block of code as a phase of the current request.
+
+    This does nothing if the request isn't being timed.
+
+    Args:
+        name (unicode):
+            The name of the phase. This must be a valid ``Server-Timing``
+            metric name (no spaces or punctuation other than ``-``).
+
+    Context:
+        The code to time.
+    """
+    timer = get_request_timer()
+
+    if timer is None:
+        yield
+    else:
+        start = time.time()
+
+        try:
+            yield
+        finally:
+            timer.add_phase(name, time.time() - start)
+
+
+def timed_middleware(name):
+    """Time a middleware method as a phase of the current request.
+
+    Args:
+        name (unicode):
+            The name of the phase.
+
+    Returns:
+        callable:
+        The method decorator.
+    """
+    def _dec(func):
+        @wraps(func)
+        def _wrapper(*args, **kwargs):
+            with timed_phase(name):
+                return func(*args, **kwargs)
+
+        return _wrapper
+
+    return _dec
+
+
+class RequestStatsAggregator(object):
+    """Aggregates request timings per view across all processes.
+
+    Timings are collected in memory, and merged into a shared copy in the
+    cache at most every :py:attr:`FLUSH_INTERVAL_SECS` seconds.
+    """
+
+    #: The number of seconds between merges into the shared stats.
+    FLUSH_INTERVAL_SECS = 30
+
+    #: The number of seconds before an abandoned merge lock expires.
+    LOCK_TIMEOUT_SECS = 10
+
+    _STATS_KEY = 'request-timing-stats'
+    _LOCK_KEY = 'request-timing-stats-lock'
+
+    def __init__(self):
+        """Initialize the aggregator."""
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._next_flush = time.time() + self.FLUSH_INTERVAL_SECS
+
+    def record(self, view_name, timer, total_secs):
+        """Record the timings for a request.
+
+        Args:
+            view_name (unicode):
+                The name of the view that handled the request.
+
+            timer (RequestTimer):
+                The timings for the request.
+
+            total_secs (float):
+                The total time spent on the request, in seconds.
+        """
+        with self._lock:
+            self._merge(self._pending, view_name, {
+                'count': 1,
+                'total_secs': total_secs,
+                'max_secs': total_secs,
+                'sql_count': timer.sql_count,
+                'sql_secs': timer.sql_secs,
+                'cache_hits': timer.cache_hits,
+                'cache_misses': timer.cache_misses,
+            })
+
+        if time.time() >= self._next_flush:
+            self.flush()
+
+    def flush(self):
+        """Merge the timings recorded by this process into the shared stats.
+
+        If another process is merging its timings, the timings will be kept
+        until the next flush.
+        """
+        self._next_flush = time.time() + self.FLUSH_INTERVAL_SECS
+        lock_key = make_cache_key(self._LOCK_KEY)
+
+        if not cache.add(lock_key, True, self.LOCK_TIMEOUT_SECS):
+            return
+
+        try:
+            with self._lock:
+                pending = self._pending
+                self._pending = {}
+
+            stats_key = make_cache_key(self._STATS_KEY)
+            stats = cache.get(stats_key) or {}
+
+            for view_name, view_stats in six.iteritems(pending):
+                self._merge(stats, view_name, view_stats)
+
+            cache.set(stats_key, stats, None)
+        except Exception as e:
+            logger.exception('Unable to store request timing stats: %s', e)
+        finally:
+            cache.delete(lock_key)
+
+    def get_stats(self):
+        """Return the shared stats for all views.
+
+        Timings recorded by this process will be merged first.
+
+        Returns:
+            dict:
+            A mapping of view names to stats. Each contains ``count``,
+            ``total_secs``, ``max_secs``, ``avg_secs``, ``sql_count``,
+            ``sql_secs``, ``cache_hits`` and ``cache_misses`` keys.
+        """
+        self.flush()
+
+        stats = cache.get(make_cache_key(self._STATS_KEY)) or {}
+
+        for view_stats in six.itervalues(stats):
+            view_stats['avg_secs'] = \
+                view_stats['total_secs'] / view_stats['count']
+
+        return stats
+
+    def reset(self):
+        """Reset the stats for all processes."""
+        with self._lock:
+            self._pending = {}
+
+        cache.delete(make_cache_key(self._STATS_KEY))
+
+    def _merge(self, stats, view_name, view_stats):
+        """Merge stats for a view into a set of stats.
+
+        Args:
+            stats (dict):
+                The stats to merge into.
+
+            view_name (unicode):
+                The name of the view.
+
+            view_stats (dict):
+                The stats for the view to merge.
+        """
+        existing = stats.get(view_name)
+
+        if existing is None:
+            stats[view_name] = dict(view_stats)
+        else:
+            for key, value in six.iteritems(view_stats):
+                if key == 'max_secs':
+                    existing[key] = max(existing[key], value)
+                else:
+                    existing[key] += value
+
+
+#: The aggregated request timings for this process.
+request_stats = RequestStatsAggregator()
+
+
+class RequestTimingMiddleware(object):
+    """Middleware that records timings for each request.
+
+    This must be listed before all other middleware apart from
+    :py:class:`django.middleware.gzip.GZipMiddleware`. It's removed from the
+    middleware chain unless request timing is enabled.
+    """
+
+    def __init__(self):
+        """Initialize the middleware.
+
+        Raises:
+            django.core.exceptions.MiddlewareNotUsed:
+                Request timing is disabled.
+        """
+        if not is_request_timing_enabled():
+            raise MiddlewareNotUsed
+
+    def process_request(self, request):
+        """Start timing a request.
+
+        Args:
+            request (django.http.HttpRequest):
+                The HTTP request from the client.
+        """
+        timer = RequestTimer()
+        request._rb_request_timer = timer
+        request._rb_debug_cursors = []
+        _local.timer = timer
+
+        for connection in connections.all():
+            request._rb_debug_cursors.append(
+                (connection, connection.force_debug_cursor))
+            connection.force_debug_cursor = True
+            connection.queries_log.clear()
+
+        _instrument_cache()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Record the time spent in middleware before the view.
+
+        Args:
+            request (django.http.HttpRequest):
+                The HTTP request from the client.
+
+            view_func (callable):
+                The view being called.
+
+            view_args (tuple):
+                The positional arguments passed to the view.
+
+            view_kwargs (dict):
+                The keyword arguments passed to the view.
+        """
+        timer = getattr(request, '_rb_request_timer', None)
+
+        if timer is not None:
+            request._rb_view_start_time = time.time()
+            timer.add_phase('middleware',
+                            request._rb_view_start_time - timer.start_time)
+
+    def process_response(self, request, response):
+        """Finish timing a request and report the timings.
+
+        Args:
+            request (django.http.HttpRequest):
+                The HTTP request from the client.
+
+            response (django.http.HttpResponse):
+                The HTTP response to send to the client.
+
+        Returns:
+            django.http.HttpResponse:
+            The response, with a ``Server-Timing`` header added.
+        """
+        timer = getattr(request, '_rb_request_timer', None)
+
+        if timer is None:
+            return response
+
+        _local.timer = None
+        now = time.time()
+        view_start_time = getattr(request, '_rb_view_start_time', None)
+
+        if view_start_time is not None:
+            timer.add_phase('view', now - view_start_time)
+
+        for connection, force_debug_cursor in request._rb_debug_cursors:
+            timer.sql_count += len(connection.queries_log)
+            timer.sql_secs += sum(
+                float(query['time'])
+                for query in connection.queries_log
+            )
+            connection.force_debug_cursor = force_debug_cursor
+
+        total_secs = now - timer.start_time
+        response['Server-Timing'] = timer.get_server_timing(total_secs)
+
+        resolver_match = getattr(request, 'resolver_match', None)
+
+        if resolver_match is not None:
+            view_name = resolver_match.view_name
+        else:
+            view_name = '(unresolved)'
+
+        request_stats.record(view_name, timer, total_secs)
+
+        return response
+
+
+def _instrument_cache():
+    """Instrument this thread's cache backend to record hits and misses.
+
+    Django uses a separate cache backend instance for each thread, so this
+    is done the first time each thread handles a timed request.
+    """
+    backend = caches[DEFAULT_CACHE_ALIAS]
+
+    if getattr(backend, '_rb_timing_instrumented', False):
+        return
+
+    orig_get = backend.get
+    orig_get_many = backend.get_many
+
+    def _get(key, default=None, version=None):
+        timer = get_request_timer()
+
+        if timer is None:
+            return orig_get(key, default, version)
+
+        start = time.time()
+        value = orig_get(key, _cache_miss, version)
+        timer.cache_secs += time.time() - start
+
+        if value is _cache_miss:
+            timer.cache_misses += 1
+            value = default
+        else:
+            timer.cache_hits += 1
+
+        return value
+
+    def _get_many(keys, version=None):
+        timer = get_request_timer()
+
+        if timer is None:
+            return orig_get_many(keys, version)
+
+        keys = list(keys)
+        start = time.time()
+        values = orig_get_many(keys, version)
+        timer.cache_secs += time.time() - start
+        timer.cache_hits += len(values)
+        timer.cache_misses += len(keys) - len(values)
+
+        return values
+
+    backend.get = _get
+    backend.get_many = _get_many
+    backend._rb_timing_instrumented = True
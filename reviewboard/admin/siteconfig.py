@@ -31,15 +31,20 @@
 
 from __future__ import unicode_literals
 
+import copy
 import logging
 import os
 import re
+import time
 
 from django.conf import settings, global_settings
+from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
 from django.utils import six
 from django.utils.translation import ugettext as _
 from djblets.log import restart_logging, siteconfig as log_siteconfig
+from djblets.cache.backend import make_cache_key
+from djblets.features.checkers import SiteConfigFeatureChecker
 from djblets.recaptcha import siteconfig as recaptcha_siteconfig
 from djblets.siteconfig.django_settings import (apply_django_settings,
                                                 get_django_defaults,
@@ -130,6 +135,7 @@ defaults.update(log_siteconfig.defaults)
 defaults.update(recaptcha_siteconfig.defaults)
 defaults.update(avatar_services.get_siteconfig_defaults())
 defaults.update({
+    'admin_activity_rollups_ready': False,
     'auth_ldap_anon_bind_uid': '',
     'auth_ldap_anon_bind_passwd': '',
     'auth_ldap_email_domain': '',
@@ -147,13 +153,18 @@ defaults.update({
     'auth_x509_autocreate_users': False,
     'company': '',
     'default_use_rich_text': True,
+    'diffviewer_chunk_store_enabled': False,
+    'diffviewer_chunk_store_max_size_mb': 1024,
+    'diffviewer_chunk_store_path': '',
     'diffviewer_context_num_lines': 5,
     'diffviewer_include_space_patterns': [],
+    'diffviewer_lazy_syntax_highlighting': True,
     'diffviewer_max_diff_size': 0,
     'diffviewer_paginate_by': 20,
     'diffviewer_paginate_orphans': 10,
     'diffviewer_syntax_highlighting': True,
     'diffviewer_syntax_highlighting_threshold': 0,
+    'diffviewer_warm_chunk_cache': False,
     'diffviewer_show_trailing_whitespace': True,
     'mail_send_review_mail': False,
     'mail_send_new_user_mail': False,
@@ -164,6 +175,7 @@ defaults.update({
     'send_support_usage_stats': True,
     'site_domain_method': 'http',
     'site_read_only': False,
+    'webapi_last_update_wait_enabled': False,
 
     'privacy_enable_user_consent': False,
     'privacy_info_html': None,
@@ -202,6 +214,12 @@ defaults.update({
 
 _original_webapi_auth_backends = settings.WEB_API_AUTH_BACKENDS
 
+#: The siteconfig settings applied by the last load in this process.
+_loaded_settings = None
+
+#: The types of siteconfig reloads tracked in the reload statistics.
+RELOAD_TYPES = ('full', 'partial', 'unchanged')
+
 
 def load_site_config(full_reload=False):
     """Load stored site configuration settings.
@@ -209,45 +227,8 @@ def load_site_config(full_reload=False):
     This populates the Django settings object with any keys that need to be
     there.
     """
-    global _original_webapi_auth_backends
-
-    def apply_setting(settings_key, db_key, default=None):
-        """Apply the given siteconfig value to the Django settings object."""
-        db_value = siteconfig.settings.get(db_key)
-
-        if db_value:
-            setattr(settings, settings_key, db_value)
-        elif default:
-            setattr(settings, settings_key, default)
-
-    def update_haystack_settings():
-        """Update the haystack settings in site config."""
-        search_backend_id = (siteconfig.get('search_backend_id') or
-                             defaults['search_backend_id'])
-        search_backend = search_backend_registry.get_search_backend(
-            search_backend_id)
-
-        if not search_backend:
-            raise ImproperlyConfigured(_(
-                'The search engine "%s" could not be found. If this is '
-                'provided by an extension, you will have to make sure that '
-                'extension is enabled.'
-                % search_backend_id
-            ))
-
-        apply_setting(
-            'HAYSTACK_CONNECTIONS', None,
-            {
-                'default': search_backend.configuration,
-            })
-
-        # Re-initialize Haystack's connection information to use the updated
-        # settings.
-        connections.connections_info = settings.HAYSTACK_CONNECTIONS
-        connections._connections = {}
+    global _loaded_settings
 
-    # If siteconfig needs to be saved back to the DB, set dirty=true
-    dirty = False
     try:
         siteconfig = SiteConfiguration.objects.get_current()
     except SiteConfiguration.DoesNotExist:
@@ -260,6 +241,214 @@ def load_site_config(full_reload=False):
         logging.error('Could not load siteconfig: %s' % e)
         return
 
+    _prepare_siteconfig(siteconfig)
+
+    # Populate the settings object with anything relevant from the siteconfig.
+    apply_django_settings(siteconfig, settings_map)
+
+    if full_reload and not getattr(settings, 'RUNNING_TEST', False):
+        # Logging may have changed, so restart logging.
+        restart_logging()
+
+    # Now for some more complicated stuff...
+    _apply_search_settings(siteconfig)
+    _apply_admin_settings(siteconfig)
+
+    # If siteconfig needs to be saved back to the DB, set dirty=true
+    dirty = _apply_auth_settings(siteconfig)
+
+    _apply_storage_settings(siteconfig)
+    _apply_domain_method(siteconfig)
+
+    # Migrate over any legacy avatar backend settings.
+    if avatar_services.migrate_settings(siteconfig):
+        dirty = True
+
+    # Save back changes if they have been made
+    if dirty:
+        siteconfig.save()
+
+    # Reload privacy consent requirements
+    recompute_privacy_consents()
+
+    _loaded_settings = copy.deepcopy(siteconfig.settings)
+
+    site_settings_loaded.send(sender=None)
+
+    return siteconfig
+
+
+def reload_site_config(siteconfig):
+    """Apply changes from a newly-fetched site configuration.
+
+    Only the settings that changed since the last load in this process are
+    applied, along with the state that depends on them (such as the search,
+    authentication or storage backends). If nothing was loaded yet, this
+    performs a full reload.
+
+    Args:
+        siteconfig (djblets.siteconfig.models.SiteConfiguration):
+            The newly-fetched site configuration.
+
+    Returns:
+        set of unicode:
+        The keys of the settings that changed, or ``None`` if a full reload
+        was performed.
+    """
+    global _loaded_settings
+
+    start = time.time()
+
+    if _loaded_settings is None:
+        load_site_config(full_reload=True)
+        _record_reload('full', start)
+
+        return None
+
+    _prepare_siteconfig(siteconfig)
+
+    new_settings = siteconfig.settings
+    changed_keys = set(
+        key
+        for key in set(new_settings) | set(_loaded_settings)
+        if new_settings.get(key) != _loaded_settings.get(key)
+    )
+
+    if not changed_keys:
+        _record_reload('unchanged', start)
+
+        return changed_keys
+
+    apply_django_settings(
+        siteconfig,
+        dict(
+            (key, settings_map[key])
+            for key in changed_keys
+            if key in settings_map
+        ))
+
+    dirty = False
+
+    for key_prefixes, apply_func in _reload_handlers:
+        if any(key.startswith(key_prefixes) for key in changed_keys):
+            if apply_func(siteconfig):
+                dirty = True
+
+    if avatar_services.migrate_settings(siteconfig):
+        dirty = True
+
+    if dirty:
+        siteconfig.save()
+
+    _loaded_settings = copy.deepcopy(siteconfig.settings)
+
+    site_settings_loaded.send(sender=None)
+    _record_reload('partial', start)
+
+    logging.debug('Reloaded siteconfig settings: %s',
+                  ', '.join(sorted(changed_keys)))
+
+    return changed_keys
+
+
+def get_reload_stats():
+    """Return statistics on siteconfig reloads across all processes.
+
+    Returns:
+        dict:
+        A mapping of reload types (see :py:data:`RELOAD_TYPES`) to
+        dictionaries containing the ``count`` of reloads of that type and the
+        ``total_secs`` spent on them.
+    """
+    values = cache.get_many([
+        _make_reload_stat_key(reload_type, stat)
+        for reload_type in RELOAD_TYPES
+        for stat in ('count', 'usecs')
+    ])
+
+    return dict(
+        (reload_type, {
+            'count': values.get(_make_reload_stat_key(reload_type, 'count'),
+                                0),
+            'total_secs': values.get(_make_reload_stat_key(reload_type,
+                                                           'usecs'),
+                                     0) / 1000000.0,
+        })
+        for reload_type in RELOAD_TYPES
+    )
+
+
+def _record_reload(reload_type, start):
+    """Record a siteconfig reload in the statistics.
+
+    Args:
+        reload_type (unicode):
+            The type of reload (see :py:data:`RELOAD_TYPES`).
+
+        start (float):
+            The time the reload started.
+    """
+    usecs = int((time.time() - start) * 1000000)
+
+    for stat, delta in (('count', 1), ('usecs', usecs)):
+        key = _make_reload_stat_key(reload_type, stat)
+
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            # The counter doesn't exist yet (or was evicted).
+            if not cache.add(key, delta, None):
+                cache.incr(key, delta)
+
+
+def _make_reload_stat_key(reload_type, stat):
+    """Return the cache key for a siteconfig reload statistic.
+
+    Args:
+        reload_type (unicode):
+            The type of reload.
+
+        stat (unicode):
+            The name of the statistic.
+
+    Returns:
+        unicode:
+        The cache key.
+    """
+    return make_cache_key('siteconfig-reloads-%s-%s' % (reload_type, stat))
+
+
+def _apply_setting(siteconfig, settings_key, db_key, default=None):
+    """Apply the given siteconfig value to the Django settings object.
+
+    Args:
+        siteconfig (djblets.siteconfig.models.SiteConfiguration):
+            The site configuration.
+
+        settings_key (unicode):
+            The name of the Django setting.
+
+        db_key (unicode):
+            The siteconfig key to apply, if any.
+
+        default (object, optional):
+            The value to apply if the siteconfig value is empty.
+    """
+    db_value = siteconfig.settings.get(db_key)
+
+    if db_value:
+        setattr(settings, settings_key, db_value)
+    elif default:
+        setattr(settings, settings_key, default)
+
+
+def _prepare_siteconfig(siteconfig):
+    """Fill in defaults and computed values in the site configuration.
+
+    Args:
+        siteconfig (djblets.siteconfig.models.SiteConfiguration):
+            The site configuration.
+    """
     # Populate defaults if they weren't already set.
     if not siteconfig.get_defaults():
         siteconfig.add_defaults(defaults)
@@ -291,27 +480,74 @@ def load_site_config(full_reload=False):
     if site_static_url == '' or site_static_url == site_media_url:
         siteconfig.set('site_static_url', settings.STATIC_URL)
 
-    # Populate the settings object with anything relevant from the siteconfig.
-    apply_django_settings(siteconfig, settings_map)
-
-    if full_reload and not getattr(settings, 'RUNNING_TEST', False):
-        # Logging may have changed, so restart logging.
-        restart_logging()
 
-    # Now for some more complicated stuff...
+def _apply_search_settings(siteconfig):
+    """Update the haystack settings in site config.
 
-    update_haystack_settings()
+    Args:
+        siteconfig (djblets.siteconfig.models.SiteConfiguration):
+            The site configuration.
 
-    # Site administrator settings
-    apply_setting("ADMINS", None, (
+    Raises:
+        django.core.exceptions.ImproperlyConfigured:
+            The configured search backend could not be found.
+    """
+    search_backend_id = (siteconfig.get('search_backend_id') or
+                         defaults['search_backend_id'])
+    search_backend = search_backend_registry.get_search_backend(
+        search_backend_id)
+
+    if not search_backend:
+        raise ImproperlyConfigured(_(
+            'The search engine "%s" could not be found. If this is '
+            'provided by an extension, you will have to make sure that '
+            'extension is enabled.'
+            % search_backend_id
+        ))
+
+    _apply_setting(
+        siteconfig, 'HAYSTACK_CONNECTIONS', None,
+        {
+            'default': search_backend.configuration,
+        })
+
+    # Re-initialize Haystack's connection information to use the updated
+    # settings.
+    connections.connections_info = settings.HAYSTACK_CONNECTIONS
+    connections._connections = {}
+
+
+def _apply_admin_settings(siteconfig):
+    """Apply the site administrator settings.
+
+    Args:
+        siteconfig (djblets.siteconfig.models.SiteConfiguration):
+            The site configuration.
+    """
+    _apply_setting(siteconfig, "ADMINS", None, (
         (siteconfig.get("site_admin_name", ""),
          siteconfig.get("site_admin_email", "")),
     ))
 
-    apply_setting("MANAGERS", None, settings.ADMINS)
+    _apply_setting(siteconfig, "MANAGERS", None, settings.ADMINS)
 
     # Explicitly base this off the STATIC_URL
-    apply_setting("ADMIN_MEDIA_PREFIX", None, settings.STATIC_URL + "admin/")
+    _apply_setting(siteconfig, "ADMIN_MEDIA_PREFIX", None,
+                   settings.STATIC_URL + "admin/")
+
+
+def _apply_auth_settings(siteconfig):
+    """Apply the authentication backend settings.
+
+    Args:
+        siteconfig (djblets.siteconfig.models.SiteConfiguration):
+            The site configuration.
+
+    Returns:
+        bool:
+        Whether the site configuration was modified and must be saved.
+    """
+    dirty = False
 
     # Set the auth backends
     auth_backend_id = siteconfig.settings.get("auth_backend", "builtin")
@@ -396,6 +632,16 @@ def load_site_config(full_reload=False):
             '.WebAPIOAuth2TokenAuthBackend',
         )
 
+    return dirty
+
+
+def _apply_storage_settings(siteconfig):
+    """Apply the file storage backend settings.
+
+    Args:
+        siteconfig (djblets.siteconfig.models.SiteConfiguration):
+            The site configuration.
+    """
     # Set the storage backend
     storage_backend = siteconfig.settings.get('storage_backend', 'builtin')
 
@@ -430,22 +676,53 @@ def load_site_config(full_reload=False):
     settings.SWIFT_CONTAINER_NAME = six.text_type(
         siteconfig.get('swift_container_name'))
 
+
+def _apply_domain_method(siteconfig):
+    """Apply the HTTP/HTTPS domain method to the environment.
+
+    Args:
+        siteconfig (djblets.siteconfig.models.SiteConfiguration):
+            The site configuration.
+    """
     if siteconfig.settings.get('site_domain_method', 'http') == 'https':
         os.environ[str('HTTPS')] = str('on')
     else:
         os.environ[str('HTTPS')] = str('off')
 
-    # Migrate over any legacy avatar backend settings.
-    if avatar_services.migrate_settings(siteconfig):
-        dirty = True
 
-    # Save back changes if they have been made
-    if dirty:
-        siteconfig.save()
+def _restart_logging(siteconfig):
+    """Restart logging with the new logging settings.
 
-    # Reload privacy consent requirements
+    Args:
+        siteconfig (djblets.siteconfig.models.SiteConfiguration):
+            The site configuration. This is unused.
+    """
+    if not getattr(settings, 'RUNNING_TEST', False):
+        restart_logging()
+
+
+def _recompute_privacy_consents(siteconfig):
+    """Recompute the privacy consent requirements.
+
+    Args:
+        siteconfig (djblets.siteconfig.models.SiteConfiguration):
+            The site configuration. This is unused.
+    """
     recompute_privacy_consents()
 
-    site_settings_loaded.send(sender=None)
 
-    return siteconfig
+#: Handlers that apply changes to settings in partial reloads.
+#:
+#: Each is a tuple of the prefixes of the siteconfig keys the handler
+#: depends on, and the handler. Handlers may return ``True`` if they modified
+#: the site configuration and it must be saved.
+_reload_handlers = [
+    (tuple(log_siteconfig.settings_map), _restart_logging),
+    (('search_',), _apply_search_settings),
+    (('site_admin_', 'site_static_url'), _apply_admin_settings),
+    (('auth_', SiteConfigFeatureChecker.siteconfig_key),
+     _apply_auth_settings),
+    (('storage_backend', 'aws_', 'swift_'), _apply_storage_settings),
+    (('site_domain_method',), _apply_domain_method),
+    (('privacy_',), _recompute_privacy_consents),
+]
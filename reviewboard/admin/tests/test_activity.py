@@ -0,0 +1,143 @@
+"""Unit tests for reviewboard.admin.activity."""
+
+from __future__ import unicode_literals
+
+import datetime
+import time
+
+from django.utils import timezone
+from djblets.siteconfig.models import SiteConfiguration
+
+from reviewboard.admin.activity import (ROLLUPS_READY_SITECONFIG_KEY,
+                                        get_activity_data,
+                                        rebuild_activity,
+                                        rollups_ready,
+                                        update_activity)
+from reviewboard.admin.models import DailyActivity
+from reviewboard.testing.testcase import TestCase
+
+
+class ActivityRollupTests(TestCase):
+    """Unit tests for the admin dashboard activity rollups."""
+
+    fixtures = ['test_users']
+
+    def setUp(self):
+        super(ActivityRollupTests, self).setUp()
+
+        self.timestamp = datetime.datetime(2019, 6, 1, 12, 0, 0,
+                                           tzinfo=timezone.utc)
+
+    def test_update_activity(self):
+        """Testing update_activity"""
+        update_activity('reviews', self.timestamp)
+        update_activity('reviews', self.timestamp)
+
+        rollup = DailyActivity.objects.get(activity_type='reviews',
+                                           date=datetime.date(2019, 6, 1))
+        self.assertEqual(rollup.count, 2)
+
+        update_activity('reviews', self.timestamp, delta=-1)
+
+        rollup = DailyActivity.objects.get(pk=rollup.pk)
+        self.assertEqual(rollup.count, 1)
+
+    def test_update_activity_with_negative_missing(self):
+        """Testing update_activity with a negative delta and no existing
+        rollup
+        """
+        update_activity('reviews', self.timestamp, delta=-1)
+
+        self.assertFalse(DailyActivity.objects.exists())
+
+    def test_signals(self):
+        """Testing activity rollups are updated when objects are created and
+        deleted
+        """
+        DailyActivity.objects.all().delete()
+
+        review_request = self.create_review_request(publish=True)
+        date = review_request.time_added.date()
+
+        self.assertEqual(
+            DailyActivity.objects.get(activity_type='review_requests',
+                                      date=date).count,
+            1)
+
+        review_request.delete()
+
+        self.assertEqual(
+            DailyActivity.objects.get(activity_type='review_requests',
+                                      date=date).count,
+            0)
+
+    def test_rebuild_activity(self):
+        """Testing rebuild_activity"""
+        review_request = self.create_review_request(
+            publish=True,
+            time_added=self.timestamp)
+        self.create_review(review_request, timestamp=self.timestamp,
+                           publish=True)
+
+        DailyActivity.objects.all().delete()
+
+        siteconfig = SiteConfiguration.objects.get_current()
+        siteconfig.set(ROLLUPS_READY_SITECONFIG_KEY, False)
+        siteconfig.save()
+
+        self.assertFalse(rollups_ready())
+
+        rebuild_activity()
+
+        self.assertTrue(rollups_ready())
+        self.assertEqual(
+            sorted(DailyActivity.objects.values_list('activity_type', 'date',
+                                                     'count')),
+            [
+                ('review_requests', datetime.date(2019, 6, 1), 1),
+                ('reviews', datetime.date(2019, 6, 1), 1),
+            ])
+
+    def test_get_activity_data(self):
+        """Testing get_activity_data with rollups"""
+        rebuild_activity()
+        update_activity('comments', self.timestamp, delta=3)
+
+        data = get_activity_data(self.timestamp - datetime.timedelta(days=1),
+                                 self.timestamp + datetime.timedelta(days=1))
+
+        self.assertEqual(data['comments'], [
+            [self._get_timestamp_ms(datetime.date(2019, 6, 1)), 3],
+        ])
+        self.assertEqual(data['reviews'], [])
+        self.assertEqual(data['review_requests'], [])
+        self.assertEqual(data['change_descriptions'], [])
+
+    def test_get_activity_data_without_rollups(self):
+        """Testing get_activity_data without built rollups"""
+        siteconfig = SiteConfiguration.objects.get_current()
+        siteconfig.set(ROLLUPS_READY_SITECONFIG_KEY, False)
+        siteconfig.save()
+
+        self.create_review_request(publish=True, time_added=self.timestamp)
+        DailyActivity.objects.all().delete()
+
+        data = get_activity_data(self.timestamp - datetime.timedelta(days=1),
+                                 self.timestamp + datetime.timedelta(days=1))
+
+        self.assertEqual(data['review_requests'], [
+            [self._get_timestamp_ms(datetime.date(2019, 6, 1)), 1],
+        ])
+
+    def _get_timestamp_ms(self, date):
+        """Return the graph timestamp for a date.
+
+        Args:
+            date (datetime.date):
+                The date.
+
+        Returns:
+            float:
+            The timestamp in milliseconds.
+        """
+        return time.mktime(date.timetuple()) * 1000
@@ -0,0 +1,42 @@
+"""Unit tests for reviewboard.admin.middleware.InitReviewBoardMiddleware."""
+
+from __future__ import unicode_literals
+
+from django.test.client import RequestFactory
+from kgb import SpyAgency
+
+import reviewboard
+from reviewboard.admin.middleware import InitReviewBoardMiddleware
+from reviewboard.testing.testcase import TestCase
+
+
+class InitReviewBoardMiddlewareTests(SpyAgency, TestCase):
+    """Unit tests for InitReviewBoardMiddleware."""
+
+    def setUp(self):
+        super(InitReviewBoardMiddlewareTests, self).setUp()
+
+        self.middleware = InitReviewBoardMiddleware()
+        self.request = RequestFactory().get('/')
+        self.spy_on(reviewboard.initialize, call_original=False)
+
+    def test_process_request(self):
+        """Testing InitReviewBoardMiddleware.process_request initializes
+        Review Board once
+        """
+        self.spy_on(reviewboard.is_initialized, call_fake=lambda: False)
+
+        self.middleware.process_request(self.request)
+        self.middleware.process_request(self.request)
+
+        self.assertEqual(len(reviewboard.initialize.calls), 1)
+
+    def test_process_request_when_warmed_up(self):
+        """Testing InitReviewBoardMiddleware.process_request when Review Board
+        was initialized before the first request
+        """
+        self.spy_on(reviewboard.is_initialized, call_fake=lambda: True)
+
+        self.middleware.process_request(self.request)
+
+        self.assertFalse(reviewboard.initialize.called)
@@ -0,0 +1,156 @@
+"""Unit tests for reviewboard.admin.request_timing."""
+
+from __future__ import unicode_literals
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test.client import RequestFactory
+
+from reviewboard.admin.request_timing import (RequestStatsAggregator,
+                                              RequestTimer,
+                                              RequestTimingMiddleware,
+                                              get_request_timer,
+                                              request_stats,
+                                              timed_phase)
+from reviewboard.admin.widgets import RequestTimingWidget
+from reviewboard.testing.testcase import TestCase
+
+
+class RequestTimerTests(TestCase):
+    """Unit tests for RequestTimer."""
+
+    def test_get_server_timing(self):
+        """Testing RequestTimer.get_server_timing"""
+        timer = RequestTimer()
+        timer.add_phase('middleware', 0.01)
+        timer.add_phase('middleware', 0.02)
+        timer.add_phase('view', 0.1)
+        timer.sql_count = 3
+        timer.sql_secs = 0.05
+        timer.cache_hits = 4
+        timer.cache_misses = 1
+        timer.cache_secs = 0.002
+
+        self.assertEqual(
+            timer.get_server_timing(0.25),
+            'middleware;dur=30.0, view;dur=100.0, '
+            'sql;dur=50.0;desc="3 queries", '
+            'cache;dur=2.0;desc="4 hits, 1 misses", '
+            'total;dur=250.0')
+
+
+class RequestTimingMiddlewareTests(TestCase):
+    """Unit tests for RequestTimingMiddleware."""
+
+    fixtures = ['test_users']
+
+    def setUp(self):
+        super(RequestTimingMiddlewareTests, self).setUp()
+
+        request_stats.reset()
+
+    def test_init_when_disabled(self):
+        """Testing RequestTimingMiddleware is unused when request timing is
+        disabled
+        """
+        with self.settings(REQUEST_TIMING_ENABLED=False):
+            with self.assertRaises(MiddlewareNotUsed):
+                RequestTimingMiddleware()
+
+    def test_request(self):
+        """Testing RequestTimingMiddleware records timings for a request"""
+        with self.settings(REQUEST_TIMING_ENABLED=True):
+            middleware = RequestTimingMiddleware()
+
+        request = RequestFactory().get('/')
+
+        middleware.process_request(request)
+        timer = get_request_timer()
+        self.assertIsNotNone(timer)
+
+        with timed_phase('test'):
+            list(User.objects.all())
+
+        cache.set('request-timing-test', 1)
+        cache.get('request-timing-test')
+        cache.get('request-timing-missing')
+
+        middleware.process_view(request, lambda request: None, (), {})
+
+        response = middleware.process_response(request, HttpResponse())
+
+        self.assertIsNone(get_request_timer())
+        self.assertEqual(list(timer.phases), ['test', 'middleware', 'view'])
+        self.assertGreaterEqual(timer.sql_count, 1)
+        self.assertEqual(timer.cache_hits, 1)
+        self.assertEqual(timer.cache_misses, 1)
+        self.assertIn('Server-Timing', response)
+        self.assertIn('cache;dur=', response['Server-Timing'])
+
+        stats = request_stats.get_stats()
+        self.assertEqual(stats['(unresolved)']['count'], 1)
+
+
+class RequestStatsAggregatorTests(TestCase):
+    """Unit tests for RequestStatsAggregator."""
+
+    def test_get_stats(self):
+        """Testing RequestStatsAggregator.get_stats merges timings from all
+        processes
+        """
+        timer = RequestTimer()
+        timer.sql_count = 2
+        timer.sql_secs = 0.5
+        timer.cache_hits = 3
+
+        aggregator1 = RequestStatsAggregator()
+        aggregator1.record('view1', timer, 1.0)
+        aggregator1.record('view1', timer, 2.0)
+        aggregator1.flush()
+
+        aggregator2 = RequestStatsAggregator()
+        aggregator2.record('view1', timer, 4.0)
+        aggregator2.record('view2', timer, 1.0)
+
+        self.assertEqual(aggregator2.get_stats(), {
+            'view1': {
+                'count': 3,
+                'total_secs': 7.0,
+                'max_secs': 4.0,
+                'avg_secs': 7.0 / 3,
+                'sql_count': 6,
+                'sql_secs': 1.5,
+                'cache_hits': 9,
+                'cache_misses': 0,
+            },
+            'view2': {
+                'count': 1,
+                'total_secs': 1.0,
+                'max_secs': 1.0,
+                'avg_secs': 1.0,
+                'sql_count': 2,
+                'sql_secs': 0.5,
+                'cache_hits': 3,
+                'cache_misses': 0,
+            },
+        })
+
+        aggregator2.reset()
+        self.assertEqual(aggregator1.get_stats(), {})
+
+
+class RequestTimingWidgetTests(TestCase):
+    """Unit tests for RequestTimingWidget."""
+
+    def test_can_render(self):
+        """Testing RequestTimingWidget.can_render"""
+        widget = RequestTimingWidget()
+        request = RequestFactory().get('/')
+
+        with self.settings(REQUEST_TIMING_ENABLED=False):
+            self.assertFalse(widget.can_render(request))
+
+        with self.settings(REQUEST_TIMING_ENABLED=True):
+            self.assertTrue(widget.can_render(request))
@@ -0,0 +1,68 @@
+"""Unit tests for reviewboard.admin.siteconfig."""
+
+from __future__ import unicode_literals
+
+from django.conf import settings
+from djblets.siteconfig.models import SiteConfiguration
+from kgb import SpyAgency
+
+from reviewboard.admin import siteconfig as siteconfig_module
+from reviewboard.admin.siteconfig import (get_reload_stats,
+                                          load_site_config,
+                                          reload_site_config)
+from reviewboard.testing.testcase import TestCase
+
+
+class ReloadSiteConfigTests(SpyAgency, TestCase):
+    """Unit tests for reload_site_config."""
+
+    def setUp(self):
+        super(ReloadSiteConfigTests, self).setUp()
+
+        self.siteconfig = SiteConfiguration.objects.get_current()
+
+    def tearDown(self):
+        super(ReloadSiteConfigTests, self).tearDown()
+
+        load_site_config()
+
+    def test_without_loaded_settings(self):
+        """Testing reload_site_config performs a full reload when settings
+        haven't been loaded yet
+        """
+        self.spy_on(load_site_config)
+        siteconfig_module._loaded_settings = None
+
+        self.assertIsNone(reload_site_config(self.siteconfig))
+        self.assertTrue(load_site_config.called)
+        self.assertEqual(get_reload_stats()['full']['count'], 1)
+
+    def test_with_unchanged_settings(self):
+        """Testing reload_site_config with no changed settings"""
+        load_site_config()
+        self.spy_on(siteconfig_module._apply_auth_settings)
+
+        self.assertEqual(reload_site_config(self.siteconfig), set())
+        self.assertFalse(siteconfig_module._apply_auth_settings.called)
+        self.assertEqual(get_reload_stats()['unchanged']['count'], 1)
+
+    def test_with_changed_settings(self):
+        """Testing reload_site_config applies only changed settings"""
+        with self.siteconfig_settings({'site_admin_name': 'Admin'}):
+            self.spy_on(siteconfig_module._apply_admin_settings)
+            self.spy_on(siteconfig_module._apply_auth_settings)
+            self.spy_on(siteconfig_module._apply_storage_settings)
+
+            self.siteconfig.set('site_admin_name', 'New Admin')
+
+            self.assertEqual(reload_site_config(self.siteconfig),
+                             {'site_admin_name'})
+            self.assertTrue(siteconfig_module._apply_admin_settings.called)
+            self.assertFalse(siteconfig_module._apply_auth_settings.called)
+            self.assertFalse(
+                siteconfig_module._apply_storage_settings.called)
+            self.assertEqual(settings.ADMINS[0][0], 'New Admin')
+            self.assertEqual(get_reload_stats()['partial']['count'], 1)
+
+            # The change is now part of the loaded settings.
+            self.assertEqual(reload_site_config(self.siteconfig), set())
@@ -7,7 +7,8 @@ import warnings
 
 from django.core.cache import cache
 from django.contrib.auth.models import User
-from django.db.models.aggregates import Count
+from django.db.models import Case, IntegerField, When
+from django.db.models.aggregates import Count, Sum
 from django.db.models.signals import post_save, post_delete
 from django.utils import six, timezone
 from django.utils.translation import ugettext_lazy as _
@@ -21,11 +22,14 @@ from djblets.registries.registry import (ALREADY_REGISTERED,
 from djblets.util.compat.django.template.loader import render_to_string
 from djblets.util.decorators import augment_method_from
 
+from reviewboard.admin.activity import (get_activity_data,
+                                        init_activity_rollups)
 from reviewboard.admin.cache_stats import get_cache_stats
-from reviewboard.changedescs.models import ChangeDescription
+from reviewboard.admin.request_timing import (is_request_timing_enabled,
+                                              request_stats)
+from reviewboard.admin.siteconfig import RELOAD_TYPES, get_reload_stats
 from reviewboard.deprecation import RemovedInReviewBoard50Warning
-from reviewboard.reviews.models import (ReviewRequest, Group,
-                                        Comment, Review)
+from reviewboard.reviews.models import Group
 from reviewboard.scmtools.models import Repository
 
 
@@ -351,6 +355,7 @@ class AdminWidgetsRegistry(OrderedRegistry):
             RepositoriesWidget,
             UserActivityWidget,
             ServerCacheWidget,
+            RequestTimingWidget,
         ]
 
 
@@ -385,6 +390,9 @@ class UserActivityWidget(BaseAdminWidget):
     js_view_class = 'RB.Admin.UserActivityWidgetView'
     css_classes = 'rb-c-admin-user-activity-widget'
 
+    #: The number of seconds the computed activity is cached for.
+    CACHE_EXPIRATION_SECS = 5 * 60
+
     def get_js_model_attrs(self, request):
         """Return data for the JavaScript model.
 
@@ -399,8 +407,21 @@ class UserActivityWidget(BaseAdminWidget):
             dict:
             Data for the JavaScript model,.
         """
+        return cache_memoize('admin-user-activity',
+                             self._compute_user_activity,
+                             expiration=self.CACHE_EXPIRATION_SECS)
+
+    def _compute_user_activity(self):
+        """Compute the user activity counts.
+
+        All counts are computed in a single aggregate query over the users
+        table, rather than one query per time range.
+
+        Returns:
+            dict:
+            The activity counts for each time range.
+        """
         now = timezone.now()
-        users = User.objects
 
         week = datetime.timedelta(days=7)
         day = datetime.timedelta(days=1)
@@ -408,20 +429,27 @@ class UserActivityWidget(BaseAdminWidget):
         two_months = datetime.timedelta(days=60)
         three_months = datetime.timedelta(days=90)
 
-        one_day = (now - week, now + day)
-        seven_days = (now - month, now - week)
-        thirty_days = (now - two_months, now - month)
-        sixty_days = (now - three_months, now - two_months)
-        ninety_days = now - three_months
-
-        return {
-            'now': users.filter(last_login__range=one_day).count(),
-            'sevenDays': users.filter(last_login__range=seven_days).count(),
-            'thirtyDays': users.filter(last_login__range=thirty_days).count(),
-            'sixtyDays': users.filter(last_login__range=sixty_days).count(),
-            'ninetyDays': users.filter(last_login__lte=ninety_days).count(),
-            'total': users.count()
-        }
+        def _count_when(**lookup):
+            return Sum(Case(When(then=1, **lookup),
+                            default=0,
+                            output_field=IntegerField()))
+
+        counts = User.objects.aggregate(
+            now=_count_when(last_login__range=(now - week, now + day)),
+            sevenDays=_count_when(last_login__range=(now - month,
+                                                     now - week)),
+            thirtyDays=_count_when(last_login__range=(now - two_months,
+                                                      now - month)),
+            sixtyDays=_count_when(last_login__range=(now - three_months,
+                                                     now - two_months)),
+            ninetyDays=_count_when(last_login__lte=now - three_months),
+            total=Count('pk'))
+
+        # Sum() returns None when there are no users at all.
+        return dict(
+            (key, value or 0)
+            for key, value in six.iteritems(counts)
+        )
 
 
 class RepositoriesWidget(Widget):
@@ -501,6 +529,83 @@ class ServerCacheWidget(Widget):
         }
 
 
+class RequestTimingWidget(BaseAdminWidget):
+    """A widget displaying the slowest views, based on request timings.
+
+    This is only shown when request timing is enabled (see
+    :py:mod:`reviewboard.admin.request_timing`).
+    """
+
+    widget_id = 'request-timing-widget'
+    name = _('Request Timing')
+    template_name = 'admin/widgets/w-request-timing.html'
+    css_classes = 'rb-c-admin-request-timing-widget'
+
+    #: The maximum number of views to show.
+    MAX_VIEWS = 10
+
+    def can_render(self, request):
+        """Return whether the widget can be rendered in the dashboard.
+
+        Args:
+            request (django.http.HttpRequest):
+                The HTTP request from the client.
+
+        Returns:
+            bool:
+            ``True`` if request timing is enabled.
+        """
+        return is_request_timing_enabled()
+
+    def get_extra_context(self, request):
+        """Return extra context for the template.
+
+        Args:
+            request (django.http.HttpRequest):
+                The HTTP request from the client.
+
+        Returns:
+            dict:
+            The stats for the views with the most total time spent on them.
+        """
+        all_stats = request_stats.get_stats()
+        view_names = sorted(
+            all_stats,
+            key=lambda view_name: all_stats[view_name]['total_secs'],
+            reverse=True)
+        view_stats = []
+
+        for view_name in view_names[:self.MAX_VIEWS]:
+            stats = all_stats[view_name]
+            count = stats['count']
+
+            view_stats.append({
+                'view_name': view_name,
+                'count': count,
+                'avg_ms': int(stats['avg_secs'] * 1000),
+                'max_ms': int(stats['max_secs'] * 1000),
+                'avg_sql_count': stats['sql_count'] // count,
+                'avg_sql_ms': int(stats['sql_secs'] * 1000 / count),
+                'cache_hits': stats['cache_hits'],
+                'cache_misses': stats['cache_misses'],
+            })
+
+        reload_stats = get_reload_stats()
+
+        return {
+            'view_stats': view_stats,
+            'siteconfig_reloads': [
+                {
+                    'reload_type': reload_type,
+                    'count': reload_stats[reload_type]['count'],
+                    'total_ms': int(
+                        reload_stats[reload_type]['total_secs'] * 1000),
+                }
+                for reload_type in RELOAD_TYPES
+            ],
+        }
+
+
 class NewsWidget(BaseAdminWidget):
     """A widget displaying the latest Review Board news headlines."""
 
@@ -576,53 +681,9 @@ def dynamic_activity_data(request):
         "range_end": new_range_end.strftime("%Y-%m-%d")
     }
 
-    def large_stats_data(range_start, range_end):
-        def get_objects(model_name, timestamp_field, date_field):
-            """Perform timestamp based queries.
-
-            This method receives a dynamic model name and performs a filter
-            query. Later the results are grouped by day and prepared for the
-            charting library.
-            """
-            args = '%s__range' % timestamp_field
-            q = model_name.objects.filter(**{
-                args: (range_start, range_end)
-            })
-            q = q.extra({timestamp_field: date_field})
-            q = q.values(timestamp_field)
-            q = q.annotate(created_count=Count('pk'))
-            q = q.order_by(timestamp_field)
-
-            data = []
-
-            for obj in q:
-                data.append([
-                    time.mktime(time.strptime(
-                        six.text_type(obj[timestamp_field]),
-                        "%Y-%m-%d")) * 1000,
-                    obj['created_count']
-                ])
-
-            return data
-
-        comment_array = get_objects(Comment, "timestamp", "date(timestamp)")
-        change_desc_array = get_objects(ChangeDescription, "timestamp",
-                                        "date(timestamp)")
-        review_array = get_objects(Review, "timestamp", "date(timestamp)")
-        rr_array = get_objects(ReviewRequest, "time_added", "date(time_added)")
-
-        return {
-            'change_descriptions': change_desc_array,
-            'comments': comment_array,
-            'reviews': review_array,
-            'review_requests': rr_array
-        }
-
-    stats_data = large_stats_data(new_range_start, new_range_end)
-
     return {
         "range": response_data,
-        "activity_data": stats_data
+        "activity_data": get_activity_data(new_range_start, new_range_end),
     }
 
 
@@ -634,7 +695,8 @@ class ActivityGraphWidget(Widget):
 
     This widget shows a daily view of creation activity for a list of models.
     All displayed widget data is computed on demand, rather than up-front
-    during creation of the widget.
+    during creation of the widget. Daily counts are read from the activity
+    rollups (see :py:mod:`reviewboard.admin.activity`).
     """
 
     widget_id = 'activity-graph-widget'
@@ -683,6 +745,8 @@ def init_widgets():
     post_delete.connect(_increment_sync_num, sender=Group)
     post_delete.connect(_increment_sync_num, sender=Repository)
 
+    init_activity_rollups()
+
 
 def register_admin_widget(widget_cls, primary=False):
     """Register an administration widget.
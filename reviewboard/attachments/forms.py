@@ -4,10 +4,12 @@ from uuid import uuid4
 import os
 
 from django import forms
+from django.db import transaction
 
 from reviewboard.attachments.mimetypes import get_uploaded_file_mimetype
 from reviewboard.attachments.models import (FileAttachment,
                                             FileAttachmentHistory)
+from reviewboard.attachments.thumbnails import queue_thumbnail_generation
 from reviewboard.reviews.models import ReviewRequestDraft
 
 
@@ -129,11 +131,15 @@ class UploadFileForm(forms.Form):
         else:
             file_attachment = FileAttachment(**attachment_kwargs)
 
-        file_attachment.file.save(filename, file_obj, save=True)
+        # Thumbnail generation is queued when this commits, once the file
+        # attachment has an ID.
+        with transaction.atomic():
+            queue_thumbnail_generation(file_attachment)
+            file_attachment.file.save(filename, file_obj, save=True)
 
-        draft = ReviewRequestDraft.create(self.review_request)
-        draft.file_attachments.add(file_attachment)
-        draft.save()
+            draft = ReviewRequestDraft.create(self.review_request)
+            draft.file_attachments.add(file_attachment)
+            draft.save()
 
         return file_attachment
 
@@ -10,8 +10,9 @@ import subprocess
 import mimeparse
 from django.contrib.staticfiles.storage import staticfiles_storage
 from django.contrib.staticfiles.templatetags.staticfiles import static
+from django.core.files.base import ContentFile
 from django.utils.html import format_html, format_html_join
-from django.utils.encoding import smart_str, force_text
+from django.utils.encoding import force_bytes, force_text, smart_str
 from django.utils.safestring import mark_safe
 from djblets.cache.backend import cache_memoize
 from djblets.util.filesystem import is_exe_in_path
@@ -269,6 +270,13 @@ class MimetypeHandler(object):
     #: size thumbnails they should generate.
     use_hd_thumbnails = True
 
+    #: Whether thumbnails are generated in the background after upload.
+    #:
+    #: If set, :py:meth:`generate_thumbnail` will be called in the background
+    #: for newly-uploaded files, and :py:meth:`get_pending_thumbnail` will be
+    #: displayed until it completes.
+    pregenerate_thumbnails = False
+
     def __init__(self, attachment, mimetype):
         """Initialize the handler.
 
@@ -393,6 +401,28 @@ class MimetypeHandler(object):
         """
         return mark_safe('<pre class="file-thumbnail"></pre>')
 
+    def get_pending_thumbnail(self):
+        """Return HTML for a placeholder while a thumbnail is generated.
+
+        Returns:
+            django.utils.safestring.SafeText:
+            The HTML for the placeholder thumbnail.
+        """
+        return mark_safe(
+            '<div class="file-thumbnail file-thumbnail-pending">'
+            ' <span class="fa fa-spinner fa-pulse" aria-hidden="true"></span>'
+            '</div>')
+
+    def generate_thumbnail(self):
+        """Generate and store the thumbnail for the attachment.
+
+        This is called in the background for newly-uploaded files if
+        :py:attr:`pregenerate_thumbnails` is set. Subclasses should store the
+        thumbnail such that :py:meth:`get_thumbnail` can return it without
+        having to generate it.
+        """
+        pass
+
     def set_thumbnail(self):
         """Set the thumbnail data for this attachment.
 
@@ -409,10 +439,23 @@ class ImageMimetype(MimetypeHandler):
     """Handles image mimetypes."""
 
     supported_mimetypes = ['image/*']
+    pregenerate_thumbnails = True
+
+    def generate_thumbnail(self):
+        """Generate and store the thumbnails of the image.
+
+        The thumbnails are stored alongside the image, where
+        :py:meth:`get_thumbnail` will find them.
+        """
+        thumbnail(self.attachment.file, (300, None))
+        thumbnail(self.attachment.file, (600, None))
 
     def get_thumbnail(self):
         """Return a thumbnail of the image.
 
+        The thumbnails will be generated if they haven't already been
+        stored.
+
         Returns:
             django.utils.safestring.SafeText:
             The HTML for the thumbnail for the associated attachment.
@@ -438,6 +481,7 @@ class TextMimetype(MimetypeHandler):
         'text/*',
         'application/x-javascript',
     ]
+    pregenerate_thumbnails = True
 
     # Read up to 'FILE_CROP_CHAR_LIMIT' number of characters from
     # the file attachment to prevent long reads caused by malicious
@@ -514,10 +558,28 @@ class TextMimetype(MimetypeHandler):
             '</div>',
             self._generate_preview_html(data))
 
+    def generate_thumbnail(self):
+        """Generate and store the thumbnail of the text file.
+
+        The HTML for the thumbnail is stored in a file alongside the
+        attachment.
+        """
+        storage = self.attachment.file.storage
+        name = self._get_stored_thumbnail_name()
+
+        if storage.exists(name):
+            storage.delete(name)
+
+        html = self._generate_thumbnail()
+
+        storage.save(name, ContentFile(force_bytes(html)))
+
     def get_thumbnail(self):
         """Return the thumbnail of the text file as rendered as html.
 
-        The content will be generated and then cached for future requests.
+        The content will be loaded from the stored thumbnail, if one has been
+        generated, or generated otherwise. It will then be cached for future
+        requests.
 
         Returns:
             django.utils.safestring.SafeText:
@@ -530,7 +592,39 @@ class TextMimetype(MimetypeHandler):
         return mark_safe(
             cache_memoize('file-attachment-thumbnail-%s-html-%s'
                           % (self.__class__.__name__, self.attachment.pk),
-                          self._generate_thumbnail))
+                          self._get_thumbnail_uncached))
+
+    def _get_thumbnail_uncached(self):
+        """Return the HTML for the thumbnail, without caching.
+
+        Returns:
+            unicode:
+            The HTML for the thumbnail.
+        """
+        from reviewboard.attachments.models import FileAttachment
+
+        if (self.attachment.thumbnail_state ==
+            FileAttachment.THUMBNAIL_STATE_READY):
+            storage = self.attachment.file.storage
+
+            try:
+                with storage.open(self._get_stored_thumbnail_name()) as fp:
+                    return force_text(fp.read())
+            except (EnvironmentError, ValueError) as e:
+                logging.warning('Unable to load the stored thumbnail for '
+                                'file attachment %s: %s',
+                                self.attachment.pk, e)
+
+        return self._generate_thumbnail()
+
+    def _get_stored_thumbnail_name(self):
+        """Return the storage name of the generated thumbnail.
+
+        Returns:
+            unicode:
+            The name of the thumbnail file in storage.
+        """
+        return '%s.thumbnail.html' % self.attachment.file.name
 
 
 class ReStructuredTextMimetype(TextMimetype):
@@ -67,6 +67,21 @@ class FileAttachment(models.Model):
     :py:class:`reviewboard.reviews.models.FileAttachmentComment`.
     """
 
+    #: The thumbnail is being generated in the background.
+    THUMBNAIL_STATE_PENDING = 'P'
+
+    #: The thumbnail has been generated and stored.
+    THUMBNAIL_STATE_READY = 'R'
+
+    #: Generating the thumbnail failed.
+    THUMBNAIL_STATE_FAILED = 'F'
+
+    THUMBNAIL_STATE_CHOICES = (
+        (THUMBNAIL_STATE_PENDING, _('Pending')),
+        (THUMBNAIL_STATE_READY, _('Ready')),
+        (THUMBNAIL_STATE_FAILED, _('Failed')),
+    )
+
     caption = models.CharField(_('caption'), max_length=256, blank=True)
     draft_caption = models.CharField(_('draft caption'),
                                      max_length=256, blank=True)
@@ -121,6 +136,15 @@ class FileAttachment(models.Model):
                                            related_name='file_attachments')
     attachment_revision = models.IntegerField(default=0)
 
+    # The state of the thumbnail generated in the background when the file
+    # was uploaded. This is None for attachments whose thumbnails are
+    # generated when first displayed.
+    thumbnail_state = models.CharField(_('thumbnail state'),
+                                       max_length=1,
+                                       choices=THUMBNAIL_STATE_CHOICES,
+                                       blank=True,
+                                       null=True)
+
     objects = FileAttachmentManager()
 
     @property
@@ -141,11 +165,24 @@ class FileAttachment(models.Model):
         return self._review_ui
 
     def _get_thumbnail(self):
-        """Return the thumbnail for display."""
+        """Return the thumbnail for display.
+
+        If the thumbnail is still being generated in the background, a
+        placeholder is returned instead. If it was queued but never generated
+        (for instance, if the uploading process exited), it will be generated
+        now.
+        """
         if not self.mimetype_handler:
             return None
 
         try:
+            if self.thumbnail_state == self.THUMBNAIL_STATE_PENDING:
+                from reviewboard.attachments.thumbnails import \
+                    generate_stale_pending_thumbnail
+
+                if not generate_stale_pending_thumbnail(self):
+                    return self.mimetype_handler.get_pending_thumbnail()
+
             return self.mimetype_handler.get_thumbnail()
         except Exception as e:
             logging.error('Error when calling get_thumbnail for '
@@ -7,6 +7,8 @@ from django.conf import settings
 from django.contrib.auth.models import AnonymousUser, User
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import transaction
+from django.test import TransactionTestCase
 from django.utils.safestring import SafeText
 from djblets.testing.decorators import add_fixtures
 from kgb import SpyAgency
@@ -18,7 +20,10 @@ from reviewboard.attachments.mimetypes import (MimetypeHandler,
                                                unregister_mimetype_handler)
 from reviewboard.attachments.models import (FileAttachment,
                                             FileAttachmentHistory)
+from reviewboard.attachments.thumbnails import (generate_thumbnail,
+                                                get_thumbnail_generator)
 from reviewboard.diffviewer.models import DiffSet, DiffSetHistory, FileDiff
+from reviewboard.reviews.models import ReviewRequest
 from reviewboard.scmtools.core import PRE_CREATION
 from reviewboard.site.models import LocalSite
 from reviewboard.testing import TestCase
@@ -791,6 +796,7 @@ class TextMimetypeTests(SpyAgency, TestCase):
         self.assertTrue(form.is_valid())
 
         self.file_attachment = form.create()
+        generate_thumbnail(self.file_attachment)
 
     def test_get_thumbnail_uncached_is_safe_text(self):
         """Testing TextMimetype.get_thumbnail string type is SafeText
@@ -814,3 +820,183 @@ class TextMimetypeTests(SpyAgency, TestCase):
         thumbnail = self.file_attachment.thumbnail
 
         self.assertIsInstance(thumbnail, SafeText)
+
+
+class ThumbnailGenerationTests(SpyAgency, BaseFileAttachmentTestCase):
+    """Unit tests for reviewboard.attachments.thumbnails."""
+
+    fixtures = ['test_users']
+
+    def setUp(self):
+        super(ThumbnailGenerationTests, self).setUp()
+
+        self.review_request = self.create_review_request(publish=True)
+
+        # Transactions are never committed in test cases, so collect the
+        # callbacks to run once the attachment is created, and keep the
+        # queue from being processed by worker threads.
+        self.on_commit_callbacks = []
+        self.spy_on(transaction.on_commit,
+                    call_fake=lambda func, *args, **kwargs: (
+                        self.on_commit_callbacks.append(func)))
+        cache.clear()
+
+        generator = get_thumbnail_generator()
+        self.spy_on(generator.queue_file_attachment,
+                    call_fake=lambda self, file_attachment_id: (
+                        self._queue.put(file_attachment_id)))
+
+    def test_upload_image(self):
+        """Testing uploading an image queues thumbnail generation"""
+        form = UploadFileForm(self.review_request, files={
+            'path': self.make_uploaded_file(),
+        })
+        self.assertTrue(form.is_valid())
+
+        file_attachment = self._create_from_form(form)
+        self.assertEqual(file_attachment.thumbnail_state,
+                         FileAttachment.THUMBNAIL_STATE_PENDING)
+        self.assertIn('file-thumbnail-pending', file_attachment.thumbnail)
+
+        self.assertEqual(get_thumbnail_generator().process_pending(), 1)
+
+        file_attachment = FileAttachment.objects.get(pk=file_attachment.pk)
+        self.assertEqual(file_attachment.thumbnail_state,
+                         FileAttachment.THUMBNAIL_STATE_READY)
+
+        storage = file_attachment.file.storage
+        basename = os.path.splitext(file_attachment.file.name)[0]
+        self.assertTrue(storage.exists('%s_300.png' % basename))
+        self.assertTrue(storage.exists('%s_600.png' % basename))
+        self.assertIn('<img src=', file_attachment.thumbnail)
+
+    def test_upload_text(self):
+        """Testing uploading a text file stores its thumbnail"""
+        uploaded_file = SimpleUploadedFile('test.txt',
+                                           b'This is a test',
+                                           content_type='text/plain')
+        form = UploadFileForm(self.review_request, files={
+            'path': uploaded_file,
+        })
+        self.assertTrue(form.is_valid())
+
+        file_attachment = self._create_from_form(form)
+        self.assertEqual(get_thumbnail_generator().process_pending(), 1)
+
+        file_attachment = FileAttachment.objects.get(pk=file_attachment.pk)
+        self.assertEqual(file_attachment.thumbnail_state,
+                         FileAttachment.THUMBNAIL_STATE_READY)
+
+        handler = file_attachment.mimetype_handler
+        self.spy_on(handler._generate_thumbnail)
+
+        self.assertIn('This is a test', file_attachment.thumbnail)
+        self.assertFalse(handler._generate_thumbnail.called)
+
+    def test_generate_thumbnail_with_error(self):
+        """Testing generate_thumbnail with an error generating the
+        thumbnail
+        """
+        file_attachment = self.create_file_attachment(
+            self.review_request,
+            thumbnail_state=FileAttachment.THUMBNAIL_STATE_PENDING)
+
+        def _generate_thumbnail(handler):
+            raise IOError('Oh no')
+
+        self.spy_on(file_attachment.mimetype_handler.generate_thumbnail,
+                    call_fake=_generate_thumbnail)
+
+        generate_thumbnail(file_attachment)
+
+        file_attachment = FileAttachment.objects.get(pk=file_attachment.pk)
+        self.assertEqual(file_attachment.thumbnail_state,
+                         FileAttachment.THUMBNAIL_STATE_FAILED)
+
+    def test_get_thumbnail_with_stale_pending(self):
+        """Testing FileAttachment.thumbnail with a pending thumbnail that was
+        never generated
+        """
+        uploaded_file = SimpleUploadedFile('test.txt',
+                                           b'This is a test',
+                                           content_type='text/plain')
+        form = UploadFileForm(self.review_request, files={
+            'path': uploaded_file,
+        })
+        self.assertTrue(form.is_valid())
+
+        file_attachment = self._create_from_form(form)
+        self.assertIn('file-thumbnail-pending', file_attachment.thumbnail)
+
+        # Simulate the uploading process exiting before the queue was
+        # processed.
+        get_thumbnail_generator()._queue.get(block=False)
+        get_thumbnail_generator()._queue.task_done()
+        cache.clear()
+
+        file_attachment = FileAttachment.objects.get(pk=file_attachment.pk)
+        self.assertIn('This is a test', file_attachment.thumbnail)
+
+        file_attachment = FileAttachment.objects.get(pk=file_attachment.pk)
+        self.assertEqual(file_attachment.thumbnail_state,
+                         FileAttachment.THUMBNAIL_STATE_READY)
+
+    def _create_from_form(self, form):
+        """Create a file attachment from an upload form.
+
+        Callbacks for the transaction being committed will be run.
+
+        Args:
+            form (reviewboard.attachments.forms.UploadFileForm):
+                The validated form.
+
+        Returns:
+            reviewboard.attachments.models.FileAttachment:
+            The new file attachment.
+        """
+        file_attachment = form.create()
+
+        for callback in self.on_commit_callbacks:
+            callback()
+
+        self.on_commit_callbacks = []
+
+        return file_attachment
+
+
+class ThumbnailGenerationCommitTests(SpyAgency, TransactionTestCase):
+    """Unit tests for queuing thumbnail generation when uploads commit."""
+
+    serialized_rollback = True
+
+    def setUp(self):
+        super(ThumbnailGenerationCommitTests, self).setUp()
+
+        cache.clear()
+
+        self.queued_ids = []
+
+        generator = get_thumbnail_generator()
+        self.spy_on(generator.queue_file_attachment,
+                    call_fake=lambda generator, file_attachment_id: (
+                        self.queued_ids.append(file_attachment_id)))
+
+    def test_upload_queues_with_id(self):
+        """Testing uploading a file outside of a transaction queues
+        thumbnail generation with the saved attachment's ID
+        """
+        user = User.objects.create_user(username='test-user',
+                                        email='test-user@example.com')
+        review_request = ReviewRequest.objects.create(user, None)
+
+        form = UploadFileForm(review_request, files={
+            'path': SimpleUploadedFile('test.txt',
+                                       b'This is a test',
+                                       content_type='text/plain'),
+        })
+        self.assertTrue(form.is_valid())
+
+        file_attachment = form.create()
+
+        self.assertIsNotNone(file_attachment.pk)
+        self.assertEqual(self.queued_ids, [file_attachment.pk])
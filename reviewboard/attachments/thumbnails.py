@@ -0,0 +1,268 @@
+"""Background generation of file attachment thumbnails.
+
+Thumbnails for file attachments were normally generated the first time they
+were displayed, meaning that the first view of a review request with many
+new attachments had to resize every image or read and highlight every text
+file before the page could render.
+
+Newly-uploaded attachments whose mimetype handlers support it are instead
+marked as having a pending thumbnail, and the thumbnails are generated and
+stored in a background thread in the uploading process. A placeholder is
+shown until the thumbnail is ready.
+
+Queued attachments hold a lease in the cache for
+:py:data:`PENDING_TIMEOUT_SECS`. If the uploading process exits before the
+thumbnail is generated, the lease expires, and the thumbnail is generated the
+next time the attachment is displayed.
+"""
+
+from __future__ import unicode_literals
+
+import logging
+import threading
+
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.utils.six.moves import queue
+from djblets.cache.backend import make_cache_key
+
+from reviewboard.attachments.models import FileAttachment
+
+
+logger = logging.getLogger(__name__)
+
+
+#: The number of seconds a thumbnail can be pending before it's generated
+#: when displayed instead.
+PENDING_TIMEOUT_SECS = 5 * 60
+
+
+class ThumbnailGenerator(object):
+    """Generates thumbnails for file attachments in the background.
+
+    Attributes:
+        num_workers (int):
+            The number of worker threads to run.
+    """
+
+    def __init__(self, num_workers=1):
+        """Initialize the generator.
+
+        Args:
+            num_workers (int, optional):
+                The number of worker threads to run.
+        """
+        self.num_workers = num_workers
+
+        self._queue = queue.Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+
+    def queue_file_attachment(self, file_attachment_id,
+                              start_workers=True):
+        """Queue a file attachment for thumbnail generation.
+
+        Args:
+            file_attachment_id (int):
+                The ID of the file attachment.
+
+            start_workers (bool, optional):
+                Whether to start the worker threads, if not already running.
+                If ``False``, the queue must be processed with
+                :py:meth:`process_pending`.
+        """
+        self._queue.put(file_attachment_id)
+
+        if start_workers:
+            self._start_workers()
+
+    def process_pending(self):
+        """Generate thumbnails for all queued attachments in this thread.
+
+        Returns:
+            int:
+            The number of file attachments processed.
+        """
+        num_processed = 0
+
+        while True:
+            try:
+                file_attachment_id = self._queue.get(block=False)
+            except queue.Empty:
+                break
+
+            try:
+                self._process(file_attachment_id)
+                num_processed += 1
+            finally:
+                self._queue.task_done()
+
+        return num_processed
+
+    def _process(self, file_attachment_id):
+        """Generate the thumbnail for a queued file attachment.
+
+        Args:
+            file_attachment_id (int):
+                The ID of the file attachment.
+        """
+        try:
+            file_attachment = FileAttachment.objects.get(
+                pk=file_attachment_id)
+        except FileAttachment.DoesNotExist:
+            # The attachment was replaced or deleted before it was processed.
+            return
+
+        generate_thumbnail(file_attachment)
+
+    def _start_workers(self):
+        """Start the worker threads, if not already running."""
+        with self._lock:
+            self._workers = [
+                worker
+                for worker in self._workers
+                if worker.is_alive()
+            ]
+
+            while len(self._workers) < self.num_workers:
+                worker = threading.Thread(target=self._run_worker,
+                                          name='ThumbnailGenerator')
+                worker.daemon = True
+                worker.start()
+
+                self._workers.append(worker)
+
+    def _run_worker(self):
+        """Process queued file attachments until the process exits."""
+        while True:
+            file_attachment_id = self._queue.get()
+
+            try:
+                close_old_connections()
+                self._process(file_attachment_id)
+            except Exception as e:
+                logger.exception('Unexpected error generating the thumbnail '
+                                 'for file attachment %s: %s',
+                                 file_attachment_id, e)
+            finally:
+                close_old_connections()
+                self._queue.task_done()
+
+
+_thumbnail_generator = ThumbnailGenerator()
+
+
+def get_thumbnail_generator():
+    """Return the thumbnail generator for this process.
+
+    Returns:
+        ThumbnailGenerator:
+        The thumbnail generator.
+    """
+    return _thumbnail_generator
+
+
+def generate_thumbnail(file_attachment):
+    """Generate and store the thumbnail for a file attachment.
+
+    The attachment's thumbnail state will be updated to reflect whether
+    generation succeeded.
+
+    Args:
+        file_attachment (reviewboard.attachments.models.FileAttachment):
+            The file attachment to generate the thumbnail for.
+    """
+    handler = file_attachment.mimetype_handler
+
+    try:
+        if handler:
+            handler.generate_thumbnail()
+
+        state = FileAttachment.THUMBNAIL_STATE_READY
+    except Exception as e:
+        logger.exception('Unable to generate the thumbnail for file '
+                         'attachment %s: %s',
+                         file_attachment.pk, e)
+        state = FileAttachment.THUMBNAIL_STATE_FAILED
+
+    file_attachment.thumbnail_state = state
+    FileAttachment.objects.filter(pk=file_attachment.pk).update(
+        thumbnail_state=state)
+
+
+def queue_thumbnail_generation(file_attachment):
+    """Queue a new file attachment for background thumbnail generation.
+
+    This must be called in a transaction (see
+    :py:func:`django.db.transaction.atomic`), before the file attachment is
+    saved in that transaction. If its mimetype handler supports generating
+    thumbnails ahead of time, the attachment will be marked as having a
+    pending thumbnail, and will be queued once the transaction is committed.
+
+    Args:
+        file_attachment (reviewboard.attachments.models.FileAttachment):
+            The new file attachment.
+    """
+    handler = file_attachment.mimetype_handler
+
+    if not handler or not handler.pregenerate_thumbnails:
+        return
+
+    file_attachment.thumbnail_state = FileAttachment.THUMBNAIL_STATE_PENDING
+
+    def _queue():
+        if file_attachment.pk is None:
+            logger.error('Unable to queue thumbnail generation for a file '
+                         'attachment that was not saved in the current '
+                         'transaction.')
+            return
+
+        cache.set(_make_pending_key(file_attachment.pk), True,
+                  PENDING_TIMEOUT_SECS)
+        _thumbnail_generator.queue_file_attachment(file_attachment.pk)
+
+    transaction.on_commit(_queue)
+
+
+def generate_stale_pending_thumbnail(file_attachment):
+    """Generate a pending thumbnail that's no longer queued.
+
+    Pending thumbnails are normally generated by the uploading process. If
+    that process exited before generating it (or generation has taken longer
+    than :py:data:`PENDING_TIMEOUT_SECS`), this will generate the thumbnail
+    in the current thread instead. Only one caller will generate it at a
+    time.
+
+    Args:
+        file_attachment (reviewboard.attachments.models.FileAttachment):
+            The file attachment with a pending thumbnail.
+
+    Returns:
+        bool:
+        ``True`` if the thumbnail was generated. ``False`` if it's still
+        queued or being generated elsewhere.
+    """
+    if not cache.add(_make_pending_key(file_attachment.pk), True,
+                     PENDING_TIMEOUT_SECS):
+        return False
+
+    logger.info('Generating the stale pending thumbnail for file '
+                'attachment %s', file_attachment.pk)
+    generate_thumbnail(file_attachment)
+
+    return True
+
+
+def _make_pending_key(file_attachment_id):
+    """Return the cache key for a pending thumbnail's lease.
+
+    Args:
+        file_attachment_id (int):
+            The ID of the file attachment.
+
+    Returns:
+        unicode:
+        The cache key.
+    """
+    return make_cache_key('file-attachment-thumbnail-pending-%s'
+                          % file_attachment_id)
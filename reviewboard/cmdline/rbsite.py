@@ -4,6 +4,7 @@ from __future__ import print_function, unicode_literals
 
 import getpass
 import imp
+import json
 import logging
 import os
 import pkg_resources
@@ -14,6 +15,7 @@ import sys
 import textwrap
 import subprocess
 import warnings
+from collections import OrderedDict
 from importlib import import_module
 from optparse import OptionGroup, OptionParser
 from random import choice as random_choice
@@ -2047,11 +2049,71 @@ class ManageCommand(Command):
             sys.exit(0)
 
 
+class ProfileStartupCommand(Command):
+    """Measures the time taken to start Review Board for the site."""
+
+    help_text = (
+        'Measures the time taken to start a new Review Board process for '
+        'the site, broken down by phase. Usage: `rb-site profile-startup '
+        '<path>`.'
+    )
+
+    def add_options(self, parser):
+        """Add any command-specific options to the parser."""
+        group = OptionGroup(parser, "'profile-startup' command",
+                            self.help_text)
+        group.add_option('--runs', type='int', dest='startup_runs',
+                         default=3,
+                         help='the number of times to start Review Board '
+                              '(default: 3)')
+        parser.add_option_group(group)
+
+    def run(self):
+        """Run the command."""
+        env = os.environ.copy()
+        env[str('DJANGO_SETTINGS_MODULE')] = str('reviewboard.settings')
+        env[str('HOME')] = force_str(
+            os.path.join(site.abs_install_dir, 'data'))
+        env[str('PYTHONPATH')] = force_str(os.pathsep.join(
+            [os.path.join(site.abs_install_dir, 'conf')] +
+            sys.path))
+
+        all_timings = []
+
+        for i in range(max(options.startup_runs, 1)):
+            # Each run needs a new process, so that nothing has been
+            # imported or initialized yet.
+            try:
+                output = subprocess.check_output(
+                    [sys.executable, '-m', 'reviewboard.warmup'],
+                    env=env)
+            except subprocess.CalledProcessError as e:
+                ui.error('Unable to start Review Board: %s' % e,
+                         done_func=lambda: sys.exit(1))
+                return
+
+            all_timings.append(json.loads(
+                output.decode('utf-8').strip().splitlines()[-1],
+                object_pairs_hook=OrderedDict))
+
+        print('%-24s %10s %10s' % ('Phase', 'Avg (ms)', 'Max (ms)'))
+
+        for phase in all_timings[0]:
+            times = [
+                timings.get(phase, 0) * 1000
+                for timings in all_timings
+            ]
+
+            print('%-24s %10.1f %10.1f'
+                  % (phase, sum(times) / len(times), max(times)))
+
+
 # A list of all commands supported by rb-site.
 COMMANDS = {
     "install": InstallCommand(),
     "upgrade": UpgradeCommand(),
     "manage": ManageCommand(),
+    "profile-startup": ProfileStartupCommand(),
 }
 
 
@@ -1,10 +1,12 @@
 from __future__ import print_function, unicode_literals
 
+from datetime import timedelta
+
 from django.contrib.auth.models import AnonymousUser, User
 from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.test.client import RequestFactory
-from django.utils import six
+from django.utils import six, timezone
 from django.utils.safestring import SafeText
 from djblets.datagrid.grids import DataGrid
 from djblets.siteconfig.models import SiteConfiguration
@@ -12,7 +14,9 @@ from djblets.testing.decorators import add_fixtures
 
 from reviewboard.accounts.models import Profile, ReviewRequestVisit
 from reviewboard.datagrids.builtin_items import UserGroupsItem, UserProfileItem
-from reviewboard.datagrids.columns import (FullNameColumn, SummaryColumn,
+from reviewboard.datagrids.columns import (FullNameColumn,
+                                           NewUpdatesColumn,
+                                           SummaryColumn,
                                            UsernameColumn)
 from reviewboard.reviews.models import (Group,
                                         ReviewRequest,
@@ -1070,6 +1074,53 @@ class FullNameColumnTests(BaseColumnTestCase):
                          '&lt;/script&gt; &quot;&quot;')
 
 
+class NewUpdatesColumnTests(BaseColumnTestCase):
+    """Testing reviewboard.datagrids.columns.NewUpdatesColumn."""
+
+    column = NewUpdatesColumn()
+
+    def test_render_data_with_new_review(self):
+        """Testing NewUpdatesColumn.render_data with a review by another user
+        since the last visit, followed by a reply from the viewing user
+        """
+        user = self.request.user
+        review_request = self.create_review_request(publish=True)
+        visit = self.create_visit(review_request, ReviewRequestVisit.VISIBLE,
+                                  user=user)
+        ReviewRequestVisit.objects.filter(pk=visit.pk).update(
+            timestamp=timezone.now() - timedelta(hours=1))
+
+        review = self.create_review(
+            review_request,
+            user='dopey',
+            timestamp=timezone.now() - timedelta(minutes=30),
+            publish=True)
+        self.create_reply(review, user=user, publish=True)
+
+        review_request = \
+            ReviewRequest.objects.with_counts(user).get(pk=review_request.pk)
+
+        self.assertIn(
+            'rb-icon-new-updates',
+            self.column.render_data(self.stateful_column, review_request))
+
+    def test_render_data_without_new_reviews(self):
+        """Testing NewUpdatesColumn.render_data without reviews by other
+        users since the last visit
+        """
+        user = self.request.user
+        review_request = self.create_review_request(publish=True)
+        self.create_visit(review_request, ReviewRequestVisit.VISIBLE,
+                          user=user)
+
+        review_request = \
+            ReviewRequest.objects.with_counts(user).get(pk=review_request.pk)
+
+        self.assertEqual(
+            self.column.render_data(self.stateful_column, review_request),
+            '')
+
+
 class SummaryColumnTests(BaseColumnTestCase):
     """Testing reviewboard.datagrids.columns.SummaryColumn."""
 
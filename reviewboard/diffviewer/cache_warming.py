@@ -0,0 +1,234 @@
+"""Background warming of the diff chunk cache for new uploads.
+
+Normally, diff chunks are generated the first time someone views a diff,
+meaning that the first reviewer waits on fetching files from the
+repository, patching, diffing, and syntax highlighting for every file.
+
+When the ``diffviewer_warm_chunk_cache`` setting is enabled, new FileDiffs
+are queued after upload, and chunks are generated for them in a background
+thread in the uploading process, filling the chunk cache ahead of time.
+FileDiffs for the newest uploads are processed first, and FileDiffs in
+DiffSets are processed before those for individual commits.
+"""
+
+from __future__ import unicode_literals
+
+import itertools
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import translation
+from django.utils.six.moves import queue
+from djblets.siteconfig.models import SiteConfiguration
+
+
+logger = logging.getLogger(__name__)
+
+
+#: The priority for FileDiffs shown when viewing a DiffSet.
+PRIORITY_DIFFSET = 0
+
+#: The priority for FileDiffs belonging to individual commits.
+PRIORITY_COMMIT = 10
+
+
+class ChunkCacheWarmer(object):
+    """Generates and caches diff chunks for FileDiffs in the background.
+
+    FileDiffs are processed in order of priority. Within a priority, the
+    most recently queued batch is processed first, so that the latest
+    revision of a diff is ready before older ones still in the queue.
+
+    Attributes:
+        num_workers (int):
+            The number of worker threads to run.
+    """
+
+    def __init__(self, num_workers=1):
+        """Initialize the warmer.
+
+        Args:
+            num_workers (int, optional):
+                The number of worker threads to run.
+        """
+        self.num_workers = num_workers
+
+        self._queue = queue.PriorityQueue()
+        self._batch_counter = itertools.count()
+        self._workers = []
+        self._lock = threading.Lock()
+
+    def queue_filediffs(self, filediff_ids, priority=PRIORITY_DIFFSET,
+                        start_workers=True):
+        """Queue FileDiffs for chunk generation.
+
+        Args:
+            filediff_ids (list of int):
+                The IDs of the FileDiffs to generate chunks for.
+
+            priority (int, optional):
+                The priority of the FileDiffs. Lower values are processed
+                first.
+
+            start_workers (bool, optional):
+                Whether to start the worker threads, if not already running.
+                If ``False``, the queue must be processed with
+                :py:meth:`process_pending`.
+        """
+        batch = -next(self._batch_counter)
+
+        for i, filediff_id in enumerate(filediff_ids):
+            self._queue.put((priority, batch, i, filediff_id))
+
+        if start_workers:
+            self._start_workers()
+
+    def process_pending(self):
+        """Generate chunks for all queued FileDiffs in the current thread.
+
+        Returns:
+            int:
+            The number of FileDiffs processed.
+        """
+        num_processed = 0
+
+        while True:
+            try:
+                item = self._queue.get(block=False)
+            except queue.Empty:
+                break
+
+            try:
+                self._process(item[-1])
+                num_processed += 1
+            finally:
+                self._queue.task_done()
+
+        return num_processed
+
+    def warm_filediff(self, filediff_id):
+        """Generate and cache chunks for a FileDiff.
+
+        Chunks are generated for the default language, with syntax
+        highlighting if it's enabled for the server.
+
+        Args:
+            filediff_id (int):
+                The ID of the FileDiff.
+
+        Raises:
+            reviewboard.diffviewer.models.filediff.FileDiff.DoesNotExist:
+                The FileDiff no longer exists.
+        """
+        from reviewboard.diffviewer.chunk_generator import \
+            get_diff_chunk_generator
+        from reviewboard.diffviewer.models import FileDiff
+
+        filediff = (
+            FileDiff.objects
+            .select_related('diffset', 'diffset__repository')
+            .get(pk=filediff_id)
+        )
+
+        siteconfig = SiteConfiguration.objects.get_current()
+        highlighting = siteconfig.get('diffviewer_syntax_highlighting')
+
+        with translation.override(settings.LANGUAGE_CODE):
+            generator = get_diff_chunk_generator(
+                None,
+                filediff,
+                enable_syntax_highlighting=highlighting)
+
+            for chunk in generator.get_chunks():
+                pass
+
+    def _process(self, filediff_id):
+        """Generate chunks for a queued FileDiff, logging any errors.
+
+        Args:
+            filediff_id (int):
+                The ID of the FileDiff.
+        """
+        try:
+            self.warm_filediff(filediff_id)
+        except Exception as e:
+            logger.exception('Unable to pre-generate diff chunks for '
+                             'FileDiff %s: %s',
+                             filediff_id, e)
+
+    def _start_workers(self):
+        """Start the worker threads, if not already running."""
+        with self._lock:
+            self._workers = [
+                worker
+                for worker in self._workers
+                if worker.is_alive()
+            ]
+
+            while len(self._workers) < self.num_workers:
+                worker = threading.Thread(target=self._run_worker,
+                                          name='ChunkCacheWarmer')
+                worker.daemon = True
+                worker.start()
+
+                self._workers.append(worker)
+
+    def _run_worker(self):
+        """Process queued FileDiffs until the process exits."""
+        while True:
+            item = self._queue.get()
+
+            try:
+                close_old_connections()
+                self._process(item[-1])
+            finally:
+                close_old_connections()
+                self._queue.task_done()
+
+
+_chunk_cache_warmer = ChunkCacheWarmer()
+
+
+def get_chunk_cache_warmer():
+    """Return the chunk cache warmer for this process.
+
+    Returns:
+        ChunkCacheWarmer:
+        The chunk cache warmer.
+    """
+    return _chunk_cache_warmer
+
+
+def queue_chunk_cache_warming(filediffs, priority=PRIORITY_DIFFSET):
+    """Queue newly-uploaded FileDiffs for chunk generation.
+
+    This does nothing unless the ``diffviewer_warm_chunk_cache`` setting is
+    enabled. The FileDiffs are queued once the current transaction is
+    committed, so that the worker threads can load them.
+
+    Args:
+        filediffs (list of reviewboard.diffviewer.models.filediff.FileDiff):
+            The FileDiffs to generate chunks for.
+
+        priority (int, optional):
+            The priority of the FileDiffs. This should be either
+            :py:data:`PRIORITY_DIFFSET` or :py:data:`PRIORITY_COMMIT`.
+    """
+    siteconfig = SiteConfiguration.objects.get_current()
+
+    if not siteconfig.get('diffviewer_warm_chunk_cache'):
+        return
+
+    # Binary files don't have chunks.
+    filediff_ids = [
+        filediff.pk
+        for filediff in filediffs
+        if not filediff.binary
+    ]
+
+    if filediff_ids:
+        transaction.on_commit(
+            lambda: _chunk_cache_warmer.queue_filediffs(filediff_ids,
+                                                        priority))
@@ -5,7 +5,6 @@ import functools
 import hashlib
 import re
 
-import pygments.util
 from django.utils import six
 from django.utils.encoding import force_text
 from django.utils.html import escape
@@ -17,8 +16,10 @@ from djblets.cache.backend import cache_memoize
 from djblets.siteconfig.models import SiteConfiguration
 from pygments import highlight
 from pygments.formatters import HtmlFormatter
-from pygments.lexers import guess_lexer_for_filename
 
+from reviewboard.diffviewer.chunk_serialization import (deserialize_chunks,
+                                                        serialize_chunks)
+from reviewboard.diffviewer.chunk_store import load_or_generate_chunks
 from reviewboard.diffviewer.differ import DiffCompatVersion, get_differ
 from reviewboard.diffviewer.diffutils import (get_filediff_encodings,
                                               get_line_changed_regions,
@@ -26,10 +27,44 @@ from reviewboard.diffviewer.diffutils import (get_filediff_encodings,
                                               get_patched_file,
                                               convert_to_unicode,
                                               split_line_endings)
+from reviewboard.diffviewer.lexers import get_lexer_for_filename
 from reviewboard.diffviewer.opcode_generator import (DiffOpcodeGenerator,
                                                      get_diff_opcode_generator)
 
 
+_HTML_TAG_RE = re.compile(r'<[^>]*>')
+_INDENTATION_MARKER_RE = re.compile(
+    r'<span class="(?:indent|unindent)">[^<]*</span>')
+
+
+def _markup_to_text(markup):
+    """Return the text for a line of markup.
+
+    This reverses the escaping and syntax highlighting applied to lines of a
+    diff, for use when re-highlighting them. Indentation markers are
+    replaced with a single space.
+
+    Args:
+        markup (unicode):
+            The HTML markup for the line.
+
+    Returns:
+        unicode:
+        The text of the line.
+    """
+    markup = _INDENTATION_MARKER_RE.sub(' ', markup)
+
+    return (
+        _HTML_TAG_RE.sub('', markup)
+        .replace('&lt;', '<')
+        .replace('&gt;', '>')
+        .replace('&quot;', '"')
+        .replace('&#39;', "'")
+        .replace('&#x27;', "'")
+        .replace('&amp;', '&')
+    )
+
+
 class NoWrapperHtmlFormatter(HtmlFormatter):
     """An HTML Formatter for Pygments that doesn't wrap items in a div."""
     def __init__(self, *args, **kwargs):
@@ -76,6 +111,15 @@ class RawDiffChunkGenerator(object):
     # Default tab size used in browsers.
     TAB_SIZE = DiffOpcodeGenerator.TAB_SIZE
 
+    # Whether collapsed chunks may be left unhighlighted until displayed.
+    # This requires callers to use highlight_pending_chunk() before
+    # displaying them.
+    ALLOW_LAZY_SYNTAX_HIGHLIGHTING = False
+
+    # The number of lines preceding a range of lines that are passed to the
+    # lexer when only highlighting part of a file.
+    LAZY_HIGHLIGHTING_CONTEXT_LINES = 100
+
     def __init__(self, old, new, orig_filename, modified_filename,
                  enable_syntax_highlighting=True, encoding_list=None,
                  diff_compat=DiffCompatVersion.DEFAULT):
@@ -156,11 +200,21 @@ class RawDiffChunkGenerator(object):
         If a cache key is provided and there are chunks already computed in the
         cache, they will be yielded. Otherwise, new chunks will be generated,
         stored in cache (given a cache key), and yielded.
+
+        If the persistent chunk store is enabled, chunks missing from the
+        cache will be loaded from the store before generating new ones.
+
+        Cached chunks are stored in a compact form (see
+        :py:mod:`reviewboard.diffviewer.chunk_serialization`), and are
+        converted back as they're yielded.
         """
         if cache_key:
-            chunks = cache_memoize(cache_key,
-                                   lambda: list(self.get_chunks_uncached()),
-                                   large_data=True)
+            chunks = deserialize_chunks(cache_memoize(
+                cache_key,
+                lambda: load_or_generate_chunks(
+                    cache_key,
+                    lambda: serialize_chunks(self.get_chunks_uncached())),
+                large_data=True))
         else:
             chunks = self.get_chunks_uncached()
 
@@ -249,6 +303,9 @@ class RawDiffChunkGenerator(object):
         a_num_lines = len(a)
         b_num_lines = len(b)
 
+        siteconfig = SiteConfiguration.objects.get_current()
+        highlight_lazily = False
+
         if is_lists:
             markup_a = a
             markup_b = b
@@ -257,14 +314,24 @@ class RawDiffChunkGenerator(object):
             markup_b = None
 
             if self._get_enable_syntax_highlighting(old, new, a, b):
-                # TODO: Try to figure out the right lexer for these files
-                #       once instead of twice.
-                markup_a = self._apply_pygments(
-                    old or '',
-                    self.normalize_path_for_display(self.orig_filename))
-                markup_b = self._apply_pygments(
-                    new or '',
-                    self.normalize_path_for_display(self.modified_filename))
+                orig_filename = \
+                    self.normalize_path_for_display(self.orig_filename)
+                modified_filename = \
+                    self.normalize_path_for_display(self.modified_filename)
+
+                if (self.ALLOW_LAZY_SYNTAX_HIGHLIGHTING and
+                    siteconfig.get('diffviewer_lazy_syntax_highlighting')):
+                    # Only the lines that will be displayed are highlighted,
+                    # once the opcodes are known. Collapsed lines are
+                    # highlighted when expanded.
+                    lexer_a = self._get_lexer(old or '', orig_filename)
+                    lexer_b = self._get_lexer(new or '', modified_filename)
+                    highlight_lazily = (lexer_a is not None or
+                                        lexer_b is not None)
+                else:
+                    markup_a = self._apply_pygments(old or '', orig_filename)
+                    markup_b = self._apply_pygments(new or '',
+                                                    modified_filename)
 
             if not markup_a:
                 markup_a = self.NEWLINES_RE.split(escape(old))
@@ -272,7 +339,6 @@ class RawDiffChunkGenerator(object):
             if not markup_b:
                 markup_b = self.NEWLINES_RE.split(escape(new))
 
-        siteconfig = SiteConfiguration.objects.get_current()
         ignore_space = True
 
         for pattern in siteconfig.get('diffviewer_include_space_patterns'):
@@ -290,6 +356,38 @@ class RawDiffChunkGenerator(object):
         line_num = 1
         opcodes_generator = self.get_opcode_generator()
 
+        if highlight_lazily:
+            opcodes_generator = list(opcodes_generator)
+            ranges_a = []
+            ranges_b = []
+
+            for tag, i1, i2, j1, j2, meta in opcodes_generator:
+                num_lines = max(i2 - i1, j2 - j1)
+                chunk_ranges = self._get_chunk_ranges(
+                    tag, num_lines,
+                    is_first=(line_num == 1),
+                    is_last=(i2 == a_num_lines and j2 == b_num_lines),
+                    context_num_lines=context_num_lines,
+                    collapse_threshold=collapse_threshold)
+
+                for start, end, collapsable in chunk_ranges:
+                    if not collapsable:
+                        if i1 + start < i2:
+                            ranges_a.append((i1 + start, min(i1 + end, i2)))
+
+                        if j1 + start < j2:
+                            ranges_b.append((j1 + start, min(j1 + end, j2)))
+
+                line_num += num_lines
+
+            line_num = 1
+
+            if lexer_a is not None:
+                self._highlight_line_ranges(a, markup_a, ranges_a, lexer_a)
+
+            if lexer_b is not None:
+                self._highlight_line_ranges(b, markup_b, ranges_b, lexer_b)
+
         counts = {
             'equal': 0,
             'replace': 0,
@@ -316,25 +414,23 @@ class RawDiffChunkGenerator(object):
 
             counts[tag] += num_lines
 
-            if tag == 'equal' and num_lines > collapse_threshold:
-                last_range_start = num_lines - context_num_lines
+            chunk_ranges = self._get_chunk_ranges(
+                tag, num_lines,
+                is_first=(line_num == 1),
+                is_last=(i2 == a_num_lines and j2 == b_num_lines),
+                context_num_lines=context_num_lines,
+                collapse_threshold=collapse_threshold)
 
-                if line_num == 1:
-                    yield self._new_chunk(lines, 0, last_range_start, True)
-                    yield self._new_chunk(lines, last_range_start, num_lines)
-                else:
-                    yield self._new_chunk(lines, 0, context_num_lines)
-
-                    if i2 == a_num_lines and j2 == b_num_lines:
-                        yield self._new_chunk(lines, context_num_lines,
-                                              num_lines, True)
-                    else:
-                        yield self._new_chunk(lines, context_num_lines,
-                                              last_range_start, True)
-                        yield self._new_chunk(lines, last_range_start,
-                                              num_lines)
-            else:
+            if len(chunk_ranges) == 1:
                 yield self._new_chunk(lines, 0, num_lines, False, tag, meta)
+            else:
+                for start, end, collapsable in chunk_ranges:
+                    chunk = self._new_chunk(lines, start, end, collapsable)
+
+                    if collapsable and highlight_lazily:
+                        chunk['meta']['syntax_highlighting_pending'] = True
+
+                    yield chunk
 
             line_num += num_lines
 
@@ -453,6 +549,65 @@ class RawDiffChunkGenerator(object):
         """
         return get_line_changed_regions(old_line, new_line)
 
+    def highlight_pending_chunk(self, chunks, chunk_index):
+        """Syntax-highlight a collapsed chunk that was left unhighlighted.
+
+        When lazy syntax highlighting is enabled, collapsed chunks are
+        generated without syntax highlighting, and are marked with a
+        ``syntax_highlighting_pending`` flag in their metadata. This will
+        highlight the lines in such a chunk, in place, using the lines of the
+        preceding chunks for context.
+
+        Args:
+            chunks (list of dict):
+                The list of all chunks in the file.
+
+            chunk_index (int):
+                The index of the chunk to highlight.
+        """
+        chunk = chunks[chunk_index]
+
+        if not chunk['meta'].pop('syntax_highlighting_pending', False):
+            return
+
+        lines = chunk['lines']
+        context_num_lines = self.LAZY_HIGHLIGHTING_CONTEXT_LINES
+
+        for markup_index, line_num_index, filename in (
+                (2, 1, self.orig_filename),
+                (5, 4, self.modified_filename)):
+            # Gather the preceding lines on this side of the diff.
+            context_lines = []
+            i = chunk_index - 1
+
+            while i >= 0 and len(context_lines) < context_num_lines:
+                context_lines[:0] = [
+                    _markup_to_text(line[markup_index])
+                    for line in chunks[i]['lines']
+                    if line[line_num_index]
+                ]
+                i -= 1
+
+            context_lines = context_lines[-context_num_lines:]
+            text_lines = context_lines + [
+                _markup_to_text(line[markup_index])
+                for line in lines
+            ]
+            lexer = self._get_lexer('\n'.join(text_lines),
+                                    self.normalize_path_for_display(filename))
+
+            if lexer is None:
+                continue
+
+            highlighted = self._highlight_lines(text_lines, lexer)
+
+            if highlighted is None:
+                continue
+
+            for line, markup in zip(lines,
+                                    highlighted[len(context_lines):]):
+                line[markup_index] = mark_safe(markup)
+
     def _get_enable_syntax_highlighting(self, old, new, a, b):
         """Returns whether or not we'll be enabling syntax highlighting.
 
@@ -481,10 +636,12 @@ class RawDiffChunkGenerator(object):
         # Don't style the file if we have any *really* long lines.
         # It's likely a minified file or data or something that doesn't
         # need styling, and it will just grind Review Board to a halt.
+        #
+        # The lines were already split when normalizing the source, so
+        # this only needs to measure them.
         for lines in (a, b):
-            for line in lines:
-                if len(line) > self.STYLED_MAX_LINE_LEN:
-                    return False
+            if lines and max(map(len, lines)) > self.STYLED_MAX_LINE_LEN:
+                return False
 
         return True
 
@@ -816,21 +973,156 @@ class RawDiffChunkGenerator(object):
             A list of lines, all syntax-highlighted, if a lexer is found.
             If no lexer is available, this will return ``None``.
         """
+        lexer = self._get_lexer(data, filename)
+
+        if lexer is None:
+            return None
+
+        return split_line_endings(
+            highlight(data, lexer, NoWrapperHtmlFormatter()))
+
+    def _get_lexer(self, data, filename):
+        """Return the Pygments lexer used to highlight a file.
+
+        Args:
+            data (unicode):
+                The contents of the file. This is only used if the filename
+                alone doesn't determine the lexer.
+
+            filename (unicode):
+                The name of the file.
+
+        Returns:
+            pygments.lexer.Lexer:
+            The lexer, or ``None`` if the file shouldn't be highlighted.
+        """
         if filename.endswith(self.STYLED_EXT_BLACKLIST):
             return None
 
-        try:
-            lexer = guess_lexer_for_filename(filename,
-                                             data,
-                                             stripnl=False,
-                                             encoding='utf-8')
-        except pygments.util.ClassNotFound:
+        return get_lexer_for_filename(filename, data)
+
+    def _get_chunk_ranges(self, tag, num_lines, is_first, is_last,
+                          context_num_lines, collapse_threshold):
+        """Return the ranges of lines in an opcode that make up its chunks.
+
+        Large regions of equal lines are split into collapsable chunks,
+        surrounded by chunks containing lines of context.
+
+        Args:
+            tag (unicode):
+                The opcode's tag.
+
+            num_lines (int):
+                The number of lines in the opcode.
+
+            is_first (bool):
+                Whether the opcode is at the start of the file.
+
+            is_last (bool):
+                Whether the opcode is at the end of the file.
+
+            context_num_lines (int):
+                The number of lines of context shown around changes.
+
+            collapse_threshold (int):
+                The number of equal lines above which lines will be
+                collapsed.
+
+        Returns:
+            list of tuple:
+            A list of ``(start, end, collapsable)`` tuples, with line offsets
+            relative to the start of the opcode.
+        """
+        if tag != 'equal' or num_lines <= collapse_threshold:
+            return [(0, num_lines, False)]
+
+        last_range_start = num_lines - context_num_lines
+
+        if is_first:
+            return [
+                (0, last_range_start, True),
+                (last_range_start, num_lines, False),
+            ]
+        elif is_last:
+            return [
+                (0, context_num_lines, False),
+                (context_num_lines, num_lines, True),
+            ]
+        else:
+            return [
+                (0, context_num_lines, False),
+                (context_num_lines, last_range_start, True),
+                (last_range_start, num_lines, False),
+            ]
+
+    def _highlight_line_ranges(self, lines, markup, ranges, lexer):
+        """Syntax-highlight ranges of lines in a file.
+
+        Each range is highlighted along with up to
+        :py:attr:`LAZY_HIGHLIGHTING_CONTEXT_LINES` preceding lines, so that
+        the lexer has the context it needs (for instance, to know that a
+        range starts within a multi-line comment). Ranges close enough to
+        share that context are highlighted together.
+
+        Args:
+            lines (list of unicode):
+                The lines of the file.
+
+            markup (list of unicode):
+                The markup for each line. The entries for highlighted lines
+                will be replaced.
+
+            ranges (list of tuple):
+                A list of ``(start, end)`` line indexes to highlight.
+
+            lexer (pygments.lexer.Lexer):
+                The lexer to highlight with.
+        """
+        context_num_lines = self.LAZY_HIGHLIGHTING_CONTEXT_LINES
+        merged_ranges = []
+
+        for start, end in sorted(ranges):
+            if (merged_ranges and
+                start <= merged_ranges[-1][1] + context_num_lines):
+                merged_ranges[-1][1] = max(merged_ranges[-1][1], end)
+            else:
+                merged_ranges.append([start, end])
+
+        for start, end in merged_ranges:
+            context_start = max(start - context_num_lines, 0)
+            highlighted = self._highlight_lines(lines[context_start:end],
+                                                lexer)
+
+            if highlighted is not None:
+                markup[start:end] = highlighted[start - context_start:]
+
+    def _highlight_lines(self, lines, lexer):
+        """Syntax-highlight a list of lines.
+
+        Args:
+            lines (list of unicode):
+                The lines to highlight.
+
+            lexer (pygments.lexer.Lexer):
+                The lexer to highlight with.
+
+        Returns:
+            list of unicode:
+            The highlighted lines, or ``None`` if the highlighted result
+            couldn't be matched up with the lines (which can happen if a line
+            contains a lone carriage return).
+        """
+        highlighted = split_line_endings(
+            highlight('%s\n' % '\n'.join(lines), lexer,
+                      NoWrapperHtmlFormatter()))
+
+        # The trailing newline results in an extra empty entry.
+        if len(highlighted) != len(lines) + 1:
             return None
 
-        lexer.add_filter('codetagify')
+        del highlighted[-1]
 
-        return split_line_endings(
-            highlight(data, lexer, NoWrapperHtmlFormatter()))
+        return highlighted
 
 
 class DiffChunkGenerator(RawDiffChunkGenerator):
@@ -872,6 +1164,11 @@ class DiffChunkGenerator(RawDiffChunkGenerator):
        grab a patched file for the interdiff version.
     """
 
+    # Chunks for FileDiffs are displayed through DiffRenderer and
+    # get_file_chunks_in_range(), which highlight collapsed chunks when
+    # they're expanded.
+    ALLOW_LAZY_SYNTAX_HIGHLIGHTING = True
+
     def __init__(self, request, filediff, interfilediff=None,
                  force_interdiff=False, enable_syntax_highlighting=True,
                  base_filediff=None):
@@ -0,0 +1,340 @@
+"""Range-addressable storage of diff chunks.
+
+Rendering a diff comment only needs the few lines around the comment, but
+the full list of chunks for a file is cached as a single entry. Review pages
+and e-mails with many comments on large files would otherwise load every
+line of every commented file from the cache.
+
+This stores a second, segmented copy of a file's chunks in the cache:
+
+* An index, containing a summary of each chunk (its type, metadata, and
+  first and last line numbers) and the first line of each segment.
+* Segments of up to :py:data:`SEGMENT_MAX_LINES` consecutive lines. Large
+  chunks are split across segments.
+
+Line ranges can then be loaded by fetching the index and the segments that
+overlap the range.
+"""
+
+from __future__ import unicode_literals
+
+import bisect
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.six.moves import cPickle as pickle
+from djblets.cache.backend import make_cache_key
+
+from reviewboard.diffviewer.chunk_serialization import (deserialize_chunk,
+                                                        serialize_chunk)
+
+
+#: The maximum number of lines stored in a segment.
+SEGMENT_MAX_LINES = 250
+
+#: The version of the segment format.
+#:
+#: This is part of the cache keys, and must be bumped whenever the format
+#: changes.
+SEGMENTS_VERSION = 1
+
+
+def get_chunk_summary(chunk):
+    """Return a summary of a chunk, without its lines.
+
+    Args:
+        chunk (dict):
+            The chunk to summarize.
+
+    Returns:
+        dict:
+        The summary of the chunk, containing the ``index``, ``change``,
+        ``collapsable``, ``numlines``, and ``meta`` keys of the chunk,
+        along with:
+
+        ``first_line`` (list):
+            The first line's virtual, original, and modified line numbers.
+
+        ``last_line_nums`` (tuple):
+            The last original and modified line numbers in the chunk. These
+            aren't always on the last line (for instance, in interdiffs with
+            filtered out opcodes).
+    """
+    lines = chunk['lines']
+    first_line = lines[0]
+    last_left = None
+    last_right = None
+
+    for line in reversed(lines):
+        if not last_right and line[4]:
+            last_right = line[4]
+
+        if not last_left and line[1]:
+            last_left = line[1]
+
+        if last_left and last_right:
+            break
+
+    return {
+        'index': chunk.get('index'),
+        'change': chunk.get('change'),
+        'collapsable': chunk.get('collapsable', False),
+        'numlines': len(lines),
+        'meta': chunk.get('meta', {}),
+        'first_line': [first_line[0], first_line[1], first_line[4]],
+        'last_line_nums': (last_left, last_right),
+    }
+
+
+def build_chunk_segments(chunks):
+    """Split a list of chunks into segments.
+
+    Args:
+        chunks (list of dict):
+            The chunks for a file.
+
+    Returns:
+        tuple:
+        A 2-tuple of:
+
+        1. The index (a :py:class:`dict`).
+        2. The list of segments. Each is a list of ``(chunk_index, lines)``
+           tuples, with the lines in serialized form.
+    """
+    summaries = []
+    segments = []
+    segment_first_lines = []
+    segment = None
+    segment_num_lines = SEGMENT_MAX_LINES
+    num_lines = 0
+
+    for i, chunk in enumerate(chunks):
+        lines = chunk['lines']
+
+        if not lines:
+            continue
+
+        summary = get_chunk_summary(chunk)
+        summary['index'] = i
+        summaries.append(summary)
+
+        start = 0
+
+        while start < len(lines):
+            if segment_num_lines == SEGMENT_MAX_LINES:
+                segment = []
+                segment_num_lines = 0
+                segments.append(segment)
+                segment_first_lines.append(lines[start][0])
+
+            end = min(len(lines),
+                      start + SEGMENT_MAX_LINES - segment_num_lines)
+            segment.append((i, serialize_chunk({
+                'lines': lines[start:end],
+            })))
+            segment_num_lines += end - start
+            start = end
+
+        num_lines = lines[-1][0]
+
+    index = {
+        'chunks': summaries,
+        'num_lines': num_lines,
+        'segment_first_lines': segment_first_lines,
+    }
+
+    return index, segments
+
+
+def get_segment_nums_for_range(index, first_line, num_lines):
+    """Return the segments containing a range of lines.
+
+    Args:
+        index (dict):
+            The segment index.
+
+        first_line (int):
+            The first virtual line number in the range.
+
+        num_lines (int):
+            The number of lines in the range.
+
+    Returns:
+        list of int:
+        The numbers of the segments overlapping the range.
+    """
+    segment_first_lines = index['segment_first_lines']
+
+    if num_lines <= 0 or not segment_first_lines:
+        return []
+
+    last_line = first_line + num_lines - 1
+    start = max(0, bisect.bisect_right(segment_first_lines, first_line) - 1)
+    end = bisect.bisect_right(segment_first_lines, last_line)
+
+    return list(range(start, end))
+
+
+def get_chunks_from_segments(index, segments, segment_nums):
+    """Return the partial chunks contained in a set of segments.
+
+    Pieces of a chunk that are split across consecutive segments are joined
+    back together.
+
+    Args:
+        index (dict):
+            The segment index.
+
+        segments (dict):
+            A mapping of segment numbers to loaded segments.
+
+        segment_nums (list of int):
+            The numbers of the consecutive segments to return chunks for.
+
+    Returns:
+        list of dict:
+        The partial chunks, containing only the lines in the segments.
+    """
+    summaries = dict(
+        (summary['index'], summary)
+        for summary in index['chunks']
+    )
+    chunks = []
+
+    for segment_num in segment_nums:
+        for chunk_index, data in segments[segment_num]:
+            lines = deserialize_chunk(data)['lines']
+
+            if chunks and chunks[-1]['index'] == chunk_index:
+                chunks[-1]['lines'] += lines
+            else:
+                summary = summaries[chunk_index]
+                chunks.append({
+                    'index': chunk_index,
+                    'change': summary['change'],
+                    'collapsable': summary['collapsable'],
+                    'meta': summary['meta'],
+                    'lines': lines,
+                })
+
+    for chunk in chunks:
+        chunk['numlines'] = len(chunk['lines'])
+
+    return chunks
+
+
+def store_chunk_segments(cache_key, chunks):
+    """Store the segments for a file's chunks in the cache.
+
+    Args:
+        cache_key (unicode):
+            The cache key for the file's chunks.
+
+        chunks (list of dict):
+            The chunks for the file.
+
+    Returns:
+        tuple:
+        A 2-tuple of the index and the list of segments, as returned by
+        :py:func:`build_chunk_segments`.
+    """
+    index, segments = build_chunk_segments(chunks)
+    expiration = settings.CACHE_EXPIRATION_TIME
+
+    cache.set_many(
+        dict(
+            (_make_segment_key(cache_key, i),
+             zlib.compress(pickle.dumps(segment,
+                                        protocol=pickle.HIGHEST_PROTOCOL)))
+            for i, segment in enumerate(segments)
+        ),
+        expiration)
+
+    # The index is stored last, so that it's never available without its
+    # segments (unless they've since been evicted).
+    cache.set(_make_index_key(cache_key), index, expiration)
+
+    return index, segments
+
+
+def load_chunk_segment_index(cache_key):
+    """Return the segment index for a file's chunks from the cache.
+
+    Args:
+        cache_key (unicode):
+            The cache key for the file's chunks.
+
+    Returns:
+        dict:
+        The segment index, or ``None`` if it's not in the cache.
+    """
+    return cache.get(_make_index_key(cache_key))
+
+
+def load_chunk_segments(cache_key, segment_nums):
+    """Load segments for a file's chunks from the cache.
+
+    All segments are loaded in a single cache request.
+
+    Args:
+        cache_key (unicode):
+            The cache key for the file's chunks.
+
+        segment_nums (list of int):
+            The numbers of the segments to load.
+
+    Returns:
+        dict:
+        A mapping of segment numbers to segments, or ``None`` if any of the
+        segments are missing from the cache.
+    """
+    keys = dict(
+        (_make_segment_key(cache_key, segment_num), segment_num)
+        for segment_num in segment_nums
+    )
+
+    if not keys:
+        return {}
+
+    results = cache.get_many(list(keys))
+
+    if len(results) != len(keys):
+        return None
+
+    return dict(
+        (keys[key], pickle.loads(zlib.decompress(data)))
+        for key, data in results.items()
+    )
+
+
+def _make_index_key(cache_key):
+    """Return the cache key for a segment index.
+
+    Args:
+        cache_key (unicode):
+            The cache key for the file's chunks.
+
+    Returns:
+        unicode:
+        The cache key for the index.
+    """
+    return make_cache_key('%s-segments-v%d' % (cache_key, SEGMENTS_VERSION))
+
+
+def _make_segment_key(cache_key, segment_num):
+    """Return the cache key for a segment.
+
+    Args:
+        cache_key (unicode):
+            The cache key for the file's chunks.
+
+        segment_num (int):
+            The number of the segment.
+
+    Returns:
+        unicode:
+        The cache key for the segment.
+    """
+    return make_cache_key('%s-segments-v%d-%d'
+                          % (cache_key, SEGMENTS_VERSION, segment_num))
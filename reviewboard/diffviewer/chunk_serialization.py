@@ -0,0 +1,249 @@
+"""Compact serialization of diff chunks for caching.
+
+Generated diff chunks are lists of dictionaries, each containing a list of
+lines. Every line is itself a list of line numbers, HTML strings, changed
+regions, and flags. Pickling these directly stores a separate object for
+every value on every line, which is bulky and slow to load for large files.
+
+For caching, each chunk is instead converted into a columnar form:
+
+* Line numbers are stored in arrays.
+* All HTML for the chunk is stored as one string, with an array of offsets.
+* Per-line booleans are stored as bit flags in a byte string.
+* Changed regions and move information, which are rare, are stored in
+  dictionaries keyed by the line's index within the chunk.
+
+Chunks are converted back as they're iterated, so consumers only pay for
+the chunks they actually read.
+"""
+
+from __future__ import unicode_literals
+
+import array
+import itertools
+
+from django.utils import six
+from django.utils.safestring import SafeText
+from django.utils.six.moves import zip
+
+
+#: The marker identifying a serialized chunk.
+#:
+#: This must be changed whenever the serialized format changes.
+SERIALIZED_CHUNK_MARKER = 'compact-chunk:1'
+
+
+#: The flag for a line consisting of whitespace-only changes.
+LINE_FLAG_WHITESPACE = 1 << 0
+
+#: The flag for a line with move information.
+LINE_FLAG_MOVED = 1 << 1
+
+
+# array.array requires a native string type code on Python 2.
+_ARRAY_TYPECODE = str('i')
+
+
+def serialize_chunks(chunks):
+    """Return a compact, cacheable representation of a list of chunks.
+
+    Args:
+        chunks (iterable of dict):
+            The chunks to serialize.
+
+    Returns:
+        list:
+        The serialized chunks, suitable for passing to
+        :py:func:`deserialize_chunks`.
+    """
+    return [
+        serialize_chunk(chunk)
+        for chunk in chunks
+    ]
+
+
+def deserialize_chunks(data):
+    """Yield chunks from a serialized representation.
+
+    Chunks are deserialized as they're iterated. Chunks cached before they
+    were serialized are yielded as-is.
+
+    Args:
+        data (list):
+            The serialized chunks, as returned by :py:func:`serialize_chunks`.
+
+    Yields:
+        dict:
+        Each chunk.
+    """
+    for item in data:
+        if isinstance(item, dict):
+            yield item
+        else:
+            yield deserialize_chunk(item)
+
+
+def serialize_chunk(chunk):
+    """Return a compact representation of a chunk.
+
+    Chunks with lines that don't follow the standard format are returned
+    unchanged.
+
+    Args:
+        chunk (dict):
+            The chunk to serialize.
+
+    Returns:
+        object:
+        The serialized chunk.
+    """
+    lines = chunk['lines']
+
+    if not lines or not _can_serialize_lines(lines):
+        return chunk
+
+    num_lines = len(lines)
+    old_line_nums = array.array(_ARRAY_TYPECODE)
+    new_line_nums = array.array(_ARRAY_TYPECODE)
+    markup_offsets = array.array(_ARRAY_TYPECODE)
+    markup = []
+    flags = bytearray(num_lines)
+    regions = {}
+    moved = {}
+    offset = 0
+
+    for i, line in enumerate(lines):
+        old_line_nums.append(line[1] or 0)
+        new_line_nums.append(line[4] or 0)
+
+        for html in (line[2], line[5]):
+            markup.append(html)
+            offset += len(html)
+            markup_offsets.append(offset)
+
+        if line[3] or line[6]:
+            regions[i] = (line[3], line[6])
+
+        line_flags = 0
+
+        if line[7]:
+            line_flags |= LINE_FLAG_WHITESPACE
+
+        if len(line) > 8:
+            line_flags |= LINE_FLAG_MOVED
+            moved[i] = line[8]
+
+        flags[i] = line_flags
+
+    return (
+        SERIALIZED_CHUNK_MARKER,
+        dict(
+            (key, value)
+            for key, value in six.iteritems(chunk)
+            if key != 'lines'
+        ),
+        lines[0][0],
+        old_line_nums,
+        new_line_nums,
+        ''.join(markup),
+        markup_offsets,
+        bytes(flags),
+        regions,
+        moved,
+    )
+
+
+def deserialize_chunk(data):
+    """Return a chunk from its compact representation.
+
+    Args:
+        data (object):
+            The serialized chunk, as returned by :py:func:`serialize_chunk`.
+
+    Returns:
+        dict:
+        The chunk.
+
+    Raises:
+        ValueError:
+            The data is not a serialized chunk.
+    """
+    if isinstance(data, dict):
+        return data
+
+    if not isinstance(data, tuple) or data[0] != SERIALIZED_CHUNK_MARKER:
+        raise ValueError('Unsupported serialized chunk data')
+
+    (marker, fields, first_line_num, old_line_nums, new_line_nums, markup,
+     markup_offsets, flags, regions, moved) = data
+
+    markup_ends = markup_offsets.tolist()
+    markup_starts = [0] + markup_ends[:-1]
+    html = [
+        SafeText(markup[start:end])
+        for start, end in zip(markup_starts, markup_ends)
+    ]
+
+    lines = [
+        [
+            line_num,
+            old_line_num or '',
+            old_html,
+            [],
+            new_line_num or '',
+            new_html,
+            [],
+            bool(line_flags & LINE_FLAG_WHITESPACE),
+        ]
+        for (line_num, old_line_num, old_html, new_line_num, new_html,
+             line_flags) in zip(itertools.count(first_line_num),
+                                old_line_nums.tolist(),
+                                html[0::2],
+                                new_line_nums.tolist(),
+                                html[1::2],
+                                bytearray(flags))
+    ]
+
+    for i, (old_region, new_region) in six.iteritems(regions):
+        line = lines[i]
+        line[3] = list(old_region)
+        line[6] = list(new_region)
+
+    for i, moved_info in six.iteritems(moved):
+        lines[i].append(moved_info)
+
+    chunk = dict(fields)
+    chunk['lines'] = lines
+
+    return chunk
+
+
+def _can_serialize_lines(lines):
+    """Return whether a chunk's lines can be serialized.
+
+    Lines must have consecutive virtual line numbers and integer line
+    numbers (or empty values) in order to be stored compactly.
+
+    Args:
+        lines (list of list):
+            The lines in the chunk.
+
+    Returns:
+        bool:
+        Whether the lines can be serialized.
+    """
+    first_line_num = lines[0][0]
+
+    if not isinstance(first_line_num, six.integer_types):
+        return False
+
+    for i, line in enumerate(lines):
+        if (len(line) not in (8, 9) or
+            line[0] != first_line_num + i or
+            not isinstance(line[1] or 0, six.integer_types) or
+            not isinstance(line[4] or 0, six.integer_types) or
+            line[1] == 0 or
+            line[4] == 0):
+            return False
+
+    return True
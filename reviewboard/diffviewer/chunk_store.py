@@ -0,0 +1,418 @@
+"""Persistent storage for generated diff chunks.
+
+Diff chunks are normally only cached in the configured cache backend. When
+that's restarted or evicts entries, every diff must be fully regenerated the
+next time it's viewed, which means fetching files from the repository,
+diffing, and syntax highlighting them all over again.
+
+When the ``diffviewer_chunk_store_enabled`` setting is enabled, generated
+chunks are also written to a directory on disk, compressed, and are read
+back when they're missing from the cache. The directory is kept under a
+configurable size by removing the least recently used entries.
+
+Entries are spread across subdirectories by hash. When storing an entry
+occasionally prunes the store, only the entry's subdirectory is pruned (to
+its share of the maximum size), so the work done while serving a diff
+stays small. The ``diff-chunk-store`` management command prunes the whole
+store.
+"""
+
+from __future__ import unicode_literals
+
+import hashlib
+import logging
+import os
+import random
+import tempfile
+import zlib
+
+from django.conf import settings
+from django.utils.encoding import force_bytes
+from django.utils.six.moves import cPickle as pickle
+from djblets.siteconfig.models import SiteConfiguration
+
+
+logger = logging.getLogger(__name__)
+
+
+#: The version of the stored chunk format.
+#:
+#: Entries stored with a different version are treated as missing. This must
+#: be bumped whenever the structure of generated chunks changes.
+CHUNK_STORE_VERSION = 2
+
+#: The probability that storing an entry will prune its subdirectory.
+GC_PROBABILITY = 0.01
+
+
+class DiffChunkStore(object):
+    """A directory of stored diff chunks.
+
+    Each entry is stored in a file named after a hash of its cache key,
+    containing the compressed, pickled chunks. Entries are written
+    atomically, so the store can be shared by multiple server processes.
+
+    The modification time of an entry is updated when it's read, so that
+    garbage collection can remove the least recently used entries first.
+
+    Attributes:
+        path (unicode):
+            The path to the directory containing the stored chunks.
+    """
+
+    #: The file extension used for stored entries.
+    ENTRY_EXTENSION = '.chunks'
+
+    #: The number of subdirectories that entries are spread across.
+    NUM_BUCKETS = 256
+
+    def __init__(self, path):
+        """Initialize the store.
+
+        Args:
+            path (unicode):
+                The path to the directory containing the stored chunks.
+                This will be created when needed.
+        """
+        self.path = path
+
+    def get(self, key):
+        """Return the chunks stored for a key.
+
+        Args:
+            key (unicode):
+                The cache key for the chunks.
+
+        Returns:
+            list of dict:
+            The stored chunks, or ``None`` if there aren't any stored (or
+            they couldn't be read).
+        """
+        filename = self._get_entry_path(key)
+
+        try:
+            with open(filename, 'rb') as fp:
+                data = fp.read()
+        except IOError:
+            return None
+
+        try:
+            version, stored_key, chunks = pickle.loads(zlib.decompress(data))
+        except Exception as e:
+            logger.warning('Unable to load stored diff chunks from %s: %s',
+                           filename, e)
+            return None
+
+        if version != CHUNK_STORE_VERSION or stored_key != key:
+            return None
+
+        try:
+            os.utime(filename, None)
+        except OSError:
+            # The entry may have been removed by garbage collection in
+            # another process. The chunks have already been read.
+            pass
+
+        return chunks
+
+    def has(self, key):
+        """Return whether chunks are stored for a key.
+
+        This only checks for the entry, without reading it.
+
+        Args:
+            key (unicode):
+                The cache key for the chunks.
+
+        Returns:
+            bool:
+            ``True`` if chunks are stored for the key.
+        """
+        return os.path.isfile(self._get_entry_path(key))
+
+    def set(self, key, chunks):
+        """Store chunks for a key.
+
+        Failures are logged and otherwise ignored, since the chunks can
+        always be regenerated.
+
+        Args:
+            key (unicode):
+                The cache key for the chunks.
+
+            chunks (list of dict):
+                The chunks to store.
+        """
+        filename = self._get_entry_path(key)
+        dirname = os.path.dirname(filename)
+
+        try:
+            data = zlib.compress(pickle.dumps(
+                (CHUNK_STORE_VERSION, key, chunks),
+                protocol=pickle.HIGHEST_PROTOCOL))
+
+            if not os.path.isdir(dirname):
+                try:
+                    os.makedirs(dirname)
+                except OSError:
+                    # Another process may have created it.
+                    if not os.path.isdir(dirname):
+                        raise
+
+            fd, temp_filename = tempfile.mkstemp(dir=dirname,
+                                                 prefix='.tmp-')
+
+            try:
+                with os.fdopen(fd, 'wb') as fp:
+                    fp.write(data)
+
+                os.rename(temp_filename, filename)
+            except Exception:
+                os.unlink(temp_filename)
+                raise
+        except Exception as e:
+            logger.exception('Unable to store diff chunks in %s: %s',
+                             filename, e)
+
+    def delete(self, key):
+        """Delete the chunks stored for a key.
+
+        Args:
+            key (unicode):
+                The cache key for the chunks.
+        """
+        try:
+            os.unlink(self._get_entry_path(key))
+        except OSError:
+            pass
+
+    def get_stats(self):
+        """Return statistics on the store.
+
+        Returns:
+            dict:
+            A dictionary with the following keys:
+
+            ``entries`` (int):
+                The number of stored entries.
+
+            ``size`` (int):
+                The total size of the stored entries, in bytes.
+        """
+        entries = self._get_entries(self.path)
+
+        return {
+            'entries': len(entries),
+            'size': sum(size for mtime, size, filename in entries),
+        }
+
+    def prune(self, max_size):
+        """Remove the least recently used entries exceeding a total size.
+
+        Args:
+            max_size (int):
+                The maximum total size of the stored entries, in bytes.
+
+        Returns:
+            tuple:
+            A 2-tuple of the number of entries removed and the total number
+            of bytes freed.
+        """
+        return self._prune_entries(self._get_entries(self.path), max_size)
+
+    def prune_bucket(self, key, max_size):
+        """Prune the subdirectory containing a key's entry.
+
+        The subdirectory is kept within its share of the maximum total size.
+        Since entries are spread evenly across subdirectories, this keeps
+        the store near the maximum size, while only listing a small part of
+        it.
+
+        Args:
+            key (unicode):
+                The cache key whose subdirectory should be pruned.
+
+            max_size (int):
+                The maximum total size of all stored entries, in bytes.
+
+        Returns:
+            tuple:
+            A 2-tuple of the number of entries removed and the total number
+            of bytes freed.
+        """
+        return self._prune_entries(
+            self._get_entries(os.path.dirname(self._get_entry_path(key))),
+            max_size // self.NUM_BUCKETS)
+
+    def clear(self):
+        """Remove all stored entries.
+
+        Returns:
+            tuple:
+            A 2-tuple of the number of entries removed and the total number
+            of bytes freed.
+        """
+        return self.prune(0)
+
+    def _prune_entries(self, entries, max_size):
+        """Remove the least recently used entries exceeding a total size.
+
+        Args:
+            entries (list of tuple):
+                The entries to consider, from :py:meth:`_get_entries`.
+
+            max_size (int):
+                The maximum total size of the entries, in bytes.
+
+        Returns:
+            tuple:
+            A 2-tuple of the number of entries removed and the total number
+            of bytes freed.
+        """
+        total_size = sum(size for mtime, size, filename in entries)
+        num_removed = 0
+        size_removed = 0
+
+        entries.sort()
+
+        for mtime, size, filename in entries:
+            if total_size - size_removed <= max_size:
+                break
+
+            try:
+                os.unlink(filename)
+            except OSError:
+                continue
+
+            num_removed += 1
+            size_removed += size
+
+        return num_removed, size_removed
+
+    def _get_entry_path(self, key):
+        """Return the path to the file for an entry.
+
+        Entries are spread across subdirectories, to keep directory sizes
+        manageable.
+
+        Args:
+            key (unicode):
+                The cache key for the entry.
+
+        Returns:
+            unicode:
+            The path to the file.
+        """
+        key_hash = hashlib.sha256(force_bytes(key)).hexdigest()
+
+        return os.path.join(self.path, key_hash[:2],
+                            key_hash + self.ENTRY_EXTENSION)
+
+    def _get_entries(self, path):
+        """Return information on stored entries in a directory.
+
+        Args:
+            path (unicode):
+                The directory to list entries in, including subdirectories.
+
+        Returns:
+            list of tuple:
+            A list of ``(mtime, size, filename)`` tuples for each entry.
+        """
+        entries = []
+
+        if not os.path.isdir(path):
+            return entries
+
+        for dirpath, dirnames, filenames in os.walk(path):
+            for filename in filenames:
+                if not filename.endswith(self.ENTRY_EXTENSION):
+                    continue
+
+                filename = os.path.join(dirpath, filename)
+
+                try:
+                    st = os.stat(filename)
+                except OSError:
+                    continue
+
+                entries.append((st.st_mtime, st.st_size, filename))
+
+        return entries
+
+
+def get_chunk_store_path():
+    """Return the configured path for stored diff chunks.
+
+    Returns:
+        unicode:
+        The path to the directory containing stored chunks.
+    """
+    siteconfig = SiteConfiguration.objects.get_current()
+
+    return (siteconfig.get('diffviewer_chunk_store_path') or
+            os.path.join(settings.SITE_DATA_DIR, 'diff-chunks'))
+
+
+def get_chunk_store():
+    """Return the persistent chunk store, if enabled.
+
+    Returns:
+        DiffChunkStore:
+        The chunk store, or ``None`` if the ``diffviewer_chunk_store_enabled``
+        setting is disabled.
+    """
+    siteconfig = SiteConfiguration.objects.get_current()
+
+    if not siteconfig.get('diffviewer_chunk_store_enabled'):
+        return None
+
+    return DiffChunkStore(get_chunk_store_path())
+
+
+def get_chunk_store_max_size():
+    """Return the configured maximum size of the chunk store.
+
+    Returns:
+        int:
+        The maximum size, in bytes.
+    """
+    siteconfig = SiteConfiguration.objects.get_current()
+
+    return siteconfig.get('diffviewer_chunk_store_max_size_mb') * 1024 * 1024
+
+
+def load_or_generate_chunks(key, generate_func):
+    """Return stored chunks, or generate and store new ones.
+
+    If the chunk store is disabled, this simply generates the chunks.
+
+    Storing new chunks occasionally prunes the part of the store they were
+    stored in, which keeps the store near the configured maximum size.
+
+    Args:
+        key (unicode):
+            The cache key for the chunks.
+
+        generate_func (callable):
+            A function that generates the list of chunks.
+
+    Returns:
+        list of dict:
+        The chunks.
+    """
+    store = get_chunk_store()
+
+    if store is None:
+        return generate_func()
+
+    chunks = store.get(key)
+
+    if chunks is None:
+        chunks = generate_func()
+        store.set(key, chunks)
+
+        if random.random() < GC_PROBABILITY:
+            store.prune_bucket(key, get_chunk_store_max_size())
+
+    return chunks
@@ -13,13 +13,21 @@ from functools import cmp_to_key
 from django.core.exceptions import ObjectDoesNotExist
 from django.utils import six
 from django.utils.encoding import force_text
+from django.core.cache import cache
 from django.utils.translation import ugettext as _
+from djblets.cache.backend import make_cache_key
 from djblets.log import log_timed
 from djblets.siteconfig.models import SiteConfiguration
 from djblets.util.compat.python.past import cmp
 from djblets.util.contextmanagers import controlled_subprocess
 
 from reviewboard.deprecation import RemovedInReviewBoard50Warning
+from reviewboard.diffviewer.chunk_segments import (get_chunk_summary,
+                                                   get_chunks_from_segments,
+                                                   get_segment_nums_for_range,
+                                                   load_chunk_segment_index,
+                                                   load_chunk_segments,
+                                                   store_chunk_segments)
 from reviewboard.diffviewer.commit_utils import exclude_ancestor_filediffs
 from reviewboard.diffviewer.errors import DiffTooBigError, PatchError
 from reviewboard.scmtools.core import PRE_CREATION, HEAD
@@ -415,6 +423,93 @@ def get_original_file_from_repo(filediff, request=None, encoding_list=None):
     return data
 
 
+def get_original_file_source(filediff):
+    """Return the repository file used for the pre-patch file of a FileDiff.
+
+    This determines which file :py:func:`get_original_file` will fetch from
+    the repository, without fetching it.
+
+    Version Added:
+        4.0
+
+    Args:
+        filediff (reviewboard.diffviewer.models.filediff.FileDiff):
+            The FileDiff to return the source file for.
+
+    Returns:
+        tuple:
+        A 2-tuple of the path and revision of the file in the repository,
+        or ``None`` if no file needs to be fetched from the repository.
+    """
+    if not filediff.parent_diff:
+        ancestors = filediff.get_ancestors(minimal=True)
+
+        if ancestors:
+            filediff = ancestors[0]
+
+        if filediff.is_new:
+            return None
+
+    extra_data = filediff.extra_data or {}
+    source_revision = extra_data.get('parent_source_revision',
+                                     filediff.source_revision)
+
+    if source_revision == PRE_CREATION:
+        return None
+
+    return (extra_data.get('parent_source_filename', filediff.source_file),
+            source_revision)
+
+
+def prefetch_original_files(filediffs, request=None):
+    """Fetch the pre-patch files for several FileDiffs from the repository.
+
+    For repositories that support fetching several files at once (see
+    :py:meth:`Repository.prefetch_files()
+    <reviewboard.scmtools.models.Repository.prefetch_files>`), this fetches
+    and caches all the files that :py:func:`get_original_file` would fetch
+    for the FileDiffs, in as few requests as possible. For other
+    repositories, this does nothing.
+
+    Version Added:
+        4.0
+
+    Args:
+        filediffs (list of reviewboard.diffviewer.models.filediff.FileDiff):
+            The FileDiffs to fetch the files for.
+
+        request (django.http.HttpRequest, optional):
+            The HTTP request from the client.
+    """
+    files_by_repository = {}
+
+    for filediff in filediffs:
+        if filediff.binary:
+            continue
+
+        repository = filediff.get_repository()
+
+        if (repository is None or
+            not repository.get_scmtool().supports_batch_file_fetch):
+            continue
+
+        source = get_original_file_source(filediff)
+
+        if source is not None:
+            key = (repository.pk, filediff.diffset.base_commit_id)
+
+            if key not in files_by_repository:
+                files_by_repository[key] = (repository, set())
+
+            files_by_repository[key][1].add(source)
+
+    for (repository_id, base_commit_id), (repository, files) in \
+            six.iteritems(files_by_repository):
+        repository.prefetch_files(sorted(files),
+                                  base_commit_id=base_commit_id,
+                                  request=request)
+
+
 def get_original_file(filediff, request=None, encoding_list=None):
     """Return the pre-patch file of a FileDiff.
 
@@ -1216,15 +1311,42 @@ def populate_diff_chunks(files, enable_syntax_highlighting=True,
     the file state.
     """
     from reviewboard.diffviewer.chunk_generator import get_diff_chunk_generator
+    from reviewboard.diffviewer.chunk_store import get_chunk_store
 
-    for diff_file in files:
-        generator = get_diff_chunk_generator(
+    generators = [
+        get_diff_chunk_generator(
             request,
             diff_file['filediff'],
             diff_file['interfilediff'],
             diff_file['force_interdiff'],
             enable_syntax_highlighting,
             base_filediff=diff_file.get('base_filediff'))
+        for diff_file in files
+    ]
+
+    # Fetch the files needed for any chunks that aren't cached or stored
+    # up-front, so that repositories supporting it can fetch them all at once.
+    store = get_chunk_store()
+
+    def _needs_files(generator):
+        cache_key = generator.make_cache_key()
+
+        return (make_cache_key(cache_key) not in cache and
+                (store is None or not store.has(cache_key)))
+
+    prefetch_original_files(
+        [
+            filediff
+            for generator in generators
+            if _needs_files(generator)
+            for filediff in (generator.filediff,
+                             generator.interfilediff,
+                             generator.base_filediff)
+            if filediff is not None
+        ],
+        request=request)
+
+    for diff_file, generator in zip(files, generators):
         chunks = list(generator.get_chunks())
 
         diff_file.update({
@@ -1250,6 +1372,45 @@ def populate_diff_chunks(files, enable_syntax_highlighting=True,
         })
 
 
+def highlight_pending_chunks(diff_file, chunk_indexes, request=None):
+    """Syntax-highlight chunks that were left unhighlighted.
+
+    When lazy syntax highlighting is enabled, collapsed chunks are generated
+    without syntax highlighting. This should be called before any of those
+    chunks are displayed.
+
+    Args:
+        diff_file (dict):
+            The diff file, with populated chunks.
+
+        chunk_indexes (list of int):
+            The indexes of the chunks that will be displayed.
+
+        request (django.http.HttpRequest, optional):
+            The HTTP request from the client.
+    """
+    from reviewboard.diffviewer.chunk_generator import get_diff_chunk_generator
+
+    chunks = diff_file['chunks']
+    pending_indexes = [
+        i
+        for i in chunk_indexes
+        if chunks[i]['meta'].get('syntax_highlighting_pending')
+    ]
+
+    if pending_indexes:
+        generator = get_diff_chunk_generator(
+            request,
+            diff_file['filediff'],
+            diff_file['interfilediff'],
+            diff_file['force_interdiff'],
+            True,
+            base_filediff=diff_file.get('base_filediff'))
+
+        for i in pending_indexes:
+            generator.highlight_pending_chunk(chunks, i)
+
+
 def get_file_from_filediff(context, filediff, interfilediff):
     """Return the files that corresponds to the filediff/interfilediff.
 
@@ -1260,25 +1421,16 @@ def get_file_from_filediff(context, filediff, interfilediff):
 
     This function returns either exactly one file or ``None``.
     """
-    interdiffset = None
-
-    key = "_diff_files_%s_%s" % (filediff.diffset.id, filediff.id)
-
-    if interfilediff:
-        key += "_%s" % (interfilediff.id)
-        interdiffset = interfilediff.diffset
+    key = _make_file_context_key(filediff, interfilediff)
 
     if key in context:
         files = context[key]
     else:
         assert 'user' in context
 
-        request = context.get('request', None)
-        files = get_diff_files(filediff.diffset, filediff, interdiffset,
-                               interfilediff=interfilediff,
-                               request=request)
+        files = _get_unpopulated_diff_files(context, filediff, interfilediff)
         populate_diff_chunks(files, get_enable_highlighting(context['user']),
-                             request=request)
+                             request=context.get('request', None))
         context[key] = files
 
     if not files:
@@ -1288,13 +1440,53 @@ def get_file_from_filediff(context, filediff, interfilediff):
     return files[0]
 
 
+def prefetch_file_chunks_in_ranges(context, filediff, interfilediff,
+                                   line_ranges):
+    """Prefetch the chunks for several ranges of lines in a filediff.
+
+    If the file's chunks are stored in segments (see
+    :py:mod:`reviewboard.diffviewer.chunk_segments`), the segments covering
+    all of the ranges are fetched from the cache at once. Subsequent calls to
+    :py:func:`get_file_chunks_in_range` for those ranges are then served
+    without further cache requests.
+
+    Args:
+        context (dict):
+            The template context, used for caching state.
+
+        filediff (reviewboard.diffviewer.models.filediff.FileDiff):
+            The FileDiff to fetch chunks for.
+
+        interfilediff (reviewboard.diffviewer.models.filediff.FileDiff):
+            The FileDiff on the other end of an interdiff, if any.
+
+        line_ranges (list of tuple):
+            A list of ``(first_line, num_lines)`` tuples.
+    """
+    segments = _get_file_segments(context, filediff, interfilediff)
+
+    if segments is not None:
+        segment_nums = set()
+
+        for first_line, num_lines in line_ranges:
+            segment_nums.update(get_segment_nums_for_range(
+                segments['index'], first_line, num_lines))
+
+        _load_file_segments(segments, sorted(segment_nums))
+
+
 def get_last_line_number_in_diff(context, filediff, interfilediff):
     """Determine the last virtual line number in the filediff/interfilediff.
 
     This returns the virtual line number to be used in expandable diff
     fragments.
     """
-    f = get_file_from_filediff(context, filediff, interfilediff)
+    segments = _get_file_segments(context, filediff, interfilediff)
+
+    if segments is not None:
+        return segments['index']['num_lines']
+
+    f = _get_file_with_segments(context, filediff, interfilediff)
 
     last_chunk = f['chunks'][-1]
     last_line = last_chunk['lines'][-1]
@@ -1304,31 +1496,27 @@ def get_last_line_number_in_diff(context, filediff, interfilediff):
 
 def _get_last_header_in_chunks_before_line(chunks, target_line):
     """Find the last header in the list of chunks before the target line."""
-    def find_last_line_numbers(lines):
-        """Return a tuple of the last line numbers in the given list of lines.
-
-        The last line numbers are not always contained in the last element of
-        the ``lines`` list. This is the case when dealing with interdiffs that
-        have filtered out opcodes.
+    return _get_last_header_in_chunk_summaries(
+        (get_chunk_summary(chunk) for chunk in chunks),
+        target_line)
 
-        See :py:func:`get_chunks_in_range` for a description of what is
-        contained in each element of ``lines``.
-        """
-        last_left = None
-        last_right = None
 
-        for line in reversed(lines):
-            if not last_right and line[4]:
-                last_right = line[4]
+def _get_last_header_in_chunk_summaries(summaries, target_line):
+    """Find the last header in a list of chunk summaries before a line.
 
-            if not last_left and line[1]:
-                last_left = line[1]
-
-            if last_left and last_right:
-                break
+    Args:
+        summaries (iterable of dict):
+            The summaries of the chunks, as returned by
+            :py:func:`~reviewboard.diffviewer.chunk_segments.get_chunk_summary`.
 
-        return last_left, last_right
+        target_line (int):
+            The virtual line number to find the header for.
 
+    Returns:
+        dict:
+        The left and right headers. See
+        :py:func:`get_last_header_before_line` for details.
+    """
     def find_header(headers, offset, last_line):
         """Return the last header that occurs before a line.
 
@@ -1358,9 +1546,8 @@ def _get_last_header_in_chunks_before_line(chunks, target_line):
         'right': None
     }
 
-    for chunk in chunks:
-        lines = chunk['lines']
-        virtual_first_line = lines[0][0]
+    for summary in summaries:
+        virtual_first_line, first_left, first_right = summary['first_line']
 
         if virtual_first_line <= target_line:
             if virtual_first_line == target_line:
@@ -1368,20 +1555,21 @@ def _get_last_header_in_chunks_before_line(chunks, target_line):
                 # there can't be any relevant header information here.
                 break
 
-            last_left, last_right = find_last_line_numbers(lines)
+            last_left, last_right = summary['last_line_nums']
+            meta = summary['meta']
 
-            if 'left_headers' in chunk['meta'] and lines[0][1]:
-                offset = virtual_first_line - lines[0][1]
+            if 'left_headers' in meta and first_left:
+                offset = virtual_first_line - first_left
 
-                left_header = find_header(chunk['meta']['left_headers'],
+                left_header = find_header(meta['left_headers'],
                                           offset, last_left + offset)
 
                 header['left'] = left_header or header['left']
 
-            if 'right_headers' in chunk['meta'] and lines[0][4]:
-                offset = virtual_first_line - lines[0][4]
+            if 'right_headers' in meta and first_right:
+                offset = virtual_first_line - first_right
 
-                right_header = find_header(chunk['meta']['right_headers'],
+                right_header = find_header(meta['right_headers'],
                                            offset, last_right + offset)
 
                 header['right'] = right_header or header['right']
@@ -1405,7 +1593,13 @@ def get_last_header_before_line(context, filediff, interfilediff, target_line):
     ``text`` The header text
     ======== ==============================================================
     """
-    f = get_file_from_filediff(context, filediff, interfilediff)
+    segments = _get_file_segments(context, filediff, interfilediff)
+
+    if segments is not None:
+        return _get_last_header_in_chunk_summaries(
+            segments['index']['chunks'], target_line)
+
+    f = _get_file_with_segments(context, filediff, interfilediff)
 
     return _get_last_header_in_chunks_before_line(f['chunks'], target_line)
 
@@ -1419,17 +1613,233 @@ def get_file_chunks_in_range(context, filediff, interfilediff,
     in order to improve performance and reduce lookup times for files that have
     already been fetched.
 
+    If the file's chunks are stored in segments, only the segments covering
+    the range are loaded. Otherwise, all chunks are loaded, and segments are
+    stored for future lookups.
+
     See :py:func:`get_chunks_in_range` for information on the returned state
     of the chunks.
     """
-    f = get_file_from_filediff(context, filediff, interfilediff)
+    segments = _get_file_segments(context, filediff, interfilediff)
+
+    if segments is not None:
+        segment_nums = get_segment_nums_for_range(segments['index'],
+                                                  first_line, num_lines)
+
+        if _load_file_segments(segments, segment_nums):
+            chunks = get_chunks_from_segments(segments['index'],
+                                              segments['segments'],
+                                              segment_nums)
+
+            return list(get_chunks_in_range(chunks, first_line, num_lines))
+
+    f = _get_file_with_segments(context, filediff, interfilediff)
 
     if f:
-        return get_chunks_in_range(f['chunks'], first_line, num_lines)
+        chunks = list(get_chunks_in_range(f['chunks'], first_line,
+                                          num_lines))
+
+        # The returned chunks share their lines with the file's chunks, so
+        # highlighting those will update these as well.
+        highlight_pending_chunks(f,
+                                 [chunk['index'] for chunk in chunks],
+                                 request=context.get('request'))
+
+        return chunks
     else:
         return []
 
 
+def _make_file_context_key(filediff, interfilediff):
+    """Return the context key for a file's state.
+
+    Args:
+        filediff (reviewboard.diffviewer.models.filediff.FileDiff):
+            The FileDiff for the file.
+
+        interfilediff (reviewboard.diffviewer.models.filediff.FileDiff):
+            The FileDiff on the other end of an interdiff, if any.
+
+    Returns:
+        unicode:
+        The context key.
+    """
+    key = '_diff_files_%s_%s' % (filediff.diffset.id, filediff.id)
+
+    if interfilediff:
+        key += '_%s' % interfilediff.id
+
+    return key
+
+
+def _get_unpopulated_diff_files(context, filediff, interfilediff):
+    """Return the list of files for a filediff, without their chunks.
+
+    The result is cached in the context.
+
+    Args:
+        context (dict):
+            The template context.
+
+        filediff (reviewboard.diffviewer.models.filediff.FileDiff):
+            The FileDiff for the file.
+
+        interfilediff (reviewboard.diffviewer.models.filediff.FileDiff):
+            The FileDiff on the other end of an interdiff, if any.
+
+    Returns:
+        list of dict:
+        The list of files, as returned by :py:func:`get_diff_files`.
+    """
+    key = '%s_unpopulated' % _make_file_context_key(filediff, interfilediff)
+
+    if key not in context:
+        if interfilediff:
+            interdiffset = interfilediff.diffset
+        else:
+            interdiffset = None
+
+        context[key] = get_diff_files(filediff.diffset, filediff,
+                                      interdiffset,
+                                      interfilediff=interfilediff,
+                                      request=context.get('request', None))
+
+    return context[key]
+
+
+def _get_file_segments(context, filediff, interfilediff):
+    """Return the state of a file's segmented chunks.
+
+    Args:
+        context (dict):
+            The template context, used for caching state.
+
+        filediff (reviewboard.diffviewer.models.filediff.FileDiff):
+            The FileDiff for the file.
+
+        interfilediff (reviewboard.diffviewer.models.filediff.FileDiff):
+            The FileDiff on the other end of an interdiff, if any.
+
+    Returns:
+        dict:
+        The state of the segments, containing the ``cache_key``, ``index``,
+        and loaded ``segments``. This will be ``None`` if the file's chunks
+        have already been fully loaded, or if they aren't stored in segments.
+    """
+    file_key = _make_file_context_key(filediff, interfilediff)
+
+    if file_key in context:
+        # All the chunks have already been loaded.
+        return None
+
+    segments_key = '%s_segments' % file_key
+
+    if segments_key not in context:
+        assert 'user' in context
+
+        from reviewboard.diffviewer.chunk_generator import \
+            get_diff_chunk_generator
+
+        files = _get_unpopulated_diff_files(context, filediff, interfilediff)
+        segments = None
+
+        if files:
+            diff_file = files[0]
+            generator = get_diff_chunk_generator(
+                context.get('request', None),
+                diff_file['filediff'],
+                diff_file['interfilediff'],
+                diff_file['force_interdiff'],
+                get_enable_highlighting(context['user']),
+                base_filediff=diff_file.get('base_filediff'))
+            cache_key = generator.make_cache_key()
+
+            segments = {
+                'cache_key': cache_key,
+                'index': load_chunk_segment_index(cache_key),
+                'segments': {},
+            }
+
+        context[segments_key] = segments
+
+    segments = context[segments_key]
+
+    if segments is None or segments['index'] is None:
+        return None
+
+    return segments
+
+
+def _load_file_segments(segments, segment_nums):
+    """Load any missing segments for a file.
+
+    Args:
+        segments (dict):
+            The state of the segments, as returned by
+            :py:func:`_get_file_segments`.
+
+        segment_nums (list of int):
+            The numbers of the segments to load.
+
+    Returns:
+        bool:
+        ``True`` if the segments were loaded, or ``False`` if any were
+        missing from the cache.
+    """
+    missing_nums = [
+        segment_num
+        for segment_num in segment_nums
+        if segment_num not in segments['segments']
+    ]
+
+    if missing_nums:
+        loaded = load_chunk_segments(segments['cache_key'], missing_nums)
+
+        if loaded is None:
+            return False
+
+        segments['segments'].update(loaded)
+
+    return True
+
+
+def _get_file_with_segments(context, filediff, interfilediff):
+    """Return a file with all chunks loaded, storing segments for later.
+
+    When the file's chunks are loaded because their segments weren't in the
+    cache, all chunks are syntax-highlighted and stored in segments, so that
+    future lookups of ranges of lines can use them.
+
+    Args:
+        context (dict):
+            The template context, used for caching state.
+
+        filediff (reviewboard.diffviewer.models.filediff.FileDiff):
+            The FileDiff for the file.
+
+        interfilediff (reviewboard.diffviewer.models.filediff.FileDiff):
+            The FileDiff on the other end of an interdiff, if any.
+
+    Returns:
+        dict:
+        The file, as returned by :py:func:`get_file_from_filediff`.
+    """
+    segments_key = '%s_segments' % _make_file_context_key(filediff,
+                                                          interfilediff)
+    segments = context.get(segments_key)
+    f = get_file_from_filediff(context, filediff, interfilediff)
+
+    if f and segments is not None and not segments.get('stored'):
+        chunks = f['chunks']
+
+        highlight_pending_chunks(f, list(range(len(chunks))),
+                                 request=context.get('request'))
+        store_chunk_segments(segments['cache_key'], chunks)
+        segments['stored'] = True
+
+    return f
+
+
 def get_chunks_in_range(chunks, first_line, num_lines):
     """Generate the chunks within a range of lines of a larger list of chunks.
 
@@ -1475,7 +1885,7 @@ def get_chunks_in_range(chunks, first_line, num_lines):
                 last_index = len(lines)
 
             new_chunk = {
-                'index': i,
+                'index': chunk.get('index', i),
                 'lines': chunk['lines'][start_index:last_index],
                 'numlines': last_index - start_index,
                 'change': chunk['change'],
@@ -346,6 +346,7 @@ def _process_files(parser, basedir, repository, base_commit_id,
 
     tool = repository.get_scmtool()
     basedir = force_bytes(basedir)
+    parsed_files = []
 
     for f in parser.parse():
         # This will either be a Revision or bytes. Either way, convert it
@@ -374,19 +375,40 @@ def _process_files(parser, basedir, repository, base_commit_id,
             continue
 
         source_filename = _normalize_filename(source_filename, basedir)
-
-        # FIXME: this would be a good place to find permissions errors
-        if (source_revision != PRE_CREATION and
+        needs_existence_check = (
+            check_existence and
+            source_revision != PRE_CREATION and
             source_revision != UNKNOWN and
             not f.binary and
             not f.deleted and
             not f.moved and
-            not f.copied and
-            (check_existence and
-             not get_file_exists(force_text(source_filename),
-                                 force_text(source_revision),
-                                 base_commit_id=base_commit_id,
-                                 request=request))):
+            not f.copied)
+
+        parsed_files.append((f, source_filename, source_revision,
+                             dest_filename, needs_existence_check))
+
+    if check_existence:
+        # Check for all the files at once, if the repository supports it.
+        # Files found to exist are cached, so the checks below won't need
+        # to contact the repository for them.
+        repository.prefetch_file_exists(
+            [
+                (force_text(source_filename), force_text(source_revision))
+                for (f, source_filename, source_revision, dest_filename,
+                     needs_existence_check) in parsed_files
+                if needs_existence_check
+            ],
+            base_commit_id=base_commit_id,
+            request=request)
+
+    for (f, source_filename, source_revision, dest_filename,
+         needs_existence_check) in parsed_files:
+        # FIXME: this would be a good place to find permissions errors
+        if (needs_existence_check and
+            not get_file_exists(force_text(source_filename),
+                                force_text(source_revision),
+                                base_commit_id=base_commit_id,
+                                request=request)):
             raise FileNotFoundError(force_text(source_filename),
                                     force_text(source_revision),
                                     base_commit_id)
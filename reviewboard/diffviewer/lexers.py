@@ -0,0 +1,220 @@
+"""Lexer lookup for syntax highlighting files in diffs.
+
+:py:func:`pygments.lexers.guess_lexer_for_filename` matches the filename
+against the filename patterns of every lexer on each call, and runs content
+analysis across every matching lexer when more than one matches. For a
+diffset with hundreds of files, this adds up.
+
+This module indexes the lexers' filename patterns once, caches the lexer
+classes matching each filename, and only analyzes the file's content when
+the filename is ambiguous. Lexer instances are shared across files.
+"""
+
+from __future__ import unicode_literals
+
+import fnmatch
+import re
+import threading
+
+from pygments.lexers import _iter_lexerclasses
+
+
+#: The maximum number of filenames kept in the lexer class cache.
+MAX_CACHED_FILENAMES = 10000
+
+
+_SIMPLE_PATTERN_RE = re.compile(r'^\*(\.[^*?\[]+)$')
+
+_lock = threading.Lock()
+_pattern_index = None
+_filename_cache = {}
+_lexers = {}
+
+
+def get_lexer_for_filename(filename, data):
+    """Return a lexer for highlighting a file in a diff.
+
+    This matches the behavior of
+    :py:func:`pygments.lexers.guess_lexer_for_filename`. The lexer will
+    preserve leading and trailing newlines, decode bytes as UTF-8, and
+    highlight code tags (such as ``TODO``).
+
+    The returned lexer is shared, and must not be modified.
+
+    Args:
+        filename (unicode):
+            The name of the file.
+
+        data (unicode):
+            The content of the file. This is only used if more than one
+            lexer matches the filename.
+
+    Returns:
+        pygments.lexer.Lexer:
+        The lexer, or ``None`` if no lexer matches the filename.
+    """
+    candidates = get_lexer_classes_for_filename(filename)
+
+    if not candidates:
+        return None
+    elif len(candidates) == 1:
+        lexer_cls = candidates[0][0]
+    else:
+        lexer_cls = _analyse_candidates(candidates, data)
+
+    try:
+        return _lexers[lexer_cls]
+    except KeyError:
+        lexer = lexer_cls(stripnl=False, encoding='utf-8')
+        lexer.add_filter('codetagify')
+        _lexers[lexer_cls] = lexer
+
+        return lexer
+
+
+def get_lexer_classes_for_filename(filename):
+    """Return the lexer classes with patterns matching a filename.
+
+    Results are cached by the file's basename.
+
+    Args:
+        filename (unicode):
+            The name of the file.
+
+    Returns:
+        list of tuple:
+        A list of 2-tuples of each matching lexer class and whether the
+        filename matched one of the lexer's primary patterns (rather than
+        one of its alias patterns).
+    """
+    basename = filename.rsplit('/', 1)[-1]
+
+    try:
+        return _filename_cache[basename]
+    except KeyError:
+        pass
+
+    suffix_index, other_patterns = _get_pattern_index()
+    matches = []
+
+    # Patterns like "*.py" only depend on the suffix of the filename, so
+    # they can be looked up directly for each possible suffix.
+    i = basename.find('.')
+
+    while i != -1:
+        matches += suffix_index.get(basename[i:], [])
+        i = basename.find('.', i + 1)
+
+    for pattern_re, lexer_cls, primary in other_patterns:
+        if pattern_re.match(basename):
+            matches.append((lexer_cls, primary))
+
+    # A lexer may match through more than one pattern. As with Pygments,
+    # a match on an alias pattern takes precedence.
+    candidates = {}
+
+    for lexer_cls, primary in matches:
+        candidates[lexer_cls] = candidates.get(lexer_cls, True) and primary
+
+    result = sorted(candidates.items(),
+                    key=lambda item: item[0].__name__)
+
+    if len(_filename_cache) >= MAX_CACHED_FILENAMES:
+        _filename_cache.clear()
+
+    _filename_cache[basename] = result
+
+    return result
+
+
+def clear_lexer_cache():
+    """Clear the cached lexer patterns, lookups, and instances.
+
+    This should be called if lexer plugins are installed or removed at
+    runtime.
+    """
+    global _pattern_index
+
+    with _lock:
+        _pattern_index = None
+        _filename_cache.clear()
+        _lexers.clear()
+
+
+def _get_pattern_index():
+    """Return the index of lexer filename patterns.
+
+    The index is built the first time it's needed. Building it loads all
+    lexer modules.
+
+    Returns:
+        tuple:
+        A 2-tuple of:
+
+        1. A dictionary mapping filename suffixes (for patterns of the form
+           ``*.ext``) to lists of ``(lexer_cls, primary)`` tuples.
+        2. A list of ``(compiled_pattern, lexer_cls, primary)`` tuples for
+           all other patterns.
+    """
+    global _pattern_index
+
+    if _pattern_index is None:
+        with _lock:
+            if _pattern_index is None:
+                suffix_index = {}
+                other_patterns = []
+
+                for lexer_cls in _iter_lexerclasses():
+                    patterns = (
+                        [(pattern, True) for pattern in lexer_cls.filenames] +
+                        [(pattern, False)
+                         for pattern in lexer_cls.alias_filenames]
+                    )
+
+                    for pattern, primary in patterns:
+                        m = _SIMPLE_PATTERN_RE.match(pattern)
+
+                        if m:
+                            suffix_index.setdefault(m.group(1), []).append(
+                                (lexer_cls, primary))
+                        else:
+                            other_patterns.append(
+                                (re.compile(fnmatch.translate(pattern)),
+                                 lexer_cls, primary))
+
+                _pattern_index = (suffix_index, other_patterns)
+
+    return _pattern_index
+
+
+def _analyse_candidates(candidates, data):
+    """Return the best lexer class for a file's content.
+
+    This scores the content using each lexer's
+    :py:meth:`~pygments.lexer.Lexer.analyse_text`, in the same way as
+    :py:func:`pygments.lexers.guess_lexer_for_filename`.
+
+    Args:
+        candidates (list of tuple):
+            The candidate lexer classes, as returned by
+            :py:func:`get_lexer_classes_for_filename`.
+
+        data (unicode):
+            The content of the file.
+
+    Returns:
+        type:
+        The best lexer class.
+    """
+    results = []
+
+    for lexer_cls, primary in candidates:
+        score = lexer_cls.analyse_text(data)
+
+        if score == 1.0:
+            return lexer_cls
+
+        results.append((score, primary, lexer_cls.priority,
+                        lexer_cls.__name__, lexer_cls))
+
+    return max(results, key=lambda result: result[:4])[-1]
@@ -0,0 +1,102 @@
+"""Management command to report on and prune stored diff chunks."""
+
+from __future__ import unicode_literals
+
+from django.core.management.base import CommandError
+from django.template.defaultfilters import filesizeformat
+from django.utils.translation import ugettext as _
+from djblets.util.compat.django.core.management.base import BaseCommand
+
+from reviewboard.diffviewer.chunk_store import (DiffChunkStore,
+                                                get_chunk_store_max_size,
+                                                get_chunk_store_path)
+
+
+class Command(BaseCommand):
+    """Management command to report on and prune stored diff chunks.
+
+    As new chunks are written, only small parts of the store are pruned at
+    a time. This should be run periodically (and after lowering the maximum
+    size) to bring the whole store back under its configured size, or to
+    clear it entirely.
+    """
+
+    help = _('Shows the size of the stored diff chunks, and optionally '
+             'removes the least recently used ones.')
+
+    def add_arguments(self, parser):
+        """Add arguments to the command.
+
+        Args:
+            parser (argparse.ArgumentParser):
+                The argument parser for the command.
+        """
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            dest='prune',
+            default=False,
+            help=_('Remove the least recently used stored chunks until the '
+                   'store is within its maximum size.'))
+        parser.add_argument(
+            '--max-size-mb',
+            action='store',
+            dest='max_size_mb',
+            type=int,
+            default=None,
+            help=_('The maximum size to prune to, in megabytes. By default, '
+                   'the configured maximum size is used.'))
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            dest='clear',
+            default=False,
+            help=_('Remove all stored chunks.'))
+
+    def handle(self, **options):
+        """Handle the command.
+
+        Args:
+            **options (dict):
+                Options parsed on the command line.
+
+        Raises:
+            django.core.management.CommandError:
+                The provided options were invalid.
+        """
+        max_size_mb = options['max_size_mb']
+
+        if max_size_mb is not None and max_size_mb < 0:
+            raise CommandError(_('--max-size-mb must not be negative.'))
+
+        # This is deliberately not conditional on the store being enabled,
+        # so that chunks stored before it was disabled can be removed.
+        store = DiffChunkStore(get_chunk_store_path())
+
+        if options['clear']:
+            num_removed, size_removed = store.clear()
+        elif options['prune']:
+            if max_size_mb is None:
+                max_size = get_chunk_store_max_size()
+            else:
+                max_size = max_size_mb * 1024 * 1024
+
+            num_removed, size_removed = store.prune(max_size)
+        else:
+            num_removed = None
+
+        if num_removed is not None:
+            self.stdout.write(
+                _('Removed %(count)d stored diff(s) (%(size)s).') % {
+                    'count': num_removed,
+                    'size': filesizeformat(size_removed),
+                })
+
+        stats = store.get_stats()
+
+        self.stdout.write(
+            _('%(path)s contains %(count)d stored diff(s) (%(size)s).') % {
+                'path': store.path,
+                'count': stats['entries'],
+                'size': filesizeformat(stats['size']),
+            })
@@ -15,6 +15,9 @@ from django.db.utils import IntegrityError
 from django.utils.encoding import force_text
 from django.utils.translation import ugettext as _
 
+from reviewboard.diffviewer.cache_warming import (PRIORITY_COMMIT,
+                                                  PRIORITY_DIFFSET,
+                                                  queue_chunk_cache_warming)
 from reviewboard.diffviewer.commit_utils import get_file_exists_in_history
 from reviewboard.diffviewer.differ import DiffCompatVersion
 from reviewboard.diffviewer.diffutils import check_diff_size
@@ -923,7 +926,7 @@ class DiffCommitManager(BaseDiffManager):
                                   repository,
                                   parent_id)
 
-        create_filediffs(
+        filediffs = create_filediffs(
             get_file_exists=get_file_exists,
             diff_file_contents=diff_file_contents,
             parent_diff_file_contents=parent_diff_file_contents,
@@ -939,6 +942,8 @@ class DiffCommitManager(BaseDiffManager):
         if validate_only:
             return None
 
+        queue_chunk_cache_warming(filediffs, priority=PRIORITY_COMMIT)
+
         return diffcommit
 
 
@@ -1057,7 +1062,7 @@ class DiffSetManager(BaseDiffManager):
         if not validate_only:
             diffset.save()
 
-        create_filediffs(
+        filediffs = create_filediffs(
             get_file_exists=repository.get_file_exists,
             diff_file_contents=diff_file_contents,
             parent_diff_file_contents=parent_diff_file_contents,
@@ -1073,6 +1078,8 @@ class DiffSetManager(BaseDiffManager):
         if validate_only:
             return None
 
+        queue_chunk_cache_warming(filediffs, priority=PRIORITY_DIFFSET)
+
         return diffset
 
     def create_empty(self, repository, diffset_history=None, **kwargs):
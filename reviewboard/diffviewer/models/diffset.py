@@ -9,6 +9,8 @@ from django.utils.encoding import python_2_unicode_compatible
 from django.utils.translation import ugettext, ugettext_lazy as _
 from djblets.db.fields import JSONField, RelationCounterField
 
+from reviewboard.diffviewer.cache_warming import (PRIORITY_DIFFSET,
+                                                  queue_chunk_cache_warming)
 from reviewboard.diffviewer.filediff_creator import create_filediffs
 from reviewboard.diffviewer.diffutils import get_total_line_counts
 from reviewboard.diffviewer.managers import DiffSetManager
@@ -159,6 +161,8 @@ class DiffSet(models.Model):
         if save:
             self.save(update_fields=('extra_data',))
 
+        queue_chunk_cache_warming(filediffs, priority=PRIORITY_DIFFSET)
+
         return filediffs
 
     def get_total_line_counts(self):
@@ -8,7 +8,8 @@ from djblets.cache.backend import cache_memoize
 from djblets.util.compat.django.template.loader import render_to_string
 
 from reviewboard.diffviewer.chunk_generator import compute_chunk_last_header
-from reviewboard.diffviewer.diffutils import populate_diff_chunks
+from reviewboard.diffviewer.diffutils import (highlight_pending_chunks,
+                                              populate_diff_chunks)
 from reviewboard.diffviewer.errors import UserVisibleError
 
 
@@ -97,6 +98,14 @@ class DiffRenderer(object):
                     _('Invalid chunk index %s specified.')
                     % self.chunk_index)
 
+            highlight_pending_chunks(self.diff_file, [self.chunk_index],
+                                     request=request)
+        elif not self.collapse_all:
+            highlight_pending_chunks(
+                self.diff_file,
+                range(len(self.diff_file['chunks'])),
+                request=request)
+
         return render_to_string(template_name=self.template_name,
                                 context=self.make_context())
 
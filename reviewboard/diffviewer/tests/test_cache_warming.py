@@ -0,0 +1,158 @@
+"""Unit tests for reviewboard.diffviewer.cache_warming."""
+
+from __future__ import unicode_literals
+
+from django.db import transaction
+from kgb import SpyAgency
+
+from reviewboard.diffviewer.cache_warming import (PRIORITY_COMMIT,
+                                                  PRIORITY_DIFFSET,
+                                                  ChunkCacheWarmer,
+                                                  get_chunk_cache_warmer,
+                                                  queue_chunk_cache_warming)
+from reviewboard.diffviewer.chunk_generator import DiffChunkGenerator
+from reviewboard.diffviewer.models import DiffSet
+from reviewboard.testing import TestCase
+
+
+class CacheWarmingTests(SpyAgency, TestCase):
+    """Unit tests for reviewboard.diffviewer.cache_warming."""
+
+    fixtures = ['test_scmtools']
+
+    def setUp(self):
+        super(CacheWarmingTests, self).setUp()
+
+        # Test cases run inside a transaction that's never committed, so
+        # run on-commit callbacks immediately.
+        self.spy_on(transaction.on_commit,
+                    call_fake=lambda func, *args, **kwargs: func())
+
+    def test_queue_chunk_cache_warming(self):
+        """Testing queue_chunk_cache_warming"""
+        repository = self.create_repository(tool_name='Test')
+        diffset = self.create_diffset(repository=repository)
+        filediff1 = self.create_filediff(diffset=diffset)
+        filediff2 = self.create_filediff(diffset=diffset, binary=True)
+
+        warmer = get_chunk_cache_warmer()
+        self.spy_on(warmer.queue_filediffs, call_original=False)
+
+        with self.siteconfig_settings({'diffviewer_warm_chunk_cache': True},
+                                      reload_settings=False):
+            queue_chunk_cache_warming([filediff1, filediff2],
+                                      priority=PRIORITY_COMMIT)
+
+        self.assertTrue(warmer.queue_filediffs.called_with(
+            [filediff1.pk], PRIORITY_COMMIT))
+
+    def test_queue_chunk_cache_warming_disabled(self):
+        """Testing queue_chunk_cache_warming with
+        diffviewer_warm_chunk_cache disabled
+        """
+        repository = self.create_repository(tool_name='Test')
+        diffset = self.create_diffset(repository=repository)
+        filediff = self.create_filediff(diffset=diffset)
+
+        warmer = get_chunk_cache_warmer()
+        self.spy_on(warmer.queue_filediffs, call_original=False)
+
+        with self.siteconfig_settings({'diffviewer_warm_chunk_cache': False},
+                                      reload_settings=False):
+            queue_chunk_cache_warming([filediff])
+
+        self.assertFalse(warmer.queue_filediffs.called)
+
+    def test_create_from_data_queues_filediffs(self):
+        """Testing DiffSetManager.create_from_data queues FileDiffs for
+        chunk generation
+        """
+        repository = self.create_repository(tool_name='Test')
+        self.spy_on(repository.get_file_exists,
+                    call_fake=lambda *args, **kwargs: True)
+
+        warmer = get_chunk_cache_warmer()
+        self.spy_on(warmer.queue_filediffs, call_original=False)
+
+        with self.siteconfig_settings({'diffviewer_warm_chunk_cache': True},
+                                      reload_settings=False):
+            diffset = DiffSet.objects.create_from_data(
+                repository=repository,
+                diff_file_name='diff',
+                diff_file_contents=self.DEFAULT_GIT_FILEDIFF_DATA_DIFF,
+                basedir='/')
+
+        filediff = diffset.files.get()
+
+        self.assertTrue(warmer.queue_filediffs.called_with(
+            [filediff.pk], PRIORITY_DIFFSET))
+
+    def test_create_from_data_with_validate_only(self):
+        """Testing DiffSetManager.create_from_data with validate_only=True
+        doesn't queue FileDiffs for chunk generation
+        """
+        repository = self.create_repository(tool_name='Test')
+        self.spy_on(repository.get_file_exists,
+                    call_fake=lambda *args, **kwargs: True)
+
+        warmer = get_chunk_cache_warmer()
+        self.spy_on(warmer.queue_filediffs, call_original=False)
+
+        with self.siteconfig_settings({'diffviewer_warm_chunk_cache': True},
+                                      reload_settings=False):
+            DiffSet.objects.create_from_data(
+                repository=repository,
+                diff_file_name='diff',
+                diff_file_contents=self.DEFAULT_GIT_FILEDIFF_DATA_DIFF,
+                basedir='/',
+                validate_only=True)
+
+        self.assertFalse(warmer.queue_filediffs.called)
+
+    def test_process_pending_order(self):
+        """Testing ChunkCacheWarmer.process_pending processes FileDiffs by
+        priority, newest first
+        """
+        warmer = ChunkCacheWarmer()
+        processed = []
+
+        self.spy_on(warmer.warm_filediff,
+                    call_fake=lambda self, pk: processed.append(pk))
+
+        warmer.queue_filediffs([1, 2], PRIORITY_COMMIT, start_workers=False)
+        warmer.queue_filediffs([3, 4], PRIORITY_DIFFSET, start_workers=False)
+        warmer.queue_filediffs([5, 6], PRIORITY_DIFFSET, start_workers=False)
+
+        self.assertEqual(warmer.process_pending(), 6)
+        self.assertEqual(processed, [5, 6, 3, 4, 1, 2])
+
+    def test_warm_filediff(self):
+        """Testing ChunkCacheWarmer.warm_filediff generates chunks"""
+        repository = self.create_repository(tool_name='Test')
+        diffset = self.create_diffset(repository=repository)
+        filediff = self.create_filediff(diffset=diffset)
+
+        generators = []
+
+        def _get_chunks(generator):
+            generators.append(generator)
+
+            return iter([])
+
+        self.spy_on(DiffChunkGenerator.get_chunks,
+                    owner=DiffChunkGenerator,
+                    call_fake=_get_chunks)
+
+        warmer = ChunkCacheWarmer()
+        warmer.queue_filediffs([filediff.pk], start_workers=False)
+
+        self.assertEqual(warmer.process_pending(), 1)
+        self.assertEqual(len(generators), 1)
+        self.assertEqual(generators[0].filediff, filediff)
+
+    def test_process_pending_with_missing_filediff(self):
+        """Testing ChunkCacheWarmer.process_pending with a deleted FileDiff"""
+        warmer = ChunkCacheWarmer()
+        warmer.queue_filediffs([12345], start_workers=False)
+
+        self.assertEqual(warmer.process_pending(), 1)
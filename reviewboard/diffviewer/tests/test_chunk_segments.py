@@ -0,0 +1,120 @@
+"""Unit tests for reviewboard.diffviewer.chunk_segments."""
+
+from __future__ import unicode_literals
+
+from django.core.cache import cache
+
+from reviewboard.diffviewer.chunk_segments import (SEGMENT_MAX_LINES,
+                                                   build_chunk_segments,
+                                                   get_chunks_from_segments,
+                                                   get_segment_nums_for_range,
+                                                   load_chunk_segment_index,
+                                                   load_chunk_segments,
+                                                   store_chunk_segments)
+from reviewboard.testing import TestCase
+
+
+class ChunkSegmentsTests(TestCase):
+    """Unit tests for reviewboard.diffviewer.chunk_segments."""
+
+    def setUp(self):
+        super(ChunkSegmentsTests, self).setUp()
+
+        # Three chunks of 10, 600, and 5 lines.
+        self.chunks = [
+            self._make_chunk(0, 1, 10, 'equal'),
+            self._make_chunk(1, 11, 600, 'replace'),
+            self._make_chunk(2, 611, 5, 'equal'),
+        ]
+
+    def test_build_chunk_segments(self):
+        """Testing build_chunk_segments"""
+        index, segments = build_chunk_segments(self.chunks)
+
+        self.assertEqual(index['num_lines'], 615)
+        self.assertEqual(index['segment_first_lines'],
+                         [1, SEGMENT_MAX_LINES + 1, 2 * SEGMENT_MAX_LINES + 1])
+        self.assertEqual(len(index['chunks']), 3)
+        self.assertEqual(index['chunks'][1]['first_line'], [11, 11, 11])
+        self.assertEqual(index['chunks'][1]['last_line_nums'], (610, 610))
+        self.assertNotIn('lines', index['chunks'][1])
+
+        self.assertEqual(len(segments), 3)
+        self.assertEqual([chunk_index for chunk_index, data in segments[0]],
+                         [0, 1])
+        self.assertEqual([chunk_index for chunk_index, data in segments[2]],
+                         [1, 2])
+
+    def test_get_segment_nums_for_range(self):
+        """Testing get_segment_nums_for_range"""
+        index, segments = build_chunk_segments(self.chunks)
+
+        self.assertEqual(get_segment_nums_for_range(index, 1, 10), [0])
+        self.assertEqual(get_segment_nums_for_range(index, 245, 10), [0, 1])
+        self.assertEqual(get_segment_nums_for_range(index, 600, 100), [2])
+        self.assertEqual(get_segment_nums_for_range(index, 1000, 10), [2])
+        self.assertEqual(get_segment_nums_for_range(index, 1, 0), [])
+
+    def test_get_chunks_from_segments(self):
+        """Testing get_chunks_from_segments joins chunks split across
+        segments
+        """
+        index, segments = build_chunk_segments(self.chunks)
+        chunks = get_chunks_from_segments(index, dict(enumerate(segments)),
+                                          [0, 1])
+
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(chunks[0]['index'], 0)
+        self.assertEqual(chunks[0]['lines'], self.chunks[0]['lines'])
+        self.assertEqual(chunks[1]['index'], 1)
+        self.assertEqual(chunks[1]['change'], 'replace')
+        self.assertEqual(chunks[1]['numlines'], 2 * SEGMENT_MAX_LINES - 10)
+        self.assertEqual(chunks[1]['lines'],
+                         self.chunks[1]['lines'][:2 * SEGMENT_MAX_LINES - 10])
+
+    def test_store_and_load(self):
+        """Testing store_chunk_segments and load_chunk_segments"""
+        index, segments = store_chunk_segments('my-chunks', self.chunks)
+
+        self.assertEqual(load_chunk_segment_index('my-chunks'), index)
+        self.assertEqual(load_chunk_segments('my-chunks', [0, 2]), {
+            0: segments[0],
+            2: segments[2],
+        })
+
+        cache.clear()
+
+        self.assertIsNone(load_chunk_segment_index('my-chunks'))
+        self.assertIsNone(load_chunk_segments('my-chunks', [0]))
+
+    def _make_chunk(self, index, first_line, num_lines, change):
+        """Return a chunk for testing.
+
+        Args:
+            index (int):
+                The index of the chunk.
+
+            first_line (int):
+                The first line number in the chunk.
+
+            num_lines (int):
+                The number of lines in the chunk.
+
+            change (unicode):
+                The type of change.
+
+        Returns:
+            dict:
+            The chunk.
+        """
+        return {
+            'index': index,
+            'change': change,
+            'collapsable': False,
+            'numlines': num_lines,
+            'meta': {},
+            'lines': [
+                [i, i, 'line %d' % i, [], i, 'line %d' % i, [], False]
+                for i in range(first_line, first_line + num_lines)
+            ],
+        }
@@ -0,0 +1,80 @@
+"""Unit tests for reviewboard.diffviewer.chunk_serialization."""
+
+from __future__ import unicode_literals
+
+from django.utils.safestring import SafeText, mark_safe
+from django.utils.six.moves import cPickle as pickle
+
+from reviewboard.diffviewer.chunk_generator import RawDiffChunkGenerator
+from reviewboard.diffviewer.chunk_serialization import (deserialize_chunk,
+                                                        deserialize_chunks,
+                                                        serialize_chunk,
+                                                        serialize_chunks)
+from reviewboard.testing import TestCase
+
+
+class ChunkSerializationTests(TestCase):
+    """Unit tests for reviewboard.diffviewer.chunk_serialization."""
+
+    def test_serialize_chunk(self):
+        """Testing serialize_chunk and deserialize_chunk"""
+        chunk = {
+            'index': 2,
+            'change': 'replace',
+            'collapsable': False,
+            'numlines': 3,
+            'meta': {
+                'whitespace_chunk': False,
+                'whitespace_lines': [(11, 21)],
+            },
+            'lines': [
+                [10, 10, mark_safe('<span>a</span>'), [(0, 1)],
+                 20, mark_safe('<span>b</span>'), [(1, 2)], False],
+                [11, 11, mark_safe('c'), [], 21, mark_safe(' c'), [], True],
+                [12, '', mark_safe(''), [], 22, mark_safe('d'), [], False,
+                 {'from': [(4, True)]}],
+            ],
+        }
+
+        data = serialize_chunk(chunk)
+        self.assertIsInstance(data, tuple)
+
+        result = deserialize_chunk(pickle.loads(pickle.dumps(data)))
+        self.assertEqual(result, chunk)
+        self.assertIsInstance(result['lines'][0][2], SafeText)
+        self.assertIsInstance(result['lines'][2][5], SafeText)
+
+    def test_serialize_chunk_with_nonstandard_lines(self):
+        """Testing serialize_chunk with lines that can't be stored
+        compactly
+        """
+        chunk = {
+            'index': 0,
+            'change': 'equal',
+            'lines': [
+                [1, 1, 'a', [], 1, 'a', [], False],
+                [3, 2, 'b', [], 2, 'b', [], False],
+            ],
+        }
+
+        self.assertIs(serialize_chunk(chunk), chunk)
+        self.assertIs(deserialize_chunk(chunk), chunk)
+
+    def test_deserialize_chunks_with_generated_chunks(self):
+        """Testing deserialize_chunks with generated chunks"""
+        old = ''.join('line %d\n' % i for i in range(100)).encode('utf-8')
+        new = old.replace(b'line 50', b'changed 50').replace(b'line 7\n', b'')
+
+        generator = RawDiffChunkGenerator(old=old,
+                                          new=new,
+                                          orig_filename='foo.py',
+                                          modified_filename='foo.py')
+        chunks = list(generator.get_chunks())
+
+        self.assertEqual(list(deserialize_chunks(serialize_chunks(chunks))),
+                         chunks)
+
+    def test_deserialize_chunk_with_invalid_data(self):
+        """Testing deserialize_chunk with invalid data"""
+        with self.assertRaises(ValueError):
+            deserialize_chunk(('unknown', {}))
@@ -0,0 +1,249 @@
+"""Unit tests for reviewboard.diffviewer.chunk_store."""
+
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from djblets.testing.decorators import add_fixtures
+from kgb import SpyAgency
+
+from reviewboard.diffviewer import chunk_store
+from reviewboard.diffviewer.chunk_generator import (RawDiffChunkGenerator,
+                                                    get_diff_chunk_generator)
+from reviewboard.diffviewer.chunk_serialization import serialize_chunks
+from reviewboard.diffviewer.chunk_store import (DiffChunkStore,
+                                                get_chunk_store,
+                                                load_or_generate_chunks)
+from reviewboard.diffviewer.diffutils import (populate_diff_chunks,
+                                              prefetch_original_files)
+from reviewboard.testing import TestCase
+
+
+class DiffChunkStoreTests(SpyAgency, TestCase):
+    """Unit tests for reviewboard.diffviewer.chunk_store."""
+
+    def setUp(self):
+        super(DiffChunkStoreTests, self).setUp()
+
+        self.tempdir = tempfile.mkdtemp(prefix='rb-tests-chunk-store-')
+        self.store = DiffChunkStore(self.tempdir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+        super(DiffChunkStoreTests, self).tearDown()
+
+    def test_get_and_set(self):
+        """Testing DiffChunkStore.get and DiffChunkStore.set"""
+        chunks = [{'index': 0, 'lines': [[1, 1, 'a']]}]
+
+        self.assertIsNone(self.store.get('my-key'))
+
+        self.store.set('my-key', chunks)
+
+        self.assertEqual(self.store.get('my-key'), chunks)
+        self.assertIsNone(self.store.get('other-key'))
+
+    def test_has(self):
+        """Testing DiffChunkStore.has"""
+        self.assertFalse(self.store.has('my-key'))
+
+        self.store.set('my-key', [])
+
+        self.assertTrue(self.store.has('my-key'))
+        self.assertFalse(self.store.has('other-key'))
+
+    def test_get_with_corrupt_entry(self):
+        """Testing DiffChunkStore.get with a corrupt entry"""
+        self.store.set('my-key', [])
+
+        with open(self.store._get_entry_path('my-key'), 'wb') as fp:
+            fp.write(b'corrupt')
+
+        self.assertIsNone(self.store.get('my-key'))
+
+    def test_prune(self):
+        """Testing DiffChunkStore.prune removes least recently used
+        entries
+        """
+        for i, key in enumerate(('key1', 'key2', 'key3')):
+            self.store.set(key, ['x' * 1000])
+            os.utime(self.store._get_entry_path(key), (i * 100, i * 100))
+
+        # Reading an entry marks it as recently used.
+        self.store.get('key1')
+
+        entry_size = os.path.getsize(self.store._get_entry_path('key1'))
+        num_removed, size_removed = self.store.prune(entry_size * 2)
+
+        self.assertEqual(num_removed, 1)
+        self.assertEqual(size_removed, entry_size)
+        self.assertIsNotNone(self.store.get('key1'))
+        self.assertIsNone(self.store.get('key2'))
+        self.assertIsNotNone(self.store.get('key3'))
+
+    def test_prune_bucket(self):
+        """Testing DiffChunkStore.prune_bucket only removes entries in the
+        key's subdirectory
+        """
+        keys = ['key%d' % i for i in range(10)]
+        buckets = {}
+
+        for key in keys:
+            self.store.set(key, ['x' * 1000])
+            buckets.setdefault(
+                os.path.dirname(self.store._get_entry_path(key)),
+                []).append(key)
+
+        bucket_keys = buckets[
+            os.path.dirname(self.store._get_entry_path('key0'))]
+
+        num_removed, size_removed = self.store.prune_bucket('key0', 0)
+
+        self.assertEqual(num_removed, len(bucket_keys))
+        self.assertGreater(size_removed, 0)
+
+        for key in keys:
+            if key in bucket_keys:
+                self.assertIsNone(self.store.get(key))
+            else:
+                self.assertIsNotNone(self.store.get(key))
+
+    def test_get_stats(self):
+        """Testing DiffChunkStore.get_stats"""
+        self.assertEqual(self.store.get_stats(), {
+            'entries': 0,
+            'size': 0,
+        })
+
+        self.store.set('key1', [])
+        self.store.set('key2', [])
+
+        stats = self.store.get_stats()
+        self.assertEqual(stats['entries'], 2)
+        self.assertGreater(stats['size'], 0)
+
+    def test_load_or_generate_chunks(self):
+        """Testing load_or_generate_chunks stores generated chunks"""
+        siteconfig_settings = {
+            'diffviewer_chunk_store_enabled': True,
+            'diffviewer_chunk_store_path': self.tempdir,
+        }
+        generated = []
+
+        def _generate():
+            generated.append(True)
+
+            return [{'index': 0}]
+
+        with self.siteconfig_settings(siteconfig_settings,
+                                      reload_settings=False):
+            self.assertEqual(load_or_generate_chunks('my-key', _generate),
+                             [{'index': 0}])
+            self.assertEqual(load_or_generate_chunks('my-key', _generate),
+                             [{'index': 0}])
+
+        self.assertEqual(len(generated), 1)
+
+    def test_load_or_generate_chunks_prunes_bucket(self):
+        """Testing load_or_generate_chunks prunes only the new entry's
+        subdirectory
+        """
+        siteconfig_settings = {
+            'diffviewer_chunk_store_enabled': True,
+            'diffviewer_chunk_store_path': self.tempdir,
+        }
+
+        self.spy_on(DiffChunkStore.prune)
+        self.spy_on(DiffChunkStore.prune_bucket)
+
+        old_gc_probability = chunk_store.GC_PROBABILITY
+        chunk_store.GC_PROBABILITY = 1
+
+        try:
+            with self.siteconfig_settings(siteconfig_settings,
+                                          reload_settings=False):
+                load_or_generate_chunks('my-key', lambda: [])
+        finally:
+            chunk_store.GC_PROBABILITY = old_gc_probability
+
+        self.assertFalse(DiffChunkStore.prune.called)
+        self.assertTrue(DiffChunkStore.prune_bucket.called)
+        self.assertEqual(DiffChunkStore.prune_bucket.last_call.args[0],
+                         'my-key')
+
+    def test_load_or_generate_chunks_disabled(self):
+        """Testing load_or_generate_chunks with the chunk store disabled"""
+        siteconfig_settings = {
+            'diffviewer_chunk_store_enabled': False,
+        }
+
+        with self.siteconfig_settings(siteconfig_settings,
+                                      reload_settings=False):
+            self.assertIsNone(get_chunk_store())
+            self.assertEqual(load_or_generate_chunks('my-key', lambda: []),
+                             [])
+
+        self.assertEqual(self.store.get_stats()['entries'], 0)
+
+    def test_get_chunks_falls_back_to_store(self):
+        """Testing RawDiffChunkGenerator.get_chunks loads chunks from the
+        store on cache misses
+        """
+        siteconfig_settings = {
+            'diffviewer_chunk_store_enabled': True,
+            'diffviewer_chunk_store_path': self.tempdir,
+        }
+
+        generator = RawDiffChunkGenerator(old=b'a\nb\n', new=b'a\nc\n',
+                                          orig_filename='foo.txt',
+                                          modified_filename='foo.txt')
+
+        with self.siteconfig_settings(siteconfig_settings,
+                                      reload_settings=False):
+            chunks = list(generator.get_chunks(cache_key='test-chunks'))
+
+            # Simulate the cache losing the chunks.
+            cache.clear()
+
+            self.spy_on(generator.get_chunks_uncached)
+
+            self.assertEqual(
+                list(generator.get_chunks(cache_key='test-chunks')),
+                chunks)
+
+        self.assertFalse(generator.get_chunks_uncached.called)
+
+    @add_fixtures(['test_scmtools'])
+    def test_populate_diff_chunks_skips_prefetch_for_stored(self):
+        """Testing populate_diff_chunks doesn't prefetch files for chunks
+        in the store
+        """
+        siteconfig_settings = {
+            'diffviewer_chunk_store_enabled': True,
+            'diffviewer_chunk_store_path': self.tempdir,
+        }
+
+        repository = self.create_repository(tool_name='Test')
+        review_request = self.create_review_request(repository=repository)
+        diffset = self.create_diffset(review_request=review_request)
+        filediff = self.create_filediff(diffset)
+
+        generator = get_diff_chunk_generator(None, filediff, None, False,
+                                             True)
+        self.store.set(generator.make_cache_key(), serialize_chunks([]))
+
+        self.spy_on(prefetch_original_files)
+
+        with self.siteconfig_settings(siteconfig_settings,
+                                      reload_settings=False):
+            populate_diff_chunks([{
+                'filediff': filediff,
+                'interfilediff': None,
+                'force_interdiff': False,
+            }])
+
+        self.assertEqual(prefetch_original_files.last_call.args[0], [])
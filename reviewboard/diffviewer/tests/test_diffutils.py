@@ -1,6 +1,7 @@
 from __future__ import print_function, unicode_literals
 
 from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
 from django.test.client import RequestFactory
 from django.utils import six
 from django.utils.six.moves import zip_longest
@@ -9,6 +10,7 @@ from djblets.testing.decorators import add_fixtures
 from kgb import SpyAgency
 
 from reviewboard.deprecation import RemovedInReviewBoard50Warning
+from reviewboard.diffviewer.chunk_segments import load_chunk_segments
 from reviewboard.diffviewer.diffutils import (
     convert_line_endings,
     convert_to_unicode,
@@ -24,9 +26,12 @@ from reviewboard.diffviewer.diffutils import (
     get_matched_interdiff_files,
     get_original_file,
     get_original_file_from_repo,
+    get_original_file_source,
     get_revision_str,
     get_sorted_filediffs,
     patch,
+    populate_diff_chunks,
+    prefetch_file_chunks_in_ranges,
     split_line_endings,
     _PATCH_GARBAGE_INPUT,
     _get_last_header_in_chunks_before_line)
@@ -3136,6 +3141,128 @@ class DiffExpansionHeaderTests(TestCase):
                          lines[header['left']['line'] - 1][2])
 
 
+class GetFileChunksInRangeTests(SpyAgency, TestCase):
+    """Unit tests for get_file_chunks_in_range."""
+
+    fixtures = ['test_users', 'test_scmtools']
+
+    siteconfig_settings_dict = {
+        'diffviewer_syntax_highlighting': True,
+    }
+
+    def setUp(self):
+        super(GetFileChunksInRangeTests, self).setUp()
+
+        diff = (b"diff --git a/tests.py b/tests.py\n"
+                b"index a4fc53e..f2414cc 100644\n"
+                b"--- a/tests.py\n"
+                b"+++ b/tests.py\n"
+                b"@@ -20,6 +20,9 @@ from reviewboard.site.urlresolvers import "
+                b"local_site_reverse\n"
+                b" from reviewboard.site.models import LocalSite\n"
+                b" from reviewboard.webapi.errors import INVALID_REPOSITORY\n"
+                b"\n"
+                b"+class Foo(object):\n"
+                b"+    def bar(self):\n"
+                b"+        pass\n"
+                b"\n"
+                b" class BaseWebAPITestCase(TestCase, EmailTestHelper);\n"
+                b"     fixtures = ['test_users', 'test_reviewrequests', 'test_"
+                b"scmtools',\n")
+
+        repository = self.create_repository(tool_name='Git')
+        review_request = self.create_review_request(repository=repository)
+        diffset = self.create_diffset(review_request=review_request)
+
+        self.user = review_request.submitter
+        self.filediff = self.create_filediff(
+            diffset=diffset, source_file='tests.py', dest_file='tests.py',
+            source_revision='a4fc53e08863f5341effb5204b77504c120166ae',
+            diff=diff)
+
+    def test_with_stored_segments(self):
+        """Testing get_file_chunks_in_range with chunks stored in segments
+        doesn't load all chunks
+        """
+        with self.siteconfig_settings(self.siteconfig_settings_dict,
+                                      reload_settings=False):
+            expected = self._get_chunk_info({'user': self.user})
+
+            self.spy_on(populate_diff_chunks)
+
+            result = self._get_chunk_info({'user': self.user})
+
+        self.assertFalse(populate_diff_chunks.called)
+        self.assertEqual(result, expected)
+
+    def test_with_evicted_segments(self):
+        """Testing get_file_chunks_in_range with stored segments missing from
+        the cache
+        """
+        with self.siteconfig_settings(self.siteconfig_settings_dict,
+                                      reload_settings=False):
+            expected = self._get_chunk_info({'user': self.user})
+
+            cache.clear()
+            self.spy_on(populate_diff_chunks)
+
+            result = self._get_chunk_info({'user': self.user})
+
+        self.assertTrue(populate_diff_chunks.called)
+        self.assertEqual(result, expected)
+
+    def test_with_prefetch(self):
+        """Testing get_file_chunks_in_range after
+        prefetch_file_chunks_in_ranges
+        """
+        with self.siteconfig_settings(self.siteconfig_settings_dict,
+                                      reload_settings=False):
+            expected = self._get_chunk_info({'user': self.user})
+
+            context = {'user': self.user}
+            prefetch_file_chunks_in_ranges(context, self.filediff, None,
+                                           [(1, 5), (20, 10)])
+
+            self.spy_on(load_chunk_segments)
+
+            result = self._get_chunk_info(context)
+
+        self.assertFalse(load_chunk_segments.called)
+        self.assertEqual(result, expected)
+
+    def _get_chunk_info(self, context):
+        """Return chunks and header information for the test file.
+
+        Args:
+            context (dict):
+                The template context.
+
+        Returns:
+            tuple:
+            The last line number, the header before line 27, and the chunks
+            in two ranges of lines.
+        """
+        return (
+            get_last_line_number_in_diff(context=context,
+                                         filediff=self.filediff,
+                                         interfilediff=None),
+            get_last_header_before_line(context=context,
+                                        filediff=self.filediff,
+                                        interfilediff=None,
+                                        target_line=27),
+            get_file_chunks_in_range(context=context,
+                                     filediff=self.filediff,
+                                     interfilediff=None,
+                                     first_line=1,
+                                     num_lines=5),
+            get_file_chunks_in_range(context=context,
+                                     filediff=self.filediff,
+                                     interfilediff=None,
+                                     first_line=20,
+                                     num_lines=10),
+        )
+
+
 class PatchTests(TestCase):
     """Unit tests for patch."""
 
@@ -3414,6 +3541,62 @@ class GetFileDiffEncodingsTests(TestCase):
             ['rot13', 'palmos'])
 
 
+class GetOriginalFileSourceTests(BaseFileDiffAncestorTests):
+    """Unit tests for get_original_file_source."""
+
+    def test_without_commits(self):
+        """Testing get_original_file_source with a FileDiff not in a commit
+        """
+        repository = self.create_repository(tool_name='Git')
+        diffset = self.create_diffset(repository=repository)
+        filediff = self.create_filediff(diffset,
+                                        source_file='/foo.c',
+                                        source_revision='a4fc53e')
+
+        self.assertEqual(get_original_file_source(filediff),
+                         ('/foo.c', 'a4fc53e'))
+
+    def test_with_parent_source(self):
+        """Testing get_original_file_source with parent diff source
+        information
+        """
+        repository = self.create_repository(tool_name='Git')
+        diffset = self.create_diffset(repository=repository)
+        filediff = self.create_filediff(diffset,
+                                        source_file='/foo.c',
+                                        source_revision='a4fc53e')
+        filediff.parent_diff = b'parent diff'
+        filediff.extra_data.update({
+            'parent_source_filename': '/bar.c',
+            'parent_source_revision': 'f2414cc',
+        })
+
+        self.assertEqual(get_original_file_source(filediff),
+                         ('/bar.c', 'f2414cc'))
+
+    def test_with_ancestors(self):
+        """Testing get_original_file_source with a FileDiff with ancestors"""
+        self.set_up_filediffs()
+
+        filediff = FileDiff.objects.get(dest_file='qux', dest_detail='03b37a0',
+                                        commit_id=3)
+        ancestor = filediff.get_ancestors(minimal=True)[0]
+
+        self.assertEqual(get_original_file_source(filediff),
+                         (ancestor.source_file, ancestor.source_revision))
+
+    def test_created_previously_deleted(self):
+        """Testing get_original_file_source with a file created and
+        previously deleted
+        """
+        self.set_up_filediffs()
+
+        filediff = FileDiff.objects.get(dest_file='bar', dest_detail='5716ca5',
+                                        commit_id=3)
+
+        self.assertIsNone(get_original_file_source(filediff))
+
+
 class GetOriginalFileTests(BaseFileDiffAncestorTests):
     """Unit tests for get_original_file."""
 
@@ -0,0 +1,84 @@
+"""Unit tests for reviewboard.diffviewer.lexers."""
+
+from __future__ import unicode_literals
+
+from pygments.lexers import (ClassNotFound, PerlLexer, PrologLexer,
+                             PythonLexer, guess_lexer_for_filename)
+
+from reviewboard.diffviewer.lexers import (clear_lexer_cache,
+                                           get_lexer_classes_for_filename,
+                                           get_lexer_for_filename)
+from reviewboard.testing import TestCase
+
+
+class LexersTests(TestCase):
+    """Unit tests for reviewboard.diffviewer.lexers."""
+
+    def setUp(self):
+        super(LexersTests, self).setUp()
+
+        clear_lexer_cache()
+
+    def test_get_lexer_for_filename(self):
+        """Testing get_lexer_for_filename"""
+        lexer = get_lexer_for_filename('src/test.py', '')
+
+        self.assertIsInstance(lexer, PythonLexer)
+        self.assertFalse(lexer.stripnl)
+        self.assertEqual(lexer.encoding, 'utf-8')
+
+    def test_get_lexer_for_filename_without_match(self):
+        """Testing get_lexer_for_filename without a matching lexer"""
+        self.assertIsNone(get_lexer_for_filename('src/README', ''))
+
+    def test_get_lexer_for_filename_reuses_lexer(self):
+        """Testing get_lexer_for_filename reuses lexers across files"""
+        self.assertIs(get_lexer_for_filename('a.py', ''),
+                      get_lexer_for_filename('b.py', ''))
+
+    def test_get_lexer_for_filename_with_special_name(self):
+        """Testing get_lexer_for_filename with a pattern that isn't based on
+        the file extension
+        """
+        lexer = get_lexer_for_filename('src/Makefile.am', '')
+
+        self.assertEqual(lexer.name, 'Makefile')
+
+    def test_get_lexer_for_filename_with_ambiguous_name(self):
+        """Testing get_lexer_for_filename with a filename matching multiple
+        lexers analyzes the content
+        """
+        self.assertIsInstance(
+            get_lexer_for_filename('test.pl', '#!/usr/bin/perl\nprint 1;\n'),
+            PerlLexer)
+        self.assertIsInstance(
+            get_lexer_for_filename('test.pl', 'foo(X) :- bar(X).\n'),
+            PrologLexer)
+
+    def test_get_lexer_for_filename_matches_pygments(self):
+        """Testing get_lexer_for_filename matches
+        pygments.lexers.guess_lexer_for_filename
+        """
+        filenames = [
+            'a/b.c', 'a/b.h', 'a/b.m', 'a/b.inc', 'a/b.html', 'a/b.js',
+            'a/b.pl', 'a/b.php3', 'a/CMakeLists.txt', 'a/.bashrc',
+            'a/Dockerfile', 'a/b.unknown',
+        ]
+
+        for filename in filenames:
+            for data in ('', '#include <stdio.h>\n', '<?php echo 1; ?>\n'):
+                try:
+                    expected = type(guess_lexer_for_filename(filename, data))
+                except ClassNotFound:
+                    expected = None
+
+                lexer = get_lexer_for_filename(filename, data)
+
+                self.assertIs(lexer and type(lexer), expected)
+
+    def test_get_lexer_classes_for_filename_cached(self):
+        """Testing get_lexer_classes_for_filename caches results"""
+        result = get_lexer_classes_for_filename('a/test.py')
+
+        self.assertEqual(result, [(PythonLexer, True)])
+        self.assertIs(get_lexer_classes_for_filename('b/test.py'), result)
@@ -448,6 +448,88 @@ class RawDiffChunkGeneratorTests(TestCase):
             chunk_generator._apply_pygments(data='This is **bold**',
                                             filename='test.md'))
 
+    def test_get_chunks_with_lazy_syntax_highlighting(self):
+        """Testing RawDiffChunkGenerator.get_chunks with lazy syntax
+        highlighting
+        """
+        class MyRawDiffChunkGenerator(RawDiffChunkGenerator):
+            ALLOW_LAZY_SYNTAX_HIGHLIGHTING = True
+
+        old = b''.join(b'x%d = "<%d>"\n' % (i, i) for i in range(30))
+        new = old.replace(b'x15 = ', b'y15 = ')
+
+        generator = MyRawDiffChunkGenerator(old=old,
+                                            new=new,
+                                            orig_filename='test.py',
+                                            modified_filename='test.py')
+
+        with self.siteconfig_settings({
+                'diffviewer_lazy_syntax_highlighting': True,
+            }):
+            chunks = list(generator.get_chunks())
+
+        self.assertEqual(
+            [(chunk['change'], chunk['collapsable']) for chunk in chunks],
+            [
+                ('equal', True),
+                ('equal', False),
+                ('replace', False),
+                ('equal', False),
+                ('equal', True),
+            ])
+
+        # The collapsed chunks are left unhighlighted.
+        for i in (0, 4):
+            meta = chunks[i]['meta']
+            self.assertTrue(meta['syntax_highlighting_pending'])
+
+        line = chunks[0]['lines'][0]
+        self.assertEqual(line[2], 'x0 = &quot;&lt;0&gt;&quot;')
+        self.assertEqual(line[5], 'x0 = &quot;&lt;0&gt;&quot;')
+
+        # The displayed chunks are highlighted.
+        for i in (1, 2, 3):
+            self.assertNotIn('syntax_highlighting_pending',
+                             chunks[i]['meta'])
+
+            for line in chunks[i]['lines']:
+                self.assertIn('<span', line[2])
+                self.assertIn('<span', line[5])
+
+    def test_highlight_pending_chunk(self):
+        """Testing RawDiffChunkGenerator.highlight_pending_chunk"""
+        class MyRawDiffChunkGenerator(RawDiffChunkGenerator):
+            ALLOW_LAZY_SYNTAX_HIGHLIGHTING = True
+
+        old = b''.join(b'x%d = """\n<%d>\n"""\n' % (i, i) for i in range(20))
+        new = old.replace(b'x10 = ', b'y10 = ')
+
+        with self.siteconfig_settings({
+                'diffviewer_lazy_syntax_highlighting': False,
+            }):
+            expected_chunks = list(MyRawDiffChunkGenerator(
+                old=old,
+                new=new,
+                orig_filename='test.py',
+                modified_filename='test.py').get_chunks())
+
+        generator = MyRawDiffChunkGenerator(old=old,
+                                            new=new,
+                                            orig_filename='test.py',
+                                            modified_filename='test.py')
+
+        with self.siteconfig_settings({
+                'diffviewer_lazy_syntax_highlighting': True,
+            }):
+            chunks = list(generator.get_chunks())
+
+        self.assertEqual(len(chunks), len(expected_chunks))
+
+        for i, chunk in enumerate(chunks):
+            generator.highlight_pending_chunk(chunks, i)
+
+        self.assertEqual(chunks, expected_chunks)
+
     def test_get_move_info_with_new_range_no_preceding(self):
         """Testing RawDiffChunkGenerator._get_move_info with new move range and
         no adjacent preceding move range
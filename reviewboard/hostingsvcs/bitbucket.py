@@ -24,9 +24,10 @@ from reviewboard.hostingsvcs.errors import (AuthorizationError,
                                             RepositoryError)
 from reviewboard.hostingsvcs.forms import (HostingServiceAuthForm,
                                            HostingServiceForm)
-from reviewboard.hostingsvcs.hook_utils import (close_all_review_requests,
-                                                get_repository_for_hook,
-                                                get_review_request_id)
+from reviewboard.hostingsvcs.hook_utils import (
+    get_repository_for_hook,
+    get_review_request_ids,
+    queue_close_all_review_requests)
 from reviewboard.hostingsvcs.service import (HostingService,
                                              HostingServiceClient)
 from reviewboard.hostingsvcs.utils.paginator import APIPaginator
@@ -194,9 +195,9 @@ class BitbucketHookViews(object):
                 'repository on Review Board.')
 
         if review_request_id_to_commits:
-            close_all_review_requests(review_request_id_to_commits,
-                                      local_site_name, repository,
-                                      hosting_service_id)
+            queue_close_all_review_requests(review_request_id_to_commits,
+                                            local_site_name, repository,
+                                            hosting_service_id)
 
         return HttpResponse()
 
@@ -231,6 +232,7 @@ class BitbucketHookViews(object):
             return results
 
         seen_commits_urls = set()
+        branch_commits = []
 
         for change in changes:
             change_new = change.get('new') or {}
@@ -260,19 +262,24 @@ class BitbucketHookViews(object):
                         commits_url,
                         seen_commits_urls=seen_commits_urls)
 
-            for commit in commits:
-                commit_hash = commit.get('hash')
-                commit_message = commit.get('message')
-
-                review_request_id = get_review_request_id(
-                    commit_message=commit_message,
-                    server_url=server_url,
-                    commit_id=commit_hash,
-                    repository=repository)
-
-                if review_request_id is not None:
-                    results[review_request_id].append(
-                        '%s (%s)' % (target_name, commit_hash[:7]))
+            branch_commits += [
+                (target_name, commit)
+                for commit in commits
+            ]
+
+        review_request_ids = get_review_request_ids(
+            [
+                (commit.get('message'), commit.get('hash'))
+                for target_name, commit in branch_commits
+            ],
+            server_url,
+            repository)
+
+        for (target_name, commit), review_request_id in zip(
+                branch_commits, review_request_ids):
+            if review_request_id is not None:
+                results[review_request_id].append(
+                    '%s (%s)' % (target_name, commit.get('hash')[:7]))
 
         return results
 
@@ -33,10 +33,11 @@ from reviewboard.hostingsvcs.errors import (AuthorizationError,
                                             TwoFactorAuthCodeRequiredError)
 from reviewboard.hostingsvcs.forms import (HostingServiceAuthForm,
                                            HostingServiceForm)
-from reviewboard.hostingsvcs.hook_utils import (close_all_review_requests,
-                                                get_git_branch_name,
-                                                get_repository_for_hook,
-                                                get_review_request_id)
+from reviewboard.hostingsvcs.hook_utils import (
+    get_git_branch_name,
+    get_repository_for_hook,
+    get_review_request_ids,
+    queue_close_all_review_requests)
 from reviewboard.hostingsvcs.repository import RemoteRepository
 from reviewboard.hostingsvcs.service import (HostingService,
                                              HostingServiceClient)
@@ -153,6 +154,9 @@ class GitHubAPIPaginator(APIPaginator):
 
     LINK_RE = re.compile(r'\<(?P<url>[^>]+)\>; rel="(?P<rel>[^"]+)",? *')
 
+    #: The number of API requests to leave available when prefetching pages.
+    PREFETCH_RATE_LIMIT_RESERVE = 100
+
     def fetch_url(self, url):
         """Fetches the page data from a URL."""
         data, headers = self.client.api_get(url, return_headers=True)
@@ -171,8 +175,27 @@ class GitHubAPIPaginator(APIPaginator):
             'headers': headers,
             'prev_url': links.get('prev'),
             'next_url': links.get('next'),
+            'last_url': links.get('last'),
         }
 
+    def get_max_prefetch_pages(self):
+        """Return the maximum number of pages that may be prefetched.
+
+        This keeps a reserve of API requests available, based on the rate
+        limit headers from the last page fetched.
+
+        Returns:
+            int:
+            The maximum number of pages to prefetch, or ``None`` if the rate
+            limit isn't known.
+        """
+        try:
+            remaining = int(self.page_headers[str('X-RateLimit-Remaining')])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+        return max(remaining - self.PREFETCH_RATE_LIMIT_RESERVE, 0)
+
 
 class GitHubClient(HostingServiceClient):
     RAW_MIMETYPE = 'application/vnd.github.v3.raw'
@@ -336,7 +359,8 @@ class GitHubClient(HostingServiceClient):
         except (URLError, HTTPError) as e:
             self._check_api_error(e)
 
-    def api_get_list(self, url, start=None, per_page=None, *args, **kwargs):
+    def api_get_list(self, url, start=None, per_page=None, prefetch_pages=0,
+                     *args, **kwargs):
         """Perform an HTTP GET to a GitHub API and returns a paginator.
 
         This returns a GitHubAPIPaginator that's used to iterate over the
@@ -346,12 +370,18 @@ class GitHubClient(HostingServiceClient):
         The ``start`` and ``per_page`` parameters can be used to control
         where pagination begins and how many results are returned per page.
         ``start`` is a 0-based index representing a page number.
+
+        ``prefetch_pages`` can be used to fetch that many upcoming pages in
+        parallel as pages are requested. The caller must then close the
+        paginator when done with it (for instance, by using it in a ``with``
+        statement).
         """
         if start is not None:
             # GitHub uses 1-based indexing, so add one.
             start += 1
 
-        return GitHubAPIPaginator(self, url, start=start, per_page=per_page)
+        return GitHubAPIPaginator(self, url, start=start, per_page=per_page,
+                                  prefetch_pages=prefetch_pages)
 
     def api_post(self, url, *args, **kwargs):
         """Perform an HTTP POST request to the GitHub API.
@@ -422,6 +452,7 @@ class GitHubClient(HostingServiceClient):
                 headers={
                     'Accept': self.RAW_MIMETYPE,
                 },
+                use_etag_cache=True,
                 **credentials)[0]
         except (URLError, HTTPError):
             raise FileNotFoundError(path, sha)
@@ -438,7 +469,7 @@ class GitHubClient(HostingServiceClient):
             url += '?sha=%s' % start
 
         try:
-            return self.api_get(url)
+            return self.api_get(url, use_etag_cache=True)
         except Exception as e:
             logging.warning('Failed to fetch commits from %s: %s',
                             url, e, exc_info=1)
@@ -471,7 +502,7 @@ class GitHubClient(HostingServiceClient):
         url = '%s/git/refs/heads' % repo_api_url
 
         try:
-            rsp = self.api_get(url)
+            rsp = self.api_get(url, use_etag_cache=True)
             return [ref for ref in rsp if ref['ref'].startswith('refs/heads/')]
         except Exception as e:
             logging.warning('Failed to fetch commits from %s: %s',
@@ -490,7 +521,7 @@ class GitHubClient(HostingServiceClient):
 
     def api_get_remote_repositories(self, api_url, owner, owner_type,
                                     filter_type=None, start=None,
-                                    per_page=None):
+                                    per_page=None, prefetch_pages=0):
         url = api_url
 
         if owner_type == 'organization':
@@ -512,7 +543,8 @@ class GitHubClient(HostingServiceClient):
 
         return self.api_get_list(url,
                                  start=start,
-                                 per_page=per_page)
+                                 per_page=per_page,
+                                 prefetch_pages=prefetch_pages)
 
     def api_get_remote_repository(self, api_url, owner, repository_id):
         try:
@@ -634,9 +666,9 @@ class GitHubHookViews(object):
                 payload, server_url, repository)
 
         if review_request_id_to_commits:
-            close_all_review_requests(review_request_id_to_commits,
-                                      local_site_name, repository,
-                                      hosting_service_id)
+            queue_close_all_review_requests(review_request_id_to_commits,
+                                            local_site_name, repository,
+                                            hosting_service_id)
 
         return HttpResponse()
 
@@ -673,12 +705,16 @@ class GitHubHookViews(object):
             return None
 
         commits = payload.get('commits', [])
-
-        for commit in commits:
+        review_request_ids = get_review_request_ids(
+            [
+                (commit.get('message'), commit.get('id'))
+                for commit in commits
+            ],
+            server_url,
+            repository)
+
+        for commit, review_request_id in zip(commits, review_request_ids):
             commit_hash = commit.get('id')
-            commit_message = commit.get('message')
-            review_request_id = get_review_request_id(
-                commit_message, server_url, commit_hash, repository)
 
             review_request_id_to_commits_map[review_request_id].append(
                 '%s (%s)' % (branch_name, commit_hash[:7]))
@@ -1079,7 +1115,8 @@ class GitHub(HostingService, BugTracker):
                       diff=diff)
 
     def get_remote_repositories(self, owner=None, owner_type='user',
-                                filter_type=None, start=None, per_page=None):
+                                filter_type=None, start=None, per_page=None,
+                                prefetch_pages=0):
         """Return a list of remote repositories matching the given criteria.
 
         This will look up each remote repository on GitHub that the given
@@ -1100,6 +1137,12 @@ class GitHub(HostingService, BugTracker):
 
         `owner` defaults to the linked account's username, and `plan`
         defaults to 'public'.
+
+        Callers that will iterate through all pages of repositories can pass
+        `prefetch_pages` to fetch that many upcoming pages in parallel. This
+        is capped by the paginator, and reduced as the account's API rate
+        limit is approached. The returned paginator must then be closed when
+        done (for instance, by using it in a ``with`` statement).
         """
         if owner is None and owner_type == 'user':
             owner = self.account.username
@@ -1108,7 +1151,8 @@ class GitHub(HostingService, BugTracker):
 
         url = self.get_api_url(self.account.hosting_url)
         paginator = self.client.api_get_remote_repositories(
-            url, owner, owner_type, filter_type, start, per_page)
+            url, owner, owner_type, filter_type, start, per_page,
+            prefetch_pages=prefetch_pages)
 
         return ProxyPaginator(
             paginator,
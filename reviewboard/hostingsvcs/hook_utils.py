@@ -2,8 +2,12 @@ from __future__ import unicode_literals
 
 import logging
 import re
+import threading
+from functools import partial
 
 from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.db import transaction
 from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from django.utils import six
@@ -77,6 +81,68 @@ def get_review_request_id(commit_message, server_url, commit_id=None,
     return review_request_id
 
 
+def get_review_request_ids(commits, server_url, repository):
+    """Return the review request IDs matching a list of pushed commits.
+
+    This works like :py:func:`get_review_request_id`, but looks up any
+    review requests matching commit IDs in a single query, rather than one
+    query per commit.
+
+    Args:
+        commits (list of tuple):
+            A list of ``(commit_message, commit_id)`` tuples.
+
+        server_url (unicode):
+            The URL of the Review Board server.
+
+        repository (reviewboard.scmtools.models.Repository):
+            The repository the commits were pushed to.
+
+    Returns:
+        list:
+        The review request ID (or ``None``) for each commit, in order.
+    """
+    regex = settings.HOSTINGSVCS_HOOK_REGEX % {
+        'server_url': server_url,
+    }
+    pattern = re.compile(regex, settings.HOSTINGSVCS_HOOK_REGEX_FLAGS)
+
+    review_request_ids = []
+    unmatched_commit_ids = set()
+
+    for commit_message, commit_id in commits:
+        match = pattern.search(commit_message or '')
+        review_request_id = None
+
+        if match:
+            try:
+                review_request_id = int(match.group('id'))
+            except ValueError:
+                logging.error('The review request ID must be an integer.')
+        elif commit_id:
+            unmatched_commit_ids.add(six.text_type(commit_id))
+
+        review_request_ids.append(review_request_id)
+
+    if unmatched_commit_ids:
+        commit_id_to_review_request_id = dict(
+            (review_request.commit_id, review_request.display_id)
+            for review_request in (
+                ReviewRequest.objects
+                .filter(repository=repository,
+                        commit_id__in=unmatched_commit_ids)
+                .only('pk', 'local_id', 'local_site', 'commit_id')
+            )
+        )
+
+        for i, (commit_message, commit_id) in enumerate(commits):
+            if review_request_ids[i] is None and commit_id:
+                review_request_ids[i] = commit_id_to_review_request_id.get(
+                    six.text_type(commit_id))
+
+    return review_request_ids
+
+
 def close_review_request(review_request, review_request_id, description):
     """Closes the specified review request as submitted."""
     if review_request.status == ReviewRequest.SUBMITTED:
@@ -103,6 +169,10 @@ def close_all_review_requests(review_request_id_to_commits, local_site_name,
     associated with that review request ID (list of strings). Commits that are
     not associated with any review requests have the key None.
     """
+    # Imported here to avoid a circular import at registration time.
+    from reviewboard.notifications.email.utils import \
+        batched_email_connection
+
     if local_site_name:
         try:
             local_site = LocalSite.objects.get(name=local_site_name)
@@ -134,7 +204,11 @@ def close_all_review_requests(review_request_id_to_commits, local_site_name,
     else:
         q &= Q(pk__in=review_request_ids)
 
-    review_requests = list(ReviewRequest.objects.filter(q))
+    review_requests = list(
+        ReviewRequest.objects
+        .filter(q)
+        .select_related('local_site', 'repository', 'submitter')
+    )
 
     # Check if there are any listed that we couldn't find, and log them.
     if len(review_request_ids) != len(review_requests):
@@ -149,12 +223,121 @@ def close_all_review_requests(review_request_id_to_commits, local_site_name,
                               'does not exist.',
                               review_request_id)
 
-    # Close any review requests we did find.
-    for review_request in review_requests:
-        review_request_id = review_request.display_id
+    # Close any review requests we did find. E-mails for all of these are
+    # sent over a single mail server connection, and a failure closing one
+    # review request won't prevent the others from being closed.
+    with batched_email_connection():
+        for review_request in review_requests:
+            review_request_id = review_request.display_id
+
+            try:
+                with transaction.atomic():
+                    close_review_request(
+                        review_request,
+                        review_request_id,
+                        ('Pushed to ' +
+                         ', '.join(
+                             review_request_id_to_commits[review_request_id])))
+            except Exception as e:
+                logging.exception('close_all_review_requests: Unable to '
+                                  'close review request #%s: %s',
+                                  review_request_id, e)
+
+
+def queue_close_all_review_requests(review_request_id_to_commits,
+                                    local_site_name, repository,
+                                    hosting_service_id):
+    """Queue closing review requests until the hook's response is sent.
+
+    Closing review requests publishes them, emits signals, and sends
+    e-mail, which can take longer than a hosting service is willing to wait
+    for a webhook to respond on large pushes. This accepts the same
+    arguments as :py:func:`close_all_review_requests`, and runs it after the
+    current HTTP response has been sent.
+
+    If this is called outside of an HTTP request, the review requests will
+    be closed immediately.
+
+    Args:
+        review_request_id_to_commits (dict):
+            A mapping of review request IDs to lists of commits.
+
+        local_site_name (unicode):
+            The name of the Local Site, if any.
+
+        repository (reviewboard.scmtools.models.Repository):
+            The repository the commits were pushed to.
+
+        hosting_service_id (unicode):
+            The ID of the hosting service.
+    """
+    queue_hook_work(close_all_review_requests,
+                    review_request_id_to_commits,
+                    local_site_name,
+                    repository,
+                    hosting_service_id)
+
+
+def queue_hook_work(func, *args, **kwargs):
+    """Queue work to run after the current HTTP response has been sent.
+
+    Work is run in the order it was queued, once the WSGI server has
+    finished sending the response. Any errors will be logged.
+
+    If this is called outside of an HTTP request, the work will be run
+    immediately.
+
+    Args:
+        func (callable):
+            The function to call.
+
+        *args (tuple):
+            Positional arguments to pass to the function.
+
+        **kwargs (dict):
+            Keyword arguments to pass to the function.
+    """
+    if getattr(_hook_work_state, 'in_request', False):
+        _hook_work_state.queue.append(partial(func, *args, **kwargs))
+    else:
+        func(*args, **kwargs)
+
+
+def _on_request_started(**kwargs):
+    """Begin tracking queued work for an HTTP request.
+
+    Args:
+        **kwargs (dict):
+            Keyword arguments from the signal.
+    """
+    _hook_work_state.in_request = True
+    _hook_work_state.queue = []
+
+
+def _on_request_finished(**kwargs):
+    """Run any work queued during an HTTP request.
+
+    Args:
+        **kwargs (dict):
+            Keyword arguments from the signal.
+    """
+    queue = getattr(_hook_work_state, 'queue', [])
+
+    _hook_work_state.in_request = False
+    _hook_work_state.queue = []
+
+    for func in queue:
+        try:
+            func()
+        except Exception as e:
+            logging.exception('Unexpected error processing queued hosting '
+                              'service hook work: %s',
+                              e)
+
+
+_hook_work_state = threading.local()
 
-        close_review_request(
-            review_request,
-            review_request_id,
-            ('Pushed to ' +
-             ', '.join(review_request_id_to_commits[review_request_id])))
+request_started.connect(_on_request_started,
+                        dispatch_uid='hostingsvcs-hook-work-started')
+request_finished.connect(_on_request_finished,
+                         dispatch_uid='hostingsvcs-hook-work-finished')
@@ -1,12 +1,16 @@
 from __future__ import unicode_literals
 
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils.encoding import python_2_unicode_compatible
 from django.utils.translation import ugettext_lazy as _
 from djblets.db.fields import JSONField
 
 from reviewboard.hostingsvcs.managers import HostingServiceAccountManager
 from reviewboard.hostingsvcs.service import get_hosting_service
+from reviewboard.hostingsvcs.utils.connection_pool import \
+    close_connection_pool
 from reviewboard.site.models import LocalSite
 
 
@@ -94,3 +98,24 @@ class HostingServiceAccount(models.Model):
         db_table = 'hostingsvcs_hostingserviceaccount'
         verbose_name = _('Hosting Service Account')
         verbose_name_plural = _('Hosting Service Accounts')
+
+
+@receiver(post_save, sender=HostingServiceAccount)
+@receiver(post_delete, sender=HostingServiceAccount)
+def _on_hosting_service_account_changed(sender, instance, **kwargs):
+    """Close any pooled HTTP connections for a saved or deleted account.
+
+    Saving an account may change its credentials or SSL certificate, so
+    new connections will be made for it.
+
+    Args:
+        sender (type):
+            The model class.
+
+        instance (HostingServiceAccount):
+            The saved or deleted account.
+
+        **kwargs (dict):
+            Additional keyword arguments from the signal.
+    """
+    close_connection_pool(instance)
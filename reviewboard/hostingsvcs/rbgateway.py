@@ -19,9 +19,10 @@ from reviewboard.hostingsvcs.errors import (AuthorizationError,
                                             HostingServiceAPIError,
                                             HostingServiceError)
 from reviewboard.hostingsvcs.forms import HostingServiceForm
-from reviewboard.hostingsvcs.hook_utils import (close_all_review_requests,
-                                                get_repository_for_hook,
-                                                get_review_request_id)
+from reviewboard.hostingsvcs.hook_utils import (
+    get_repository_for_hook,
+    get_review_request_ids,
+    queue_close_all_review_requests)
 from reviewboard.hostingsvcs.service import (HostingService,
                                              HostingServiceClient)
 from reviewboard.scmtools.core import Branch, Commit, UNKNOWN
@@ -88,12 +89,17 @@ def hook_close_submitted(request, local_site_name=None,
     server_url = get_server_url(request=request)
     review_request_ids_to_commits = defaultdict(list)
 
-    for commit in payload['commits']:
-        commit_id = commit.get('id')
-        commit_message = commit.get('message')
-        review_request_id = get_review_request_id(
-            commit_message, server_url, commit_id, repository)
+    commits = payload['commits']
+    review_request_ids = get_review_request_ids(
+        [
+            (commit.get('message'), commit.get('id'))
+            for commit in commits
+        ],
+        server_url,
+        repository)
 
+    for commit, review_request_id in zip(commits, review_request_ids):
+        commit_id = commit.get('id')
         targets = commit['target']
 
         if 'tags' in targets and targets['tags']:
@@ -113,10 +119,10 @@ def hook_close_submitted(request, local_site_name=None,
         review_request_ids_to_commits[review_request_id].append(target_str)
 
     if review_request_ids_to_commits:
-        close_all_review_requests(review_request_ids_to_commits,
-                                  local_site_name,
-                                  repository,
-                                  hosting_service_id)
+        queue_close_all_review_requests(review_request_ids_to_commits,
+                                        local_site_name,
+                                        repository,
+                                        hosting_service_id)
 
     return HttpResponse()
 
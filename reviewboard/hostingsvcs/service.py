@@ -14,10 +14,10 @@ from email.generator import _make_boundary as generate_boundary
 from cryptography import x509
 from cryptography.hazmat.backends import default_backend
 from django.conf.urls import include, url
-from django.dispatch import receiver
+from django.core.cache import cache
 from django.utils import six
 from django.utils.encoding import force_bytes, force_str, force_text
-from django.utils.six.moves.urllib.error import URLError
+from django.utils.six.moves.urllib.error import HTTPError, URLError
 from django.utils.six.moves.urllib.parse import (parse_qs, urlencode,
                                                  urlparse, urlunparse)
 from django.utils.six.moves.urllib.request import (
@@ -34,11 +34,11 @@ from djblets.registries.registry import (ALREADY_REGISTERED, LOAD_ENTRY_POINT,
 from djblets.util.decorators import cached_property
 
 import reviewboard.hostingsvcs.urls as hostingsvcs_urls
+from reviewboard.hostingsvcs.utils.connection_pool import get_connection_pool
 from reviewboard.registries.registry import EntryPointRegistry
 from reviewboard.scmtools.certs import Certificate
 from reviewboard.scmtools.crypto_utils import decrypt_password
 from reviewboard.scmtools.errors import UnverifiedCertificateError
-from reviewboard.signals import initializing
 
 
 logger = logging.getLogger(__name__)
@@ -282,20 +282,42 @@ class HostingServiceHTTPRequest(object):
                 An error occurred talking to the server, or an HTTP error
                 (400+) was returned.
         """
+        hosting_service = self.hosting_service
+
+        if hosting_service:
+            response_cls = hosting_service.client.http_response_cls
+            ssl_cert = hosting_service.account.data.get('ssl_cert')
+        else:
+            response_cls = HostingServiceHTTPResponse
+            ssl_cert = None
+
+        pool = self._get_connection_pool()
+
+        if pool is not None:
+            url, status_code, headers, data = pool.urlopen(
+                url=self.url,
+                method=self.method,
+                body=self.body,
+                headers=self.headers,
+                ssl_cert=ssl_cert)
+
+            return response_cls(request=self,
+                                url=url,
+                                data=data,
+                                headers=headers,
+                                status_code=status_code)
+
         request = BaseURLRequest(self.url, self.body, self.headers)
         request.get_method = lambda: self.method
 
-        hosting_service = self.hosting_service
-
-        if hosting_service and 'ssl_cert' in hosting_service.account.data:
+        if ssl_cert:
             # create_default_context only exists in Python 2.7.9+. Using it
             # here should be fine, however, because accepting invalid or
             # self-signed certificates is only possible when running
             # against versions that have this (see the check for
             # create_default_context below).
             context = ssl.create_default_context()
-            context.load_verify_locations(
-                cadata=hosting_service.account.data['ssl_cert'])
+            context.load_verify_locations(cadata=ssl_cert)
             context.check_hostname = False
 
             self._urlopen_handlers.append(HTTPSHandler(context=context))
@@ -303,17 +325,40 @@ class HostingServiceHTTPRequest(object):
         opener = build_opener(*self._urlopen_handlers)
         response = opener.open(request)
 
-        if hosting_service:
-            response_cls = hosting_service.client.http_response_cls
-        else:
-            response_cls = HostingServiceHTTPResponse
-
         return response_cls(request=self,
                             url=response.geturl(),
                             data=response.read(),
                             headers=dict(response.headers),
                             status_code=response.getcode())
 
+    def _get_connection_pool(self):
+        """Return the connection pool to use for this request.
+
+        Requests are sent over a persistent connection from the hosting
+        service account's pool when possible. Requests that need custom
+        :py:mod:`urllib2` handlers (such as HTTP Digest Auth), need to go
+        through a proxy, or aren't associated with a saved account will use
+        :py:mod:`urllib2` directly.
+
+        Returns:
+            reviewboard.hostingsvcs.utils.connection_pool.HTTPConnectionPool:
+            The connection pool, or ``None`` if the request shouldn't use
+            one.
+        """
+        hosting_service = self.hosting_service
+
+        if (self._urlopen_handlers or
+            hosting_service is None or
+            not hosting_service.client.use_http_connection_pool):
+            return None
+
+        pool = get_connection_pool(hosting_service.account)
+
+        if pool is None or not pool.can_open(self.url):
+            return None
+
+        return pool
+
 
 class HostingServiceHTTPResponse(object):
     """An HTTP response from the server.
@@ -497,6 +542,30 @@ class HostingServiceClient(object):
     #:     4.0
     use_http_digest_auth = False
 
+    #: Whether to reuse persistent HTTP connections across requests.
+    #:
+    #: Connections are pooled per hosting service account. This can be
+    #: turned off if a service doesn't behave well with keep-alive
+    #: connections.
+    #:
+    #: Version Added:
+    #:     4.0
+    use_http_connection_pool = True
+
+    #: The number of seconds responses are cached for conditional requests.
+    #:
+    #: See the ``use_etag_cache`` argument to :py:meth:`http_request`.
+    #:
+    #: Version Added:
+    #:     4.0
+    etag_cache_expiration = 60 * 60 * 24
+
+    #: The maximum size of a response body cached for conditional requests.
+    #:
+    #: Version Added:
+    #:     4.0
+    etag_cache_max_size = 1024 * 1024
+
     def __init__(self, hosting_service):
         """Initialize the client.
 
@@ -763,7 +832,7 @@ class HostingServiceClient(object):
                                  **kwargs)
 
     def http_request(self, url, body=None, headers=None, method='GET',
-                     **kwargs):
+                     use_etag_cache=False, **kwargs):
         """Perform an HTTP request, processing and handling results.
 
         This constructs an HTTP request based on the specified criteria,
@@ -814,6 +883,16 @@ class HostingServiceClient(object):
             method (unicode, optional):
                 The HTTP method to use to perform the request.
 
+            use_etag_cache (bool, optional):
+                Whether to cache the response and make a conditional request
+                (using ``If-None-Match``) the next time the same URL is
+                requested. If the server responds with ``304 Not Modified``,
+                the cached response is returned. This only applies to
+                ``GET`` requests for responses that include an ``ETag``.
+
+                Version Added:
+                    4.0
+
             **kwargs (dict):
                 Additional keyword arguments to pass to
                 :py:meth:`build_http_request`.
@@ -842,14 +921,126 @@ class HostingServiceClient(object):
                                           credentials=credentials,
                                           **kwargs)
 
+        cache_key = None
+        cached = None
+
+        if (use_etag_cache and
+            method == 'GET' and
+            self.hosting_service.account.pk is not None):
+            cache_key = self._make_etag_cache_key(request)
+            cached = cache.get(cache_key)
+
+            if cached:
+                request.add_header('If-None-Match', cached['etag'])
+
         try:
-            return self.process_http_response(self.open_http_request(request))
+            try:
+                response = self.open_http_request(request)
+            except HTTPError as e:
+                if cached and e.code == 304:
+                    response = self._build_etag_cached_response(request,
+                                                                cached, e)
+                else:
+                    raise
+            else:
+                if cache_key:
+                    self._store_etag_cached_response(cache_key, response)
+
+            return self.process_http_response(response)
         except URLError as e:
             # This will either raise, or it will return and we'll raise.
             self.process_http_error(request, e)
 
             raise
 
+    def _make_etag_cache_key(self, request):
+        """Return the cache key for a conditional request's cached response.
+
+        The key covers the account, URL, and the headers that can affect the
+        representation returned, so that responses are never shared between
+        credentials or content types.
+
+        Args:
+            request (HostingServiceHTTPRequest):
+                The request being made.
+
+        Returns:
+            unicode:
+            The cache key.
+        """
+        key_data = '\n'.join(
+            force_text(value or '')
+            for value in (request.url,
+                          request.get_header('Authorization'),
+                          request.get_header('Accept'))
+        )
+
+        return 'hostingsvc-etag:%s:%s' % (
+            self.hosting_service.account.pk,
+            hashlib.sha256(key_data.encode('utf-8')).hexdigest())
+
+    def _store_etag_cached_response(self, cache_key, response):
+        """Cache a response for later conditional requests.
+
+        Args:
+            cache_key (unicode):
+                The cache key for the response.
+
+            response (HostingServiceHTTPResponse):
+                The response to cache.
+        """
+        etag = None
+
+        for key, value in six.iteritems(response.headers):
+            if key.lower() == 'etag':
+                etag = value
+                break
+
+        data = response.data
+
+        if (etag and
+            response.status_code == 200 and
+            (data is None or len(data) <= self.etag_cache_max_size)):
+            cache.set(cache_key,
+                      {
+                          'etag': force_text(etag),
+                          'url': response.url,
+                          'data': data,
+                          'headers': response.headers,
+                      },
+                      self.etag_cache_expiration)
+
+    def _build_etag_cached_response(self, request, cached, e):
+        """Return a response built from a cached conditional response.
+
+        Any headers from the ``304 Not Modified`` response (such as rate
+        limit information) take precedence over the cached headers.
+
+        Args:
+            request (HostingServiceHTTPRequest):
+                The request that was made.
+
+            cached (dict):
+                The cached response information.
+
+            e (urllib2.HTTPError):
+                The ``304 Not Modified`` error.
+
+        Returns:
+            HostingServiceHTTPResponse:
+            The response.
+        """
+        headers = dict(cached['headers'])
+
+        if e.headers:
+            headers.update(dict(e.headers))
+
+        return self.http_response_cls(request=request,
+                                      url=cached['url'],
+                                      data=cached['data'],
+                                      headers=headers,
+                                      status_code=200)
+
     def get_http_credentials(self, account, username=None, password=None,
                              **kwargs):
         """Return credentials used to authenticate with the service.
@@ -1796,6 +1987,12 @@ class HostingService(object):
             per_page (int, optional):
                 The number of results per page.
 
+            **kwargs (dict):
+                Additional hosting service-specific arguments. Services
+                that support it may accept ``prefetch_pages``, the number of
+                upcoming pages to fetch in parallel. The paginator should
+                then be closed when no longer needed.
+
         Returns:
             reviewboard.hostingsvcs.utils.APIPaginator:
             A paginator for the returned repositories.
@@ -2184,11 +2381,6 @@ def unregister_hosting_service(name):
         raise e
 
 
-@receiver(initializing, dispatch_uid='populate_hosting_services')
-def _on_initializing(**kwargs):
-    _hosting_service_registry.populate()
-
-
 #: Legacy name for HostingServiceHTTPRequest
 #:
 #: Deprecated:
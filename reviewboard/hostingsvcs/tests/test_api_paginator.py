@@ -1,5 +1,6 @@
 from __future__ import unicode_literals
 
+from django.db import connections
 from django.utils.six.moves.urllib.parse import parse_qs, urlsplit
 from kgb import SpyAgency
 
@@ -48,6 +49,32 @@ class DummyMultiPageAPIPaginator(APIPaginator):
             self.fail('Unexpected URL %s' % url)
 
 
+class DummyPrefetchAPIPaginator(APIPaginator):
+    start_query_param = 'page'
+
+    def fetch_url(self, url):
+        page = int(parse_qs(urlsplit(url).query)['page'][0])
+
+        if page == 3 and self.fail_page_3:
+            raise Exception('Page 3 failed')
+
+        page_info = {
+            'data': [page * 10 + i for i in range(3)],
+            'per_page': 3,
+            'total_count': 12,
+        }
+
+        if page > 1:
+            page_info['prev_url'] = 'http://example.com/?page=%s' % (page - 1)
+
+        if page < 4:
+            page_info['next_url'] = 'http://example.com/?page=%s' % (page + 1)
+
+        return page_info
+
+    fail_page_3 = False
+
+
 class BasePaginatorTests(SpyAgency, TestCase):
     """Unit tests for BasePaginator."""
 
@@ -214,6 +241,197 @@ class APIPaginatorTests(TestCase):
         self.assertEqual(paginator.url, url)
 
 
+class APIPaginatorPrefetchTests(SpyAgency, TestCase):
+    """Unit tests for APIPaginator page prefetching."""
+
+    def test_iter_items_with_prefetch(self):
+        """Testing APIPaginator.iter_items with prefetch_pages"""
+        self.spy_on(DummyPrefetchAPIPaginator.fetch_url)
+
+        paginator = DummyPrefetchAPIPaginator(
+            client=None,
+            url='http://example.com/?page=1')
+
+        self.assertEqual(list(paginator.iter_items(prefetch_pages=2)),
+                         [10, 11, 12, 20, 21, 22, 30, 31, 32, 40, 41, 42])
+
+        urls = sorted(
+            call.args[0]
+            for call in DummyPrefetchAPIPaginator.fetch_url.calls
+        )
+        self.assertEqual(urls, [
+            'http://example.com/?page=1',
+            'http://example.com/?page=2',
+            'http://example.com/?page=3',
+            'http://example.com/?page=4',
+        ])
+        self.assertIsNone(paginator._prefetch_pool)
+
+    def test_iter_pages_with_prefetch_and_max_pages(self):
+        """Testing APIPaginator.iter_pages with prefetch_pages and max_pages
+        """
+        self.spy_on(DummyPrefetchAPIPaginator.fetch_url)
+
+        paginator = DummyPrefetchAPIPaginator(
+            client=None,
+            url='http://example.com/?page=1')
+
+        pages = list(paginator.iter_pages(max_pages=2, prefetch_pages=3))
+
+        self.assertEqual(pages, [[10, 11, 12], [20, 21, 22]])
+        self.assertEqual(len(DummyPrefetchAPIPaginator.fetch_url.calls), 2)
+
+    def test_iter_pages_with_prefetch_error(self):
+        """Testing APIPaginator.iter_pages with prefetch_pages raises errors
+        in page order
+        """
+        paginator = DummyPrefetchAPIPaginator(
+            client=None,
+            url='http://example.com/?page=1')
+        paginator.fail_page_3 = True
+
+        pages = []
+
+        with self.assertRaisesMessage(Exception, 'Page 3 failed'):
+            for page in paginator.iter_pages(prefetch_pages=3):
+                pages.append(page)
+
+        self.assertEqual(pages, [[10, 11, 12], [20, 21, 22]])
+
+    def test_next_with_prefetch_rate_limited(self):
+        """Testing APIPaginator.next with prefetching limited by
+        get_max_prefetch_pages
+        """
+        self.spy_on(DummyPrefetchAPIPaginator.get_max_prefetch_pages,
+                    call_fake=lambda paginator: 0)
+        self.spy_on(DummyPrefetchAPIPaginator.fetch_url)
+
+        paginator = DummyPrefetchAPIPaginator(
+            client=None,
+            url='http://example.com/?page=1',
+            prefetch_pages=2)
+
+        self.assertEqual(len(DummyPrefetchAPIPaginator.fetch_url.calls), 1)
+        self.assertEqual(paginator.next(), [20, 21, 22])
+        self.assertEqual(len(DummyPrefetchAPIPaginator.fetch_url.calls), 2)
+
+    def test_start_prefetch_with_max_prefetch_pages(self):
+        """Testing APIPaginator.start_prefetch caps prefetch_pages to
+        MAX_PREFETCH_PAGES
+        """
+        max_prefetch_pages = DummyPrefetchAPIPaginator.MAX_PREFETCH_PAGES
+        paginator = DummyPrefetchAPIPaginator(
+            client=None,
+            url='http://example.com/?page=1')
+        self.spy_on(paginator.get_prefetch_urls)
+
+        paginator.start_prefetch(max_prefetch_pages + 5)
+
+        try:
+            self.assertEqual(paginator.prefetch_pages, max_prefetch_pages)
+            self.assertEqual(paginator.get_prefetch_urls.last_call.args[0],
+                             max_prefetch_pages)
+        finally:
+            paginator.stop_prefetch()
+
+    def test_close(self):
+        """Testing APIPaginator.close frees prefetch threads"""
+        paginator = DummyPrefetchAPIPaginator(
+            client=None,
+            url='http://example.com/?page=1',
+            prefetch_pages=2)
+        pool = paginator._prefetch_pool
+        self.assertIsNotNone(pool)
+        self.spy_on(pool.close)
+
+        paginator.close()
+
+        self.assertTrue(pool.close.called)
+        self.assertIsNone(paginator._prefetch_pool)
+
+        # The paginator can still be used, without prefetching.
+        self.assertEqual(paginator.next(), [20, 21, 22])
+        self.assertIsNone(paginator._prefetch_pool)
+
+    def test_context_manager(self):
+        """Testing APIPaginator as a context manager frees prefetch threads
+        when abandoned partway through
+        """
+        with DummyPrefetchAPIPaginator(
+                client=None,
+                url='http://example.com/?page=1',
+                prefetch_pages=2) as paginator:
+            pool = paginator._prefetch_pool
+            self.spy_on(pool.close)
+
+            self.assertEqual(paginator.next(), [20, 21, 22])
+
+        self.assertTrue(pool.close.called)
+        self.assertIsNone(paginator._prefetch_pool)
+
+    def test_del(self):
+        """Testing APIPaginator frees prefetch threads when destroyed"""
+        paginator = DummyPrefetchAPIPaginator(
+            client=None,
+            url='http://example.com/?page=1',
+            prefetch_pages=2)
+        pool = paginator._prefetch_pool
+        self.spy_on(pool.close)
+
+        paginator.__del__()
+
+        self.assertTrue(pool.close.called)
+
+    def test_prefetch_closes_db_connections(self):
+        """Testing APIPaginator closes database connections in prefetch
+        threads
+        """
+        self.spy_on(connections.close_all)
+
+        paginator = DummyPrefetchAPIPaginator(
+            client=None,
+            url='http://example.com/?page=1')
+
+        self.assertEqual(list(paginator.iter_pages(prefetch_pages=3))[-1],
+                         [40, 41, 42])
+        self.assertEqual(len(connections.close_all.calls), 3)
+
+    def test_get_prefetch_urls(self):
+        """Testing APIPaginator.get_prefetch_urls"""
+        paginator = DummyPrefetchAPIPaginator(
+            client=None,
+            url='http://example.com/?page=1')
+        paginator.next_url = 'http://example.com/?foo=bar&page=2'
+
+        self.assertEqual(paginator.get_prefetch_urls(5), [
+            'http://example.com/?foo=bar&page=2',
+            'http://example.com/?foo=bar&page=3',
+            'http://example.com/?foo=bar&page=4',
+        ])
+
+    def test_get_prefetch_urls_with_last_url(self):
+        """Testing APIPaginator.get_prefetch_urls with last_url"""
+        paginator = DummyPrefetchAPIPaginator(
+            client=None,
+            url='http://example.com/?page=1')
+        paginator.total_count = None
+        paginator.last_url = 'http://example.com/?page=3'
+
+        self.assertEqual(paginator.get_prefetch_urls(5), [
+            'http://example.com/?page=2',
+            'http://example.com/?page=3',
+        ])
+
+    def test_get_prefetch_urls_without_last_page(self):
+        """Testing APIPaginator.get_prefetch_urls without a known last page"""
+        paginator = DummyPrefetchAPIPaginator(
+            client=None,
+            url='http://example.com/?page=1')
+        paginator.total_count = None
+
+        self.assertEqual(paginator.get_prefetch_urls(5), [])
+
+
 class ProxyPaginatorTests(TestCase):
     """Tests for ProxyPaginator."""
 
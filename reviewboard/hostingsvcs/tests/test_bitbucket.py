@@ -12,6 +12,7 @@ from djblets.testing.decorators import add_fixtures
 from reviewboard.hostingsvcs.bitbucket import BitbucketAuthForm
 from reviewboard.hostingsvcs.errors import (AuthorizationError,
                                             RepositoryError)
+from reviewboard.hostingsvcs.hook_utils import get_review_request_ids
 from reviewboard.hostingsvcs.testing import HostingServiceTestCase
 from reviewboard.reviews.models import ReviewRequest
 from reviewboard.scmtools.core import Branch, Commit
@@ -961,6 +962,8 @@ class CloseSubmittedHookTests(BitbucketTestCase):
                 'hooks_uuid': repository.get_or_create_hooks_uuid(),
             })
 
+        self.spy_on(get_review_request_ids)
+
         with self.setup_http_test(self.make_handler_for_paths(paths),
                                   expected_http_calls=2):
             self._post_commit_hook_payload(
@@ -968,6 +971,10 @@ class CloseSubmittedHookTests(BitbucketTestCase):
                 review_request_url=review_request1.get_absolute_url(),
                 truncated=True)
 
+        # The review requests for all commits are looked up together.
+        self.assertEqual(len(get_review_request_ids.calls), 1)
+        self.assertEqual(len(get_review_request_ids.last_call.args[0]), 2)
+
         # Check the first review request.
         #
         # The first review request has an entry in the truncated list and the
@@ -0,0 +1,178 @@
+"""Unit tests for reviewboard.hostingsvcs.utils.connection_pool."""
+
+from __future__ import unicode_literals
+
+import threading
+
+from django.utils.six.moves import BaseHTTPServer
+from django.utils.six.moves.urllib.error import HTTPError
+
+from reviewboard.hostingsvcs.models import HostingServiceAccount
+from reviewboard.hostingsvcs.utils.connection_pool import (
+    HTTPConnectionPool,
+    get_connection_pool)
+from reviewboard.testing.testcase import TestCase
+
+
+class _TestRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = str('HTTP/1.1')
+
+    def do_GET(self):
+        if self.path == '/redirect':
+            self._send(302, b'', {'Location': '/file'})
+        elif self.path == '/not-modified':
+            self._send(304, None)
+        elif self.path == '/missing':
+            self._send(404, b'{"message": "Not found"}')
+        else:
+            self._send(200, b'hello:%d' % id(self.connection))
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self._send(200, self.rfile.read(length))
+
+    def log_message(self, *args, **kwargs):
+        pass
+
+    def _send(self, status, body, headers={}):
+        self.send_response(status)
+
+        for key, value in headers.items():
+            self.send_header(key, value)
+
+        if body is not None:
+            self.send_header('Content-Length', str(len(body)))
+
+        self.end_headers()
+
+        if body:
+            self.wfile.write(body)
+
+
+class HTTPConnectionPoolTests(TestCase):
+    """Unit tests for HTTPConnectionPool."""
+
+    @classmethod
+    def setUpClass(cls):
+        super(HTTPConnectionPoolTests, cls).setUpClass()
+
+        cls.server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0),
+                                               _TestRequestHandler)
+        cls.server_thread = threading.Thread(target=cls.server.serve_forever)
+        cls.server_thread.daemon = True
+        cls.server_thread.start()
+
+        cls.base_url = 'http://127.0.0.1:%s' % cls.server.server_port
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+        super(HTTPConnectionPoolTests, cls).tearDownClass()
+
+    def setUp(self):
+        super(HTTPConnectionPoolTests, self).setUp()
+
+        self.pool = HTTPConnectionPool()
+
+    def tearDown(self):
+        self.pool.close()
+
+        super(HTTPConnectionPoolTests, self).tearDown()
+
+    def test_urlopen_reuses_connection(self):
+        """Testing HTTPConnectionPool.urlopen reuses connections"""
+        url, status, headers, data1 = self.pool.urlopen(
+            '%s/file' % self.base_url)
+        self.assertEqual(status, 200)
+        self.assertTrue(data1.startswith(b'hello:'))
+
+        url, status, headers, data2 = self.pool.urlopen(
+            '%s/file' % self.base_url)
+
+        # The server reports the same connection for both requests.
+        self.assertEqual(data1, data2)
+
+    def test_urlopen_with_post(self):
+        """Testing HTTPConnectionPool.urlopen with POST"""
+        url, status, headers, data = self.pool.urlopen(
+            '%s/echo' % self.base_url,
+            method='POST',
+            body=b'payload')
+
+        self.assertEqual(status, 200)
+        self.assertEqual(data, b'payload')
+
+    def test_urlopen_with_redirect(self):
+        """Testing HTTPConnectionPool.urlopen follows redirects"""
+        url, status, headers, data = self.pool.urlopen(
+            '%s/redirect' % self.base_url)
+
+        self.assertEqual(url, '%s/file' % self.base_url)
+        self.assertEqual(status, 200)
+
+    def test_urlopen_with_not_modified(self):
+        """Testing HTTPConnectionPool.urlopen with 304 Not Modified"""
+        with self.assertRaises(HTTPError) as cm:
+            self.pool.urlopen('%s/not-modified' % self.base_url)
+
+        self.assertEqual(cm.exception.code, 304)
+
+    def test_urlopen_with_http_error(self):
+        """Testing HTTPConnectionPool.urlopen with HTTP error"""
+        with self.assertRaises(HTTPError) as cm:
+            self.pool.urlopen('%s/missing' % self.base_url)
+
+        e = cm.exception
+        self.assertEqual(e.code, 404)
+        self.assertEqual(e.read(), b'{"message": "Not found"}')
+
+    def test_close_with_connection_in_use(self):
+        """Testing HTTPConnectionPool.close closes connections released
+        after the pool is closed
+        """
+        key = ('http', '127.0.0.1', self.server.server_port, None)
+        conn = self.pool._acquire(key, None)[0]
+
+        self.pool.close()
+        self.pool._release(key, conn)
+
+        self.assertEqual(self.pool._idle[key], [])
+
+    def test_can_open_with_unsupported_scheme(self):
+        """Testing HTTPConnectionPool.can_open with unsupported scheme"""
+        self.assertFalse(self.pool.can_open('ftp://example.com/'))
+
+
+class GetConnectionPoolTests(TestCase):
+    """Unit tests for get_connection_pool."""
+
+    def setUp(self):
+        super(GetConnectionPoolTests, self).setUp()
+
+        self.account = HostingServiceAccount.objects.create(
+            service_name='github',
+            username='myuser')
+
+    def test_with_account_saved(self):
+        """Testing get_connection_pool after saving the account returns a
+        new pool
+        """
+        pool = get_connection_pool(self.account)
+        self.assertIs(get_connection_pool(self.account), pool)
+
+        self.account.data['password'] = 'new-password'
+        self.account.save()
+
+        self.assertIsNot(get_connection_pool(self.account), pool)
+        self.assertTrue(pool._closed)
+
+    def test_with_account_deleted(self):
+        """Testing get_connection_pool pools are closed when the account is
+        deleted
+        """
+        pool = get_connection_pool(self.account)
+        self.account.delete()
+
+        self.assertTrue(pool._closed)
@@ -877,6 +877,67 @@ class GitHubTests(GitHubTestCase):
         self.assertEqual(repo.path, 'myrepo_path2')
         self.assertEqual(repo.mirror_path, 'myrepo_mirror2')
 
+    def test_get_remote_repositories_with_prefetch_pages(self):
+        """Testing GitHub.get_remote_repositories with prefetch_pages"""
+        base_url = 'https://api.github.com/user/repos'
+        paths = {}
+
+        for page in range(1, 4):
+            if page == 1:
+                path = '/user/repos'
+            else:
+                path = '/user/repos?page=%d' % page
+
+            links = ['<%s?page=3>; rel="last"' % base_url]
+
+            if page < 3:
+                links.append('<%s?page=%d>; rel="next"'
+                             % (base_url, page + 1))
+
+            paths[path] = {
+                'payload': self.dump_json([
+                    {
+                        'id': page,
+                        'owner': {
+                            'login': 'myuser',
+                        },
+                        'name': 'myrepo%d' % page,
+                        'clone_url': 'myrepo_path%d' % page,
+                        'mirror_url': 'myrepo_mirror%d' % page,
+                        'private': 'false'
+                    },
+                ]),
+                'headers': {
+                    str('Link'): str(', '.join(links)),
+                },
+            }
+
+        with self.setup_http_test(self.make_handler_for_paths(paths),
+                                  expected_http_calls=3) as ctx:
+            with ctx.service.get_remote_repositories(
+                    'myuser', prefetch_pages=2) as paginator:
+                # Both upcoming pages are requested before they're needed.
+                self.assertEqual(len(paginator.paginator._prefetched), 2)
+
+                repos = list(paginator.iter_items())
+
+        self.assertEqual(
+            [
+                repo.id
+                for repo in repos
+            ],
+            ['myuser/myrepo1', 'myuser/myrepo2', 'myuser/myrepo3'])
+        self.assertEqual(
+            sorted(
+                call.args[0]
+                for call in ctx.http_calls
+            ),
+            [
+                'https://api.github.com/user/repos',
+                'https://api.github.com/user/repos?page=2',
+                'https://api.github.com/user/repos?page=3',
+            ])
+
     def test_get_remote_repositories_with_other_user(self):
         """Testing GitHub.get_remote_repositories with requesting user's
         repositories
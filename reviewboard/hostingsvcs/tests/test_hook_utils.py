@@ -0,0 +1,157 @@
+"""Unit tests for reviewboard.hostingsvcs.hook_utils."""
+
+from __future__ import unicode_literals
+
+from kgb import SpyAgency
+
+from reviewboard.hostingsvcs.hook_utils import (_on_request_finished,
+                                                _on_request_started,
+                                                close_all_review_requests,
+                                                close_review_request,
+                                                get_review_request_ids,
+                                                queue_hook_work)
+from reviewboard.hostingsvcs.models import HostingServiceAccount
+from reviewboard.reviews.models import ReviewRequest
+from reviewboard.testing import TestCase
+
+
+class HookUtilsTests(SpyAgency, TestCase):
+    """Unit tests for reviewboard.hostingsvcs.hook_utils."""
+
+    fixtures = ['test_users', 'test_scmtools']
+
+    def setUp(self):
+        super(HookUtilsTests, self).setUp()
+
+        account = HostingServiceAccount.objects.create(service_name='github',
+                                                       username='myuser')
+        self.repository = self.create_repository(hosting_account=account)
+
+    def test_get_review_request_ids(self):
+        """Testing get_review_request_ids"""
+        review_request1 = self.create_review_request(
+            repository=self.repository,
+            commit_id='abc123',
+            publish=True)
+        review_request2 = self.create_review_request(
+            repository=self.repository,
+            commit_id='def456',
+            publish=True)
+
+        with self.assertNumQueries(1):
+            review_request_ids = get_review_request_ids(
+                [
+                    ('Reviewed at http://example.com/r/42/', 'aaa111'),
+                    ('No review request', 'abc123'),
+                    ('No review request', 'bbb222'),
+                    ('No review request', 'def456'),
+                ],
+                'http://example.com/',
+                self.repository)
+
+        self.assertEqual(review_request_ids,
+                         [42, review_request1.pk, None, review_request2.pk])
+
+    def test_get_review_request_ids_without_commit_ids(self):
+        """Testing get_review_request_ids without commit IDs to look up"""
+        with self.assertNumQueries(0):
+            review_request_ids = get_review_request_ids(
+                [
+                    ('Reviewed at http://example.com/r/42/', 'aaa111'),
+                    ('No review request', None),
+                ],
+                'http://example.com/',
+                self.repository)
+
+        self.assertEqual(review_request_ids, [42, None])
+
+    def test_close_all_review_requests(self):
+        """Testing close_all_review_requests"""
+        review_request1 = self.create_review_request(
+            repository=self.repository,
+            publish=True)
+        review_request2 = self.create_review_request(
+            repository=self.repository,
+            publish=True)
+
+        close_all_review_requests(
+            {
+                review_request1.pk: ['master (abc1234)'],
+                review_request2.pk: ['master (def5678)'],
+                None: ['master (0000000)'],
+            },
+            None,
+            self.repository,
+            'github')
+
+        review_request1 = ReviewRequest.objects.get(pk=review_request1.pk)
+        self.assertEqual(review_request1.status, ReviewRequest.SUBMITTED)
+        self.assertEqual(review_request1.changedescs.get().text,
+                         'Pushed to master (abc1234)')
+
+        review_request2 = ReviewRequest.objects.get(pk=review_request2.pk)
+        self.assertEqual(review_request2.status, ReviewRequest.SUBMITTED)
+        self.assertEqual(review_request2.changedescs.get().text,
+                         'Pushed to master (def5678)')
+
+    def test_close_all_review_requests_with_error(self):
+        """Testing close_all_review_requests continues after an error
+        closing a review request
+        """
+        review_request1 = self.create_review_request(
+            repository=self.repository,
+            publish=True)
+        review_request2 = self.create_review_request(
+            repository=self.repository,
+            publish=True)
+
+        def _close_review_request(review_request, review_request_id,
+                                  description):
+            if review_request_id == review_request1.pk:
+                raise Exception('Oh no')
+
+            close_review_request.call_original(review_request,
+                                               review_request_id,
+                                               description)
+
+        self.spy_on(close_review_request, call_fake=_close_review_request)
+
+        close_all_review_requests(
+            {
+                review_request1.pk: ['master (abc1234)'],
+                review_request2.pk: ['master (def5678)'],
+            },
+            None,
+            self.repository,
+            'github')
+
+        review_request1 = ReviewRequest.objects.get(pk=review_request1.pk)
+        self.assertEqual(review_request1.status,
+                         ReviewRequest.PENDING_REVIEW)
+
+        review_request2 = ReviewRequest.objects.get(pk=review_request2.pk)
+        self.assertEqual(review_request2.status, ReviewRequest.SUBMITTED)
+
+    def test_queue_hook_work_outside_request(self):
+        """Testing queue_hook_work outside of an HTTP request"""
+        calls = []
+
+        queue_hook_work(calls.append, 1)
+
+        self.assertEqual(calls, [1])
+
+    def test_queue_hook_work_in_request(self):
+        """Testing queue_hook_work during an HTTP request"""
+        calls = []
+
+        _on_request_started()
+
+        try:
+            queue_hook_work(calls.append, 1)
+            queue_hook_work(calls.append, 2)
+
+            self.assertEqual(calls, [])
+        finally:
+            _on_request_finished()
+
+        self.assertEqual(calls, [1, 2])
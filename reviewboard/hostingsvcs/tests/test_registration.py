@@ -4,10 +4,13 @@ from django.conf.urls import url
 from django.core.urlresolvers import NoReverseMatch
 from django.http import HttpResponse
 from djblets.registries.errors import AlreadyRegisteredError, ItemLookupError
+from kgb import SpyAgency
 
 from reviewboard.hostingsvcs.service import (HostingService,
+                                             get_hosting_services,
                                              register_hosting_service,
                                              unregister_hosting_service)
+from reviewboard.hostingsvcs.urls import HostingServiceURLResolver
 from reviewboard.site.urlresolvers import local_site_reverse
 from reviewboard.testing import TestCase
 
@@ -100,3 +103,19 @@ class HostingServiceRegistrationTests(TestCase):
         # Once unregistered, should not be able to unregister again
         with self.assertRaises(ItemLookupError):
             unregister_hosting_service('dummy-service')
+
+
+class HostingServiceURLResolverTests(SpyAgency, TestCase):
+    """Unit tests for HostingServiceURLResolver."""
+
+    def test_url_patterns_populates_registry(self):
+        """Testing HostingServiceURLResolver.url_patterns populates the
+        hosting services registry once
+        """
+        resolver = HostingServiceURLResolver()
+        self.spy_on(get_hosting_services)
+
+        resolver.url_patterns
+        resolver.url_patterns
+
+        self.assertEqual(len(get_hosting_services.calls), 1)
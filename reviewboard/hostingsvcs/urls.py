@@ -1,10 +1,59 @@
 from __future__ import unicode_literals
 
+import threading
+
 from django.conf.urls import include, url
 from djblets.urls.resolvers import DynamicURLResolver
 
 
-dynamic_urls = DynamicURLResolver()
+class HostingServiceURLResolver(DynamicURLResolver):
+    """A URL resolver for the URLs provided by hosting services.
+
+    Hosting services add their URL patterns when they're registered. Rather
+    than populating the registry of hosting services when Review Board starts,
+    this populates it the first time the URL patterns are needed.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Initialize the resolver.
+
+        Args:
+            *args (tuple):
+                Positional arguments to pass to the parent class.
+
+            **kwargs (dict):
+                Keyword arguments to pass to the parent class.
+        """
+        super(HostingServiceURLResolver, self).__init__(*args, **kwargs)
+
+        self._services_loaded = False
+        self._services_loading = False
+        self._services_lock = threading.RLock()
+
+    @property
+    def url_patterns(self):
+        """The list of URL patterns for all registered hosting services."""
+        if not self._services_loaded:
+            with self._services_lock:
+                # Registering hosting services will access the URL patterns
+                # again from this thread, so guard against recursion.
+                if not self._services_loaded and not self._services_loading:
+                    from reviewboard.hostingsvcs.service import \
+                        get_hosting_services
+
+                    self._services_loading = True
+
+                    try:
+                        get_hosting_services()
+                    finally:
+                        self._services_loading = False
+
+                    self._services_loaded = True
+
+        return super(HostingServiceURLResolver, self).url_patterns
+
+
+dynamic_urls = HostingServiceURLResolver()
 
 
 urlpatterns = [
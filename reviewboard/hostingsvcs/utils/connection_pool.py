@@ -0,0 +1,383 @@
+"""Persistent HTTP connection pooling for hosting service clients.
+
+By default, :py:mod:`urllib2` opens a new connection (and performs a new
+TLS handshake) for every request. Hosting service integrations often make
+many requests in a row to the same API server (for instance, when fetching
+files for a diff), so this module keeps a pool of keep-alive connections
+per hosting service account, reusing them across requests.
+"""
+
+from __future__ import unicode_literals
+
+import hashlib
+import io
+import logging
+import socket
+import ssl
+import threading
+import time
+from collections import defaultdict
+
+from django.utils import six
+from django.utils.encoding import force_bytes, force_str
+from django.utils.six.moves import http_client
+from django.utils.six.moves.urllib.error import HTTPError, URLError
+from django.utils.six.moves.urllib.parse import urljoin, urlsplit
+from django.utils.six.moves.urllib.request import getproxies, proxy_bypass
+
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPConnectionPool(object):
+    """A pool of persistent HTTP connections.
+
+    Connections are keyed by scheme, host, port, and SSL configuration, and
+    are returned to the pool after each complete response unless the server
+    asked to close them. Idle connections are discarded after
+    :py:attr:`idle_timeout` seconds.
+
+    This is thread-safe. A connection is only ever used by one request at a
+    time.
+
+    Attributes:
+        idle_timeout (int):
+            The number of seconds an idle connection may be kept around.
+
+        max_idle_per_host (int):
+            The maximum number of idle connections kept per host.
+    """
+
+    #: HTTP status codes that will be followed as redirects.
+    REDIRECT_STATUS_CODES = (301, 302, 303, 307, 308)
+
+    #: The maximum number of redirects to follow for a request.
+    MAX_REDIRECTS = 10
+
+    def __init__(self, max_idle_per_host=4, idle_timeout=60):
+        """Initialize the pool.
+
+        Args:
+            max_idle_per_host (int, optional):
+                The maximum number of idle connections kept per host.
+
+            idle_timeout (int, optional):
+                The number of seconds an idle connection may be kept around.
+        """
+        self.max_idle_per_host = max_idle_per_host
+        self.idle_timeout = idle_timeout
+
+        self._idle = defaultdict(list)
+        self._ssl_contexts = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def can_open(self, url):
+        """Return whether the pool can open the given URL.
+
+        Only HTTP and HTTPS URLs that don't need to go through a proxy are
+        supported. Anything else should go through :py:mod:`urllib2`.
+
+        Args:
+            url (unicode):
+                The URL to check.
+
+        Returns:
+            bool:
+            ``True`` if the URL can be opened through the pool.
+        """
+        parts = urlsplit(url)
+
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            return False
+
+        return (parts.scheme not in getproxies() or
+                proxy_bypass(parts.hostname))
+
+    def urlopen(self, url, method='GET', body=None, headers=None,
+                ssl_cert=None):
+        """Perform an HTTP request, following any redirects.
+
+        Args:
+            url (unicode):
+                The URL to open.
+
+            method (unicode, optional):
+                The HTTP method.
+
+            body (bytes, optional):
+                The request body.
+
+            headers (dict, optional):
+                The request headers, as native strings.
+
+            ssl_cert (unicode, optional):
+                A PEM-encoded certificate to trust for HTTPS connections, in
+                place of the default certificate authorities. The hostname
+                is not checked when this is provided.
+
+        Returns:
+            tuple:
+            A 4-tuple of:
+
+            1. The final URL (:py:class:`unicode`).
+            2. The HTTP status code (:py:class:`int`).
+            3. The response headers (:py:class:`dict`).
+            4. The response body (:py:class:`bytes`).
+
+        Raises:
+            urllib2.HTTPError:
+                The server returned an HTTP error or a response that wasn't
+                followed (such as ``304 Not Modified``), matching the
+                behavior of :py:mod:`urllib2`.
+
+            urllib2.URLError:
+                There was an error communicating with the server.
+        """
+        headers = dict(headers or {})
+        num_redirects = 0
+
+        while True:
+            status, reason, message, data = self._send(
+                url, method, body, headers, ssl_cert)
+
+            if 200 <= status < 300:
+                return url, status, dict(message), data
+
+            location = message.get(str('Location'))
+
+            if (status not in self.REDIRECT_STATUS_CODES or
+                not location or
+                num_redirects >= self.MAX_REDIRECTS or
+                (status in (307, 308) and method not in ('GET', 'HEAD'))):
+                # urllib2 refuses to redirect a 307/308 for anything but
+                # GET and HEAD, since the body would need to be re-sent.
+                raise HTTPError(url, status, reason, message,
+                                io.BytesIO(data))
+
+            if method not in ('GET', 'HEAD'):
+                method = 'GET'
+                body = None
+                headers.pop(str('Content-type'), None)
+                headers.pop(str('Content-length'), None)
+
+            url = urljoin(url, location)
+            num_redirects += 1
+
+    def close(self):
+        """Close all idle connections in the pool.
+
+        Connections in use are closed when they're released.
+        """
+        with self._lock:
+            self._closed = True
+            idle = self._idle
+            self._idle = defaultdict(list)
+
+        for connections in six.itervalues(idle):
+            for conn, last_used in connections:
+                conn.close()
+
+    def _send(self, url, method, body, headers, ssl_cert):
+        """Send a single HTTP request on a pooled connection.
+
+        If a reused connection turns out to have been closed by the server,
+        the request will be retried once on a new connection.
+
+        Args:
+            url (unicode):
+                The URL to open.
+
+            method (unicode):
+                The HTTP method.
+
+            body (bytes):
+                The request body.
+
+            headers (dict):
+                The request headers.
+
+            ssl_cert (unicode):
+                A PEM-encoded certificate to trust, if any.
+
+        Returns:
+            tuple:
+            A 4-tuple of the status code, the reason phrase, the
+            :py:class:`httplib.HTTPMessage` containing the headers, and the
+            response body.
+
+        Raises:
+            urllib2.URLError:
+                There was an error communicating with the server.
+        """
+        parts = urlsplit(url)
+        path = parts.path or '/'
+
+        if parts.query:
+            path = '%s?%s' % (path, parts.query)
+
+        key = (parts.scheme, parts.hostname, parts.port,
+               ssl_cert and hashlib.sha1(force_bytes(ssl_cert)).hexdigest())
+
+        while True:
+            conn, reused = self._acquire(key, ssl_cert)
+
+            try:
+                conn.request(method, force_str(path), body, headers)
+                response = conn.getresponse()
+                data = response.read()
+            except (http_client.HTTPException, socket.error) as e:
+                conn.close()
+
+                if reused and not isinstance(e, ssl.SSLError):
+                    # The server likely closed the idle connection.
+                    logger.debug('Retrying %s %s on a new connection after '
+                                 'error: %s',
+                                 method, url, e)
+                    continue
+
+                raise URLError(e)
+
+            if response.will_close:
+                conn.close()
+            else:
+                self._release(key, conn)
+
+            return response.status, response.reason, response.msg, data
+
+    def _acquire(self, key, ssl_cert):
+        """Return a connection for the given key.
+
+        Args:
+            key (tuple):
+                The key identifying the host and SSL configuration.
+
+            ssl_cert (unicode):
+                A PEM-encoded certificate to trust, if any.
+
+        Returns:
+            tuple:
+            A 2-tuple of the connection and whether it was reused from the
+            pool.
+        """
+        now = time.time()
+
+        with self._lock:
+            connections = self._idle[key]
+
+            while connections:
+                conn, last_used = connections.pop()
+
+                if now - last_used <= self.idle_timeout:
+                    return conn, True
+
+                conn.close()
+
+            ssl_context = None
+
+            if key[0] == 'https':
+                ssl_context = self._get_ssl_context(ssl_cert)
+
+        scheme, host, port = key[:3]
+
+        if scheme == 'https':
+            conn = http_client.HTTPSConnection(host, port,
+                                               context=ssl_context)
+        else:
+            conn = http_client.HTTPConnection(host, port)
+
+        return conn, False
+
+    def _release(self, key, conn):
+        """Return a connection to the pool.
+
+        Args:
+            key (tuple):
+                The key identifying the host and SSL configuration.
+
+            conn (httplib.HTTPConnection):
+                The connection to return.
+        """
+        with self._lock:
+            connections = self._idle[key]
+
+            if (not self._closed and
+                len(connections) < self.max_idle_per_host):
+                connections.append((conn, time.time()))
+                conn = None
+
+        if conn is not None:
+            conn.close()
+
+    def _get_ssl_context(self, ssl_cert):
+        """Return an SSL context for HTTPS connections.
+
+        Contexts are cached, since loading certificates is expensive. This
+        must be called with the lock held.
+
+        Args:
+            ssl_cert (unicode):
+                A PEM-encoded certificate to trust, if any.
+
+        Returns:
+            ssl.SSLContext:
+            The SSL context.
+        """
+        try:
+            return self._ssl_contexts[ssl_cert]
+        except KeyError:
+            context = ssl.create_default_context()
+
+            if ssl_cert:
+                context.load_verify_locations(cadata=ssl_cert)
+                context.check_hostname = False
+
+            self._ssl_contexts[ssl_cert] = context
+
+            return context
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_connection_pool(account):
+    """Return the connection pool for a hosting service account.
+
+    Args:
+        account (reviewboard.hostingsvcs.models.HostingServiceAccount):
+            The hosting service account.
+
+    Returns:
+        HTTPConnectionPool:
+        The connection pool, or ``None`` if the account hasn't been saved
+        (in which case connections shouldn't be pooled).
+    """
+    if account is None or account.pk is None:
+        return None
+
+    with _pools_lock:
+        try:
+            return _pools[account.pk]
+        except KeyError:
+            pool = HTTPConnectionPool()
+            _pools[account.pk] = pool
+
+            return pool
+
+
+def close_connection_pool(account):
+    """Close and discard the connection pool for an account.
+
+    This should be called when an account's credentials or SSL settings
+    change, or when the account is deleted.
+
+    Args:
+        account (reviewboard.hostingsvcs.models.HostingServiceAccount):
+            The hosting service account.
+    """
+    with _pools_lock:
+        pool = _pools.pop(account.pk, None)
+
+    if pool is not None:
+        pool.close()
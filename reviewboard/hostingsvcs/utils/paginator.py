@@ -2,10 +2,18 @@
 
 from __future__ import unicode_literals
 
+import logging
+from multiprocessing.pool import ThreadPool
+
+from django.db import connections
 from django.utils import six
 from django.utils.six.moves import range
-from django.utils.six.moves.urllib.parse import (parse_qs, urlencode,
-                                                 urlsplit, urlunsplit)
+from django.utils.six.moves.urllib.parse import (parse_qs, parse_qsl,
+                                                 urlencode, urlsplit,
+                                                 urlunsplit)
+
+
+logger = logging.getLogger(__name__)
 
 
 class InvalidPageError(Exception):
@@ -107,7 +115,7 @@ class BasePaginator(object):
         """
         raise NotImplementedError
 
-    def iter_items(self, max_pages=None):
+    def iter_items(self, max_pages=None, prefetch_pages=None):
         """Iterate through all items across pages.
 
         This will repeatedly fetch pages, iterating through all items and
@@ -120,15 +128,20 @@ class BasePaginator(object):
             max_pages (int, optional):
                 The maximum number of pages to iterate through.
 
+            prefetch_pages (int, optional):
+                The number of upcoming pages to fetch in parallel while
+                iterating. See :py:meth:`iter_pages`.
+
         Yields:
             object:
             Each item from each page's payload.
         """
-        for page in self.iter_pages(max_pages=max_pages):
+        for page in self.iter_pages(max_pages=max_pages,
+                                    prefetch_pages=prefetch_pages):
             for data in self.page_data:
                 yield data
 
-    def iter_pages(self, max_pages=None):
+    def iter_pages(self, max_pages=None, prefetch_pages=None):
         """Iterate through pages of results.
 
         This will repeatedly fetch pages, providing each parsed page payload
@@ -137,14 +150,31 @@ class BasePaginator(object):
         The maximum number of pages can be capped, to limit the impact on
         the server.
 
+        If ``prefetch_pages`` is provided, paginators that support it will
+        fetch up to that many upcoming pages in parallel, while pages are
+        still being provided to the caller in order. Prefetching never goes
+        beyond ``max_pages``.
+
         Args:
             max_pages (int, optional):
                 The maximum number of pages to iterate through.
 
+            prefetch_pages (int, optional):
+                The number of upcoming pages to fetch in parallel.
+
         Yields:
             object:
             The parsed payload for each page.
         """
+        if prefetch_pages:
+            if max_pages is None:
+                max_prefetch_pages = None
+            else:
+                max_prefetch_pages = max_pages - 1
+
+            self.start_prefetch(prefetch_pages,
+                                max_pages=max_prefetch_pages)
+
         try:
             if max_pages is None:
                 while True:
@@ -158,6 +188,63 @@ class BasePaginator(object):
                     yield self.page_data
         except InvalidPageError:
             pass
+        finally:
+            if prefetch_pages:
+                self.stop_prefetch()
+
+    def start_prefetch(self, prefetch_pages, max_pages=None):
+        """Begin fetching upcoming pages in parallel.
+
+        Subclasses that know how to compute the URLs of upcoming pages can
+        override this. By default, this does nothing, and pages will be
+        fetched one at a time.
+
+        Args:
+            prefetch_pages (int):
+                The number of upcoming pages to fetch in parallel.
+
+            max_pages (int, optional):
+                The maximum number of pages after the current page that may
+                be fetched.
+        """
+        pass
+
+    def stop_prefetch(self):
+        """Stop fetching upcoming pages in parallel.
+
+        Any pages that were prefetched but not yet consumed will be
+        discarded.
+        """
+        pass
+
+    def close(self):
+        """Release any resources held by the paginator.
+
+        This stops prefetching, freeing any threads used to fetch pages.
+        Paginators created with prefetching enabled should be closed when
+        the caller is done with them, either by calling this or by using the
+        paginator as a context manager. The paginator can still be used
+        afterward, fetching one page at a time.
+        """
+        self.stop_prefetch()
+
+    def __enter__(self):
+        """Enter the paginator's context.
+
+        Returns:
+            BasePaginator:
+            This paginator.
+        """
+        return self
+
+    def __exit__(self, *args):
+        """Exit the paginator's context, closing the paginator.
+
+        Args:
+            *args (tuple):
+                Information on any exception raised in the context.
+        """
+        self.close()
 
     def __iter__(self):
         """Iterate through pages of results.
@@ -196,9 +283,16 @@ class APIPaginator(BasePaginator):
         next_url (unicode):
             The URL for the next set of results in the page.
 
+        last_url (unicode):
+            The URL for the last page of results, if known.
+
         page_headers (dict):
             HTTP headers returned for the current page.
 
+        prefetch_pages (int):
+            The number of upcoming pages to fetch in parallel. This is 0 if
+            pages are fetched one at a time.
+
         prev_url (unicode):
             The URL for the previous set of results in the page.
 
@@ -218,7 +312,19 @@ class APIPaginator(BasePaginator):
     #: of pagination queries.
     per_page_query_param = None
 
-    def __init__(self, client, url, query_params={}, *args, **kwargs):
+    #: The number of the first page, when using :py:attr:`start_query_param`.
+    #:
+    #: This is used along with ``total_count`` and ``per_page`` to compute
+    #: the number of the last page, for prefetching.
+    first_page_number = 1
+
+    #: The maximum number of pages that can be fetched in parallel.
+    #:
+    #: Requests for more prefetched pages than this are capped to this value.
+    MAX_PREFETCH_PAGES = 10
+
+    def __init__(self, client, url, query_params={}, prefetch_pages=0,
+                 *args, **kwargs):
         """Initialize the paginator.
 
         Once initialized, the first page will be fetched automatically.
@@ -235,6 +341,13 @@ class APIPaginator(BasePaginator):
                 This will be updated with :py:attr:`start_query_param`
                 and :py:attr:`per_page_query_param`, if set.
 
+            prefetch_pages (int, optional):
+                The number of upcoming pages to fetch in parallel as pages
+                are requested. This is capped to :py:attr:`MAX_PREFETCH_PAGES`.
+                See :py:meth:`start_prefetch`. If provided, the paginator
+                should be closed when no longer needed (see
+                :py:meth:`close`).
+
             *args (tuple):
                 Positional arguments for the parent constructor.
 
@@ -247,7 +360,13 @@ class APIPaginator(BasePaginator):
         self.url = url
         self.prev_url = None
         self.next_url = None
+        self.last_url = None
         self.page_headers = None
+        self.prefetch_pages = min(prefetch_pages, self.MAX_PREFETCH_PAGES)
+
+        self._prefetch_max_pages = None
+        self._prefetch_pool = None
+        self._prefetched = {}
 
         # Augment the URL with the provided query parameters.
         query_params = query_params.copy()
@@ -261,6 +380,7 @@ class APIPaginator(BasePaginator):
         self.request_kwargs.setdefault('query', {}).update(query_params)
 
         self._fetch_page()
+        self._schedule_prefetch()
 
     @property
     def has_prev(self):
@@ -306,7 +426,119 @@ class APIPaginator(BasePaginator):
             raise InvalidPageError
 
         self.url = self.next_url
-        return self._fetch_page()
+
+        if self._prefetch_max_pages is not None:
+            self._prefetch_max_pages -= 1
+
+        result = self._prefetched.pop(self._get_page_url_key(self.url), None)
+
+        if result is None:
+            page_info = self.fetch_url(self.url)
+        else:
+            # Any error fetching the page will be raised here, just as if
+            # the page had been fetched now.
+            page_info = result.get()
+
+        self._set_page_info(page_info)
+        self._schedule_prefetch()
+
+        return self.page_data
+
+    def start_prefetch(self, prefetch_pages, max_pages=None):
+        """Begin fetching upcoming pages in parallel.
+
+        Once started, each time a page is fetched, up to ``prefetch_pages``
+        of the following pages will be requested in background threads.
+        Pages are still returned in order by :py:meth:`next`, and any error
+        fetching a page will be raised when that page is reached.
+
+        Prefetching requires knowing the URLs of upcoming pages. These are
+        computed from :py:attr:`next_url` using :py:attr:`start_query_param`,
+        up to the last page (as determined by the ``last_url`` or
+        ``total_count`` and ``per_page`` returned by :py:meth:`fetch_url`).
+        If these aren't known, pages will be fetched one at a time.
+
+        Args:
+            prefetch_pages (int):
+                The number of upcoming pages to fetch in parallel. This is
+                capped to :py:attr:`MAX_PREFETCH_PAGES`.
+
+            max_pages (int, optional):
+                The maximum number of pages after the current page that may
+                be fetched.
+        """
+        self.prefetch_pages = min(prefetch_pages, self.MAX_PREFETCH_PAGES)
+        self._prefetch_max_pages = max_pages
+        self._schedule_prefetch()
+
+    def stop_prefetch(self):
+        """Stop fetching upcoming pages in parallel.
+
+        Any pages that were prefetched but not yet consumed will be
+        discarded. Requests already in progress will be allowed to finish.
+        """
+        self.prefetch_pages = 0
+        self._prefetch_max_pages = None
+        self._prefetched = {}
+        self._close_prefetch_pool()
+
+    def __del__(self):
+        """Free the prefetch threads when the paginator is destroyed.
+
+        This covers paginators that are abandoned without being closed.
+        """
+        self._close_prefetch_pool()
+
+    def get_max_prefetch_pages(self):
+        """Return the maximum number of pages that may currently be prefetched.
+
+        Subclasses can override this to limit prefetching based on the
+        hosting service's rate limits (for instance, using the headers
+        from the current page).
+
+        Returns:
+            int:
+            The maximum number of pages to prefetch, or ``None`` if there's
+            no limit.
+        """
+        return None
+
+    def get_prefetch_urls(self, num_pages):
+        """Return the URLs of upcoming pages to prefetch.
+
+        Args:
+            num_pages (int):
+                The maximum number of URLs to return.
+
+        Returns:
+            list of unicode:
+            The URLs of the upcoming pages, in order, starting with
+            :py:attr:`next_url`.
+        """
+        if not self.start_query_param or not self.next_url:
+            return []
+
+        next_page = self._get_page_number(self.next_url)
+
+        if next_page is None:
+            return []
+
+        if self.last_url:
+            last_page = self._get_page_number(self.last_url)
+        elif self.total_count is not None and self.per_page:
+            last_page = (self.first_page_number +
+                         max(self.total_count - 1, 0) // self.per_page)
+        else:
+            last_page = None
+
+        if last_page is None:
+            return []
+
+        return [
+            self._get_page_url(self.next_url, page)
+            for page in range(next_page,
+                              min(next_page + num_pages, last_page + 1))
+        ]
 
     def fetch_url(self, url):
         """Fetch the URL, returning information on the page.
@@ -332,6 +564,13 @@ class APIPaginator(BasePaginator):
         ``next_url`` (:py:class:`unicode`, optional)
             The optional URL to the next page.
 
+        ``last_url`` (:py:class:`unicode`, optional)
+            The optional URL to the last page.
+
+        If prefetching is enabled, this will be called from background
+        threads. Any database connections opened by those threads are closed
+        once the page is fetched.
+
         Args:
             url (unicode):
                 The URL to fetch.
@@ -350,10 +589,20 @@ class APIPaginator(BasePaginator):
             The resulting page data. This will usually be a :py:class:`list`,
             but is implementation-dependent.
         """
-        page_info = self.fetch_url(self.url)
+        self._set_page_info(self.fetch_url(self.url))
+
+        return self.page_data
 
+    def _set_page_info(self, page_info):
+        """Store the information on a fetched page.
+
+        Args:
+            page_info (dict):
+                The page information returned by :py:meth:`fetch_url`.
+        """
         self.prev_url = page_info.get('prev_url')
         self.next_url = page_info.get('next_url')
+        self.last_url = page_info.get('last_url')
         self.per_page = page_info.get('per_page', self.per_page)
         self.page_data = page_info.get('data')
         self.page_headers = page_info.get('headers', {})
@@ -372,6 +621,12 @@ class APIPaginator(BasePaginator):
              'string, not %r'
              % type(self.next_url))
 
+        assert self.last_url is None or isinstance(self.last_url,
+                                                   six.text_type), \
+            ('"last_url" result from fetch_url() must be None or Unicode '
+             'string, not %r'
+             % type(self.last_url))
+
         assert self.total_count is None or isinstance(self.total_count, int), \
             ('"total_count" result from fetch_url() must be None or int, not '
              '%r'
@@ -386,7 +641,136 @@ class APIPaginator(BasePaginator):
              'not %r'
              % type(self.page_headers))
 
-        return self.page_data
+    def _schedule_prefetch(self):
+        """Begin fetching upcoming pages, if prefetching is enabled."""
+        num_pages = self.prefetch_pages
+
+        if self._prefetch_max_pages is not None:
+            num_pages = min(num_pages, self._prefetch_max_pages)
+
+        max_prefetch_pages = self.get_max_prefetch_pages()
+
+        if max_prefetch_pages is not None:
+            num_pages = min(num_pages, max_prefetch_pages)
+
+        if not self.has_next:
+            # There's nothing left to fetch, so free up the threads.
+            self._close_prefetch_pool()
+
+            return
+
+        if num_pages <= 0:
+            return
+
+        urls = self.get_prefetch_urls(num_pages)
+
+        if not urls:
+            return
+
+        if self._prefetch_pool is None:
+            self._prefetch_pool = ThreadPool(processes=self.prefetch_pages)
+
+        for url in urls:
+            key = self._get_page_url_key(url)
+
+            if key not in self._prefetched:
+                logger.debug('Prefetching API page %s', url)
+                self._prefetched[key] = self._prefetch_pool.apply_async(
+                    self._prefetch_url, (url,))
+
+    def _close_prefetch_pool(self):
+        """Close the pool of threads used to prefetch pages.
+
+        The threads will exit once any requests in progress have finished.
+        """
+        pool = getattr(self, '_prefetch_pool', None)
+
+        if pool is not None:
+            pool.close()
+            self._prefetch_pool = None
+
+    def _prefetch_url(self, url):
+        """Fetch a URL from a background thread.
+
+        Hosting service code may access the database while fetching a page
+        (for instance, to load or update the hosting service account). Each
+        thread gets its own database connections, which Django won't close
+        for us, so they're closed once the page is fetched.
+
+        Args:
+            url (unicode):
+                The URL to fetch.
+
+        Returns:
+            dict:
+            The pagination information returned by :py:meth:`fetch_url`.
+        """
+        try:
+            return self.fetch_url(url)
+        finally:
+            connections.close_all()
+
+    def _get_page_number(self, url):
+        """Return the page number in a URL.
+
+        Args:
+            url (unicode):
+                The URL containing the :py:attr:`start_query_param`.
+
+        Returns:
+            int:
+            The page number, or ``None`` if not found in the URL.
+        """
+        values = parse_qs(urlsplit(url).query).get(self.start_query_param)
+
+        try:
+            return int(values[0])
+        except (TypeError, ValueError):
+            return None
+
+    def _get_page_url(self, url, page):
+        """Return a URL for a different page.
+
+        Args:
+            url (unicode):
+                The URL of a page of results.
+
+            page (int):
+                The page number for the new URL.
+
+        Returns:
+            unicode:
+            The URL for the page.
+        """
+        parts = urlsplit(url)
+        query = [
+            (key, value)
+            for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if key != self.start_query_param
+        ]
+        query.append((self.start_query_param, page))
+
+        return urlunsplit((parts.scheme, parts.netloc, parts.path,
+                           urlencode(query), parts.fragment))
+
+    def _get_page_url_key(self, url):
+        """Return a key used to match prefetched pages to URLs.
+
+        This ignores the order of query arguments.
+
+        Args:
+            url (unicode):
+                The URL.
+
+        Returns:
+            tuple:
+            The key for the URL.
+        """
+        parts = urlsplit(url)
+
+        return (parts.scheme, parts.netloc, parts.path,
+                tuple(sorted(parse_qsl(parts.query,
+                                       keep_blank_values=True))))
 
 
 class ProxyPaginator(BasePaginator):
@@ -476,6 +860,35 @@ class ProxyPaginator(BasePaginator):
         """
         return self._process_page(self.paginator.next())
 
+    def start_prefetch(self, prefetch_pages, max_pages=None):
+        """Begin fetching upcoming pages in parallel.
+
+        This forwards to the paginator being proxied.
+
+        Args:
+            prefetch_pages (int):
+                The number of upcoming pages to fetch in parallel.
+
+            max_pages (int, optional):
+                The maximum number of pages after the current page that may
+                be fetched.
+        """
+        self.paginator.start_prefetch(prefetch_pages, max_pages=max_pages)
+
+    def stop_prefetch(self):
+        """Stop fetching upcoming pages in parallel.
+
+        This forwards to the paginator being proxied.
+        """
+        self.paginator.stop_prefetch()
+
+    def close(self):
+        """Release any resources held by the paginator.
+
+        This forwards to the paginator being proxied.
+        """
+        self.paginator.close()
+
     def normalize_page_data(self, data):
         """Normalize a page of data.
 
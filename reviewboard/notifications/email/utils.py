@@ -3,8 +3,11 @@
 from __future__ import unicode_literals
 
 import logging
+import threading
+from contextlib import contextmanager
 
 from django.contrib.auth.models import User
+from django.core.mail import get_connection
 from django.db.models import Q
 from djblets.mail.utils import (build_email_address,
                                 build_email_address_for_user)
@@ -292,6 +295,9 @@ def send_email(email_builder, **kwargs):
         return None, False
 
     try:
+        if message.connection is None:
+            message.connection = _get_batched_email_connection()
+
         message.send()
     except Exception:
         logging.exception(
@@ -304,3 +310,64 @@ def send_email(email_builder, **kwargs):
         return message, False
 
     return message, True
+
+
+@contextmanager
+def batched_email_connection():
+    """Share a single mail server connection for e-mails sent in a block.
+
+    By default, each e-mail opens and closes its own connection to the mail
+    server. Within this context, all e-mails sent through
+    :py:func:`send_email` on the current thread will use one connection,
+    which is opened when the first e-mail is sent and closed when the
+    context exits. This is useful when performing operations in bulk.
+
+    Contexts may be nested, in which case the outermost context owns the
+    connection.
+    """
+    if getattr(_email_batch_state, 'active', False):
+        yield
+        return
+
+    _email_batch_state.active = True
+    _email_batch_state.connection = None
+
+    try:
+        yield
+    finally:
+        connection = _email_batch_state.connection
+
+        _email_batch_state.active = False
+        _email_batch_state.connection = None
+
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception as e:
+                logging.warning('Error closing batched e-mail connection: '
+                                '%s',
+                                e)
+
+
+def _get_batched_email_connection():
+    """Return the mail server connection for the current batch, if any.
+
+    Returns:
+        django.core.mail.backends.base.BaseEmailBackend:
+        The open connection, or ``None`` if e-mails aren't being batched on
+        this thread.
+    """
+    if not getattr(_email_batch_state, 'active', False):
+        return None
+
+    connection = _email_batch_state.connection
+
+    if connection is None:
+        connection = get_connection()
+        connection.open()
+        _email_batch_state.connection = connection
+
+    return connection
+
+
+_email_batch_state = threading.local()
@@ -0,0 +1,18 @@
+from __future__ import unicode_literals
+
+from django.dispatch import receiver
+
+from reviewboard.signals import initializing
+
+
+@receiver(initializing)
+def _on_initializing(**kwargs):
+    """Connect signal handlers when initializing Review Board.
+
+    Args:
+        **kwargs (dict):
+            Keyword arguments from the signal.
+    """
+    from reviewboard.reviews import last_update
+
+    last_update.connect_signals()
@@ -0,0 +1,16 @@
+from __future__ import unicode_literals
+
+from django_evolution.mutations import AddField
+from django.db import models
+
+
+MUTATIONS = [
+    AddField('ReviewRequest', 'last_activity_timestamp', models.DateTimeField,
+             null=True),
+    AddField('ReviewRequest', 'last_activity_type', models.CharField,
+             max_length=16, null=True),
+    AddField('ReviewRequest', 'last_activity_object_id',
+             models.PositiveIntegerField, null=True),
+    AddField('ReviewRequest', 'last_activity_user', models.ForeignKey,
+             null=True, related_model='auth.User'),
+]
@@ -0,0 +1,310 @@
+"""Cached information on the last update made to review requests.
+
+Open review request pages check for updates by requesting the review
+request's ``last_update`` API resource, which adds up to constant load when
+many pages are open.
+
+Instead, the last update information is built from the review request's
+denormalized ``last_activity_*`` fields and stored in the cache, keyed by
+review request. The record is updated when review requests, reviews, and
+replies are published, closed, or reopened, and is validated against the
+review request's ``last_updated`` timestamp when read. The record stores
+the ID of the user who made the update, which is resolved to a user when
+the record is returned.
+
+Clients can also wait for the record to change (see
+:py:func:`wait_for_last_update`), which only reads from the cache while
+waiting. This is only allowed if the ``webapi_last_update_wait_enabled``
+setting is enabled, since each waiting client occupies a server thread or
+process.
+"""
+
+from __future__ import unicode_literals
+
+import time
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils.translation import ugettext_noop
+from djblets.cache.backend import make_cache_key
+from djblets.util.http import encode_etag
+
+from reviewboard.reviews.signals import (reply_published,
+                                         review_published,
+                                         review_request_closed,
+                                         review_request_published,
+                                         review_request_reopened)
+
+
+#: How long last update information is kept in the cache, in seconds.
+LAST_UPDATE_CACHE_EXPIRATION = 7 * 24 * 60 * 60
+
+#: How often the cache is checked while waiting for an update, in seconds.
+LAST_UPDATE_POLL_INTERVAL_SECS = 1
+
+
+def get_last_update_info(review_request):
+    """Return information on the last update made to a review request.
+
+    If there's an up-to-date record in the cache, it will be returned.
+    Otherwise, it will be computed and stored.
+
+    Args:
+        review_request (reviewboard.reviews.models.ReviewRequest):
+            The review request.
+
+    Returns:
+        dict:
+        A dictionary with the following keys:
+
+        ``etag`` (:py:class:`unicode`):
+            An ETag representing the update.
+
+        ``summary`` (:py:class:`unicode`):
+            An untranslated summary of the update.
+
+        ``timestamp`` (:py:class:`datetime.datetime`):
+            The timestamp of the update.
+
+        ``type`` (:py:class:`unicode`):
+            The type of update. This is one of ``review-request``, ``diff``,
+            ``reply``, or ``review``.
+
+        ``user`` (:py:class:`django.contrib.auth.models.User`):
+            The user who made the update.
+
+        ``version`` (:py:class:`unicode`):
+            The review request's ``last_updated`` timestamp when the
+            information was computed.
+    """
+    info = cache.get(_make_cache_key(review_request.pk))
+
+    if info is None or info['version'] != _get_version(review_request):
+        return update_last_update_info(review_request)
+
+    return _resolve_user(info, review_request)
+
+
+def get_cached_last_update_info(review_request_id):
+    """Return the cached last update information for a review request.
+
+    This does not validate the record against the database.
+
+    Args:
+        review_request_id (int):
+            The ID of the review request.
+
+    Returns:
+        dict:
+        The last update information (see :py:func:`get_last_update_info`),
+        or ``None`` if it's not in the cache.
+    """
+    info = cache.get(_make_cache_key(review_request_id))
+
+    if info is not None:
+        info = _resolve_user(info)
+
+    return info
+
+
+def update_last_update_info(review_request):
+    """Compute and cache the last update information for a review request.
+
+    Args:
+        review_request (reviewboard.reviews.models.ReviewRequest):
+            The review request.
+
+    Returns:
+        dict:
+        The last update information (see :py:func:`get_last_update_info`).
+    """
+    from reviewboard.reviews.models import ReviewRequest
+
+    activity = review_request.get_last_activity()
+    timestamp = activity['timestamp']
+    update_type = activity['type']
+
+    if update_type == ReviewRequest.LAST_ACTIVITY_REVIEW_REQUEST:
+        if review_request.status == ReviewRequest.SUBMITTED:
+            summary = ugettext_noop('Review request submitted')
+        elif review_request.status == ReviewRequest.DISCARDED:
+            summary = ugettext_noop('Review request discarded')
+        else:
+            summary = ugettext_noop('Review request updated')
+    elif update_type == ReviewRequest.LAST_ACTIVITY_DIFF:
+        summary = ugettext_noop('Diff updated')
+    elif update_type == ReviewRequest.LAST_ACTIVITY_REPLY:
+        summary = ugettext_noop('New reply')
+    else:
+        summary = ugettext_noop('New review')
+
+    # If the user isn't known, this review request hasn't been changed since
+    # it was first published, so this change must be due to the original
+    # submitter.
+    user_id = review_request.last_activity_user_id or \
+        review_request.submitter_id
+
+    info = {
+        'etag': encode_etag('%s:%s' % (timestamp, activity['object_id'])),
+        'summary': summary,
+        'timestamp': timestamp,
+        'type': update_type,
+        'user_id': user_id,
+        'version': _get_version(review_request),
+    }
+
+    cache.set(_make_cache_key(review_request.pk), info,
+              LAST_UPDATE_CACHE_EXPIRATION)
+
+    return _resolve_user(info, review_request)
+
+
+def wait_for_last_update(review_request, etag, timeout):
+    """Wait for a review request's last update to change.
+
+    This will return as soon as the last update no longer matches the
+    provided ETag, or once the timeout has passed. While waiting, only the
+    cache is checked.
+
+    Args:
+        review_request (reviewboard.reviews.models.ReviewRequest):
+            The review request.
+
+        etag (unicode):
+            The ETag of the last update the client knows about.
+
+        timeout (float):
+            The maximum number of seconds to wait.
+
+    Returns:
+        dict:
+        The last update information (see :py:func:`get_last_update_info`).
+    """
+    info = get_last_update_info(review_request)
+    deadline = time.time() + timeout
+    cache_key = _make_cache_key(review_request.pk)
+
+    while info['etag'] == etag and time.time() < deadline:
+        time.sleep(min(LAST_UPDATE_POLL_INTERVAL_SECS,
+                       max(deadline - time.time(), 0)))
+
+        new_info = cache.get(cache_key)
+
+        if new_info is not None and new_info['etag'] != info['etag']:
+            info = _resolve_user(new_info, review_request)
+
+    return info
+
+
+def _resolve_user(info, review_request=None):
+    """Return last update information with the user resolved.
+
+    Only the user's ID is stored in the cache. The user is taken from the
+    review request when possible, to avoid a query.
+
+    Args:
+        info (dict):
+            The last update information, as stored in the cache.
+
+        review_request (reviewboard.reviews.models.ReviewRequest, optional):
+            The review request the information is for.
+
+    Returns:
+        dict:
+        A copy of the information, with a ``user`` key.
+    """
+    user_id = info['user_id']
+    user = None
+
+    if review_request is not None:
+        if user_id == review_request.last_activity_user_id:
+            user = review_request.last_activity_user
+        elif user_id == review_request.submitter_id:
+            user = review_request.submitter
+
+    if user is None:
+        try:
+            user = User.objects.get(pk=user_id)
+        except User.DoesNotExist:
+            pass
+
+    info = info.copy()
+    info['user'] = user
+
+    return info
+
+
+def _get_version(review_request):
+    """Return the version used to validate cached information.
+
+    Args:
+        review_request (reviewboard.reviews.models.ReviewRequest):
+            The review request.
+
+    Returns:
+        unicode:
+        The version.
+    """
+    return '%s' % review_request.last_updated
+
+
+def _make_cache_key(review_request_id):
+    """Return the cache key for a review request's last update.
+
+    Args:
+        review_request_id (int):
+            The ID of the review request.
+
+    Returns:
+        unicode:
+        The cache key.
+    """
+    return make_cache_key('review-request-last-update-%s' % review_request_id)
+
+
+def _on_review_request_changed(review_request, **kwargs):
+    """Update the last update information when a review request changes.
+
+    Args:
+        review_request (reviewboard.reviews.models.ReviewRequest):
+            The review request that was published, closed, or reopened.
+
+        **kwargs (dict):
+            Additional keyword arguments from the signal.
+    """
+    update_last_update_info(review_request)
+
+
+def _on_review_published(review=None, reply=None, **kwargs):
+    """Update the last update information when a review is published.
+
+    Args:
+        review (reviewboard.reviews.models.Review, optional):
+            The review that was published.
+
+        reply (reviewboard.reviews.models.Review, optional):
+            The reply that was published.
+
+        **kwargs (dict):
+            Additional keyword arguments from the signal.
+    """
+    update_last_update_info((review or reply).review_request)
+
+
+def connect_signals():
+    """Begin updating last update information as review requests change."""
+    review_request_published.connect(
+        _on_review_request_changed,
+        dispatch_uid='last-update-review-request-published')
+    review_request_closed.connect(
+        _on_review_request_changed,
+        dispatch_uid='last-update-review-request-closed')
+    review_request_reopened.connect(
+        _on_review_request_changed,
+        dispatch_uid='last-update-review-request-reopened')
+    review_published.connect(
+        _on_review_published,
+        dispatch_uid='last-update-review-published')
+    reply_published.connect(
+        _on_review_published,
+        dispatch_uid='last-update-reply-published')
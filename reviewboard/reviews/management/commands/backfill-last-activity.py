@@ -0,0 +1,85 @@
+"""Management command to backfill review request last activity."""
+
+from __future__ import unicode_literals
+
+from django.core.management.base import CommandError
+from django.utils.translation import ugettext as _
+from djblets.util.compat.django.core.management.base import BaseCommand
+
+from reviewboard.reviews.models import ReviewRequest
+
+
+class Command(BaseCommand):
+    """Management command to backfill review request last activity.
+
+    Review requests created before the ``last_activity_*`` fields were
+    added compute them on first access. This computes them ahead of time,
+    in batches, so that datagrids and review request pages don't have to.
+    """
+
+    help = _('Computes the last activity information for review requests '
+             'that are missing it.')
+
+    def add_arguments(self, parser):
+        """Add arguments to the command.
+
+        Args:
+            parser (argparse.ArgumentParser):
+                The argument parser for the command.
+        """
+        parser.add_argument(
+            '--batch-size',
+            action='store',
+            dest='batch_size',
+            type=int,
+            default=500,
+            help=_('The number of review requests to load at a time.'))
+
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            default=False,
+            dest='all',
+            help=_('Recompute the last activity for all review requests, '
+                   'not just those missing it.'))
+
+    def handle(self, **options):
+        """Handle the command.
+
+        Args:
+            **options (dict):
+                Options parsed on the command line.
+
+        Raises:
+            django.core.management.CommandError:
+                The provided options were invalid.
+        """
+        batch_size = options['batch_size']
+
+        if batch_size < 1:
+            raise CommandError(_('--batch-size must be a positive number.'))
+
+        queryset = ReviewRequest.objects.order_by('pk')
+
+        if not options['all']:
+            queryset = queryset.filter(last_activity_timestamp__isnull=True)
+
+        last_pk = 0
+        num_updated = 0
+
+        while True:
+            review_requests = list(queryset.filter(pk__gt=last_pk)
+                                   [:batch_size])
+
+            if not review_requests:
+                break
+
+            for review_request in review_requests:
+                review_request.update_last_activity()
+
+            last_pk = review_requests[-1].pk
+            num_updated += len(review_requests)
+
+        self.stdout.write(_('Updated the last activity for %d review '
+                            'request(s).')
+                          % num_updated)
@@ -1,24 +1,96 @@
-"""Management command to reset review request counters on accounts."""
+"""Management command to recompute review request counters on accounts."""
 
 from __future__ import unicode_literals
 
+from django.core.management.base import CommandError
 from django.utils.translation import ugettext as _
 from djblets.util.compat.django.core.management.base import BaseCommand
 
-from reviewboard.accounts.admin import fix_review_counts
+from reviewboard.accounts.counts import (DEFAULT_BATCH_SIZE,
+                                         check_counts,
+                                         recount_groups,
+                                         recount_site_profiles)
 
 
 class Command(BaseCommand):
-    """Management command to reset review request counters on accounts."""
+    """Management command to recompute review request counters on accounts.
 
-    help = _('Resets all review request-related counters on accounts.')
+    Counters are computed in batches using grouped queries and stored
+    immediately, rather than being cleared and left for each user to
+    recompute on their next page load.
+    """
+
+    help = _('Recomputes all review request-related counters on accounts '
+             'and review groups.')
+
+    def add_arguments(self, parser):
+        """Add arguments to the command.
+
+        Args:
+            parser (argparse.ArgumentParser):
+                The argument parser for the command.
+        """
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            dest='check',
+            default=False,
+            help=_("Report counters that don't match their computed values, "
+                   "without changing anything."))
+        parser.add_argument(
+            '--batch-size',
+            action='store',
+            dest='batch_size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=_('The number of accounts or review groups to compute '
+                   'counters for at once.'))
 
     def handle(self, **options):
         """Handle the command.
 
         Args:
-            **options (dict, unused):
-                Options parsed on the command line. For this command, no
-                options are available.
+            **options (dict):
+                Options parsed on the command line.
+
+        Raises:
+            django.core.management.CommandError:
+                The provided options were invalid, or ``--check`` found
+                mismatched counters.
         """
-        fix_review_counts()
+        batch_size = options['batch_size']
+
+        if batch_size < 1:
+            raise CommandError(_('--batch-size must be a positive number.'))
+
+        if options['check']:
+            mismatches = check_counts(batch_size=batch_size)
+
+            for mismatch in mismatches:
+                self.stdout.write(
+                    _('%(model)s %(pk)s: %(field)s is %(stored)s, expected '
+                      '%(expected)s')
+                    % {
+                        'model': mismatch.model.__name__,
+                        'pk': mismatch.pk,
+                        'field': mismatch.field_name,
+                        'stored': mismatch.stored,
+                        'expected': mismatch.expected,
+                    })
+
+            if mismatches:
+                raise CommandError(_('%d counter(s) are inconsistent.')
+                                   % len(mismatches))
+
+            self.stdout.write(_('All counters are consistent.'))
+        else:
+            num_profiles = recount_site_profiles(batch_size=batch_size)
+            num_groups = recount_groups(batch_size=batch_size)
+
+            self.stdout.write(
+                _('Recomputed counters for %(num_profiles)d account '
+                  'profile(s) and %(num_groups)d review group(s).')
+                % {
+                    'num_profiles': num_profiles,
+                    'num_groups': num_groups,
+                })
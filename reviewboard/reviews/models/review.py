@@ -368,12 +368,23 @@ class Review(models.Model):
         self.file_attachment_comments.update(timestamp=self.timestamp)
         self.general_comments.update(timestamp=self.timestamp)
 
-        # Update the last_updated timestamp and the last review activity
-        # timestamp on the review request.
+        # Update the last_updated timestamp, the last review activity
+        # timestamp, and the last activity information on the review request.
+        if self.is_reply():
+            activity_type = self.review_request.LAST_ACTIVITY_REPLY
+        else:
+            activity_type = self.review_request.LAST_ACTIVITY_REVIEW
+
         self.review_request.last_review_activity_timestamp = self.timestamp
         self.review_request.last_updated = self.timestamp
+        self.review_request.set_last_activity(timestamp=self.timestamp,
+                                              activity_type=activity_type,
+                                              object_id=self.pk,
+                                              user=self.user)
         self.review_request.save(update_fields=(
-            'last_review_activity_timestamp', 'last_updated'))
+            'last_review_activity_timestamp', 'last_updated',
+            'last_activity_timestamp', 'last_activity_type',
+            'last_activity_object_id', 'last_activity_user'))
 
         if self.is_reply():
             reply_published.send(sender=self.__class__,
@@ -160,6 +160,18 @@ class ReviewRequest(BaseReviewRequestDetails):
         (DISCARDED, _('Discarded')),
     )
 
+    LAST_ACTIVITY_REVIEW_REQUEST = 'review-request'
+    LAST_ACTIVITY_DIFF = 'diff'
+    LAST_ACTIVITY_REVIEW = 'review'
+    LAST_ACTIVITY_REPLY = 'reply'
+
+    LAST_ACTIVITY_TYPES = (
+        (LAST_ACTIVITY_REVIEW_REQUEST, _('Review request updated')),
+        (LAST_ACTIVITY_DIFF, _('Diff updated')),
+        (LAST_ACTIVITY_REVIEW, _('New review')),
+        (LAST_ACTIVITY_REPLY, _('New reply')),
+    )
+
     ISSUE_COUNTER_FIELDS = {
         BaseComment.OPEN: 'issue_open_count',
         BaseComment.RESOLVED: 'issue_resolved_count',
@@ -259,6 +271,32 @@ class ReviewRequest(BaseReviewRequestDetails):
         blank=True)
     shipit_count = CounterField(_("ship-it count"), default=0)
 
+    # The last public activity on the review request. These are maintained
+    # when publishing, closing, and reopening the review request, and when
+    # publishing reviews and replies. See get_last_activity().
+    last_activity_timestamp = models.DateTimeField(
+        _('last activity timestamp'),
+        null=True,
+        default=None,
+        blank=True)
+    last_activity_type = models.CharField(
+        _('last activity type'),
+        max_length=16,
+        choices=LAST_ACTIVITY_TYPES,
+        null=True,
+        blank=True)
+    last_activity_object_id = models.PositiveIntegerField(
+        _('last activity object ID'),
+        null=True,
+        blank=True)
+    last_activity_user = models.ForeignKey(
+        User,
+        verbose_name=_('last activity user'),
+        related_name='+',
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL)
+
     issue_open_count = CounterField(
         _('open issue count'),
         initializer=_initialize_issue_counts)
@@ -743,6 +781,119 @@ class ReviewRequest(BaseReviewRequestDetails):
             'updated_object': updated_object,
         }
 
+    def get_last_activity(self):
+        """Return the last public activity on the review request.
+
+        This reads the denormalized ``last_activity_*`` fields. If they
+        haven't been populated yet (for review requests that predate them
+        and haven't been backfilled), they will be computed using
+        :py:meth:`get_last_activity_info` and stored.
+
+        Returns:
+            dict:
+            A dictionary with the following keys:
+
+            ``timestamp`` (:py:class:`datetime.datetime`):
+                The time of the activity.
+
+            ``type`` (:py:class:`unicode`):
+                The type of activity. This is one of
+                :py:attr:`LAST_ACTIVITY_REVIEW_REQUEST`,
+                :py:attr:`LAST_ACTIVITY_DIFF`,
+                :py:attr:`LAST_ACTIVITY_REVIEW`, or
+                :py:attr:`LAST_ACTIVITY_REPLY`.
+
+            ``object_id`` (:py:class:`int`):
+                The ID of the review request, diffset, or review that was
+                updated.
+
+            ``user_id`` (:py:class:`int`):
+                The ID of the user responsible for the activity.
+        """
+        if self.last_activity_timestamp is None:
+            self.update_last_activity()
+
+        if self.last_updated > self.last_activity_timestamp:
+            # The review request was saved without going through publish(),
+            # close(), or reopen(). Report it as an update to the review
+            # request itself, as get_last_activity_info() would.
+            return {
+                'timestamp': self.last_updated,
+                'type': self.LAST_ACTIVITY_REVIEW_REQUEST,
+                'object_id': self.pk,
+                'user_id': self.last_activity_user_id,
+            }
+
+        return {
+            'timestamp': self.last_activity_timestamp,
+            'type': self.last_activity_type,
+            'object_id': self.last_activity_object_id,
+            'user_id': self.last_activity_user_id,
+        }
+
+    def update_last_activity(self):
+        """Recompute and store the last public activity on the review request.
+
+        This computes the activity using :py:meth:`get_last_activity_info`
+        and stores it in the ``last_activity_*`` fields, without otherwise
+        modifying the review request.
+        """
+        info = self.get_last_activity_info()
+        updated_object = info['updated_object']
+        changedesc = info['changedesc']
+        user = None
+
+        if isinstance(updated_object, DiffSet):
+            activity_type = self.LAST_ACTIVITY_DIFF
+        elif isinstance(updated_object, ReviewRequest):
+            activity_type = self.LAST_ACTIVITY_REVIEW_REQUEST
+        elif updated_object.is_reply():
+            activity_type = self.LAST_ACTIVITY_REPLY
+            user = updated_object.user
+        else:
+            activity_type = self.LAST_ACTIVITY_REVIEW
+            user = updated_object.user
+
+        if changedesc:
+            user = changedesc.get_user(self)
+        elif user is None:
+            user = self.submitter
+
+        self.set_last_activity(timestamp=info['timestamp'],
+                               activity_type=activity_type,
+                               object_id=updated_object.pk,
+                               user=user)
+
+        ReviewRequest.objects.filter(pk=self.pk).update(
+            last_activity_timestamp=self.last_activity_timestamp,
+            last_activity_type=self.last_activity_type,
+            last_activity_object_id=self.last_activity_object_id,
+            last_activity_user=self.last_activity_user_id)
+
+    def set_last_activity(self, timestamp, activity_type, object_id, user):
+        """Set the last public activity on the review request.
+
+        This only sets the fields. The caller is responsible for saving.
+
+        Args:
+            timestamp (datetime.datetime):
+                The time of the activity.
+
+            activity_type (unicode):
+                The type of activity.
+
+            object_id (int):
+                The ID of the review request, diffset, or review that was
+                updated.
+
+            user (django.contrib.auth.models.User):
+                The user responsible for the activity.
+        """
+        self.last_activity_timestamp = timestamp
+        self.last_activity_type = activity_type
+        self.last_activity_object_id = object_id
+        self.last_activity_user = user
+
     def changeset_is_pending(self, commit_id):
         """Returns whether the associated changeset is pending commit.
 
@@ -1029,6 +1180,12 @@ class ReviewRequest(BaseReviewRequestDetails):
                 self.commit_id = None
 
             self.status = close_type
+            self.last_updated = changedesc.timestamp
+            self.set_last_activity(
+                timestamp=changedesc.timestamp,
+                activity_type=self.LAST_ACTIVITY_REVIEW_REQUEST,
+                object_id=self.pk,
+                user=changedesc.get_user(self))
             self.save(update_counts=True)
 
             review_request_closed.send(
@@ -1047,6 +1204,12 @@ class ReviewRequest(BaseReviewRequestDetails):
             changedesc.save()
 
             # Needed to renew last-update.
+            self.last_updated = changedesc.timestamp
+            self.set_last_activity(
+                timestamp=changedesc.timestamp,
+                activity_type=self.LAST_ACTIVITY_REVIEW_REQUEST,
+                object_id=self.pk,
+                user=changedesc.get_user(self))
             self.save()
 
         # Delete the associated draft review request.
@@ -1089,6 +1252,12 @@ class ReviewRequest(BaseReviewRequestDetails):
                 self.changedescs.add(changedesc)
 
             self.status = self.PENDING_REVIEW
+            self.last_updated = changedesc.timestamp
+            self.set_last_activity(
+                timestamp=changedesc.timestamp,
+                activity_type=self.LAST_ACTIVITY_REVIEW_REQUEST,
+                object_id=self.pk,
+                user=changedesc.get_user(self))
             self.save(update_counts=True)
 
         review_request_reopened.send(sender=self.__class__, user=user,
@@ -1191,8 +1360,24 @@ class ReviewRequest(BaseReviewRequestDetails):
             # for the first time. Set the creation timestamp to now.
             self.time_added = timestamp
 
+        if draft is not None and draft.diffset_id is not None:
+            activity_type = self.LAST_ACTIVITY_DIFF
+            activity_object_id = draft.diffset_id
+        else:
+            activity_type = self.LAST_ACTIVITY_REVIEW_REQUEST
+            activity_object_id = self.pk
+
+        if changes is not None:
+            activity_user = changes.get_user(self)
+        else:
+            activity_user = self.submitter
+
         self.public = True
         self.last_updated = timestamp
+        self.set_last_activity(timestamp=timestamp,
+                               activity_type=activity_type,
+                               object_id=activity_object_id,
+                               user=activity_user)
         self.save(update_counts=True, old_submitter=old_submitter)
 
         review_request_published.send(sender=self.__class__, user=user,
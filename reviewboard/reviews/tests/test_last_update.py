@@ -0,0 +1,98 @@
+"""Unit tests for reviewboard.reviews.last_update."""
+
+from __future__ import unicode_literals
+
+import time
+
+from django.core.cache import cache
+
+from reviewboard.reviews.last_update import (_make_cache_key,
+                                             get_cached_last_update_info,
+                                             get_last_update_info,
+                                             wait_for_last_update)
+from reviewboard.testing import TestCase
+
+
+class LastUpdateTests(TestCase):
+    """Unit tests for reviewboard.reviews.last_update."""
+
+    fixtures = ['test_users']
+
+    def test_get_last_update_info(self):
+        """Testing get_last_update_info"""
+        review_request = self.create_review_request(publish=True)
+
+        info = get_last_update_info(review_request)
+        self.assertEqual(info['type'], 'review-request')
+        self.assertEqual(info['summary'], 'Review request updated')
+        self.assertEqual(info['user'], review_request.submitter)
+
+    def test_get_last_update_info_cached(self):
+        """Testing get_last_update_info uses the cache"""
+        review_request = self.create_review_request(publish=True)
+        info = get_last_update_info(review_request)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_last_update_info(review_request), info)
+
+    def test_get_last_update_info_caches_user_id(self):
+        """Testing get_last_update_info stores the user's ID in the cache"""
+        review_request = self.create_review_request(publish=True)
+        get_last_update_info(review_request)
+
+        cached = cache.get(_make_cache_key(review_request.pk))
+        self.assertNotIn('user', cached)
+        self.assertEqual(cached['user_id'], review_request.submitter_id)
+
+        info = get_cached_last_update_info(review_request.pk)
+        self.assertEqual(info['user'], review_request.submitter)
+
+    def test_review_published(self):
+        """Testing last update information is updated when a review is
+        published
+        """
+        review_request = self.create_review_request(publish=True)
+        get_last_update_info(review_request)
+
+        review = self.create_review(review_request, publish=False)
+        review.publish()
+
+        info = get_cached_last_update_info(review_request.pk)
+        self.assertEqual(info['type'], 'review')
+        self.assertEqual(info['timestamp'], review.timestamp)
+        self.assertEqual(info['user'], review.user)
+
+    def test_review_request_closed(self):
+        """Testing last update information is updated when a review request
+        is closed
+        """
+        review_request = self.create_review_request(publish=True)
+        get_last_update_info(review_request)
+
+        review_request.close(review_request.SUBMITTED)
+
+        info = get_cached_last_update_info(review_request.pk)
+        self.assertEqual(info['type'], 'review-request')
+        self.assertEqual(info['summary'], 'Review request submitted')
+
+    def test_wait_for_last_update_with_new_update(self):
+        """Testing wait_for_last_update with an update newer than the ETag"""
+        review_request = self.create_review_request(publish=True)
+
+        start = time.time()
+        info = wait_for_last_update(review_request, etag='old', timeout=30)
+
+        self.assertEqual(info['type'], 'review-request')
+        self.assertLess(time.time() - start, 1)
+
+    def test_wait_for_last_update_with_timeout(self):
+        """Testing wait_for_last_update with no new update before the timeout
+        """
+        review_request = self.create_review_request(publish=True)
+        etag = get_last_update_info(review_request)['etag']
+
+        start = time.time()
+        info = wait_for_last_update(review_request, etag=etag, timeout=0.1)
+
+        self.assertEqual(info['etag'], etag)
+        self.assertGreaterEqual(time.time() - start, 0.1)
@@ -0,0 +1,45 @@
+"""Unit tests for reviewboard.reviews.ui.line_index."""
+
+from __future__ import unicode_literals
+
+import io
+import tempfile
+
+from reviewboard.reviews.ui.line_index import build_line_offsets, read_lines
+from reviewboard.testing import TestCase
+
+
+class LineIndexTests(TestCase):
+    """Unit tests for reviewboard.reviews.ui.line_index."""
+
+    def test_build_line_offsets_with_mmap(self):
+        """Testing build_line_offsets with a file on disk"""
+        with tempfile.TemporaryFile() as fp:
+            fp.write(b'abc\n\nde\nf')
+            fp.flush()
+
+            self.assertEqual(list(build_line_offsets(fp)), [0, 4, 5, 8, 9])
+
+    def test_build_line_offsets_with_stream(self):
+        """Testing build_line_offsets with a file that can't be mapped"""
+        fp = io.BytesIO(b'abc\n\nde\nf\n')
+
+        self.assertEqual(list(build_line_offsets(fp)), [0, 4, 5, 8, 10])
+
+    def test_build_line_offsets_with_empty_file(self):
+        """Testing build_line_offsets with an empty file"""
+        with tempfile.TemporaryFile() as fp:
+            self.assertEqual(list(build_line_offsets(fp)), [0])
+
+        self.assertEqual(list(build_line_offsets(io.BytesIO())), [0])
+
+    def test_read_lines(self):
+        """Testing read_lines"""
+        fp = io.BytesIO(b'abc\n\nde\nf')
+        line_offsets = build_line_offsets(fp)
+
+        self.assertEqual(read_lines(fp, line_offsets, 1, 1), b'abc\n')
+        self.assertEqual(read_lines(fp, line_offsets, 2, 2), b'\nde\n')
+        self.assertEqual(read_lines(fp, line_offsets, 3, 10), b'de\nf')
+        self.assertEqual(read_lines(fp, line_offsets, 5, 1), b'')
+        self.assertEqual(read_lines(fp, line_offsets, 1, 0), b'')
@@ -2,6 +2,8 @@
 
 from __future__ import unicode_literals
 
+import json
+
 from reviewboard.site.urlresolvers import local_site_reverse
 from reviewboard.testing import TestCase
 
@@ -248,3 +250,89 @@ class ReviewFileAttachmentViewTests(TestCase):
                     'file_attachment_diff_id': attachment2.pk,
                 }))
         self.assertEqual(response.status_code, 404)
+
+
+class ReviewFileAttachmentLinesViewTests(TestCase):
+    """Unit tests for reviewboard.reviews.views.ReviewFileAttachmentLinesView.
+    """
+
+    fixtures = ['test_users']
+
+    def setUp(self):
+        super(ReviewFileAttachmentLinesViewTests, self).setUp()
+
+        self.review_request = self.create_review_request(publish=True)
+        self.attachment = self.create_file_attachment(
+            self.review_request,
+            orig_filename='lines.txt',
+            mimetype='text/plain',
+            file_content=b'line 1\nline 2\nline 3\n')
+
+    def test_get(self):
+        """Testing ReviewFileAttachmentLinesView GET"""
+        response = self.client.get(self._get_url(self.attachment),
+                                   {'first': 2, 'count': 5})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(
+            json.loads(response.content.decode('utf-8')),
+            {
+                'first_line': 2,
+                'num_lines': 3,
+                'lines': ['<pre>line 2</pre>', '<pre>line 3</pre>'],
+            })
+
+    def test_get_with_invalid_range(self):
+        """Testing ReviewFileAttachmentLinesView GET with invalid range"""
+        url = self._get_url(self.attachment)
+
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(
+            self.client.get(url, {'first': 0, 'count': 5}).status_code,
+            400)
+        self.assertEqual(
+            self.client.get(url, {'first': 'x', 'count': 5}).status_code,
+            400)
+
+    def test_get_with_non_text_attachment(self):
+        """Testing ReviewFileAttachmentLinesView GET with non-text attachment
+        """
+        attachment = self.create_file_attachment(self.review_request)
+
+        response = self.client.get(self._get_url(attachment),
+                                   {'first': 1, 'count': 5})
+        self.assertEqual(response.status_code, 404)
+
+    def test_get_with_invalid_id(self):
+        """Testing ReviewFileAttachmentLinesView GET with attachment for
+        another review request
+        """
+        review_request2 = self.create_review_request(publish=True)
+
+        response = self.client.get(
+            local_site_reverse(
+                'file-attachment-lines',
+                kwargs={
+                    'review_request_id': review_request2.pk,
+                    'file_attachment_id': self.attachment.pk,
+                }),
+            {'first': 1, 'count': 5})
+        self.assertEqual(response.status_code, 404)
+
+    def _get_url(self, attachment):
+        """Return the URL for the lines of an attachment.
+
+        Args:
+            attachment (reviewboard.attachments.models.FileAttachment):
+                The file attachment.
+
+        Returns:
+            unicode:
+            The URL.
+        """
+        return local_site_reverse(
+            'file-attachment-lines',
+            kwargs={
+                'review_request_id': self.review_request.pk,
+                'file_attachment_id': attachment.pk,
+            })
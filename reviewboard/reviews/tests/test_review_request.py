@@ -700,6 +700,129 @@ class GetLastActivityInfoTests(TestCase):
             })
 
 
+class GetLastActivityTests(TestCase):
+    """Unit tests for ReviewRequest.get_last_activity"""
+
+    fixtures = ['test_scmtools', 'test_users']
+
+    def setUp(self):
+        super(GetLastActivityTests, self).setUp()
+
+        self.review_request = self.create_review_request(
+            create_repository=True,
+            publish=True)
+
+    def test_get_last_activity(self):
+        """Testing ReviewRequest.get_last_activity after publishing"""
+        review_request = ReviewRequest.objects.get(pk=self.review_request.pk)
+
+        with self.assertNumQueries(0):
+            activity = review_request.get_last_activity()
+
+        self.assertEqual(
+            activity,
+            {
+                'timestamp': review_request.last_updated,
+                'type': ReviewRequest.LAST_ACTIVITY_REVIEW_REQUEST,
+                'object_id': review_request.pk,
+                'user_id': review_request.submitter_id,
+            })
+
+    def test_get_last_activity_diff_update(self):
+        """Testing ReviewRequest.get_last_activity after a diff update"""
+        diffset = self.create_diffset(review_request=self.review_request,
+                                      draft=True)
+        self.review_request.publish(user=self.review_request.submitter)
+        diffset = DiffSet.objects.get(pk=diffset.pk)
+
+        review_request = ReviewRequest.objects.get(pk=self.review_request.pk)
+
+        self.assertEqual(
+            review_request.get_last_activity(),
+            {
+                'timestamp': diffset.timestamp,
+                'type': ReviewRequest.LAST_ACTIVITY_DIFF,
+                'object_id': diffset.pk,
+                'user_id': review_request.submitter_id,
+            })
+
+    def test_get_last_activity_review_reply(self):
+        """Testing ReviewRequest.get_last_activity after a review and a
+        reply
+        """
+        doc = User.objects.get(username='doc')
+        review = self.create_review(review_request=self.review_request,
+                                    user=doc,
+                                    publish=True)
+
+        review_request = ReviewRequest.objects.get(pk=self.review_request.pk)
+
+        self.assertEqual(
+            review_request.get_last_activity(),
+            {
+                'timestamp': review.timestamp,
+                'type': ReviewRequest.LAST_ACTIVITY_REVIEW,
+                'object_id': review.pk,
+                'user_id': doc.pk,
+            })
+
+        reply = self.create_reply(review=review, publish=True)
+        review_request = ReviewRequest.objects.get(pk=self.review_request.pk)
+
+        self.assertEqual(
+            review_request.get_last_activity(),
+            {
+                'timestamp': reply.timestamp,
+                'type': ReviewRequest.LAST_ACTIVITY_REPLY,
+                'object_id': reply.pk,
+                'user_id': reply.user_id,
+            })
+
+    def test_get_last_activity_close(self):
+        """Testing ReviewRequest.get_last_activity after closing"""
+        self.review_request.close(ReviewRequest.SUBMITTED)
+        changedesc = self.review_request.changedescs.latest()
+
+        review_request = ReviewRequest.objects.get(pk=self.review_request.pk)
+
+        self.assertEqual(
+            review_request.get_last_activity(),
+            {
+                'timestamp': changedesc.timestamp,
+                'type': ReviewRequest.LAST_ACTIVITY_REVIEW_REQUEST,
+                'object_id': review_request.pk,
+                'user_id': review_request.submitter_id,
+            })
+
+    def test_get_last_activity_not_populated(self):
+        """Testing ReviewRequest.get_last_activity computes and stores
+        missing information
+        """
+        review = self.create_review(review_request=self.review_request,
+                                    publish=True)
+        ReviewRequest.objects.filter(pk=self.review_request.pk).update(
+            last_activity_timestamp=None,
+            last_activity_type=None,
+            last_activity_object_id=None,
+            last_activity_user=None)
+
+        review_request = ReviewRequest.objects.get(pk=self.review_request.pk)
+        activity = review_request.get_last_activity()
+
+        self.assertEqual(
+            activity,
+            {
+                'timestamp': review.timestamp,
+                'type': ReviewRequest.LAST_ACTIVITY_REVIEW,
+                'object_id': review.pk,
+                'user_id': review.user_id,
+            })
+
+        review_request = ReviewRequest.objects.get(pk=self.review_request.pk)
+        self.assertEqual(review_request.last_activity_timestamp,
+                         review.timestamp)
+
+
 class IssueCounterTests(TestCase):
     """Unit tests for review request issue counters."""
 
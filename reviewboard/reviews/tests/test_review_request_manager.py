@@ -1,8 +1,13 @@
 from __future__ import unicode_literals
 
+from datetime import timedelta
+
 from django.contrib.auth.models import User
+from django.utils import timezone
 from djblets.testing.decorators import add_fixtures
 
+from reviewboard.accounts.models import ReviewRequestVisit
+
 from reviewboard.diffviewer.models import DiffSetHistory
 from reviewboard.reviews.models import (DefaultReviewer, ReviewRequest,
                                         ReviewRequestDraft)
@@ -932,6 +937,73 @@ class ReviewRequestManagerTests(TestCase):
                 'Test 1',
             ])
 
+    def test_with_counts_with_new_review(self):
+        """Testing ReviewRequest.objects.with_counts with a review by another
+        user since the last visit
+        """
+        user = User.objects.get(username='doc')
+        review_request = self._create_visited_review_request(user)
+        self.create_review(review_request, user='dopey', publish=True)
+
+        review_request = \
+            ReviewRequest.objects.with_counts(user).get(pk=review_request.pk)
+
+        self.assertEqual(review_request.new_review_count, 1)
+
+    def test_with_counts_with_new_review_then_reply_by_user(self):
+        """Testing ReviewRequest.objects.with_counts with a review by another
+        user since the last visit, followed by a reply from the user
+        """
+        user = User.objects.get(username='doc')
+        review_request = self._create_visited_review_request(user)
+        review = self.create_review(
+            review_request,
+            user='dopey',
+            timestamp=timezone.now() - timedelta(minutes=30),
+            publish=True)
+        self.create_reply(review, user=user, publish=True)
+
+        review_request = \
+            ReviewRequest.objects.with_counts(user).get(pk=review_request.pk)
+
+        self.assertEqual(review_request.new_review_count, 1)
+        self.assertEqual(list(review_request.get_new_reviews(user)),
+                         [review])
+
+    def test_with_counts_with_review_by_user(self):
+        """Testing ReviewRequest.objects.with_counts with only a review by
+        the user since the last visit
+        """
+        user = User.objects.get(username='doc')
+        review_request = self._create_visited_review_request(user)
+        self.create_review(review_request, user=user, publish=True)
+
+        review_request = \
+            ReviewRequest.objects.with_counts(user).get(pk=review_request.pk)
+
+        self.assertEqual(review_request.new_review_count, 0)
+
+    def _create_visited_review_request(self, user):
+        """Create a review request that a user last visited an hour ago.
+
+        Args:
+            user (django.contrib.auth.models.User):
+                The user visiting the review request.
+
+        Returns:
+            reviewboard.reviews.models.review_request.ReviewRequest:
+            The new review request.
+        """
+        timestamp = timezone.now() - timedelta(hours=1)
+        review_request = self.create_review_request(publish=True)
+
+        visit = self.create_visit(review_request, ReviewRequestVisit.VISIBLE,
+                                  user=user)
+        ReviewRequestVisit.objects.filter(pk=visit.pk).update(
+            timestamp=timestamp)
+
+        return review_request
+
     def assertValidSummaries(self, review_requests, summaries):
         r_summaries = [r.summary for r in review_requests]
 
@@ -2,6 +2,7 @@
 from __future__ import unicode_literals
 
 from django.test.client import RequestFactory
+from pygments.lexers import TextLexer
 
 from reviewboard.reviews.ui.text import TextBasedReviewUI
 from reviewboard.testing import TestCase
@@ -57,8 +58,102 @@ class TextBasedReviewUITests(TestCase):
         self.assertNotIn('rendered_chunks', extra_context)
         self.assertEqual(extra_context['text_lines'],
                          ['<pre>And this is revision 2.</pre>'])
+        self.assertEqual(extra_context['num_text_lines'], 1)
         self.assertEqual(extra_context['rendered_lines'], [])
 
+    def test_get_extra_context_with_large_file(self):
+        """Testing TextBasedReviewUI.get_extra_context with a file larger
+        than a window of lines
+        """
+        review_ui = self._create_lines_review_ui(num_lines=10)
+
+        request = RequestFactory().get('/')
+        extra_context = review_ui.get_extra_context(request)
+
+        self.assertEqual(extra_context['num_text_lines'], 10)
+        self.assertEqual(extra_context['text_lines'],
+                         ['<pre>line 1</pre>',
+                          '<pre>line 2</pre>',
+                          '<pre>line 3</pre>'])
+
+    def test_get_js_model_data(self):
+        """Testing TextBasedReviewUI.get_js_model_data"""
+        review_ui = self._create_lines_review_ui(num_lines=10)
+        data = review_ui.get_js_model_data()
+
+        self.assertEqual(data['numLines'], 10)
+        self.assertEqual(data['linesWindowSize'], 3)
+        self.assertEqual(
+            data['linesURL'],
+            '/r/%s/file/%s/_lines/' % (self.review_request.display_id,
+                                       review_ui.obj.pk))
+
+    def test_get_text_lines_in_range(self):
+        """Testing TextBasedReviewUI.get_text_lines_in_range across windows"""
+        review_ui = self._create_lines_review_ui(num_lines=10)
+
+        self.assertEqual(
+            review_ui.get_text_lines_in_range(2, 5),
+            ['<pre>line %d</pre>' % i for i in range(2, 7)])
+        self.assertEqual(
+            review_ui.get_text_lines_in_range(9, 5),
+            ['<pre>line 9</pre>', '<pre>line 10</pre>'])
+        self.assertEqual(review_ui.get_text_lines_in_range(11, 5), [])
+
+    def test_get_text_lines_in_range_with_blank_lines(self):
+        """Testing TextBasedReviewUI.get_text_lines_in_range with blank lines
+        at window boundaries
+        """
+        review_ui = self._create_lines_review_ui(
+            content=b'a\n\n\n\nb\n\n')
+
+        self.assertEqual(review_ui.get_num_lines(), 6)
+        self.assertEqual(
+            review_ui.get_text_lines_in_range(1, 6),
+            ['<pre>a</pre>', '<pre></pre>', '<pre></pre>', '<pre></pre>',
+             '<pre>b</pre>', '<pre></pre>'])
+
+    def test_get_text_lines(self):
+        """Testing TextBasedReviewUI.get_text_lines"""
+        review_ui = self._create_lines_review_ui(num_lines=4)
+
+        self.assertEqual(review_ui.get_text_lines(),
+                         ['<pre>line %d</pre>' % i for i in range(1, 5)])
+
+    def test_get_text_lines_with_custom_highlighting(self):
+        """Testing TextBasedReviewUI.get_text_lines with a subclass that
+        overrides generate_highlighted_text
+        """
+        class CustomReviewUI(TextBasedReviewUI):
+            def generate_highlighted_text(self):
+                return ['<pre>custom %d</pre>' % i for i in range(1, 6)]
+
+        review_ui = self._create_lines_review_ui(num_lines=4,
+                                                 review_ui_cls=CustomReviewUI)
+
+        self.assertEqual(review_ui.get_num_lines(), 5)
+        self.assertEqual(review_ui.get_text_lines(),
+                         ['<pre>custom %d</pre>' % i for i in range(1, 6)])
+        self.assertEqual(review_ui.get_text_lines_in_range(4, 3),
+                         ['<pre>custom 4</pre>', '<pre>custom 5</pre>'])
+
+    def test_get_text_lines_with_custom_lexer(self):
+        """Testing TextBasedReviewUI.get_text_lines doesn't modify the lexer
+        from get_source_lexer
+        """
+        lexer = TextLexer()
+
+        class CustomReviewUI(TextBasedReviewUI):
+            def get_source_lexer(self, filename, data):
+                return lexer
+
+        review_ui = self._create_lines_review_ui(content=b'a\n\nb\n\n',
+                                                 review_ui_cls=CustomReviewUI)
+
+        self.assertEqual(review_ui.get_text_lines_in_range(2, 3),
+                         ['<pre></pre>', '<pre>b</pre>', '<pre></pre>'])
+        self.assertTrue(lexer.stripnl)
+
     def test_get_extra_context_with_diff(self):
         """Testing TextBasedReviewUI.get_extra_context with diff_against_obj"""
         new_attachment = self.create_file_attachment(
@@ -116,3 +211,41 @@ class TextBasedReviewUITests(TestCase):
         self.assertEqual(list(extra_context['rendered_chunks']), [])
         self.assertNotIn('text_lines', extra_context)
         self.assertNotIn('rendered_lines', extra_context)
+
+    def _create_lines_review_ui(self, num_lines=0, content=None,
+                                review_ui_cls=TextBasedReviewUI):
+        """Return a review UI for a file attachment with numbered lines.
+
+        The review UI will use windows of 3 lines.
+
+        Args:
+            num_lines (int, optional):
+                The number of lines to generate in the file.
+
+            content (bytes, optional):
+                Explicit content for the file, instead of generated lines.
+
+            review_ui_cls (type, optional):
+                The review UI class to instantiate.
+
+        Returns:
+            reviewboard.reviews.ui.text.TextBasedReviewUI:
+            The review UI.
+        """
+        if content is None:
+            content = ''.join(
+                'line %d\n' % i
+                for i in range(1, num_lines + 1)
+            ).encode('utf-8')
+
+        attachment = self.create_file_attachment(
+            self.review_request,
+            orig_filename='lines.txt',
+            mimetype='text/plain',
+            file_content=content)
+
+        review_ui = review_ui_cls(review_request=self.review_request,
+                                  obj=attachment)
+        review_ui.lines_window_size = 3
+
+        return review_ui
@@ -231,7 +231,7 @@ class ReviewUI(object):
             The context to use in the template.
         """
         last_activity_time = \
-            self.review_request.get_last_activity_info()['timestamp']
+            self.review_request.get_last_activity()['timestamp']
 
         draft = self.review_request.get_draft(request.user)
         review_request_details = draft or self.review_request
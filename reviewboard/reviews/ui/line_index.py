@@ -0,0 +1,160 @@
+"""Line offset indexes for stored text files.
+
+Large text file attachments can't be loaded into memory (or into a single
+cache entry) all at once. Instead, an index of the byte offset of the start
+of each line is built once, and ranges of lines are then read directly from
+the stored file as needed.
+"""
+
+from __future__ import unicode_literals
+
+import array
+import mmap
+import os
+
+
+#: The size of the blocks read when a file can't be memory-mapped.
+READ_BLOCK_SIZE = 64 * 1024
+
+
+# array.array requires a native string type code on Python 2.
+_ARRAY_TYPECODE = str('L')
+
+
+def build_line_offsets(fp):
+    """Return the byte offsets of the lines in a file.
+
+    If the file is on the local filesystem, it will be memory-mapped and
+    scanned for newlines, without reading it into memory. Otherwise (for
+    instance, for files in remote storage), it will be read in blocks.
+
+    Args:
+        fp (file):
+            The opened file.
+
+    Returns:
+        array.array:
+        The offset of the start of each line, followed by the size of the
+        file. The number of lines is one less than the length of the array.
+    """
+    try:
+        fileno = fp.fileno()
+        size = os.fstat(fileno).st_size
+    except (AttributeError, EnvironmentError, ValueError):
+        return _build_line_offsets_from_reads(fp)
+
+    if size == 0:
+        return array.array(_ARRAY_TYPECODE, [0])
+
+    try:
+        mapped = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+    except (EnvironmentError, ValueError):
+        return _build_line_offsets_from_reads(fp)
+
+    try:
+        return _build_line_offsets(mapped, size)
+    finally:
+        mapped.close()
+
+
+def read_lines(fp, line_offsets, first_line, num_lines):
+    """Read a range of lines from a file.
+
+    Args:
+        fp (file):
+            The opened file.
+
+        line_offsets (array.array):
+            The line offsets for the file, as returned by
+            :py:func:`build_line_offsets`.
+
+        first_line (int):
+            The 1-based number of the first line to read.
+
+        num_lines (int):
+            The maximum number of lines to read.
+
+    Returns:
+        bytes:
+        The contents of the lines, including their trailing newlines. This
+        will be empty if the range is outside of the file.
+    """
+    total_lines = len(line_offsets) - 1
+    first_line = max(first_line, 1)
+    last_line = min(first_line + num_lines - 1, total_lines)
+
+    if num_lines <= 0 or first_line > last_line:
+        return b''
+
+    start = line_offsets[first_line - 1]
+    end = line_offsets[last_line]
+
+    fp.seek(start)
+
+    return fp.read(end - start)
+
+
+def _build_line_offsets(data, size):
+    """Return the byte offsets of the lines in a buffer.
+
+    Args:
+        data (bytes or mmap.mmap):
+            The contents of the file.
+
+        size (int):
+            The size of the file.
+
+    Returns:
+        array.array:
+        The line offsets, as described in :py:func:`build_line_offsets`.
+    """
+    offsets = array.array(_ARRAY_TYPECODE, [0])
+    find = data.find
+    pos = find(b'\n')
+
+    while pos != -1 and pos + 1 < size:
+        offsets.append(pos + 1)
+        pos = find(b'\n', pos + 1)
+
+    if size > 0:
+        offsets.append(size)
+
+    return offsets
+
+
+def _build_line_offsets_from_reads(fp):
+    """Return the byte offsets of the lines in a file, reading in blocks.
+
+    Args:
+        fp (file):
+            The opened file.
+
+    Returns:
+        array.array:
+        The line offsets, as described in :py:func:`build_line_offsets`.
+    """
+    offsets = array.array(_ARRAY_TYPECODE, [0])
+    block_start = 0
+    line_start = 0
+
+    fp.seek(0)
+
+    while True:
+        block = fp.read(READ_BLOCK_SIZE)
+
+        if not block:
+            break
+
+        pos = block.find(b'\n')
+
+        while pos != -1:
+            line_start = block_start + pos + 1
+            offsets.append(line_start)
+            pos = block.find(b'\n', pos + 1)
+
+        block_start += len(block)
+
+    if block_start > line_start:
+        offsets.append(block_start)
+
+    return offsets
@@ -2,6 +2,7 @@ from __future__ import unicode_literals
 
 import logging
 
+from django.utils import six
 from django.utils.encoding import force_bytes
 from django.utils.safestring import mark_safe
 from djblets.cache.backend import cache_memoize
@@ -15,6 +16,8 @@ from reviewboard.diffviewer.chunk_generator import (NoWrapperHtmlFormatter,
                                                     RawDiffChunkGenerator)
 from reviewboard.diffviewer.diffutils import get_chunks_in_range
 from reviewboard.reviews.ui.base import FileAttachmentReviewUI
+from reviewboard.reviews.ui.line_index import build_line_offsets, read_lines
+from reviewboard.site.urlresolvers import local_site_reverse
 
 
 class TextBasedReviewUI(FileAttachmentReviewUI):
@@ -39,6 +42,12 @@ class TextBasedReviewUI(FileAttachmentReviewUI):
 
     extra_css_classes = []
 
+    #: The number of lines highlighted and cached together.
+    #:
+    #: Only the first window of lines is rendered into the page. The rest are
+    #: loaded by the browser a window at a time.
+    lines_window_size = 500
+
     js_model_class = 'RB.TextBasedReviewable'
     js_view_class = 'RB.TextBasedReviewableView'
 
@@ -51,6 +60,24 @@ class TextBasedReviewUI(FileAttachmentReviewUI):
         else:
             data['viewMode'] = 'source'
 
+        if not self.diff_against_obj:
+            local_site_name = None
+
+            if self.review_request.local_site:
+                local_site_name = self.review_request.local_site.name
+
+            data.update({
+                'numLines': self.get_num_lines(),
+                'linesURL': local_site_reverse(
+                    'file-attachment-lines',
+                    local_site_name=local_site_name,
+                    kwargs={
+                        'review_request_id': self.review_request.display_id,
+                        'file_attachment_id': self.obj.pk,
+                    }),
+                'linesWindowSize': self.lines_window_size,
+            })
+
         return data
 
     def get_extra_context(self, request):
@@ -77,7 +104,8 @@ class TextBasedReviewUI(FileAttachmentReviewUI):
         else:
             file_line_list = [
                 mark_safe(line)
-                for line in self.get_text_lines()
+                for line in self.get_text_lines_in_range(
+                    1, self.lines_window_size)
             ]
 
             rendered_line_list = [
@@ -87,6 +115,7 @@ class TextBasedReviewUI(FileAttachmentReviewUI):
 
             context.update({
                 'text_lines': file_line_list,
+                'num_text_lines': self.get_num_lines(),
                 'rendered_lines': rendered_line_list,
             })
 
@@ -118,11 +147,83 @@ class TextBasedReviewUI(FileAttachmentReviewUI):
         """Return the file contents as syntax-highlighted lines.
 
         This will fetch the file, render it however appropriate for the review
-        UI, and split it into reviewable lines. It will then cache it for
-        future renders.
+        UI, and split it into reviewable lines. The lines are highlighted and
+        cached in windows of :py:attr:`lines_window_size` lines.
+
+        For large files, :py:meth:`get_text_lines_in_range` should be used
+        instead, to avoid loading the entire file.
+
+        If a subclass overrides :py:meth:`generate_highlighted_text`, the
+        whole file is highlighted and cached at once using that method
+        instead.
         """
-        return cache_memoize('text-attachment-%d-lines' % self.obj.pk,
-                             lambda: list(self.generate_highlighted_text()))
+        return self.get_text_lines_in_range(1, self.get_num_lines())
+
+    def get_num_lines(self):
+        """Return the number of lines in the file.
+
+        Returns:
+            int:
+            The number of lines.
+        """
+        if self._has_custom_highlighting():
+            return len(self._get_all_text_lines())
+
+        return len(self.get_line_offsets()) - 1
+
+    def get_line_offsets(self):
+        """Return the byte offsets of the lines in the file.
+
+        The offsets are computed from the stored file without loading it into
+        memory, and are then cached.
+
+        Returns:
+            array.array:
+            The offset of the start of each line, followed by the size of the
+            file.
+        """
+        return cache_memoize('text-attachment-%d-line-offsets' % self.obj.pk,
+                             self._get_line_offsets_uncached,
+                             large_data=True)
+
+    def get_text_lines_in_range(self, first_line, num_lines):
+        """Return a range of the file contents as syntax-highlighted lines.
+
+        Only the windows of lines overlapping the range are loaded from the
+        file and highlighted. Each window is cached separately.
+
+        Args:
+            first_line (int):
+                The 1-based number of the first line to return.
+
+            num_lines (int):
+                The maximum number of lines to return.
+
+        Returns:
+            list of unicode:
+            The highlighted lines in the range. This may be shorter than
+            ``num_lines`` if the range extends past the end of the file.
+        """
+        first_line = max(first_line, 1)
+        last_line = min(first_line + num_lines - 1, self.get_num_lines())
+
+        if first_line > last_line:
+            return []
+
+        if self._has_custom_highlighting():
+            return self._get_all_text_lines()[first_line - 1:last_line]
+
+        window_size = self.lines_window_size
+        first_window = (first_line - 1) // window_size
+        last_window = (last_line - 1) // window_size
+        lines = []
+
+        for window_num in range(first_window, last_window + 1):
+            lines += self._get_text_lines_window(window_num)
+
+        start = first_line - 1 - first_window * window_size
+
+        return lines[start:start + last_line - first_line + 1]
 
     def get_rendered_lines(self):
         """Returns the file contents as a render, based on the raw text.
@@ -147,6 +248,113 @@ class TextBasedReviewUI(FileAttachmentReviewUI):
 
         return data
 
+    def _get_line_offsets_uncached(self):
+        """Return the byte offsets of the lines in the file.
+
+        Returns:
+            array.array:
+            The line offsets.
+        """
+        self.obj.file.open()
+
+        with self.obj.file as f:
+            return build_line_offsets(f)
+
+    def _has_custom_highlighting(self):
+        """Return whether a subclass overrides generate_highlighted_text.
+
+        Highlighting is only done in windows of lines if the default
+        :py:meth:`generate_highlighted_text` is used. Otherwise, the
+        subclass's implementation is used to highlight the whole file.
+
+        Returns:
+            bool:
+            Whether :py:meth:`generate_highlighted_text` is overridden.
+        """
+        return (six.get_unbound_function(type(self).generate_highlighted_text)
+                is not six.get_unbound_function(
+                    TextBasedReviewUI.generate_highlighted_text))
+
+    def _get_all_text_lines(self):
+        """Return all syntax-highlighted lines from generate_highlighted_text.
+
+        Returns:
+            list of unicode:
+            The highlighted lines for the whole file.
+        """
+        return cache_memoize('text-attachment-%d-lines' % self.obj.pk,
+                             lambda: list(self.generate_highlighted_text()))
+
+    def _get_text_lines_window(self, window_num):
+        """Return a window of syntax-highlighted lines.
+
+        Args:
+            window_num (int):
+                The 0-based number of the window.
+
+        Returns:
+            list of unicode:
+            The highlighted lines in the window.
+        """
+        window_size = self.lines_window_size
+
+        return cache_memoize(
+            'text-attachment-%d-lines-%d-%d' % (self.obj.pk, window_size,
+                                                window_num),
+            lambda: self._generate_highlighted_lines(
+                first_line=window_num * window_size + 1,
+                num_lines=window_size))
+
+    def _generate_highlighted_lines(self, first_line, num_lines):
+        """Generate syntax-highlighted lines for a range of the file.
+
+        Only the lines in the range are read from the file. Since each range
+        is highlighted on its own, constructs spanning ranges (such as long
+        multi-line strings) may be highlighted differently than they would be
+        in the full file.
+
+        Args:
+            first_line (int):
+                The 1-based number of the first line to highlight.
+
+            num_lines (int):
+                The maximum number of lines to highlight.
+
+        Returns:
+            list of unicode:
+            The highlighted lines.
+        """
+        line_offsets = self.get_line_offsets()
+        self.obj.file.open()
+
+        with self.obj.file as f:
+            data = read_lines(f, line_offsets, first_line, num_lines)
+
+        num_lines = min(num_lines, len(line_offsets) - first_line)
+
+        if num_lines <= 0:
+            return []
+
+        lexer = self.get_source_lexer(self.obj.filename, data)
+
+        # Leading and trailing blank lines must be kept, or the lines in the
+        # range would be misnumbered. A new lexer is created with this option,
+        # rather than modifying the one provided by get_source_lexer().
+        lexer = type(lexer)(**dict(lexer.options, stripnl=False))
+
+        lines = highlight(data, lexer, NoWrapperHtmlFormatter()).splitlines()
+
+        # Keep the number of lines consistent with the line offsets, even if
+        # the lexer split or joined lines differently (for instance, on
+        # lone carriage returns).
+        lines = lines[:num_lines]
+        lines += [''] * (num_lines - len(lines))
+
+        return [
+            '<pre>%s</pre>' % line
+            for line in lines
+        ]
+
     def generate_highlighted_text(self):
         """Generates syntax-highlighted text for the file.
 
@@ -264,20 +472,21 @@ class TextBasedReviewUI(FileAttachmentReviewUI):
         else:
             try:
                 if view_mode == 'source':
-                    lines = self.get_text_lines()
+                    lines = self.get_text_lines_in_range(
+                        begin_line_num, end_line_num - begin_line_num + 1)
                 elif view_mode == 'rendered':
-                    lines = self.get_rendered_lines()
+                    # Grab only the lines we care about.
+                    #
+                    # The line numbers are stored 1-indexed, so normalize
+                    # to 0.
+                    lines = self.get_rendered_lines()[
+                        begin_line_num - 1:end_line_num]
             except Exception as e:
                 logging.error('Unable to generate text attachment comment '
                               'thumbnail for comment %s: %s',
                               comment, e)
                 return ''
 
-            # Grab only the lines we care about.
-            #
-            # The line numbers are stored 1-indexed, so normalize to 0.
-            lines = lines[begin_line_num - 1:end_line_num]
-
             context['lines'] = [
                 {
                     'line_num': begin_line_num + i,
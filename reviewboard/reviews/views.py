@@ -5,6 +5,7 @@ import json
 import logging
 import re
 import struct
+from collections import OrderedDict
 
 import dateutil.parser
 from django.conf import settings
@@ -48,7 +49,8 @@ from reviewboard.diffviewer.diffutils import (convert_to_unicode,
                                               get_last_header_before_line,
                                               get_last_line_number_in_diff,
                                               get_original_file,
-                                              get_patched_file)
+                                              get_patched_file,
+                                              prefetch_file_chunks_in_ranges)
 from reviewboard.diffviewer.models import DiffSet
 from reviewboard.diffviewer.views import (DiffFragmentView,
                                           DiffViewerView,
@@ -74,6 +76,7 @@ from reviewboard.reviews.models import (Comment,
                                         ReviewRequest,
                                         Screenshot)
 from reviewboard.reviews.ui.base import FileAttachmentReviewUI
+from reviewboard.reviews.ui.text import TextBasedReviewUI
 from reviewboard.scmtools.errors import FileNotFoundError
 from reviewboard.scmtools.models import Repository
 from reviewboard.site.mixins import CheckLocalSiteAccessViewMixin
@@ -358,6 +361,29 @@ def build_diff_comment_fragments(
     if lines_of_context is None:
         lines_of_context = [0, 0]
 
+    comments = list(comments)
+
+    # Fetch the lines needed for all comments on each file at once.
+    line_ranges = OrderedDict()
+
+    for comment in comments:
+        first_line = max(1, comment.first_line - lines_of_context[0])
+        last_line = comment.last_line + lines_of_context[1]
+
+        line_ranges.setdefault(
+            (comment.filediff, comment.interfilediff),
+            []).append((first_line, last_line - first_line + 1))
+
+    for (filediff, interfilediff), ranges in six.iteritems(line_ranges):
+        try:
+            prefetch_file_chunks_in_ranges(context, filediff, interfilediff,
+                                           ranges)
+        except Exception as e:
+            # Any errors will be handled when rendering each comment.
+            logging.exception('Unable to prefetch diff chunks for '
+                              'FileDiff %s: %s',
+                              filediff.pk, e)
+
     for comment in comments:
         try:
             max_line = get_last_line_number_in_diff(context, comment.filediff,
@@ -606,8 +632,8 @@ class ReviewRequestDetailView(ReviewRequestViewMixin,
         # Prepare data used in both the page and the ETag.
         starred = self.is_review_request_starred()
 
-        self.last_activity_time = review_request.get_last_activity_info(
-            data.diffsets, data.reviews)['timestamp']
+        self.last_activity_time = \
+            review_request.get_last_activity()['timestamp']
         etag_timestamp = self.last_activity_time
 
         entry_etags = ':'.join(
@@ -899,8 +925,7 @@ class ReviewRequestUpdatesView(ReviewRequestViewMixin, ETagViewMixin,
         # Build page data only for the entry we care about.
         data.query_data_pre_etag()
 
-        last_activity_time = review_request.get_last_activity_info(
-            data.diffsets, data.reviews)['timestamp']
+        last_activity_time = review_request.get_last_activity()['timestamp']
 
         entry_etags = ':'.join(
             entry_cls.build_etag_data(data)
@@ -1198,8 +1223,8 @@ class ReviewsDiffViewerView(ReviewRequestViewMixin,
         if self.draft and self.draft.diffset:
             num_diffs += 1
 
-        last_activity_time = self.review_request.get_last_activity_info(
-            diffsets)['timestamp']
+        last_activity_time = \
+            self.review_request.get_last_activity()['timestamp']
 
         review_request_details = self.draft or self.review_request
 
@@ -2033,6 +2058,34 @@ class ReviewFileAttachmentView(ReviewRequestViewMixin,
             django.http.HttpResponse:
             The resulting HTTP response from the handler.
         """
+        review_ui = self.get_review_ui(request, file_attachment_id,
+                                       file_attachment_diff_id)
+
+        return review_ui.render_to_response(request)
+
+    def get_review_ui(self, request, file_attachment_id,
+                      file_attachment_diff_id=None):
+        """Return the review UI for a file attachment.
+
+        Args:
+            request (django.http.HttpRequest):
+                The HTTP request from the client.
+
+            file_attachment_id (int):
+                The ID of the file attachment to review.
+
+            file_attachment_diff_id (int, optional):
+                The ID of the file attachment to diff against.
+
+        Returns:
+            reviewboard.reviews.ui.base.FileAttachmentReviewUI:
+            The review UI for the file attachment.
+
+        Raises:
+            django.http.Http404:
+                The file attachment could not be found, or its review UI is
+                not enabled for the user.
+        """
         review_request = self.review_request
         draft = review_request.get_draft(request.user)
 
@@ -2073,11 +2126,71 @@ class ReviewFileAttachmentView(ReviewRequestViewMixin,
             is_enabled_for = False
 
         if review_ui and is_enabled_for:
-            return review_ui.render_to_response(request)
+            return review_ui
         else:
             raise Http404
 
 
+class ReviewFileAttachmentLinesView(ReviewFileAttachmentView):
+    """Returns a range of syntax-highlighted lines of a text file attachment.
+
+    This is used by the text review UI to incrementally load the lines of
+    large files. The range is specified by the ``first`` (1-based) and
+    ``count`` query arguments, and the lines are returned as JSON.
+    """
+
+    #: The maximum number of lines that can be requested at once.
+    max_lines = 5000
+
+    def get(self, request, file_attachment_id, *args, **kwargs):
+        """Handle a HTTP GET request.
+
+        Args:
+            request (django.http.HttpRequest):
+                The HTTP request from the client.
+
+            file_attachment_id (int):
+                The ID of the file attachment.
+
+            *args (tuple):
+                Positional arguments passed to the handler.
+
+            **kwargs (dict):
+                Keyword arguments passed to the handler.
+
+        Returns:
+            django.http.HttpResponse:
+            The resulting HTTP response from the handler.
+        """
+        try:
+            first_line = int(request.GET.get('first', 1))
+            num_lines = int(request.GET['count'])
+        except (KeyError, ValueError):
+            return HttpResponseBadRequest(
+                'The "first" and "count" arguments must be integers.',
+                content_type='text/plain; charset=utf-8')
+
+        if first_line < 1 or not (0 < num_lines <= self.max_lines):
+            return HttpResponseBadRequest(
+                'The requested range of lines is invalid.',
+                content_type='text/plain; charset=utf-8')
+
+        review_ui = self.get_review_ui(request, file_attachment_id)
+
+        if not isinstance(review_ui, TextBasedReviewUI):
+            raise Http404
+
+        data = {
+            'first_line': first_line,
+            'num_lines': review_ui.get_num_lines(),
+            'lines': review_ui.get_text_lines_in_range(first_line,
+                                                       num_lines),
+        }
+
+        return HttpResponse(json.dumps(data),
+                            content_type='application/json')
+
+
 class ReviewScreenshotView(ReviewRequestViewMixin,
                            UserProfileRequiredViewMixin,
                            View):
@@ -520,6 +520,14 @@ class SCMTool(object):
     #:     3.0.18
     prefers_mirror_path = False
 
+    #: Whether this can fetch or check for several files in one request.
+    #:
+    #: If ``True``, subclasses must implement :py:meth:`get_files` and
+    #: :py:meth:`files_exist`. These are used to prefetch the files in a
+    #: diff when validating it or generating its chunks, instead of making
+    #: a round trip to the repository for each file.
+    supports_batch_file_fetch = False
+
     #: Overridden help text for the configuration form fields.
     #:
     #: This allows the form fields to have custom help text for the SCMTool,
@@ -660,6 +668,58 @@ class SCMTool(object):
         except FileNotFoundError:
             return False
 
+    def get_files(self, files, base_commit_id=None, **kwargs):
+        """Return the contents of several files from a repository.
+
+        This is only called if :py:attr:`supports_batch_file_fetch` is
+        ``True``. Files that could not be found should be left out of the
+        results, rather than raising an exception. Callers will fall back on
+        :py:meth:`get_file` for those.
+
+        Args:
+            files (list of tuple):
+                A list of ``(path, revision)`` tuples for the files to fetch.
+
+            base_commit_id (unicode, optional):
+                The ID of the commit that the files were changed in. This may
+                not be provided, and is dependent on the type of repository.
+
+            **kwargs (dict):
+                Additional keyword arguments. This is not currently used, but
+                is available for future expansion.
+
+        Returns:
+            dict:
+            A dictionary mapping ``(path, revision)`` tuples to the file
+            contents, as bytes.
+        """
+        raise NotImplementedError
+
+    def files_exist(self, files, base_commit_id=None, **kwargs):
+        """Return whether several files exist in a repository.
+
+        This is only called if :py:attr:`supports_batch_file_fetch` is
+        ``True``.
+
+        Args:
+            files (list of tuple):
+                A list of ``(path, revision)`` tuples for the files to check.
+
+            base_commit_id (unicode, optional):
+                The ID of the commit that the files were changed in. This may
+                not be provided, and is dependent on the type of repository.
+
+            **kwargs (dict):
+                Additional keyword arguments. This is not currently used, but
+                is available for future expansion.
+
+        Returns:
+            set of tuple:
+            The ``(path, revision)`` tuples for the files that exist. Callers
+            will fall back on :py:meth:`file_exists` for any others.
+        """
+        raise NotImplementedError
+
     def parse_diff_revision(self, file_str, revision_str, moved=False,
                             copied=False, **kwargs):
         """Return a parsed filename and revision as represented in a diff.
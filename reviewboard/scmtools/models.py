@@ -11,6 +11,8 @@ from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured, ValidationError
 from django.db import IntegrityError, models
 from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils import six, timezone
 from django.utils.encoding import python_2_unicode_compatible
 from django.utils.http import urlquote
@@ -681,6 +683,169 @@ class Repository(models.Model):
 
         return exists
 
+    def prefetch_files(self, files, base_commit_id=None, request=None):
+        """Fetch several files from the repository into the cache.
+
+        If the repository's SCMTool supports fetching several files at once
+        (and the repository isn't backed by a hosting service), all the
+        files that aren't already cached will be fetched in as few requests
+        as possible, and then cached. Later calls to :py:meth:`get_file` for
+        those files won't need to contact the repository.
+
+        Otherwise, or if the fetch fails, this does nothing, and the files
+        will be fetched individually when needed.
+
+        This will send the
+        :py:data:`~reviewboard.scmtools.signals.fetching_file` signal for
+        each uncached file, and the
+        :py:data:`~reviewboard.scmtools.signals.fetched_file` signal for each
+        file that was fetched.
+
+        Args:
+            files (list of tuple):
+                A list of ``(path, revision)`` tuples for the files to fetch.
+                The paths and revisions must be Unicode strings.
+
+            base_commit_id (unicode, optional):
+                The ID of the commit containing the revisions of the files.
+
+            request (django.http.HttpRequest, optional):
+                The current HTTP request from the client. This is used for
+                logging purposes.
+
+        Returns:
+            int:
+            The number of files that were fetched and cached.
+        """
+        tool = self._get_batch_scmtool()
+
+        if tool is None:
+            return 0
+
+        keys = self._get_uncached_file_keys(
+            files,
+            lambda path, revision: self._make_file_cache_key(
+                path, revision, base_commit_id))
+
+        if not keys:
+            return 0
+
+        for path, revision in keys:
+            fetching_file.send(sender=self,
+                               path=path,
+                               revision=revision,
+                               base_commit_id=base_commit_id,
+                               request=request)
+
+        log_timer = log_timed('Fetching %d files from %s'
+                              % (len(keys), self),
+                              request=request)
+
+        try:
+            results = tool.get_files(list(keys),
+                                     base_commit_id=base_commit_id)
+        except Exception as e:
+            logging.warning('Unable to fetch %d files from repository %s '
+                            '(ID %s) in a batch. They will be fetched '
+                            'individually: %s',
+                            len(keys), self, self.pk, e)
+            return 0
+        finally:
+            log_timer.done()
+
+        for (path, revision), data in six.iteritems(results):
+            assert isinstance(data, bytes), (
+                '%s.get_files() must return byte strings, not %s'
+                % (type(tool).__name__, type(data)))
+
+            cache_memoize(keys[(path, revision)],
+                          lambda: [data],
+                          large_data=True)
+
+            fetched_file.send(sender=self,
+                              path=path,
+                              revision=revision,
+                              base_commit_id=base_commit_id,
+                              request=request,
+                              data=data)
+
+        return len(results)
+
+    def prefetch_file_exists(self, files, base_commit_id=None,
+                             request=None):
+        """Check whether several files exist, caching the results.
+
+        This works like :py:meth:`prefetch_files`, but only checks whether
+        the files exist. Later calls to :py:meth:`get_file_exists` for the
+        files found to exist won't need to contact the repository. Files that
+        weren't found will be checked individually when needed.
+
+        This will send the
+        :py:data:`~reviewboard.scmtools.signals.checking_file_exists` signal
+        for each uncached file, and the
+        :py:data:`~reviewboard.scmtools.signals.checked_file_exists` signal
+        for each file found to exist.
+
+        Args:
+            files (list of tuple):
+                A list of ``(path, revision)`` tuples for the files to check.
+                The paths and revisions must be Unicode strings.
+
+            base_commit_id (unicode, optional):
+                The ID of the commit containing the revisions of the files.
+
+            request (django.http.HttpRequest, optional):
+                The current HTTP request from the client. This is used for
+                logging purposes.
+
+        Returns:
+            int:
+            The number of files that were found to exist.
+        """
+        tool = self._get_batch_scmtool()
+
+        if tool is None:
+            return 0
+
+        keys = self._get_uncached_file_keys(
+            files,
+            lambda path, revision: self._make_file_exists_cache_key(
+                path, revision, base_commit_id),
+            check_file_cache_key=lambda path, revision: (
+                self._make_file_cache_key(path, revision, base_commit_id)))
+
+        if not keys:
+            return 0
+
+        for path, revision in keys:
+            checking_file_exists.send(sender=self,
+                                      path=path,
+                                      revision=revision,
+                                      base_commit_id=base_commit_id,
+                                      request=request)
+
+        try:
+            found = tool.files_exist(list(keys),
+                                     base_commit_id=base_commit_id)
+        except Exception as e:
+            logging.warning('Unable to check for %d files in repository %s '
+                            '(ID %s) in a batch. They will be checked '
+                            'individually: %s',
+                            len(keys), self, self.pk, e)
+            return 0
+
+        for path, revision in found:
+            cache_memoize(keys[(path, revision)], lambda: '1')
+
+            checked_file_exists.send(sender=self,
+                                     path=path,
+                                     revision=revision,
+                                     base_commit_id=base_commit_id,
+                                     request=request,
+                                     exists=True)
+
+        return len(found)
+
     def get_branches(self):
         """Return a list of all branches on the repository.
 
@@ -1058,6 +1223,66 @@ class Repository(models.Model):
             urlquote(base_commit_id or ''),
             urlquote(self.raw_file_url or ''))
 
+    def _get_batch_scmtool(self):
+        """Return the SCMTool to use for batched file operations.
+
+        Returns:
+            reviewboard.scmtools.core.SCMTool:
+            The SCMTool, or ``None`` if the repository is backed by a hosting
+            service or the SCMTool doesn't support batched file operations.
+        """
+        if self.hosting_service:
+            return None
+
+        tool = self.get_scmtool()
+
+        if not tool.supports_batch_file_fetch:
+            return None
+
+        return tool
+
+    def _get_uncached_file_keys(self, files, make_key,
+                                check_file_cache_key=None):
+        """Return the cache keys for files that aren't yet cached.
+
+        Args:
+            files (list of tuple):
+                A list of ``(path, revision)`` tuples.
+
+            make_key (callable):
+                A function taking a path and revision and returning the
+                cache key for the file.
+
+            check_file_cache_key (callable, optional):
+                An optional function returning a second cache key to check.
+                Files cached under either key are left out.
+
+        Returns:
+            dict:
+            A dictionary mapping ``(path, revision)`` tuples to the cache
+            keys for the files that aren't cached.
+        """
+        keys = {}
+
+        for path, revision in files:
+            if not isinstance(path, six.text_type):
+                raise TypeError('"path" must be a Unicode string, not %s'
+                                % type(path))
+
+            if not isinstance(revision, six.text_type):
+                raise TypeError('"revision" must be a Unicode string, not %s'
+                                % type(revision))
+
+            key = make_key(path, revision)
+
+            if (make_cache_key(key) not in cache and
+                (check_file_cache_key is None or
+                 make_cache_key(check_file_cache_key(path, revision))
+                 not in cache)):
+                keys[(path, revision)] = key
+
+        return keys
+
     def _get_file_uncached(self, path, revision, base_commit_id, request):
         """Return a file from the repository, bypassing cache.
 
@@ -1210,3 +1435,26 @@ class Repository(models.Model):
                            ('hooks_uuid', 'local_site'))
         verbose_name = _('Repository')
         verbose_name_plural = _('Repositories')
+
+
+@receiver(post_save, sender=Repository)
+@receiver(post_delete, sender=Repository)
+def _on_repository_changed(sender, instance, **kwargs):
+    """Close any pooled Perforce connections for a changed repository.
+
+    Pooled connections are keyed by the repository's server and
+    credentials, so pools for old settings would otherwise stay open.
+
+    Args:
+        sender (type):
+            The model class.
+
+        instance (Repository):
+            The saved or deleted repository.
+
+        **kwargs (dict):
+            Additional keyword arguments from the signal.
+    """
+    from reviewboard.scmtools.perforce import close_perforce_connection_pools
+
+    close_perforce_connection_pools(repository_id=instance.pk)
@@ -12,6 +12,7 @@ import socket
 import stat
 import subprocess
 import tempfile
+import threading
 import time
 from contextlib import contextmanager
 
@@ -216,6 +217,407 @@ class STunnelProxy(object):
                     pass
 
 
+class PerforceConnection(object):
+    """An open connection to a Perforce server, managed by a pool.
+
+    Attributes:
+        p4 (P4.P4):
+            The connected P4 instance.
+
+        proxy (STunnelProxy):
+            The stunnel proxy owned by this connection, if any.
+
+        last_used (float):
+            The time the connection was last released to the pool.
+
+        last_checked (float):
+            The time the connection's health was last checked.
+    """
+
+    def __init__(self, p4, proxy=None):
+        """Initialize the connection.
+
+        Args:
+            p4 (P4.P4):
+                The connected P4 instance.
+
+            proxy (STunnelProxy, optional):
+                The stunnel proxy owned by this connection.
+        """
+        self.p4 = p4
+        self.proxy = proxy
+        self.last_used = time.time()
+        self.last_checked = self.last_used
+
+    def is_alive(self):
+        """Return whether the connection is still open.
+
+        This doesn't talk to the server. It only checks whether the
+        connection has been closed or dropped.
+
+        Returns:
+            bool:
+            Whether the connection is still open.
+        """
+        try:
+            return bool(self.p4.connected())
+        except Exception:
+            return False
+
+    def check_health(self):
+        """Check that the server still responds on this connection.
+
+        Returns:
+            bool:
+            Whether the connection is healthy.
+        """
+        if not self.is_alive():
+            return False
+
+        try:
+            self.p4.run_info('-s')
+        except Exception:
+            return False
+
+        self.last_checked = time.time()
+
+        return True
+
+    def close(self):
+        """Close the connection and shut down its tunnel, if any."""
+        try:
+            if self.p4.connected():
+                self.p4.disconnect()
+        except Exception:
+            pass
+
+        if self.proxy:
+            try:
+                self.proxy.shutdown()
+            except Exception:
+                pass
+
+            self.proxy = None
+
+
+class PerforceConnectionPool(object):
+    """A pool of authenticated connections to a Perforce server.
+
+    Opening a Perforce connection (and possibly an stunnel proxy and a
+    login) for every file in a diff is slow. Connections are instead kept
+    open and reused by later operations on the same repository.
+
+    Idle connections are closed once they've been unused for
+    :py:attr:`IDLE_TIMEOUT_SECS`, and connections that have been idle for
+    more than :py:attr:`HEALTH_CHECK_SECS` are checked before being reused.
+    Checks for expiring login tickets are shared by all connections in the
+    pool.
+
+    Once a pool is closed, connections released to it are closed instead of
+    being kept for reuse.
+
+    Attributes:
+        repository_ids (set of int):
+            The IDs of the repositories that have used this pool.
+    """
+
+    #: The number of seconds before an idle connection is closed.
+    IDLE_TIMEOUT_SECS = 5 * 60
+
+    #: The number of idle seconds before a connection is checked for health.
+    HEALTH_CHECK_SECS = 30
+
+    #: The number of seconds between checks for expiring login tickets.
+    TICKET_CHECK_SECS = 5 * 60
+
+    #: The maximum number of idle connections to keep open.
+    MAX_IDLE_CONNECTIONS = 4
+
+    def __init__(self):
+        """Initialize the pool."""
+        self.repository_ids = set()
+        self._idle = []
+        self._lock = threading.Lock()
+        self._last_ticket_check = None
+        self._num_in_use = 0
+        self._closed = False
+
+    @property
+    def is_unused(self):
+        """Whether the pool has no idle or in-use connections."""
+        with self._lock:
+            return not self._idle and self._num_in_use == 0
+
+    def acquire(self, client):
+        """Return a connection from the pool, opening one if needed.
+
+        The connection is exclusively owned by the caller until it's passed
+        to :py:meth:`release`.
+
+        Args:
+            client (PerforceClient):
+                The client requesting the connection. This is used to open
+                new connections.
+
+        Returns:
+            PerforceConnection:
+            The connection.
+        """
+        now = time.time()
+        expired = []
+        connection = None
+
+        with self._lock:
+            self._num_in_use += 1
+
+            while self._idle:
+                candidate = self._idle.pop()
+
+                if now - candidate.last_used > self.IDLE_TIMEOUT_SECS:
+                    expired.append(candidate)
+                else:
+                    connection = candidate
+                    break
+
+            # The remaining connections were used less recently than this
+            # one, so they may also be ready to expire.
+            expired += [
+                idle
+                for idle in self._idle
+                if now - idle.last_used > self.IDLE_TIMEOUT_SECS
+            ]
+            self._idle = [
+                idle
+                for idle in self._idle
+                if idle not in expired
+            ]
+
+        for idle in expired:
+            idle.close()
+
+        if connection is not None:
+            if now - connection.last_checked > self.HEALTH_CHECK_SECS:
+                healthy = connection.check_health()
+            else:
+                healthy = connection.is_alive()
+
+            if healthy:
+                return connection
+
+            connection.close()
+
+        try:
+            return client.create_connection()
+        except Exception:
+            with self._lock:
+                self._num_in_use -= 1
+
+            raise
+
+    def release(self, connection):
+        """Return a connection to the pool.
+
+        Connections that were dropped are closed instead of being reused.
+
+        Args:
+            connection (PerforceConnection):
+                The connection to return.
+        """
+        alive = connection.is_alive()
+
+        with self._lock:
+            self._num_in_use -= 1
+
+            if (alive and not self._closed and
+                len(self._idle) < self.MAX_IDLE_CONNECTIONS):
+                connection.last_used = time.time()
+                self._idle.append(connection)
+                return
+
+        connection.close()
+
+    def check_refresh_ticket(self, client):
+        """Refresh the login ticket, if it hasn't been checked recently.
+
+        Tickets are stored in a file shared by all connections, so this only
+        needs to be checked periodically for the pool as a whole.
+
+        Args:
+            client (PerforceClient):
+                The client, connected through a connection from this pool.
+        """
+        now = time.time()
+
+        with self._lock:
+            if (self._last_ticket_check is not None and
+                now - self._last_ticket_check < self.TICKET_CHECK_SECS):
+                return
+
+            self._last_ticket_check = now
+
+        try:
+            client.check_refresh_ticket()
+        except Exception:
+            with self._lock:
+                self._last_ticket_check = None
+
+            raise
+
+    def close_expired(self):
+        """Close idle connections that have expired.
+
+        Connections that have been idle for more than
+        :py:attr:`IDLE_TIMEOUT_SECS` are closed.
+        """
+        now = time.time()
+
+        with self._lock:
+            expired = [
+                idle
+                for idle in self._idle
+                if now - idle.last_used > self.IDLE_TIMEOUT_SECS
+            ]
+            self._idle = [
+                idle
+                for idle in self._idle
+                if idle not in expired
+            ]
+
+        for connection in expired:
+            connection.close()
+
+    def close(self):
+        """Close all idle connections in the pool.
+
+        Connections currently in use will be closed when they're released.
+        """
+        with self._lock:
+            idle = self._idle
+            self._idle = []
+            self._closed = True
+
+        for connection in idle:
+            connection.close()
+
+
+#: The number of seconds between sweeps of expired pooled connections.
+CONNECTION_POOL_SWEEP_SECS = 60
+
+_connection_pools = {}
+_connection_pools_lock = threading.Lock()
+_connection_pools_pid = None
+_connection_pools_last_sweep = None
+
+
+def get_perforce_connection_pool(client):
+    """Return the connection pool for a client's repository configuration.
+
+    Pools are shared by all clients with the same server and credentials in
+    the current process. Pools inherited from a parent process are discarded,
+    since their connections can't be shared across processes.
+
+    Periodically (see :py:data:`CONNECTION_POOL_SWEEP_SECS`), this also
+    closes expired idle connections in all pools, and discards pools that
+    are no longer in use (such as those for credentials that have since
+    changed).
+
+    Args:
+        client (PerforceClient):
+            The client to return the pool for.
+
+    Returns:
+        PerforceConnectionPool:
+        The connection pool.
+    """
+    global _connection_pools, _connection_pools_pid
+    global _connection_pools_last_sweep
+
+    key = (client.p4port, client.use_stunnel, client.username,
+           client.password, client.encoding, client.p4host,
+           client.client_name, client.local_site_name,
+           client.use_ticket_auth)
+    pid = os.getpid()
+    now = time.time()
+    sweep = False
+
+    with _connection_pools_lock:
+        if _connection_pools_pid != pid:
+            _connection_pools = {}
+            _connection_pools_pid = pid
+            _connection_pools_last_sweep = now
+
+        if (_connection_pools_last_sweep is None or
+            now - _connection_pools_last_sweep >= CONNECTION_POOL_SWEEP_SECS):
+            _connection_pools_last_sweep = now
+            sweep = True
+
+        try:
+            pool = _connection_pools[key]
+        except KeyError:
+            pool = PerforceConnectionPool()
+            _connection_pools[key] = pool
+
+        if client.repository_id is not None:
+            pool.repository_ids.add(client.repository_id)
+
+    if sweep:
+        _sweep_perforce_connection_pools(keep_pool=pool)
+
+    return pool
+
+
+def close_perforce_connection_pools(repository_id=None):
+    """Close pooled Perforce connections in this process.
+
+    Args:
+        repository_id (int, optional):
+            The ID of a repository. If provided, only pools used by this
+            repository will be closed.
+    """
+    with _connection_pools_lock:
+        if repository_id is None:
+            pools = list(six.itervalues(_connection_pools))
+            _connection_pools.clear()
+        else:
+            pools = []
+
+            for key, pool in list(six.iteritems(_connection_pools)):
+                if repository_id in pool.repository_ids:
+                    pools.append(pool)
+                    del _connection_pools[key]
+
+    for pool in pools:
+        pool.close()
+
+
+def _sweep_perforce_connection_pools(keep_pool):
+    """Close expired connections and discard unused pools.
+
+    Args:
+        keep_pool (PerforceConnectionPool):
+            A pool that's about to be used, which won't be discarded.
+    """
+    with _connection_pools_lock:
+        pools = list(six.iteritems(_connection_pools))
+
+    for key, pool in pools:
+        pool.close_expired()
+
+    unused = []
+
+    with _connection_pools_lock:
+        for key, pool in pools:
+            if (pool is not keep_pool and
+                _connection_pools.get(key) is pool and
+                pool.is_unused):
+                del _connection_pools[key]
+                unused.append(pool)
+
+    # Any connection released to these pools from now on will be closed.
+    for pool in unused:
+        pool.close()
+
+
 class PerforceClient(object):
     """Client for talking to a Perforce server.
 
@@ -231,9 +633,15 @@ class PerforceClient(object):
     #: We default this to 1 hour.
     TICKET_RENEWAL_SECS = 1 * 60 * 60
 
+    #: The max number of files passed to a single batched command.
+    #:
+    #: Larger batches are split up into several commands, all run over the
+    #: same connection.
+    MAX_BATCH_FILES = 100
+
     def __init__(self, path, username, password, encoding='', host=None,
                  client_name=None, local_site_name=None,
-                 use_ticket_auth=False):
+                 use_ticket_auth=False, repository_id=None):
         """Initialize the client.
 
         Args:
@@ -263,6 +671,10 @@ class PerforceClient(object):
             use_ticket_auth (bool, optional):
                 Whether to use ticket-based authentication. By default, this
                 is not used.
+
+            repository_id (int, optional):
+                The ID of the repository the client is for. This is used to
+                close pooled connections when the repository changes.
         """
         if path.startswith('stunnel:'):
             path = path[8:]
@@ -278,6 +690,7 @@ class PerforceClient(object):
         self.client_name = client_name
         self.local_site_name = local_site_name
         self.use_ticket_auth = use_ticket_auth
+        self.repository_id = repository_id
 
         import P4
         self.p4 = P4.P4()
@@ -366,16 +779,74 @@ class PerforceClient(object):
                 with client.connect():
                     ...
         """
-        self.p4.user = force_str(self.username)
+        if self.use_stunnel:
+            # Spin up an stunnel client and then redirect through that
+            proxy = STunnelProxy(self.p4port)
+            proxy.start_client()
+            p4_port = '127.0.0.1:%d' % proxy.port
+        else:
+            proxy = None
+            p4_port = self.p4port
 
-        if self.encoding:
-            self.p4.charset = force_str(self.encoding)
+        self._configure_p4(self.p4, p4_port)
 
-        # Exceptions will only be raised for errors, not warnings.
-        self.p4.exception_level = 1
+        try:
+            with self.p4.connect():
+                if self.use_ticket_auth:
+                    # The ticket may not exist, may have expired, or may be
+                    # close to expiring. Check for those conditions and
+                    # possibly request/extend a ticket.
+                    self.check_refresh_ticket()
+
+                yield
+        finally:
+            if proxy:
+                try:
+                    proxy.shutdown()
+                except Exception:
+                    pass
+
+    @contextmanager
+    def connect_pooled(self):
+        """Use a pooled connection to the Perforce server.
+
+        This works like :py:meth:`connect`, but takes an authenticated
+        connection from the pool for the repository, creating one if needed.
+        Once the context ends, the connection is returned to the pool for
+        reuse, unless it was dropped.
+
+        While in the context, :py:attr:`p4` refers to the pooled connection.
+
+        Context:
+            The context for the connection.
+
+            No variables are passed to the context.
+        """
+        pool = get_perforce_connection_pool(self)
+        connection = pool.acquire(self)
+        old_p4 = self.p4
+        self.p4 = connection.p4
+
+        try:
+            if self.use_ticket_auth:
+                pool.check_refresh_ticket(self)
+
+            yield
+        finally:
+            self.p4 = old_p4
+            pool.release(connection)
+
+    def create_connection(self):
+        """Create and open a new connection for a connection pool.
+
+        Returns:
+            PerforceConnection:
+            The new connection. If stunnel is used, the connection will own
+            its own tunnel.
+        """
+        import P4
 
         if self.use_stunnel:
-            # Spin up an stunnel client and then redirect through that
             proxy = STunnelProxy(self.p4port)
             proxy.start_client()
             p4_port = '127.0.0.1:%d' % proxy.port
@@ -383,13 +854,48 @@ class PerforceClient(object):
             proxy = None
             p4_port = self.p4port
 
-        self.p4.port = force_str(p4_port)
+        p4 = P4.P4()
+        self._configure_p4(p4, p4_port)
+
+        try:
+            p4.connect()
+        except Exception:
+            if proxy:
+                try:
+                    proxy.shutdown()
+                except Exception:
+                    pass
+
+            raise
+
+        return PerforceConnection(p4, proxy)
+
+    def _configure_p4(self, p4, p4_port):
+        """Configure a P4 instance for connecting to the server.
+
+        Args:
+            p4 (P4.P4):
+                The P4 instance to configure.
+
+            p4_port (unicode):
+                The port to connect to. This will differ from
+                :py:attr:`p4port` when using stunnel.
+        """
+        p4.user = force_str(self.username)
+
+        if self.encoding:
+            p4.charset = force_str(self.encoding)
+
+        # Exceptions will only be raised for errors, not warnings.
+        p4.exception_level = 1
+
+        p4.port = force_str(p4_port)
 
         if self.p4host:
-            self.p4.host = force_str(self.p4host)
+            p4.host = force_str(self.p4host)
 
         if self.client_name:
-            self.p4.client = force_str(self.client_name)
+            p4.client = force_str(self.client_name)
 
         if self.use_ticket_auth:
             # The repository is configured for ticket-based authentication.
@@ -414,37 +920,27 @@ class PerforceClient(object):
                     tickets_dir = None
 
             if tickets_dir:
-                self.p4.ticket_file = force_str(
+                p4.ticket_file = force_str(
                     os.path.join(tickets_dir, 'p4tickets'))
         else:
             # The repository does not use ticket-based authentication. We'll
             # need to set the password that's provided.
-            self.p4.password = force_str(self.password)
-
-        try:
-            with self.p4.connect():
-                if self.use_ticket_auth:
-                    # The ticket may not exist, may have expired, or may be
-                    # close to expiring. Check for those conditions and
-                    # possibly request/extend a ticket.
-                    self.check_refresh_ticket()
-
-                yield
-        finally:
-            if proxy:
-                try:
-                    proxy.shutdown()
-                except Exception:
-                    pass
+            p4.password = force_str(self.password)
 
     @contextmanager
-    def run_worker(self):
+    def run_worker(self, pooled=False):
         """Run a Perforce command from within a Perforce connection context.
 
         This will set up a Perforce connection for an operation, disconnecting
         when the context is finished, and raising a suitable exception if
         anything goes wrong.
 
+        Args:
+            pooled (bool, optional):
+                Whether to use a pooled connection (see
+                :py:meth:`connect_pooled`), rather than opening and closing
+                a new connection.
+
         Context:
             The context for the connection. Once the context ends, the
             connection will close.
@@ -477,8 +973,13 @@ class PerforceClient(object):
         """
         from P4 import P4Exception
 
+        if pooled:
+            connect = self.connect_pooled
+        else:
+            connect = self.connect
+
         try:
-            with self.connect():
+            with connect():
                 yield
         except P4Exception as e:
             error = six.text_type(e)
@@ -525,7 +1026,7 @@ class PerforceClient(object):
         """
         changeset_id = six.text_type(changeset_id)
 
-        with self.run_worker():
+        with self.run_worker(pooled=True):
             try:
                 change = self.p4.run_change('-o', '-O', changeset_id)
                 changeset_id = change[0]['Change']
@@ -568,7 +1069,7 @@ class PerforceClient(object):
         else:
             depot_path = '%s#%s' % (path, revision)
 
-        with self.run_worker():
+        with self.run_worker(pooled=True):
             fd, filename = tempfile.mkstemp(prefix='reviewboard.')
 
             try:
@@ -613,7 +1114,7 @@ class PerforceClient(object):
         else:
             depot_path = '%s#%s' % (path, revision)
 
-        with self.run_worker():
+        with self.run_worker(pooled=True):
             res = self.p4.run_fstat(depot_path)
 
         if res:
@@ -621,6 +1122,250 @@ class PerforceClient(object):
 
         return None
 
+    def get_files(self, files):
+        """Return the contents of several files in as few requests as possible.
+
+        This issues a single :command:`p4 print` for each batch of files
+        (see :py:attr:`MAX_BATCH_FILES`), splitting the tagged output back
+        up into the contents of each file.
+
+        Args:
+            files (list of tuple):
+                A list of ``(path, revision)`` tuples, each containing a
+                depot path (without a revision) and the revision to fetch.
+
+        Returns:
+            dict:
+            A dictionary mapping the ``(path, revision)`` tuples to the
+            contents of the files, as bytes. Files that could not be found
+            are left out.
+        """
+        results = {}
+        to_fetch = []
+
+        for path, revision in files:
+            if revision == PRE_CREATION:
+                results[(path, revision)] = b''
+            else:
+                to_fetch.append((path, revision))
+
+        if not to_fetch:
+            return results
+
+        printed = {}
+
+        with self.run_worker(pooled=True):
+            with self._use_raw_encoding():
+                for batch in self._split_batches(to_fetch):
+                    output = self.p4.run_print(*[
+                        self._make_depot_path(path, revision)
+                        for path, revision in batch
+                    ])
+                    printed.update(self._split_print_output(output))
+
+        for path, revision in to_fetch:
+            data = self._find_batch_result(printed, path, revision)
+
+            if data is not None:
+                results[(path, revision)] = data
+
+        return results
+
+    def get_file_stats(self, files):
+        """Return status information about several files in one request.
+
+        This issues a single :command:`p4 fstat` for each batch of files
+        (see :py:attr:`MAX_BATCH_FILES`).
+
+        Args:
+            files (list of tuple):
+                A list of ``(path, revision)`` tuples, each containing a
+                depot path (without a revision) and the revision to check.
+
+        Returns:
+            dict:
+            A dictionary mapping the ``(path, revision)`` tuples to the
+            status information for each file. Files that had no status
+            information are left out.
+        """
+        to_check = [
+            (path, revision)
+            for path, revision in files
+            if revision != PRE_CREATION
+        ]
+        stats = {}
+
+        if to_check:
+            with self.run_worker(pooled=True):
+                for batch in self._split_batches(to_check):
+                    res = self.p4.run_fstat(*[
+                        self._make_depot_path(path, revision)
+                        for path, revision in batch
+                    ])
+
+                    for file_stat in res:
+                        if (isinstance(file_stat, dict) and
+                            'depotFile' in file_stat):
+                            stats.setdefault(file_stat['depotFile'], {})[
+                                file_stat.get('headRev')] = file_stat
+
+        results = {}
+
+        for path, revision in to_check:
+            file_stat = self._find_batch_result(stats, path, revision)
+
+            if file_stat is not None:
+                results[(path, revision)] = file_stat
+
+        return results
+
+    def _make_depot_path(self, path, revision):
+        """Return a depot path for a file at a revision.
+
+        Args:
+            path (unicode):
+                The depot path, without a revision.
+
+            revision (unicode):
+                The revision for the path.
+
+        Returns:
+            unicode:
+            The depot path, including the revision if not fetching
+            :py:data:`~reviewboard.scmtools.core.HEAD`.
+        """
+        if revision == HEAD:
+            return path
+        else:
+            return '%s#%s' % (path, revision)
+
+    def _split_batches(self, files):
+        """Split a list of files into batches for a single command.
+
+        Args:
+            files (list):
+                The list of files.
+
+        Yields:
+            list:
+            Each batch of up to :py:attr:`MAX_BATCH_FILES` files.
+        """
+        for i in range(0, len(files), self.MAX_BATCH_FILES):
+            yield files[i:i + self.MAX_BATCH_FILES]
+
+    def _split_print_output(self, output):
+        """Split the tagged output of p4 print into per-file contents.
+
+        The tagged output consists of a dictionary of information on each
+        file, followed by the contents of the file. Large files may have
+        their contents split across several entries.
+
+        Args:
+            output (list):
+                The output from :command:`p4 print`.
+
+        Returns:
+            dict:
+            A dictionary mapping each depot path to a dictionary mapping the
+            printed revision to the file's contents.
+        """
+        printed = {}
+        chunks = None
+
+        for item in output:
+            if isinstance(item, dict):
+                if 'depotFile' in item:
+                    chunks = []
+                    printed.setdefault(item['depotFile'], {})[
+                        item.get('rev')] = (item.get('type', ''), chunks)
+                else:
+                    chunks = None
+            elif chunks is not None:
+                if isinstance(item, six.text_type):
+                    item = item.encode('utf-8')
+
+                chunks.append(item)
+
+        return dict(
+            (depot_path, dict(
+                (rev, self._join_print_chunks(file_type, chunks))
+                for rev, (file_type, chunks) in six.iteritems(revs)
+            ))
+            for depot_path, revs in six.iteritems(printed)
+        )
+
+    def _join_print_chunks(self, file_type, chunks):
+        """Return a file's contents from the chunks printed for it.
+
+        Args:
+            file_type (unicode):
+                The Perforce file type.
+
+            chunks (list of bytes):
+                The chunks of the file's contents.
+
+        Returns:
+            bytes:
+            The contents of the file.
+        """
+        if 'symlink' in file_type:
+            # This matches get_file(), which doesn't follow symlinks.
+            return b''
+
+        return b''.join(chunks)
+
+    def _find_batch_result(self, results, path, revision):
+        """Return the result from a batched command for a file.
+
+        Args:
+            results (dict):
+                A dictionary mapping depot paths to dictionaries mapping
+                revisions to results.
+
+            path (unicode):
+                The depot path, without a revision.
+
+            revision (unicode):
+                The requested revision.
+
+        Returns:
+            object:
+            The result for the file, or ``None`` if there wasn't one.
+        """
+        revs = results.get(path)
+
+        if not revs:
+            return None
+        elif revision == HEAD:
+            if len(revs) == 1:
+                return next(six.itervalues(revs))
+
+            return None
+        else:
+            return revs.get(force_text(revision))
+
+    @contextmanager
+    def _use_raw_encoding(self):
+        """Return file contents from the current connection as bytes.
+
+        On Python 3, P4Python decodes text file contents unless the
+        connection's encoding is set to ``raw``. The previous encoding is
+        restored when the context ends, since the connection may be pooled.
+
+        Context:
+            The context in which contents will be returned as bytes.
+        """
+        if six.PY3:
+            old_encoding = self.p4.encoding
+            self.p4.encoding = 'raw'
+
+            try:
+                yield
+            finally:
+                self.p4.encoding = old_encoding
+        else:
+            yield
+
 
 class PerforceTool(SCMTool):
     """Repository support for Perforce.
@@ -641,6 +1386,7 @@ class PerforceTool(SCMTool):
     diffs_use_absolute_paths = True
     supports_ticket_auth = True
     supports_pending_changesets = True
+    supports_batch_file_fetch = True
     prefers_mirror_path = True
 
     field_help_text = {
@@ -685,7 +1431,8 @@ class PerforceTool(SCMTool):
             client_name=repository.extra_data.get('p4_client'),
             local_site_name=local_site_name,
             use_ticket_auth=repository.extra_data.get('use_ticket_auth',
-                                                      False))
+                                                      False),
+            repository_id=repository.pk)
 
     @classmethod
     def check_repository(cls, path, username=None, password=None,
@@ -824,9 +1571,53 @@ class PerforceTool(SCMTool):
             ``True`` if the file exists in the repository. ``False`` if it
             does not.
         """
-        stat = self.client.get_file_stat(path, revision)
+        file_stat = self.client.get_file_stat(path, revision)
+
+        return file_stat is not None and 'headRev' in file_stat
+
+    def get_files(self, files, **kwargs):
+        """Return the contents of several files in the repository.
+
+        The files are fetched using as few :command:`p4 print` commands as
+        possible.
+
+        Args:
+            files (list of tuple):
+                A list of ``(path, revision)`` tuples for the files to fetch.
+
+            **kwargs (dict):
+                Unused keyword arguments.
+
+        Returns:
+            dict:
+            A dictionary mapping ``(path, revision)`` tuples to the file
+            contents. Files that could not be found are left out.
+        """
+        return self.client.get_files(files)
 
-        return stat is not None and 'headRev' in stat
+    def files_exist(self, files, **kwargs):
+        """Return whether several files exist in the repository.
+
+        The files are checked using as few :command:`p4 fstat` commands as
+        possible.
+
+        Args:
+            files (list of tuple):
+                A list of ``(path, revision)`` tuples for the files to check.
+
+            **kwargs (dict):
+                Unused keyword arguments.
+
+        Returns:
+            set of tuple:
+            The ``(path, revision)`` tuples for the files that exist.
+        """
+        return set(
+            key
+            for key, file_stat in six.iteritems(
+                self.client.get_file_stats(files))
+            if 'headRev' in file_stat
+        )
 
     def parse_diff_revision(self, filename, revision, *args, **kwargs):
         """Parse and return a filename and revision from a diff.
@@ -19,13 +19,19 @@ from djblets.util.filesystem import is_exe_in_path
 from kgb import SpyAgency
 from P4 import P4Exception
 
+from reviewboard.scmtools import perforce
 from reviewboard.scmtools.core import PRE_CREATION
 from reviewboard.scmtools.errors import (AuthenticationError,
                                          RepositoryNotFoundError,
                                          SCMError,
                                          UnverifiedCertificateError)
 from reviewboard.scmtools.models import Repository, Tool
-from reviewboard.scmtools.perforce import PerforceTool, STunnelProxy
+from reviewboard.scmtools.perforce import (PerforceConnection,
+                                           PerforceConnectionPool,
+                                           PerforceTool,
+                                           STunnelProxy,
+                                           close_perforce_connection_pools,
+                                           get_perforce_connection_pool)
 from reviewboard.scmtools.tests.testcases import SCMTestCase
 from reviewboard.site.models import LocalSite
 from reviewboard.testing import online_only
@@ -42,8 +48,46 @@ if P4 is not None:
 
         def connect(self):
             return self
+
+    class DummyPooledP4(DummyP4):
+        """A dummy P4 that simulates an open connection for pooling.
+
+        This is used to test connection pooling without talking to a server.
+        """
+
+        def __init__(self, *args, **kwargs):
+            super(DummyPooledP4, self).__init__(*args, **kwargs)
+
+            self.is_connected = True
+            self.num_info_calls = 0
+            self.print_calls = []
+            self.print_output = []
+            self.fstat_calls = []
+            self.fstat_output = []
+
+        def connected(self):
+            return self.is_connected
+
+        def disconnect(self):
+            self.is_connected = False
+
+        def run_info(self, *args):
+            self.num_info_calls += 1
+
+            return []
+
+        def run_print(self, *args):
+            self.print_calls.append(args)
+
+            return self.print_output
+
+        def run_fstat(self, *args):
+            self.fstat_calls.append(args)
+
+            return self.fstat_output
 else:
     DummyP4 = None
+    DummyPooledP4 = None
 
 
 class BasePerforceTestCase(SpyAgency, SCMTestCase):
@@ -86,6 +130,7 @@ class PerforceTests(BasePerforceTestCase):
     def tearDown(self):
         super(PerforceTests, self).tearDown()
 
+        close_perforce_connection_pools()
         shutil.rmtree(os.path.join(settings.SITE_DATA_DIR, 'p4'),
                       ignore_errors=True)
 
@@ -767,6 +812,314 @@ class PerforceTests(BasePerforceTestCase):
         self.assertEqual(files[0].delete_count, 1)
 
 
+class PerforceConnectionPoolTests(BasePerforceTestCase):
+    """Unit tests for reviewboard.scmtools.perforce.PerforceConnectionPool."""
+
+    fixtures = ['test_scmtools']
+
+    def setUp(self):
+        super(PerforceConnectionPoolTests, self).setUp()
+
+        self.repository = Repository(name='Perforce.com',
+                                     path='p4.example.com:1666',
+                                     username='test-user',
+                                     password='test-pass',
+                                     tool=Tool.objects.get(name='Perforce'))
+        self.client = self.repository.get_scmtool().client
+
+        self.spy_on(self.client.create_connection,
+                    call_fake=lambda client: PerforceConnection(
+                        DummyPooledP4()))
+
+    def tearDown(self):
+        super(PerforceConnectionPoolTests, self).tearDown()
+
+        close_perforce_connection_pools()
+
+    def test_connect_pooled_reuses_connection(self):
+        """Testing PerforceClient.connect_pooled reuses connections"""
+        client = self.client
+        orig_p4 = client.p4
+
+        with client.connect_pooled():
+            p4 = client.p4
+            self.assertIsNot(p4, orig_p4)
+
+        self.assertIs(client.p4, orig_p4)
+
+        with client.connect_pooled():
+            self.assertIs(client.p4, p4)
+
+        self.assertEqual(len(client.create_connection.calls), 1)
+
+    def test_connect_pooled_shared_between_clients(self):
+        """Testing PerforceClient.connect_pooled shares pools between
+        clients for the same repository
+        """
+        client2 = self.repository.get_scmtool().client
+
+        self.assertIs(get_perforce_connection_pool(self.client),
+                      get_perforce_connection_pool(client2))
+
+        self.repository.username = 'other-user'
+        client3 = self.repository.get_scmtool().client
+
+        self.assertIsNot(get_perforce_connection_pool(self.client),
+                         get_perforce_connection_pool(client3))
+
+    def test_connect_pooled_with_dropped_connection(self):
+        """Testing PerforceClient.connect_pooled replaces dropped
+        connections
+        """
+        client = self.client
+
+        with client.connect_pooled():
+            p4 = client.p4
+
+        p4.is_connected = False
+
+        with client.connect_pooled():
+            self.assertIsNot(client.p4, p4)
+
+        self.assertEqual(len(client.create_connection.calls), 2)
+
+    def test_acquire_with_idle_timeout(self):
+        """Testing PerforceConnectionPool.acquire closes expired idle
+        connections
+        """
+        pool = PerforceConnectionPool()
+        connection = pool.acquire(self.client)
+        pool.release(connection)
+
+        connection.last_used -= PerforceConnectionPool.IDLE_TIMEOUT_SECS + 1
+
+        new_connection = pool.acquire(self.client)
+        self.assertIsNot(new_connection, connection)
+        self.assertFalse(connection.p4.is_connected)
+
+    def test_acquire_with_health_check(self):
+        """Testing PerforceConnectionPool.acquire checks the health of
+        connections idle for a while
+        """
+        pool = PerforceConnectionPool()
+        connection = pool.acquire(self.client)
+        pool.release(connection)
+
+        self.assertIs(pool.acquire(self.client), connection)
+        self.assertEqual(connection.p4.num_info_calls, 0)
+        pool.release(connection)
+
+        connection.last_checked -= PerforceConnectionPool.HEALTH_CHECK_SECS + 1
+
+        self.assertIs(pool.acquire(self.client), connection)
+        self.assertEqual(connection.p4.num_info_calls, 1)
+
+    def test_release_with_closed_pool(self):
+        """Testing PerforceConnectionPool.release closes connections
+        released to a closed pool
+        """
+        pool = PerforceConnectionPool()
+        connection = pool.acquire(self.client)
+        pool.close()
+        pool.release(connection)
+
+        self.assertFalse(connection.p4.is_connected)
+        self.assertTrue(pool.is_unused)
+
+    def test_get_pool_sweeps_other_pools(self):
+        """Testing get_perforce_connection_pool closes expired connections
+        and discards unused pools for other configurations
+        """
+        with self.client.connect_pooled():
+            p4 = self.client.p4
+
+        pool = get_perforce_connection_pool(self.client)
+        pool._idle[0].last_used -= \
+            PerforceConnectionPool.IDLE_TIMEOUT_SECS + 1
+
+        self.repository.username = 'other-user'
+        client2 = self.repository.get_scmtool().client
+
+        perforce._connection_pools_last_sweep -= \
+            perforce.CONNECTION_POOL_SWEEP_SECS
+        get_perforce_connection_pool(client2)
+
+        self.assertFalse(p4.is_connected)
+        self.assertIsNot(get_perforce_connection_pool(self.client), pool)
+
+    def test_repository_saved_closes_pool(self):
+        """Testing saving a repository closes its pooled connections"""
+        self.repository.save()
+        client = self.repository.get_scmtool().client
+        self.spy_on(client.create_connection,
+                    call_fake=lambda client: PerforceConnection(
+                        DummyPooledP4()))
+
+        with client.connect_pooled():
+            p4 = client.p4
+
+        pool = get_perforce_connection_pool(client)
+        self.assertIn(self.repository.pk, pool.repository_ids)
+
+        self.repository.save()
+
+        self.assertFalse(p4.is_connected)
+        self.assertIsNot(get_perforce_connection_pool(client), pool)
+
+    def test_repository_deleted_closes_pool(self):
+        """Testing deleting a repository closes its pooled connections"""
+        self.repository.save()
+        client = self.repository.get_scmtool().client
+        self.spy_on(client.create_connection,
+                    call_fake=lambda client: PerforceConnection(
+                        DummyPooledP4()))
+
+        with client.connect_pooled():
+            p4 = client.p4
+
+        self.repository.delete()
+
+        self.assertFalse(p4.is_connected)
+
+    def test_check_refresh_ticket_shared(self):
+        """Testing PerforceConnectionPool.check_refresh_ticket only checks
+        periodically
+        """
+        self.repository.extra_data['use_ticket_auth'] = True
+        client = self.repository.get_scmtool().client
+
+        self.spy_on(client.create_connection,
+                    call_fake=lambda client: PerforceConnection(
+                        DummyPooledP4()))
+        self.spy_on(client.check_refresh_ticket, call_original=False)
+
+        with client.connect_pooled():
+            with client.connect_pooled():
+                pass
+
+        with client.connect_pooled():
+            pass
+
+        self.assertEqual(len(client.create_connection.calls), 2)
+        self.assertEqual(len(client.check_refresh_ticket.calls), 1)
+
+
+class PerforceBatchFetchTests(BasePerforceTestCase):
+    """Unit tests for batched file fetches in Perforce."""
+
+    fixtures = ['test_scmtools']
+
+    def setUp(self):
+        super(PerforceBatchFetchTests, self).setUp()
+
+        self.repository = Repository(name='Perforce.com',
+                                     path='p4.example.com:1666',
+                                     username='test-user',
+                                     password='test-pass',
+                                     tool=Tool.objects.get(name='Perforce'))
+        self.tool = self.repository.get_scmtool()
+        self.client = self.tool.client
+        self.p4 = DummyPooledP4()
+
+        self.spy_on(self.client.create_connection,
+                    call_fake=lambda client: PerforceConnection(self.p4))
+
+    def tearDown(self):
+        super(PerforceBatchFetchTests, self).tearDown()
+
+        close_perforce_connection_pools()
+
+    def test_get_files(self):
+        """Testing PerforceClient.get_files"""
+        self.p4.print_output = [
+            {
+                'depotFile': '//depot/a.c',
+                'rev': '2',
+                'type': 'text',
+            },
+            b'line 1\n',
+            b'line 2\n',
+            {
+                'depotFile': '//depot/b.png',
+                'rev': '7',
+                'type': 'binary',
+            },
+            b'\x89PNG',
+            {
+                'depotFile': '//depot/link',
+                'rev': '1',
+                'type': 'symlink',
+            },
+            b'target',
+        ]
+
+        files = self.client.get_files([
+            ('//depot/a.c', '2'),
+            ('//depot/b.png', 'HEAD'),
+            ('//depot/link', '1'),
+            ('//depot/missing.c', '3'),
+            ('//depot/new.c', 'PRE-CREATION'),
+        ])
+
+        self.assertEqual(files, {
+            ('//depot/a.c', '2'): b'line 1\nline 2\n',
+            ('//depot/b.png', 'HEAD'): b'\x89PNG',
+            ('//depot/link', '1'): b'',
+            ('//depot/new.c', 'PRE-CREATION'): b'',
+        })
+        self.assertEqual(self.p4.print_calls, [
+            ('//depot/a.c#2', '//depot/b.png', '//depot/link#1',
+             '//depot/missing.c#3'),
+        ])
+        self.assertEqual(len(self.client.create_connection.calls), 1)
+
+    def test_get_files_with_batches(self):
+        """Testing PerforceClient.get_files splits large requests into
+        batches
+        """
+        self.client.MAX_BATCH_FILES = 2
+
+        self.client.get_files([
+            ('//depot/a.c', '1'),
+            ('//depot/b.c', '2'),
+            ('//depot/c.c', '3'),
+        ])
+
+        self.assertEqual(self.p4.print_calls, [
+            ('//depot/a.c#1', '//depot/b.c#2'),
+            ('//depot/c.c#3',),
+        ])
+        self.assertEqual(len(self.client.create_connection.calls), 1)
+
+    def test_files_exist(self):
+        """Testing PerforceTool.files_exist"""
+        self.p4.fstat_output = [
+            {
+                'depotFile': '//depot/a.c',
+                'headRev': '2',
+            },
+            {
+                'depotFile': '//depot/b.c',
+                'headRev': '5',
+            },
+        ]
+
+        found = self.tool.files_exist([
+            ('//depot/a.c', '2'),
+            ('//depot/b.c', 'HEAD'),
+            ('//depot/c.c', '1'),
+            ('//depot/new.c', 'PRE-CREATION'),
+        ])
+
+        self.assertEqual(found, {
+            ('//depot/a.c', '2'),
+            ('//depot/b.c', 'HEAD'),
+        })
+        self.assertEqual(self.p4.fstat_calls, [
+            ('//depot/a.c#2', '//depot/b.c', '//depot/c.c#1'),
+        ])
+
+
 class PerforceStunnelTests(BasePerforceTestCase):
     """Unit tests for Perforce running through stunnel.
 
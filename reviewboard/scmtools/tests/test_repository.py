@@ -5,10 +5,12 @@ import os
 from django.contrib.auth.models import AnonymousUser
 from django.core.cache import cache
 from django.core.exceptions import ValidationError
+from djblets.cache.backend import make_cache_key
 from djblets.testing.decorators import add_fixtures
 from kgb import SpyAgency
 
 from reviewboard.scmtools.core import HEAD
+from reviewboard.scmtools.errors import SCMError
 from reviewboard.scmtools.models import Repository, Tool
 from reviewboard.scmtools.signals import (checked_file_exists,
                                           checking_file_exists,
@@ -276,6 +278,96 @@ class RepositoryTests(SpyAgency, TestCase):
         self.assertEqual(found_signals[1],
                          ('checked_file_exists', path, revision, request))
 
+    def test_prefetch_files(self):
+        """Testing Repository.prefetch_files caches files fetched in a batch"""
+        repository = self.repository
+        tool = self._get_batch_scmtool()
+
+        self.spy_on(tool.get_files,
+                    call_fake=lambda tool, files, **kwargs: {
+                        ('readme', 'e965047'): b'file data',
+                    })
+        self.spy_on(tool.get_file, call_original=False)
+
+        files = [
+            ('readme', 'e965047'),
+            ('missing', 'e965047'),
+        ]
+
+        self.assertEqual(repository.prefetch_files(files), 1)
+        self.assertSpyCalledWith(tool.get_files, files)
+
+        self.assertEqual(repository.get_file('readme', 'e965047'),
+                         b'file data')
+        self.assertTrue(repository.get_file_exists('readme', 'e965047'))
+        self.assertFalse(tool.get_file.called)
+
+        # Only the file that wasn't found should be fetched again.
+        repository.prefetch_files(files)
+
+        self.assertEqual(len(tool.get_files.calls), 2)
+        self.assertSpyLastCalledWith(tool.get_files,
+                                     [('missing', 'e965047')])
+
+    def test_prefetch_files_without_batch_support(self):
+        """Testing Repository.prefetch_files with an SCMTool that doesn't
+        support batched fetches
+        """
+        scmtool_cls = self.repository.scmtool_class
+
+        self.spy_on(scmtool_cls.get_files, owner=scmtool_cls)
+
+        self.assertEqual(
+            self.repository.prefetch_files([('readme', 'e965047')]),
+            0)
+        self.assertFalse(scmtool_cls.get_files.called)
+
+    def test_prefetch_files_with_error(self):
+        """Testing Repository.prefetch_files with an error fetching the
+        batch
+        """
+        def _get_files(tool, files, **kwargs):
+            raise SCMError('Oh no')
+
+        tool = self._get_batch_scmtool()
+        self.spy_on(tool.get_files, call_fake=_get_files)
+
+        self.assertEqual(
+            self.repository.prefetch_files([('readme', 'e965047')]),
+            0)
+        self.assertNotIn(
+            make_cache_key(self.repository._make_file_cache_key(
+                'readme', 'e965047', None)),
+            cache)
+
+    def test_prefetch_file_exists(self):
+        """Testing Repository.prefetch_file_exists caches files found in a
+        batch
+        """
+        repository = self.repository
+        tool = self._get_batch_scmtool()
+
+        self.spy_on(tool.files_exist,
+                    call_fake=lambda tool, files, **kwargs: {
+                        ('readme', 'e965047'),
+                    })
+        self.spy_on(tool.file_exists,
+                    call_fake=lambda *args, **kwargs: False)
+
+        files = [
+            ('readme', 'e965047'),
+            ('missing', 'e965047'),
+        ]
+
+        self.assertEqual(repository.prefetch_file_exists(files), 1)
+        self.assertSpyCalledWith(tool.files_exist, files)
+
+        self.assertTrue(repository.get_file_exists('readme', 'e965047'))
+        self.assertFalse(tool.file_exists.called)
+
+        self.assertFalse(repository.get_file_exists('missing', 'e965047'))
+        self.assertEqual(len(tool.file_exists.calls), 1)
+
     def test_repository_name_with_255_characters(self):
         """Testing Repository.name with 255 characters"""
         repository = self.create_repository(name='t' * 255)
@@ -410,3 +502,20 @@ class RepositoryTests(SpyAgency, TestCase):
 
         self.assertFalse(repository.is_accessible_by(user))
         self.assertFalse(repository.is_accessible_by(AnonymousUser()))
+
+    def _get_batch_scmtool(self):
+        """Return an SCMTool for the repository that supports batched fetches.
+
+        Returns:
+            reviewboard.scmtools.core.SCMTool:
+            The SCMTool instance, which will be returned for all calls to
+            :py:meth:`Repository.get_scmtool()
+            <reviewboard.scmtools.models.Repository.get_scmtool>`.
+        """
+        tool = self.repository.get_scmtool()
+        tool.supports_batch_file_fetch = True
+
+        self.spy_on(self.repository.get_scmtool,
+                    call_fake=lambda repository: tool)
+
+        return tool
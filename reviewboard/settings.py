@@ -70,6 +70,7 @@ USE_I18N = True
 MIDDLEWARE_CLASSES = [
     # Keep these first, in order
     'django.middleware.gzip.GZipMiddleware',
+    'reviewboard.admin.request_timing.RequestTimingMiddleware',
     'reviewboard.admin.middleware.InitReviewBoardMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
@@ -103,6 +104,10 @@ MIDDLEWARE_CLASSES = [
 ]
 RB_EXTRA_MIDDLEWARE_CLASSES = []
 
+# Whether to record timings for each request. This can be enabled in
+# settings_local.py to diagnose slow servers.
+REQUEST_TIMING_ENABLED = False
+
 SITE_ROOT_URLCONF = 'reviewboard.urls'
 ROOT_URLCONF = 'djblets.urls.root'
 
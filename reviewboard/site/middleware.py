@@ -5,6 +5,7 @@ from __future__ import unicode_literals
 from django.utils.functional import SimpleLazyObject
 from djblets.db.query import get_object_or_none
 
+from reviewboard.admin.request_timing import timed_middleware
 from reviewboard.site.models import LocalSite
 
 
@@ -18,6 +19,7 @@ class LocalSiteMiddleware(object):
     instead.
     """
 
+    @timed_middleware('local-site')
     def process_view(self, request, view_func, view_args, view_kwargs):
         """Process the request before calling the view.
 
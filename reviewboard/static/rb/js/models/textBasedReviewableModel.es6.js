@@ -14,11 +14,25 @@
  *     hasRenderedView (boolean):
  *         Whether or not the text has a rendered view, such as for Markdown,
  *         etc.
+ *
+ *     numLines (number):
+ *         The total number of lines in the source text. This is only set
+ *         when not showing a diff.
+ *
+ *     linesURL (string):
+ *         The URL used to load ranges of lines of the source text. This is
+ *         only set when not showing a diff.
+ *
+ *     linesWindowSize (number):
+ *         The number of lines to load from ``linesURL`` at a time.
  */
 RB.TextBasedReviewable = RB.FileAttachmentReviewable.extend({
     defaults: _.defaults({
         viewMode: 'source',
         hasRenderedView: false,
+        numLines: null,
+        linesURL: null,
+        linesWindowSize: 500,
     }, RB.FileAttachmentReviewable.prototype.defaults),
 
     commentBlockModel: RB.TextCommentBlock,
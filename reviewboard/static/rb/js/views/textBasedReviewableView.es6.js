@@ -25,6 +25,9 @@ RB.TextBasedReviewableView = RB.FileAttachmentReviewableView.extend({
         this._$renderedTable = null;
         this._textSelector = null;
         this._renderedSelector = null;
+        this._allLinesLoaded = true;
+        this._pendingCommentBlockViews = [];
+        this._pendingScrollLineNum = null;
 
         this.on('commentBlockViewAdded', this._placeCommentBlockView, this);
 
@@ -114,6 +117,14 @@ RB.TextBasedReviewableView = RB.FileAttachmentReviewableView.extend({
                           this._onRevisionSelected);
         }
 
+        /*
+         * This must happen before the router starts, so that any line being
+         * linked to will be scrolled to once it's loaded.
+         */
+        if (!this.model.get('diffRevision') && this.model.get('linesURL')) {
+            this._loadRemainingLines();
+        }
+
         const reviewURL = this.model.get('reviewRequest').get('reviewURL');
         const attachmentID = this.model.get('fileAttachmentID');
         Backbone.history.start({
@@ -121,6 +132,94 @@ RB.TextBasedReviewableView = RB.FileAttachmentReviewableView.extend({
         });
     },
 
+    /**
+     * Load the remaining lines of the source text.
+     *
+     * Only the first window of lines of a large file is rendered into the
+     * page. The remaining lines are loaded one window at a time and appended
+     * to the table, so the page is usable while they load. Any comments or
+     * scrolling waiting on those lines are then handled.
+     */
+    _loadRemainingLines() {
+        const tbody = this._$textTable[0].tBodies[0];
+        const firstLine = tbody.rows.length + 1;
+
+        if (firstLine > this.model.get('numLines')) {
+            this._onAllLinesLoaded();
+            return;
+        }
+
+        this._allLinesLoaded = false;
+
+        $.ajax(this.model.get('linesURL'), {
+            data: {
+                first: firstLine,
+                count: this.model.get('linesWindowSize'),
+            },
+            dataType: 'json',
+        })
+            .done(rsp => {
+                if (rsp.first_line !== firstLine || rsp.lines.length === 0) {
+                    this._onAllLinesLoaded();
+                    return;
+                }
+
+                const html = rsp.lines.map((line, i) => {
+                    const lineNum = firstLine + i;
+
+                    return `<tr line="${lineNum}"><th>${lineNum}</th>` +
+                           `<td class="l">${line}</td></tr>`;
+                });
+
+                $(tbody).append(html.join(''));
+
+                this._placePendingCommentBlockViews();
+                this._scrollToPendingLine();
+                this._loadRemainingLines();
+            })
+            .fail(() => this._onAllLinesLoaded());
+    },
+
+    /**
+     * Handle the completion of loading lines of the source text.
+     *
+     * Any comments or scrolling still waiting on lines will be handled with
+     * the lines that are available.
+     */
+    _onAllLinesLoaded() {
+        this._allLinesLoaded = true;
+        this._placePendingCommentBlockViews();
+        this._scrollToPendingLine();
+    },
+
+    /**
+     * Place any comment views that were waiting for their lines to load.
+     */
+    _placePendingCommentBlockViews() {
+        const commentBlockViews = this._pendingCommentBlockViews;
+        this._pendingCommentBlockViews = [];
+
+        commentBlockViews.forEach(
+            commentBlockView => this._placeCommentBlockView(commentBlockView));
+
+        if (commentBlockViews.length > 0) {
+            /* Cause all comments to recalculate their sizes. */
+            $(window).triggerHandler('resize');
+        }
+    },
+
+    /**
+     * Scroll to a line that was waiting to be loaded, if any.
+     */
+    _scrollToPendingLine() {
+        const lineNum = this._pendingScrollLineNum;
+
+        if (lineNum !== null) {
+            this._pendingScrollLineNum = null;
+            this._scrollToLine(lineNum);
+        }
+    },
+
     /**
      * Callback for when a new file revision is selected.
      *
@@ -168,9 +267,17 @@ RB.TextBasedReviewableView = RB.FileAttachmentReviewableView.extend({
      *         The line number to scroll to.
      */
     _scrollToLine(lineNum) {
-        const $table = this._getTableForViewMode(this.model.get('viewMode'));
+        const viewMode = this.model.get('viewMode');
+        const $table = this._getTableForViewMode(viewMode);
         const rows = $table[0].tBodies[0].rows;
 
+        if (viewMode === 'source' && !this._allLinesLoaded &&
+            lineNum > rows.length) {
+            /* Wait until the line has been loaded. */
+            this._pendingScrollLineNum = lineNum;
+            return;
+        }
+
         /* Normalize this to a valid row index. */
         lineNum = RB.MathUtils.clip(lineNum, 1, rows.length) - 1;
 
@@ -254,12 +361,19 @@ RB.TextBasedReviewableView = RB.FileAttachmentReviewableView.extend({
                 rowEls = rowSelector.getRowsForRange(beginLineNum, endLineNum);
             } else {
                 /*
-                 * Since we know we have the entire content of the text in one
-                 * list, we don't need to use getRowsForRange here, and instead
-                 * can look up the lines directly in the lists of rows.
+                 * Since we know the rows are in line order, we don't need to
+                 * use getRowsForRange here, and instead can look up the lines
+                 * directly in the lists of rows.
                  */
                 const rows = rowSelector.el.tBodies[0].rows;
 
+                if (viewMode === 'source' && !this._allLinesLoaded &&
+                    endLineNum > rows.length) {
+                    /* Wait until the lines have been loaded. */
+                    this._pendingCommentBlockViews.push(commentBlockView);
+                    return;
+                }
+
                 /* The line numbers are 1-based, so normalize for the rows. */
                 rowEls = [rows[beginLineNum - 1], rows[endLineNum - 1]];
             }
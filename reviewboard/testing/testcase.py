@@ -1114,6 +1114,11 @@ class TestCase(FixturesCompilerMixin, DjbletsTestCase):
                 last_updated=last_updated)
             review_request.last_updated = last_updated
 
+        if publish and last_updated:
+            # Keep the denormalized last activity in sync with the
+            # overridden timestamp.
+            review_request.update_last_activity()
+
         return review_request
 
     def create_review_request_draft(self, review_request):
@@ -1207,6 +1212,9 @@ class TestCase(FixturesCompilerMixin, DjbletsTestCase):
             Review.objects.filter(pk=review.pk).update(timestamp=timestamp)
             review.timestamp = timestamp
 
+            if publish:
+                review.review_request.update_last_activity()
+
         return review
 
     def create_review_group(self, name='test-group', with_local_site=False,
@@ -1282,6 +1290,9 @@ class TestCase(FixturesCompilerMixin, DjbletsTestCase):
             Review.objects.filter(pk=reply.pk).update(timestamp=timestamp)
             reply.timestamp = timestamp
 
+            if publish:
+                reply.review_request.update_last_activity()
+
         return reply
 
     def create_screenshot(self, review_request, caption='My caption',
@@ -8,9 +8,12 @@ from django.utils import six
 from djblets.staticbundles import (
     PIPELINE_JAVASCRIPT as DJBLETS_PIPELINE_JAVASCRIPT,
     PIPELINE_STYLESHEETS as DJBLETS_PIPELINE_STYLESHEETS)
+from kgb import SpyAgency
 
+import reviewboard
 from reviewboard.staticbundles import PIPELINE_JAVASCRIPT, PIPELINE_STYLESHEETS
 from reviewboard.testing import TestCase
+from reviewboard.warmup import warm_up
 
 
 class StaticBundlesTests(TestCase):
@@ -49,3 +52,18 @@ class StaticBundlesTests(TestCase):
         """Testing that all static stylesheet files exist"""
         self._check_file_groups(PIPELINE_STYLESHEETS,
                                 DJBLETS_PIPELINE_STYLESHEETS.keys())
+
+
+class WarmUpTests(SpyAgency, TestCase):
+    """Unit tests for reviewboard.warmup."""
+
+    def test_warm_up_with_initialize_error(self):
+        """Testing warm_up with an error initializing Review Board"""
+        def _initialize(*args, **kwargs):
+            raise Exception('Oh no')
+
+        self.spy_on(reviewboard.is_initialized, call_fake=lambda: False)
+        self.spy_on(reviewboard.initialize, call_fake=_initialize)
+
+        self.assertEqual(warm_up(), {})
+        self.assertTrue(reviewboard.initialize.called)
@@ -0,0 +1,157 @@
+"""Warm-up of Review Board before serving requests.
+
+Review Board initializes itself on the first request handled by each
+process, and populates many registries (hosting services, SCMTools, avatar
+services, authentication backends, URL patterns) the first time they're
+used. This makes the first requests handled by each new web server process
+slow.
+
+:py:func:`warm_up` does all of this up-front. When called from the WSGI
+script by a server that loads the application before forking its worker
+processes (such as ``gunicorn --preload``, or mod_wsgi with
+``WSGIImportScript``), the work is done once and shared by all workers.
+
+Running this module as a script (as ``rb-site profile-startup`` does) will
+print the time spent in each phase of a cold start, as JSON.
+"""
+
+from __future__ import print_function, unicode_literals
+
+import json
+import logging
+import time
+from collections import OrderedDict
+
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up():
+    """Initialize Review Board and populate its registries.
+
+    Database and cache connections opened while warming up are closed
+    afterward, so that they aren't shared by forked worker processes.
+
+    Errors are logged rather than raised, so that a failure (for instance,
+    the database being unavailable) doesn't keep the application from
+    loading. Anything not initialized here will be initialized on the first
+    request, as usual.
+
+    Returns:
+        collections.OrderedDict:
+        A mapping of warm-up phase names to the time spent in them, in
+        seconds. This doesn't include :py:func:`reviewboard.initialize`,
+        whose phases are available from
+        :py:func:`reviewboard.get_init_timings`.
+    """
+    from django.core.cache import cache
+    from django.db import connections
+
+    from reviewboard import initialize, is_initialized
+
+    timings = OrderedDict()
+
+    try:
+        if not is_initialized():
+            initialize()
+    except Exception as e:
+        logger.exception('Unable to initialize Review Board while warming '
+                         'up: %s',
+                         e)
+    else:
+        for name, func in (('hosting-services', _load_hosting_services),
+                           ('scmtools', _load_scmtools),
+                           ('auth-backends', _load_auth_backends),
+                           ('avatar-services', _load_avatar_services),
+                           ('url-patterns', _load_url_patterns)):
+            start = time.time()
+
+            try:
+                func()
+            except Exception as e:
+                logger.exception('Unable to warm up %s: %s', name, e)
+
+            timings[name] = time.time() - start
+
+    try:
+        connections.close_all()
+        cache.close()
+    except Exception as e:
+        logger.exception('Unable to close connections after warming up: %s',
+                         e)
+
+    return timings
+
+
+def measure_startup():
+    """Measure the time spent in each phase of a cold start.
+
+    This must be called in a new process, before Django or Review Board have
+    been set up.
+
+    Returns:
+        collections.OrderedDict:
+        A mapping of phase names to the time spent in them, in seconds.
+    """
+    start = time.time()
+
+    from django.conf import settings
+
+    # Accessing a setting loads the settings modules.
+    settings.INSTALLED_APPS
+
+    timings = OrderedDict()
+    timings['load-settings'] = time.time() - start
+
+    from reviewboard import get_init_timings
+
+    warm_up_timings = warm_up()
+    timings.update(get_init_timings())
+    timings.update(warm_up_timings)
+    timings['total'] = time.time() - start
+
+    return timings
+
+
+def _load_hosting_services():
+    """Populate the hosting services registry and their URL patterns."""
+    from reviewboard.hostingsvcs.service import get_hosting_services
+
+    get_hosting_services()
+
+
+def _load_scmtools():
+    """Import the SCMTool classes for all registered tools."""
+    from reviewboard.scmtools.models import Tool
+
+    for tool in Tool.objects.all():
+        try:
+            tool.get_scmtool_class()
+        except Exception as e:
+            # The tool's dependencies may not be installed.
+            logger.debug('Unable to load SCMTool %s: %s', tool.name, e)
+
+
+def _load_auth_backends():
+    """Load the enabled authentication backends."""
+    from reviewboard.accounts.backends import get_enabled_auth_backends
+
+    get_enabled_auth_backends()
+
+
+def _load_avatar_services():
+    """Populate the avatar services registry."""
+    from reviewboard.avatars import avatar_services
+
+    avatar_services.populate()
+
+
+def _load_url_patterns():
+    """Load and index all URL patterns."""
+    from django.core.urlresolvers import get_resolver
+
+    get_resolver(None).reverse_dict
+
+
+if __name__ == '__main__':
+    print(json.dumps(measure_startup()))
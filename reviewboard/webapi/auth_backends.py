@@ -7,6 +7,10 @@ from djblets.webapi.auth.backends.api_tokens import TokenAuthBackendMixin
 from djblets.webapi.auth.backends.oauth2_tokens import OAuth2TokenBackendMixin
 
 from reviewboard.accounts.backends import AuthBackend
+from reviewboard.webapi.auth_cache import (cache_api_token,
+                                           cache_oauth2_token,
+                                           get_cached_api_token,
+                                           get_cached_oauth2_token)
 from reviewboard.webapi.models import WebAPIToken
 
 
@@ -20,6 +24,41 @@ class TokenAuthBackend(TokenAuthBackendMixin, AuthBackend):
 
     api_token_model = WebAPIToken
 
+    def authenticate(self, token=None, **kwargs):
+        """Authenticate a user with an API token.
+
+        Validated tokens are cached for a short time (see
+        :py:mod:`reviewboard.webapi.auth_cache`), so that clients making many
+        requests don't need the token looked up each time.
+
+        Args:
+            token (unicode, optional):
+                The API token to authenticate with.
+
+            **kwargs (dict):
+                Other keyword arguments.
+
+        Returns:
+            django.contrib.auth.models.User:
+            The authenticated user, or ``None`` if the token was invalid.
+        """
+        if not token:
+            return None
+
+        webapi_token = get_cached_api_token(token)
+
+        if webapi_token is None:
+            user = super(TokenAuthBackend, self).authenticate(token=token,
+                                                              **kwargs)
+
+            if user is not None:
+                cache_api_token(user._webapi_token)
+        else:
+            user = webapi_token.user
+            user._webapi_token = webapi_token
+
+        return user
+
 
 class OAuth2TokenAuthBackend(OAuth2TokenBackendMixin, AuthBackend):
     """An OAuth2 token authentication backend that handles local sites.
@@ -29,8 +68,49 @@ class OAuth2TokenAuthBackend(OAuth2TokenBackendMixin, AuthBackend):
 
     * not limited to a local site; or
     * limited to the local site being requested.
+
+    Validated access tokens are cached for a short time (see
+    :py:mod:`reviewboard.webapi.auth_cache`).
     """
 
+    def authenticate(self, **credentials):
+        """Authenticate a request with an OAuth2 access token.
+
+        Args:
+            **credentials (dict):
+                The credentials for authentication. This must contain a
+                ``request`` key.
+
+        Returns:
+            django.contrib.auth.models.User:
+            The authenticated user, or ``None`` if the token was invalid.
+        """
+        request = credentials.get('request')
+
+        if request is None:
+            return None
+
+        token = self._get_bearer_token(request)
+
+        if token:
+            access_token = get_cached_oauth2_token(token)
+
+            if (access_token is not None and
+                not access_token.is_expired() and
+                self._is_local_site_match(request,
+                                          access_token.application)):
+                request._oauth2_token = access_token
+                request.session['oauth2_token_id'] = access_token.pk
+
+                return access_token.user
+
+        user = super(OAuth2TokenAuthBackend, self).authenticate(**credentials)
+
+        if user is not None and token:
+            cache_oauth2_token(request._oauth2_token)
+
+        return user
+
     def verify_request(self, request, token, user):
         """Ensure the given authentication request is valid.
 
@@ -58,10 +138,45 @@ class OAuth2TokenAuthBackend(OAuth2TokenBackendMixin, AuthBackend):
         """
         application = token.application
         return (application.enabled and
-                application.local_site == request.local_site and
+                self._is_local_site_match(request, application) and
                 (not application.local_site or
                  application.local_site.is_accessible_by(user)))
 
+    def _get_bearer_token(self, request):
+        """Return the bearer token provided in a request.
+
+        Args:
+            request (django.http.HttpRequest):
+                The current HTTP request.
+
+        Returns:
+            unicode:
+            The bearer token, or ``None`` if one wasn't provided.
+        """
+        parts = request.META.get('HTTP_AUTHORIZATION', '').split(' ', 1)
+
+        if len(parts) == 2 and parts[0].lower() == 'bearer':
+            return parts[1].strip() or None
+
+        return None
+
+    def _is_local_site_match(self, request, application):
+        """Return whether an application may be used for a request.
+
+        Args:
+            request (django.http.HttpRequest):
+                The current HTTP request.
+
+            application (reviewboard.oauth.models.Application):
+                The application the access token belongs to.
+
+        Returns:
+            bool:
+            Whether the application is associated with the Local Site being
+            requested (or neither has a Local Site).
+        """
+        return application.local_site == getattr(request, 'local_site', None)
+
 
 class WebAPIBasicAuthBackend(DjbletsWebAPIBasicAuthBackend):
     """A specialized WebAPI Basic auth backend that supports e-mail addresses.
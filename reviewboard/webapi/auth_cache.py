@@ -0,0 +1,241 @@
+"""Caching of validated API tokens and OAuth2 access tokens.
+
+Clients authenticating to the API with a token would otherwise have the
+token, its user, and (for OAuth2) its application and Local Site looked up
+in the database on every request. Once validated, tokens are cached for
+:py:data:`TOKEN_CACHE_EXPIRATION_SECS`.
+
+Cached tokens are invalidated when they're changed or deleted. Changes that
+may affect many tokens at once (to users, OAuth2 applications, or Local
+Sites) invalidate all cached tokens.
+"""
+
+from __future__ import unicode_literals
+
+import hashlib
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from djblets.cache.backend import make_cache_key
+from oauth2_provider.models import AccessToken
+
+from reviewboard.oauth.models import Application
+from reviewboard.site.models import LocalSite
+from reviewboard.webapi.models import WebAPIToken
+
+
+#: The number of seconds that validated tokens are cached for.
+TOKEN_CACHE_EXPIRATION_SECS = 60
+
+
+_GENERATION_KEY = 'webapi-auth-token-generation'
+
+
+def get_cached_api_token(token):
+    """Return a cached, validated API token.
+
+    Args:
+        token (unicode):
+            The value of the token provided by the client.
+
+    Returns:
+        reviewboard.webapi.models.WebAPIToken:
+        The API token, with its user loaded, or ``None`` if it's not cached.
+    """
+    return _get_cached_token('api', token)
+
+
+def cache_api_token(webapi_token):
+    """Cache a validated API token.
+
+    Args:
+        webapi_token (reviewboard.webapi.models.WebAPIToken):
+            The API token, with its user loaded.
+    """
+    _cache_token('api', webapi_token.token, webapi_token,
+                 TOKEN_CACHE_EXPIRATION_SECS)
+
+
+def get_cached_oauth2_token(token):
+    """Return a cached, validated OAuth2 access token.
+
+    Args:
+        token (unicode):
+            The value of the token provided by the client.
+
+    Returns:
+        oauth2_provider.models.AccessToken:
+        The access token, with its user, application and the application's
+        Local Site loaded, or ``None`` if it's not cached.
+    """
+    return _get_cached_token('oauth2', token)
+
+
+def cache_oauth2_token(access_token):
+    """Cache a validated OAuth2 access token.
+
+    The token won't be cached past its expiration.
+
+    Args:
+        access_token (oauth2_provider.models.AccessToken):
+            The access token, with its user, application and the
+            application's Local Site loaded.
+    """
+    expiration = min(
+        TOKEN_CACHE_EXPIRATION_SECS,
+        int((access_token.expires - timezone.now()).total_seconds()))
+
+    if expiration > 0:
+        _cache_token('oauth2', access_token.token, access_token, expiration)
+
+
+def invalidate_cached_tokens():
+    """Invalidate all cached tokens."""
+    key = make_cache_key(_GENERATION_KEY)
+
+    try:
+        cache.incr(key)
+    except ValueError:
+        # The generation doesn't exist yet (or was evicted). Any cached
+        # tokens were stored with a different generation.
+        cache.add(key, 1, None)
+
+
+def connect_signals():
+    """Begin invalidating cached tokens as they and their owners change."""
+    for sender in (WebAPIToken, AccessToken):
+        post_save.connect(_on_token_changed, sender=sender,
+                          dispatch_uid='webapi-auth-cache-token-saved')
+        post_delete.connect(_on_token_changed, sender=sender,
+                            dispatch_uid='webapi-auth-cache-token-deleted')
+
+    post_save.connect(_on_user_saved, sender=User,
+                      dispatch_uid='webapi-auth-cache-user-saved')
+
+    for sender in (User, Application, LocalSite):
+        post_delete.connect(_on_owner_changed, sender=sender,
+                            dispatch_uid='webapi-auth-cache-owner-deleted')
+
+    for sender in (Application, LocalSite):
+        post_save.connect(_on_owner_changed, sender=sender,
+                          dispatch_uid='webapi-auth-cache-owner-saved')
+
+    m2m_changed.connect(_on_owner_changed, sender=LocalSite.users.through,
+                        dispatch_uid='webapi-auth-cache-local-site-users')
+
+
+def _get_cached_token(token_type, token):
+    """Return a cached token.
+
+    Args:
+        token_type (unicode):
+            The type of token (``api`` or ``oauth2``).
+
+        token (unicode):
+            The value of the token provided by the client.
+
+    Returns:
+        object:
+        The cached token instance, or ``None`` if it's not cached or was
+        invalidated.
+    """
+    generation_key = make_cache_key(_GENERATION_KEY)
+    token_key = _make_token_key(token_type, token)
+    values = cache.get_many([generation_key, token_key])
+    entry = values.get(token_key)
+
+    if (entry is None or
+        entry['generation'] != values.get(generation_key, 0)):
+        return None
+
+    return entry['instance']
+
+
+def _cache_token(token_type, token, instance, expiration):
+    """Cache a validated token.
+
+    Args:
+        token_type (unicode):
+            The type of token (``api`` or ``oauth2``).
+
+        token (unicode):
+            The value of the token.
+
+        instance (object):
+            The token instance to cache.
+
+        expiration (int):
+            The number of seconds to cache the token for.
+    """
+    cache.set(
+        _make_token_key(token_type, token),
+        {
+            'generation': cache.get(make_cache_key(_GENERATION_KEY), 0),
+            'instance': instance,
+        },
+        expiration)
+
+
+def _make_token_key(token_type, token):
+    """Return the cache key for a token.
+
+    The token is hashed, so that it isn't exposed in the cache's keys.
+
+    Args:
+        token_type (unicode):
+            The type of token (``api`` or ``oauth2``).
+
+        token (unicode):
+            The value of the token.
+
+    Returns:
+        unicode:
+        The cache key.
+    """
+    return make_cache_key('webapi-auth-token-%s-%s'
+                          % (token_type,
+                             hashlib.sha256(force_bytes(token)).hexdigest()))
+
+
+def _on_token_changed(instance, **kwargs):
+    """Invalidate a token when it's changed or deleted.
+
+    Args:
+        instance (object):
+            The API token or OAuth2 access token.
+
+        **kwargs (dict):
+            Additional keyword arguments from the signal.
+    """
+    for token_type in ('api', 'oauth2'):
+        cache.delete(_make_token_key(token_type, instance.token))
+
+
+def _on_user_saved(update_fields=None, **kwargs):
+    """Invalidate all tokens when a user changes.
+
+    Users may have been deactivated. Updates that only change the user's
+    last login time (such as those made when logging in) are ignored.
+
+    Args:
+        update_fields (frozenset, optional):
+            The fields that were updated.
+
+        **kwargs (dict):
+            Additional keyword arguments from the signal.
+    """
+    if not update_fields or set(update_fields) != {'last_login'}:
+        invalidate_cached_tokens()
+
+
+def _on_owner_changed(**kwargs):
+    """Invalidate all tokens when something that tokens depend on changes.
+
+    Args:
+        **kwargs (dict):
+            Keyword arguments from the signal.
+    """
+    invalidate_cached_tokens()
@@ -3,6 +3,7 @@ from __future__ import unicode_literals
 import copy
 import json
 import logging
+import threading
 
 from django.utils import six
 from django.utils.encoding import force_text
@@ -32,6 +33,7 @@ from reviewboard.webapi.decorators import (webapi_check_local_site,
                                            webapi_check_login_required)
 from reviewboard.webapi.errors import READ_ONLY_ERROR
 from reviewboard.webapi.models import WebAPIToken
+from reviewboard.webapi.token_policy import get_compiled_policy
 
 
 CUSTOM_MIMETYPE_BASE = 'application/vnd.reviewboard.org'
@@ -40,6 +42,10 @@ PRIVATE_KEY_PREFIX = '__'
 NOT_CALLABLE = 'not_callable'
 
 
+#: The request whose API token policy is being checked in this thread.
+_token_policy_state = threading.local()
+
+
 class ExtraDataAccessLevel(object):
     """Various access levels for ``extra_data`` fields.
 
@@ -128,6 +134,79 @@ class RBResourceMixin(APIQueryUtilsMixin, ResourceAPITokenMixin,
     #: enabled, the resource will return a 403 Forbidden error.
     required_features = []
 
+    def call_method_view(self, request, method, view, *args, **kwargs):
+        """Call the API method handler.
+
+        This makes the request available to
+        :py:meth:`is_resource_method_allowed` while the token's access
+        policy is checked.
+
+        Args:
+            request (django.http.HttpRequest):
+                The current HTTP request.
+
+            method (unicode):
+                The HTTP method.
+
+            view (callable):
+                The view.
+
+            *args (tuple):
+                Additional positional arguments.
+
+            **kwargs (dict):
+                Additional keyword arguments.
+
+        Returns:
+            WebAPIError or tuple:
+            Either a 403 Forbidden error or the result of calling the method
+            view.
+        """
+        old_request = getattr(_token_policy_state, 'request', None)
+        _token_policy_state.request = request
+
+        try:
+            return super(RBResourceMixin, self).call_method_view(
+                request, method, view, *args, **kwargs)
+        finally:
+            _token_policy_state.request = old_request
+
+    def is_resource_method_allowed(self, resources_policy, method,
+                                   resource_id):
+        """Return whether a method can be performed on a resource.
+
+        This makes the same decision as
+        :py:class:`~djblets.webapi.resources.mixins.api_tokens.
+        ResourceAPITokenMixin`, using the compiled policy for the request's
+        API token (see :py:mod:`reviewboard.webapi.token_policy`) instead of
+        scanning the policy.
+
+        Args:
+            resources_policy (dict):
+                The ``resources`` section of the token's policy.
+
+            method (unicode):
+                The HTTP method.
+
+            resource_id (unicode):
+                The ID of the object being accessed, if any.
+
+        Returns:
+            bool:
+            Whether the method is allowed.
+        """
+        request = getattr(_token_policy_state, 'request', None)
+        webapi_token = getattr(request, '_webapi_token', None)
+
+        if (webapi_token is not None and
+            (webapi_token.policy or {}).get('resources') is
+            resources_policy):
+            return get_compiled_policy(webapi_token).is_allowed(
+                self.policy_id, method, resource_id)
+
+        return super(RBResourceMixin, self).is_resource_method_allowed(
+            resources_policy, method, resource_id)
+
 
 class WebAPIResource(RBResourceMixin, DjbletsWebAPIResource):
     """A specialization of the Djblets WebAPIResource for Review Board."""
@@ -1,6 +1,7 @@
 from __future__ import unicode_literals
 
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 from djblets.webapi.models import BaseWebAPIToken
 
@@ -21,6 +22,22 @@ class WebAPIToken(BaseWebAPIToken):
     local_site = models.ForeignKey(LocalSite, related_name='webapi_tokens',
                                    blank=True, null=True)
 
+    def save(self, *args, **kwargs):
+        """Save the token.
+
+        The token's last updated time will be set to the current time.
+
+        Args:
+            *args (tuple):
+                Positional arguments to pass to the parent method.
+
+            **kwargs (dict):
+                Keyword arguments to pass to the parent method.
+        """
+        self.last_updated = timezone.now()
+
+        super(WebAPIToken, self).save(*args, **kwargs)
+
     @classmethod
     def get_root_resource(self):
         from reviewboard.webapi.resources import resources
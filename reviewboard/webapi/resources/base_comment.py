@@ -462,7 +462,7 @@ class BaseCommentResource(MarkdownFieldsMixin, WebAPIResource):
         comment.save(update_fields=['issue_status'])
 
         last_activity_time = \
-            review_request.get_last_activity_info()['timestamp']
+            review_request.get_last_activity()['timestamp']
 
         return 200, {
             comment_resource.item_result_key: comment,
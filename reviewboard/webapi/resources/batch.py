@@ -0,0 +1,415 @@
+from __future__ import unicode_literals
+
+import io
+import json
+import logging
+
+from django.core.handlers.wsgi import WSGIRequest
+from django.core.urlresolvers import Resolver404, resolve
+from django.utils import six
+from django.utils.encoding import force_str, force_text
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import urlencode
+from django.utils.six.moves.urllib.parse import urlparse
+from djblets.db.query import get_object_or_none
+from djblets.webapi.decorators import (webapi_request_fields,
+                                       webapi_response_errors)
+from djblets.webapi.errors import (INVALID_FORM_DATA, NOT_LOGGED_IN,
+                                   PERMISSION_DENIED)
+from djblets.webapi.fields import StringFieldType
+from djblets.webapi.resources.base import \
+    WebAPIResource as DjbletsWebAPIResource
+
+from reviewboard.site.models import LocalSite
+from reviewboard.webapi.base import WebAPIResource
+from reviewboard.webapi.decorators import (webapi_check_local_site,
+                                           webapi_check_login_required)
+
+
+logger = logging.getLogger(__name__)
+
+
+class BatchResource(WebAPIResource):
+    """Performs several API requests in a single HTTP request.
+
+    Clients that need many resources at once (for instance, a review request,
+    its diffs, and the diffs' files and comments) can post a list of requests
+    to this resource, instead of making each request separately. The
+    requests are performed in order, and the responses are returned together.
+
+    Each request is made with the same authentication as the batch, and is
+    subject to the same permission checks, API token policies and OAuth2
+    scopes as it would be if made separately. Objects fetched by one
+    ``GET`` request are reused by later ones in the batch, until a request
+    modifies data.
+
+    The ``requests`` field is a JSON-encoded list of requests, each with
+    the following keys:
+
+    ``path`` (required):
+        The path to the API resource, as found in the resource's links,
+        including any query string.
+
+    ``method``:
+        The HTTP method (``GET``, ``POST``, ``PUT`` or ``DELETE``). This
+        defaults to ``GET``.
+
+    ``data``:
+        A dictionary of form fields to send, for ``POST`` and ``PUT``
+        requests.
+
+    ``id``:
+        A value identifying the request, which will be included in its
+        response.
+
+    Each response in ``responses`` contains the HTTP ``status`` code, the
+    decoded JSON ``body`` (if any), the ``etag`` and ``location`` headers
+    (if set), and the request's ``id`` (if provided).
+    """
+
+    added_in = '4.0'
+
+    name = 'batch'
+    singleton = True
+    allowed_methods = ('GET', 'POST')
+
+    #: The maximum number of requests that can be made in a batch.
+    max_requests = 50
+
+    #: The HTTP methods that requests in a batch can use.
+    request_methods = ('GET', 'POST', 'PUT', 'DELETE')
+
+    #: Request headers that apply only to the batch, and not its requests.
+    _batch_only_headers = (
+        'CONTENT_LENGTH',
+        'CONTENT_TYPE',
+        'HTTP_AUTHORIZATION',
+        'HTTP_IF_MODIFIED_SINCE',
+        'HTTP_IF_NONE_MATCH',
+    )
+
+    def call_method_view(self, request, method, view, *args, **kwargs):
+        """Call the given method view.
+
+        A batch doesn't access or modify anything itself, so API token
+        policies, OAuth2 scopes and read-only mode aren't checked for the
+        batch. They're checked for each request in the batch instead.
+
+        Args:
+            request (django.http.HttpRequest):
+                The current HTTP request.
+
+            method (unicode):
+                The HTTP method.
+
+            view (callable):
+                The view.
+
+            *args (tuple):
+                Additional positional arguments.
+
+            **kwargs (dict):
+                Additional keyword arguments.
+
+        Returns:
+            WebAPIError or tuple:
+            The result of calling the method view.
+        """
+        return view(request, *args, **kwargs)
+
+    @webapi_check_local_site
+    @webapi_check_login_required
+    def get(self, request, *args, **kwargs):
+        """Returns information on making batch requests.
+
+        This contains the maximum number of requests that can be made in a
+        single batch.
+        """
+        return 200, {
+            self.name: {
+                'max_requests': self.max_requests,
+                'links': self.get_links(request=request, *args, **kwargs),
+            },
+        }
+
+    @webapi_check_local_site
+    @webapi_check_login_required
+    @webapi_response_errors(INVALID_FORM_DATA, NOT_LOGGED_IN,
+                            PERMISSION_DENIED)
+    @webapi_request_fields(
+        required={
+            'requests': {
+                'type': StringFieldType,
+                'description': 'The list of requests to perform, encoded '
+                               'as a JSON string.',
+            },
+        }
+    )
+    def create(self, request, requests, *args, **kwargs):
+        """Performs a batch of API requests.
+
+        The requests are performed in order. A failed request won't stop
+        later requests from being performed, and won't undo changes made by
+        earlier requests.
+
+        The response contains a ``responses`` list, with the response to
+        each request in the same order as the requests.
+        """
+        try:
+            batch = self._parse_requests(request, requests)
+        except ValueError as e:
+            return INVALID_FORM_DATA, {
+                'fields': {
+                    'requests': [six.text_type(e)],
+                },
+            }
+
+        local_sites = {
+            getattr(request, '_local_site_name', None):
+                getattr(request, 'local_site', None),
+        }
+        object_caches = {}
+        responses = []
+
+        for sub_request_info in batch:
+            local_site_name = \
+                sub_request_info['match'].kwargs.get('local_site_name')
+
+            if local_site_name not in local_sites:
+                local_sites[local_site_name] = \
+                    self._get_lazy_local_site(local_site_name)
+
+            sub_request = self._build_sub_request(
+                request,
+                sub_request_info,
+                local_site_name=local_site_name,
+                local_site=local_sites[local_site_name],
+                object_cache=object_caches.setdefault(local_site_name, {}))
+
+            responses.append(self._run_sub_request(sub_request,
+                                                   sub_request_info))
+
+            if sub_request_info['method'] != 'GET':
+                # Objects fetched so far may have been modified.
+                object_caches.clear()
+
+        return 200, {
+            'responses': responses,
+        }
+
+    def _parse_requests(self, request, requests):
+        """Parse and validate the list of requests in a batch.
+
+        Args:
+            request (django.http.HttpRequest):
+                The HTTP request for the batch.
+
+            requests (unicode):
+                The JSON-encoded list of requests.
+
+        Returns:
+            list of dict:
+            Information on each request, with ``method``, ``path``,
+            ``query``, ``data``, ``id`` and ``match`` keys.
+
+        Raises:
+            ValueError:
+                The list of requests was invalid.
+        """
+        try:
+            requests = json.loads(requests)
+        except ValueError as e:
+            raise ValueError('The list of requests is not valid JSON: %s' % e)
+
+        if not isinstance(requests, list):
+            raise ValueError('The requests must be a list.')
+
+        if len(requests) > self.max_requests:
+            raise ValueError('No more than %d requests can be made in a '
+                             'batch.' % self.max_requests)
+
+        script_name = request.META.get('SCRIPT_NAME', '')
+        batch = []
+
+        for i, sub_request in enumerate(requests):
+            if (not isinstance(sub_request, dict) or
+                not isinstance(sub_request.get('path'), six.string_types)):
+                raise ValueError('Request %d must be a dictionary with a '
+                                 '"path" key.' % i)
+
+            method = sub_request.get('method', 'GET')
+
+            if method not in self.request_methods:
+                raise ValueError('Request %d has an unsupported method '
+                                 '"%s".' % (i, method))
+
+            data = sub_request.get('data') or {}
+
+            if not isinstance(data, dict):
+                raise ValueError('The data for request %d must be a '
+                                 'dictionary.' % i)
+
+            url = urlparse(sub_request['path'])
+            path = url.path
+
+            if script_name and path.startswith(script_name):
+                path = path[len(script_name):]
+
+            try:
+                match = resolve(path)
+            except Resolver404:
+                match = None
+
+            if (match is None or
+                not isinstance(match.func, DjbletsWebAPIResource) or
+                isinstance(match.func, BatchResource)):
+                raise ValueError('Request %d is not for an API resource.'
+                                 % i)
+
+            batch.append({
+                'method': method,
+                'path': path,
+                'query': url.query,
+                'data': data,
+                'id': sub_request.get('id'),
+                'match': match,
+            })
+
+        return batch
+
+    def _build_sub_request(self, request, sub_request_info, local_site_name,
+                           local_site, object_cache):
+        """Build the HTTP request for a request in a batch.
+
+        The request shares the batch's user, session and API token, and
+        skips all middleware.
+
+        Args:
+            request (django.http.HttpRequest):
+                The HTTP request for the batch.
+
+            sub_request_info (dict):
+                Information on the request, from :py:meth:`_parse_requests`.
+
+            local_site_name (unicode):
+                The name of the Local Site being accessed, if any.
+
+            local_site (reviewboard.site.models.LocalSite):
+                The Local Site being accessed, if any.
+
+            object_cache (dict):
+                The cache of objects fetched by earlier requests for the
+                Local Site.
+
+        Returns:
+            django.core.handlers.wsgi.WSGIRequest:
+            The HTTP request.
+        """
+        data = sub_request_info['data']
+
+        if data:
+            body = urlencode(data, doseq=True).encode('utf-8')
+        else:
+            body = b''
+
+        environ = dict(
+            (key, value)
+            for key, value in six.iteritems(request.META)
+            if key not in self._batch_only_headers
+        )
+        environ.update({
+            str('REQUEST_METHOD'): str(sub_request_info['method']),
+            str('PATH_INFO'): force_str(sub_request_info['path']),
+            str('QUERY_STRING'): force_str(sub_request_info['query']),
+            str('CONTENT_TYPE'): str('application/x-www-form-urlencoded'),
+            str('CONTENT_LENGTH'): str(len(body)),
+            str('HTTP_ACCEPT'): str('application/json'),
+            str('wsgi.input'): io.BytesIO(body),
+        })
+
+        sub_request = WSGIRequest(environ)
+        sub_request.user = request.user
+        sub_request.session = request.session
+        sub_request.resolver_match = sub_request_info['match']
+        sub_request._local_site_name = local_site_name
+        sub_request.local_site = local_site
+        sub_request._djblets_webapi_object_cache = object_cache
+
+        for attr in ('_webapi_token', '_oauth2_token'):
+            if hasattr(request, attr):
+                setattr(sub_request, attr, getattr(request, attr))
+
+        return sub_request
+
+    def _run_sub_request(self, sub_request, sub_request_info):
+        """Perform a request in a batch.
+
+        Args:
+            sub_request (django.http.HttpRequest):
+                The HTTP request.
+
+            sub_request_info (dict):
+                Information on the request, from :py:meth:`_parse_requests`.
+
+        Returns:
+            dict:
+            The serialized response.
+        """
+        match = sub_request_info['match']
+        result = {}
+
+        if sub_request_info['id'] is not None:
+            result['id'] = sub_request_info['id']
+
+        try:
+            response = match.func(sub_request, *match.args, **match.kwargs)
+        except Exception as e:
+            logger.exception('Unexpected error performing batch request '
+                             '%s %s: %s',
+                             sub_request_info['method'],
+                             sub_request_info['path'], e,
+                             request=sub_request)
+            result['status'] = 500
+
+            return result
+
+        result['status'] = response.status_code
+
+        for header in ('ETag', 'Location'):
+            if response.has_header(header):
+                result[header.lower()] = response[header]
+
+        if not response.streaming and response.content:
+            content = force_text(response.content)
+
+            try:
+                result['body'] = json.loads(content)
+            except ValueError:
+                result['body'] = content
+
+        return result
+
+    def _get_lazy_local_site(self, local_site_name):
+        """Return the Local Site for requests in a batch.
+
+        This matches what
+        :py:class:`~reviewboard.site.middleware.LocalSiteMiddleware` sets
+        for requests.
+
+        Args:
+            local_site_name (unicode):
+                The name of the Local Site, if any.
+
+        Returns:
+            django.utils.functional.SimpleLazyObject:
+            The Local Site, fetched when first accessed, or ``None`` if no
+            Local Site name was provided.
+        """
+        if local_site_name:
+            return SimpleLazyObject(
+                lambda: get_object_or_none(LocalSite, name=local_site_name))
+
+        return None
+
+
+batch_resource = BatchResource()
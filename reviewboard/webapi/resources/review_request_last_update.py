@@ -3,14 +3,17 @@ from __future__ import unicode_literals
 from django.core.exceptions import ObjectDoesNotExist
 from django.http import HttpResponseNotModified
 from django.utils.translation import ugettext as _
-from djblets.util.http import encode_etag, etag_if_none_match
+from djblets.siteconfig.models import SiteConfiguration
+from djblets.util.http import etag_if_none_match
+from djblets.webapi.decorators import webapi_request_fields
 from djblets.webapi.errors import DOES_NOT_EXIST
 from djblets.webapi.fields import (ChoiceFieldType,
                                    DateTimeFieldType,
+                                   IntFieldType,
                                    StringFieldType)
 
-from reviewboard.diffviewer.models import DiffSet
-from reviewboard.reviews.models import Review, ReviewRequest
+from reviewboard.reviews.last_update import (get_last_update_info,
+                                             wait_for_last_update)
 from reviewboard.webapi.base import WebAPIResource
 from reviewboard.webapi.decorators import (webapi_check_local_site,
                                            webapi_check_login_required)
@@ -21,7 +24,8 @@ class ReviewRequestLastUpdateResource(WebAPIResource):
     """Provides information on the last update made to a review request.
 
     Clients can periodically poll this to see if any new updates have been
-    made.
+    made, or wait for the next update using the ``wait`` parameter (if the
+    server allows it).
     """
 
     name = 'last_update'
@@ -57,9 +61,30 @@ class ReviewRequestLastUpdateResource(WebAPIResource):
         },
     }
 
+    #: The maximum number of seconds a client may wait for an update.
+    MAX_WAIT_SECS = 30
+
     @webapi_check_login_required
     @webapi_check_local_site
-    def get(self, request, *args, **kwargs):
+    @webapi_request_fields(
+        optional={
+            'wait': {
+                'type': IntFieldType,
+                'description': 'The number of seconds to wait for a new '
+                               'update, if the request contains an '
+                               '``If-None-Match`` header matching the '
+                               'current update. The response will be sent '
+                               'as soon as there is a new update, or with '
+                               'a :http:`304` once the time has passed. '
+                               'This is capped at 30 seconds. This is '
+                               'ignored unless waiting has been enabled '
+                               'on the server.',
+                'added_in': '4.0',
+            },
+        },
+        allow_unknown=True
+    )
+    def get(self, request, wait=None, *args, **kwargs):
         """Returns the last update made to the review request.
 
         This shows the type of update that was made, the user who made the
@@ -70,6 +95,15 @@ class ReviewRequestLastUpdateResource(WebAPIResource):
         This does not take into account changes to a draft review request, as
         that's generally not update information that the owner of the draft is
         interested in. Only public updates are represented.
+
+        Clients that already know about the latest update can pass its ETag
+        in ``If-None-Match`` along with ``wait`` to be notified of the next
+        update as soon as it happens, rather than polling repeatedly.
+
+        Each waiting client holds on to a server thread or process, so
+        waiting is only performed if the server has been configured to allow
+        it. Otherwise, ``wait`` is ignored and the response is sent
+        immediately.
         """
         try:
             review_request = \
@@ -81,60 +115,29 @@ class ReviewRequestLastUpdateResource(WebAPIResource):
                                                                review_request):
             return self.get_no_access_error(request)
 
-        info = review_request.get_last_activity_info()
-        timestamp = info['timestamp']
-        updated_object = info['updated_object']
-        changedesc = info['changedesc']
+        siteconfig = SiteConfiguration.objects.get_current()
 
-        etag = encode_etag('%s:%s' % (timestamp, updated_object.pk))
+        if (wait and wait > 0 and
+            'HTTP_IF_NONE_MATCH' in request.META and
+            siteconfig.get('webapi_last_update_wait_enabled')):
+            info = wait_for_last_update(
+                review_request,
+                etag=request.META['HTTP_IF_NONE_MATCH'],
+                timeout=min(wait, self.MAX_WAIT_SECS))
+        else:
+            info = get_last_update_info(review_request)
+
+        etag = info['etag']
 
         if etag_if_none_match(request, etag):
             return HttpResponseNotModified()
 
-        summary = None
-        update_type = None
-        user = None
-
-        if isinstance(updated_object, ReviewRequest):
-            if updated_object.status == ReviewRequest.SUBMITTED:
-                summary = _('Review request submitted')
-            elif updated_object.status == ReviewRequest.DISCARDED:
-                summary = _('Review request discarded')
-            else:
-                summary = _('Review request updated')
-
-            update_type = 'review-request'
-        elif isinstance(updated_object, DiffSet):
-            summary = _('Diff updated')
-            update_type = 'diff'
-        elif isinstance(updated_object, Review):
-            if updated_object.is_reply():
-                summary = _('New reply')
-                update_type = 'reply'
-            else:
-                summary = _('New review')
-                update_type = 'review'
-
-            user = updated_object.user
-        else:
-            # Should never be able to happen. The object will always at least
-            # be a ReviewRequest.
-            assert False
-
-        if changedesc:
-            user = changedesc.get_user(review_request)
-        elif user is None:
-            # There is no changedesc which means this review request hasn't
-            # been changed since it was first published, so this change must
-            # be due to the original submitter.
-            user = review_request.submitter
-
         return 200, {
             self.item_result_key: {
-                'timestamp': timestamp,
-                'user': user,
-                'summary': summary,
-                'type': update_type,
+                'timestamp': info['timestamp'],
+                'user': info['user'],
+                'summary': _(info['summary']),
+                'type': info['type'],
             }
         }, {
             'ETag': etag,
@@ -26,6 +26,7 @@ class RootResource(WebAPIResource, DjbletsRootResource):
 
     def __init__(self, *args, **kwargs):
         super(RootResource, self).__init__([
+            resources.batch,
             resources.default_reviewer,
             resources.extension,
             resources.hosting_service,
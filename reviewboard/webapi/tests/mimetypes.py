@@ -12,6 +12,9 @@ api_token_item_mimetype = _build_mimetype('api-token')
 archived_item_mimetype = _build_mimetype('archived-review-request')
 
 
+batch_mimetype = _build_mimetype('batch')
+
+
 change_list_mimetype = _build_mimetype('review-request-changes')
 change_item_mimetype = _build_mimetype('review-request-change')
 
@@ -0,0 +1,190 @@
+"""Unit tests for reviewboard.webapi.auth_cache."""
+
+from __future__ import unicode_literals
+
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test.client import RequestFactory
+from django.utils import timezone
+from oauth2_provider.models import AccessToken
+
+from reviewboard.site.models import LocalSite
+from reviewboard.testing import TestCase
+from reviewboard.webapi.auth_backends import (OAuth2TokenAuthBackend,
+                                              TokenAuthBackend)
+from reviewboard.webapi.auth_cache import (cache_oauth2_token,
+                                           connect_signals,
+                                           get_cached_api_token,
+                                           get_cached_oauth2_token,
+                                           invalidate_cached_tokens)
+
+
+class TokenAuthCacheTests(TestCase):
+    """Unit tests for caching API tokens in TokenAuthBackend."""
+
+    fixtures = ['test_users']
+
+    def setUp(self):
+        super(TokenAuthCacheTests, self).setUp()
+
+        cache.clear()
+        connect_signals()
+
+        self.user = User.objects.get(username='doc')
+        self.webapi_token = self.create_webapi_token(self.user)
+        self.backend = TokenAuthBackend()
+
+    def test_authenticate_caches_token(self):
+        """Testing TokenAuthBackend.authenticate caches validated tokens"""
+        self.backend.authenticate(token=self.webapi_token.token)
+
+        with self.assertNumQueries(0):
+            user = self.backend.authenticate(token=self.webapi_token.token)
+
+        self.assertEqual(user, self.user)
+        self.assertEqual(user._webapi_token, self.webapi_token)
+
+    def test_authenticate_with_invalid_token(self):
+        """Testing TokenAuthBackend.authenticate doesn't cache invalid tokens
+        """
+        self.assertIsNone(self.backend.authenticate(token='abc123'))
+        self.assertIsNone(get_cached_api_token('abc123'))
+
+    def test_token_deleted(self):
+        """Testing TokenAuthBackend.authenticate after the token is deleted"""
+        self.backend.authenticate(token=self.webapi_token.token)
+        self.webapi_token.delete()
+
+        self.assertIsNone(get_cached_api_token(self.webapi_token.token))
+        self.assertIsNone(
+            self.backend.authenticate(token=self.webapi_token.token))
+
+    def test_token_saved(self):
+        """Testing TokenAuthBackend.authenticate after the token is changed"""
+        self.backend.authenticate(token=self.webapi_token.token)
+        self.webapi_token.policy = {'access': 'ro'}
+        self.webapi_token.save()
+
+        user = self.backend.authenticate(token=self.webapi_token.token)
+        self.assertEqual(user._webapi_token.policy, {'access': 'ro'})
+
+    def test_user_deactivated(self):
+        """Testing TokenAuthBackend.authenticate after the user is
+        deactivated
+        """
+        self.backend.authenticate(token=self.webapi_token.token)
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertIsNone(
+            self.backend.authenticate(token=self.webapi_token.token))
+
+    def test_user_last_login_updated(self):
+        """Testing TokenAuthBackend.authenticate keeps tokens cached when
+        only the user's last login time changes
+        """
+        self.backend.authenticate(token=self.webapi_token.token)
+        self.user.last_login = timezone.now()
+        self.user.save(update_fields=['last_login'])
+
+        self.assertIsNotNone(get_cached_api_token(self.webapi_token.token))
+
+    def test_invalidate_cached_tokens(self):
+        """Testing invalidate_cached_tokens"""
+        self.backend.authenticate(token=self.webapi_token.token)
+        invalidate_cached_tokens()
+
+        self.assertIsNone(get_cached_api_token(self.webapi_token.token))
+
+
+class OAuth2TokenAuthCacheTests(TestCase):
+    """Unit tests for caching access tokens in OAuth2TokenAuthBackend."""
+
+    fixtures = ['test_users']
+
+    def setUp(self):
+        super(OAuth2TokenAuthCacheTests, self).setUp()
+
+        cache.clear()
+        connect_signals()
+
+        self.user = User.objects.get(username='doc')
+        self.application = self.create_oauth_application(user=self.user)
+        self.access_token = self.create_oauth_token(self.application,
+                                                    self.user,
+                                                    'session:read')
+        self.backend = OAuth2TokenAuthBackend()
+
+    def test_authenticate_with_cached_token(self):
+        """Testing OAuth2TokenAuthBackend.authenticate with a cached token"""
+        self._cache_token()
+        request = self._create_request()
+
+        with self.assertNumQueries(0):
+            user = self.backend.authenticate(request=request)
+
+        self.assertEqual(user, self.user)
+        self.assertEqual(request._oauth2_token, self.access_token)
+        self.assertEqual(request.session['oauth2_token_id'],
+                         self.access_token.pk)
+
+    def test_authenticate_with_cached_token_other_local_site(self):
+        """Testing OAuth2TokenAuthBackend.authenticate with a cached token
+        for a different Local Site
+        """
+        self._cache_token()
+        request = self._create_request()
+        request.local_site = LocalSite.objects.create(name='local-site-1')
+
+        self.assertIsNone(self.backend.authenticate(request=request))
+
+    def test_cache_oauth2_token_expired(self):
+        """Testing cache_oauth2_token with an expired token"""
+        self.access_token.expires = timezone.now() - timedelta(seconds=1)
+        self.access_token.save()
+        self._cache_token()
+
+        self.assertIsNone(get_cached_oauth2_token(self.access_token.token))
+
+    def test_application_disabled(self):
+        """Testing OAuth2TokenAuthBackend.authenticate after the application
+        is disabled
+        """
+        self._cache_token()
+        self.application.enabled = False
+        self.application.save()
+
+        self.assertIsNone(get_cached_oauth2_token(self.access_token.token))
+
+    def test_token_deleted(self):
+        """Testing OAuth2TokenAuthBackend.authenticate after the token is
+        deleted
+        """
+        self._cache_token()
+        self.access_token.delete()
+
+        self.assertIsNone(get_cached_oauth2_token(self.access_token.token))
+
+    def _cache_token(self):
+        """Cache the access token, as it would be once validated."""
+        cache_oauth2_token(
+            AccessToken.objects
+            .select_related('application__local_site', 'user')
+            .get(pk=self.access_token.pk))
+
+    def _create_request(self):
+        """Return a request authenticating with the access token.
+
+        Returns:
+            django.http.HttpRequest:
+            The request.
+        """
+        request = RequestFactory().get(
+            '/api/',
+            HTTP_AUTHORIZATION='Bearer %s' % self.access_token.token)
+        request.local_site = None
+        request.session = {}
+
+        return request
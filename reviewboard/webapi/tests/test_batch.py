@@ -0,0 +1,208 @@
+from __future__ import unicode_literals
+
+import json
+
+from django.utils import six
+from djblets.webapi.errors import INVALID_FORM_DATA, PERMISSION_DENIED
+
+from reviewboard.webapi.resources import resources
+from reviewboard.webapi.tests.base import BaseWebAPITestCase
+from reviewboard.webapi.tests.mimetypes import batch_mimetype
+from reviewboard.webapi.tests.mixins import BasicTestsMetaclass
+from reviewboard.webapi.tests.urls import (get_batch_url,
+                                           get_review_request_item_url,
+                                           get_review_request_list_url,
+                                           get_session_url)
+
+
+@six.add_metaclass(BasicTestsMetaclass)
+class ResourceTests(BaseWebAPITestCase):
+    """Testing the BatchResource APIs."""
+
+    fixtures = ['test_users']
+    sample_api_url = 'batch/'
+    test_http_methods = ('GET',)
+    resource = resources.batch
+
+    def compare_item(self, item_rsp, item):
+        self.assertEqual(item_rsp['max_requests'],
+                         self.resource.max_requests)
+
+    #
+    # HTTP GET tests
+    #
+
+    def setup_basic_get_test(self, user, with_local_site, local_site_name):
+        return (get_batch_url(local_site_name),
+                batch_mimetype,
+                None)
+
+    #
+    # HTTP POST tests
+    #
+
+    def test_post(self):
+        """Testing the POST batch/ API"""
+        review_request = self.create_review_request(publish=True)
+
+        rsp = self._post_batch([
+            {
+                'id': 'session',
+                'path': get_session_url(),
+            },
+            {
+                'id': 'review-request',
+                'path': get_review_request_item_url(
+                    review_request.display_id),
+            },
+            {
+                'path': get_review_request_item_url(12345),
+            },
+        ])
+
+        responses = rsp['responses']
+        self.assertEqual(len(responses), 3)
+
+        self.assertEqual(responses[0]['id'], 'session')
+        self.assertEqual(responses[0]['status'], 200)
+        self.assertTrue(responses[0]['body']['session']['authenticated'])
+
+        self.assertEqual(responses[1]['id'], 'review-request')
+        self.assertEqual(responses[1]['status'], 200)
+        self.assertIn('etag', responses[1])
+        self.assertEqual(responses[1]['body']['review_request']['id'],
+                         review_request.display_id)
+
+        self.assertNotIn('id', responses[2])
+        self.assertEqual(responses[2]['status'], 404)
+        self.assertEqual(responses[2]['body']['stat'], 'fail')
+
+    def test_post_with_query(self):
+        """Testing the POST batch/ API with a query string in a path"""
+        self.create_review_request(publish=True)
+        self.create_review_request(publish=True)
+
+        rsp = self._post_batch([
+            {
+                'path': '%s?counts-only=1' % get_review_request_list_url(),
+            },
+        ])
+
+        self.assertEqual(rsp['responses'][0]['body']['count'], 2)
+
+    def test_post_with_write(self):
+        """Testing the POST batch/ API with a request that modifies data"""
+        review_request = self.create_review_request(submitter=self.user,
+                                                    publish=True)
+        url = get_review_request_item_url(review_request.display_id)
+
+        rsp = self._post_batch([
+            {
+                'path': url,
+            },
+            {
+                'method': 'PUT',
+                'path': url,
+                'data': {
+                    'status': 'discarded',
+                },
+            },
+            {
+                'path': url,
+            },
+        ])
+
+        responses = rsp['responses']
+        self.assertEqual(responses[0]['body']['review_request']['status'],
+                         'pending')
+        self.assertEqual(responses[1]['status'], 200)
+        self.assertEqual(responses[2]['body']['review_request']['status'],
+                         'discarded')
+
+    def test_post_with_permission_denied(self):
+        """Testing the POST batch/ API with a request the user doesn't have
+        permission for
+        """
+        review_request = self.create_review_request(publish=True)
+
+        rsp = self._post_batch([
+            {
+                'method': 'DELETE',
+                'path': get_review_request_item_url(
+                    review_request.display_id),
+            },
+        ])
+
+        response = rsp['responses'][0]
+        self.assertEqual(response['status'], 403)
+        self.assertEqual(response['body']['err']['code'],
+                         PERMISSION_DENIED.code)
+
+    def test_post_with_invalid_json(self):
+        """Testing the POST batch/ API with invalid JSON"""
+        rsp = self.api_post(get_batch_url(),
+                            {'requests': '[{'},
+                            expected_status=400)
+
+        self.assertEqual(rsp['stat'], 'fail')
+        self.assertEqual(rsp['err']['code'], INVALID_FORM_DATA.code)
+        self.assertIn('requests', rsp['fields'])
+
+    def test_post_with_too_many_requests(self):
+        """Testing the POST batch/ API with too many requests"""
+        rsp = self.api_post(
+            get_batch_url(),
+            {
+                'requests': json.dumps(
+                    [{'path': get_session_url()}] *
+                    (self.resource.max_requests + 1)),
+            },
+            expected_status=400)
+
+        self.assertEqual(rsp['stat'], 'fail')
+        self.assertEqual(rsp['err']['code'], INVALID_FORM_DATA.code)
+
+    def test_post_with_non_api_path(self):
+        """Testing the POST batch/ API with a path outside the API"""
+        for path in ('/dashboard/', get_batch_url()):
+            rsp = self.api_post(
+                get_batch_url(),
+                {'requests': json.dumps([{'path': path}])},
+                expected_status=400)
+
+            self.assertEqual(rsp['stat'], 'fail')
+            self.assertEqual(rsp['err']['code'], INVALID_FORM_DATA.code)
+
+    def test_post_with_invalid_method(self):
+        """Testing the POST batch/ API with an unsupported method"""
+        rsp = self.api_post(
+            get_batch_url(),
+            {
+                'requests': json.dumps([{
+                    'method': 'PATCH',
+                    'path': get_session_url(),
+                }]),
+            },
+            expected_status=400)
+
+        self.assertEqual(rsp['stat'], 'fail')
+        self.assertEqual(rsp['err']['code'], INVALID_FORM_DATA.code)
+
+    def _post_batch(self, requests):
+        """Post a batch of requests and return the response.
+
+        Args:
+            requests (list of dict):
+                The requests in the batch.
+
+        Returns:
+            dict:
+            The decoded response payload.
+        """
+        rsp = self.api_post(get_batch_url(),
+                            {'requests': json.dumps(requests)},
+                            expected_mimetype=batch_mimetype)
+
+        self.assertEqual(rsp['stat'], 'ok')
+
+        return rsp
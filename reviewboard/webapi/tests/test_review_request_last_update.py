@@ -6,8 +6,11 @@ from dateutil.parser import parse as parse_date
 from django.contrib.auth.models import User
 from django.utils import six
 from djblets.webapi.testing.decorators import webapi_test_template
+from kgb import SpyAgency
 
 from reviewboard.diffviewer.models import DiffSet
+from reviewboard.reviews.last_update import (get_last_update_info,
+                                             wait_for_last_update)
 from reviewboard.reviews.models import (Review, ReviewRequest,
                                         ReviewRequestDraft)
 from reviewboard.webapi.resources import resources
@@ -19,7 +22,7 @@ from reviewboard.webapi.tests.urls import get_review_request_last_update_url
 
 
 @six.add_metaclass(BasicTestsMetaclass)
-class ResourceTests(BaseWebAPITestCase):
+class ResourceTests(SpyAgency, BaseWebAPITestCase):
     """Testing ReviewRequestLastUpdateResource APIs."""
 
     fixtures = ['test_users', 'test_scmtools']
@@ -398,3 +401,45 @@ class ResourceTests(BaseWebAPITestCase):
         # We have no way of knowing what user published based on only the
         # model, so it will always be the review author.
         self.compare_item(item_rsp, review_request, expected_user=self.user)
+
+    @webapi_test_template
+    def test_get_with_wait(self):
+        """Testing the GET <URL> API with ?wait= and
+        webapi_last_update_wait_enabled
+        """
+        def _wait_for_last_update(review_request, etag, timeout):
+            return get_last_update_info(review_request)
+
+        self.spy_on(wait_for_last_update, call_fake=_wait_for_last_update)
+
+        url, expected_mimetype, review_request = \
+            self.setup_basic_get_test(self.user)
+        etag = get_last_update_info(review_request)['etag']
+
+        with self.siteconfig_settings({
+                'webapi_last_update_wait_enabled': True,
+            }):
+            response = self.client.get(url, {'wait': 60},
+                                       HTTP_IF_NONE_MATCH=etag)
+
+        self.assertHttpNotModified(response)
+        self.assertTrue(wait_for_last_update.called)
+        self.assertEqual(wait_for_last_update.last_call.kwargs['timeout'],
+                         self.resource.MAX_WAIT_SECS)
+
+    @webapi_test_template
+    def test_get_with_wait_disabled(self):
+        """Testing the GET <URL> API with ?wait= and
+        webapi_last_update_wait_enabled disabled
+        """
+        self.spy_on(wait_for_last_update)
+
+        url, expected_mimetype, review_request = \
+            self.setup_basic_get_test(self.user)
+        etag = get_last_update_info(review_request)['etag']
+
+        response = self.client.get(url, {'wait': 60},
+                                   HTTP_IF_NONE_MATCH=etag)
+
+        self.assertHttpNotModified(response)
+        self.assertFalse(wait_for_last_update.called)
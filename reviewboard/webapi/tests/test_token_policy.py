@@ -0,0 +1,184 @@
+"""Unit tests for reviewboard.webapi.token_policy."""
+
+from __future__ import unicode_literals
+
+from django.contrib.auth.models import User
+from djblets.webapi.errors import PERMISSION_DENIED
+from djblets.webapi.resources.mixins.api_tokens import ResourceAPITokenMixin
+from kgb import SpyAgency
+
+from reviewboard.testing import TestCase
+from reviewboard.webapi.models import WebAPIToken
+from reviewboard.webapi.tests.base import BaseWebAPITestCase
+from reviewboard.webapi.tests.mimetypes import session_mimetype
+from reviewboard.webapi.tests.urls import (get_review_request_item_url,
+                                           get_session_url)
+from reviewboard.webapi.token_policy import (CompiledAPITokenPolicy,
+                                             clear_compiled_policy_cache,
+                                             get_compiled_policy)
+
+
+class _PolicyResource(ResourceAPITokenMixin):
+    """A resource for checking policies with ResourceAPITokenMixin."""
+
+    def __init__(self, name):
+        self.name = name
+
+
+class CompiledAPITokenPolicyTests(TestCase):
+    """Unit tests for CompiledAPITokenPolicy."""
+
+    POLICIES = [
+        {},
+        {'resources': {}},
+        {'resources': {'*': {'allow': ['*']}}},
+        {'resources': {'*': {'allow': ['GET', 'HEAD', 'OPTIONS'],
+                             'block': ['*']}}},
+        {'resources': {
+            '*': {'block': ['*']},
+            'review_request': {
+                '*': {'allow': ['GET']},
+                '42': {'allow': ['*'], 'block': ['DELETE']},
+            },
+        }},
+        {'resources': {
+            'review_request': {
+                '42': {'block': ['*']},
+                '43': {},
+            },
+            'repository': {},
+        }},
+        {'resources': {
+            '*': {'allow': ['GET']},
+            'review_request': {
+                '*': {'allow': ['PUT']},
+            },
+        }},
+    ]
+
+    def test_is_allowed(self):
+        """Testing CompiledAPITokenPolicy.is_allowed matches
+        ResourceAPITokenMixin.is_resource_method_allowed
+        """
+        for policy in self.POLICIES:
+            compiled = CompiledAPITokenPolicy(policy)
+            resources_policy = policy.get('resources')
+
+            for policy_id in ('review_request', 'repository', 'user'):
+                resource = _PolicyResource(policy_id)
+
+                for method in ('GET', 'PUT', 'DELETE'):
+                    for object_id in (None, '42', '43', '44'):
+                        if resources_policy:
+                            expected = resource.is_resource_method_allowed(
+                                resources_policy, method, object_id)
+                        else:
+                            expected = True
+
+                        self.assertEqual(
+                            compiled.is_allowed(policy_id, method, object_id),
+                            expected,
+                            'Unexpected result for %s %s:%s with policy %r'
+                            % (method, policy_id, object_id, policy))
+
+
+class GetCompiledPolicyTests(TestCase):
+    """Unit tests for get_compiled_policy."""
+
+    fixtures = ['test_users']
+
+    def setUp(self):
+        super(GetCompiledPolicyTests, self).setUp()
+
+        clear_compiled_policy_cache()
+
+        self.webapi_token = self.create_webapi_token(
+            User.objects.get(username='doc'),
+            policy={
+                'resources': {
+                    '*': {'allow': ['GET'], 'block': ['*']},
+                },
+            })
+
+    def test_cached(self):
+        """Testing get_compiled_policy caches compiled policies"""
+        compiled = get_compiled_policy(self.webapi_token)
+        token = WebAPIToken.objects.get(pk=self.webapi_token.pk)
+
+        self.assertIs(get_compiled_policy(token), compiled)
+
+    def test_policy_changed(self):
+        """Testing get_compiled_policy recompiles changed policies"""
+        compiled = get_compiled_policy(self.webapi_token)
+        self.assertFalse(compiled.is_allowed('review_request', 'PUT'))
+
+        self.webapi_token.policy = {}
+        self.webapi_token.save()
+        token = WebAPIToken.objects.get(pk=self.webapi_token.pk)
+
+        compiled = get_compiled_policy(token)
+        self.assertTrue(compiled.is_allowed('review_request', 'PUT'))
+
+    def test_policy_changed_with_same_last_updated(self):
+        """Testing get_compiled_policy recompiles policies changed without
+        a new last updated time
+        """
+        compiled = get_compiled_policy(self.webapi_token)
+        self.assertFalse(compiled.is_allowed('review_request', 'PUT'))
+
+        # Timestamps may only be stored to the second, so a policy could
+        # change without the token's last updated time changing.
+        token = WebAPIToken.objects.get(pk=self.webapi_token.pk)
+        token.policy = {}
+
+        compiled = get_compiled_policy(token)
+        self.assertTrue(compiled.is_allowed('review_request', 'PUT'))
+
+
+class ResourcePolicyTests(SpyAgency, BaseWebAPITestCase):
+    """Unit tests for checking API token policies in resources."""
+
+    fixtures = ['test_users']
+
+    def setUp(self):
+        super(ResourcePolicyTests, self).setUp()
+
+        clear_compiled_policy_cache()
+
+        webapi_token = self.create_webapi_token(
+            self.user,
+            policy={
+                'resources': {
+                    'review_request': {'*': {'block': ['*']}},
+                },
+            })
+
+        session = self.client.session
+        session['webapi_token_id'] = webapi_token.pk
+        session.save()
+
+    def test_allowed(self):
+        """Testing API token policies allow resources using the compiled
+        policy
+        """
+        self.spy_on(CompiledAPITokenPolicy.is_allowed)
+
+        self.api_get(get_session_url(),
+                     expected_mimetype=session_mimetype)
+
+        self.assertTrue(CompiledAPITokenPolicy.is_allowed.called)
+
+    def test_blocked(self):
+        """Testing API token policies block resources using the compiled
+        policy
+        """
+        review_request = self.create_review_request(publish=True)
+        self.spy_on(CompiledAPITokenPolicy.is_allowed)
+
+        rsp = self.api_get(
+            get_review_request_item_url(review_request.display_id),
+            expected_status=403)
+
+        self.assertEqual(rsp['stat'], 'fail')
+        self.assertEqual(rsp['err']['code'], PERMISSION_DENIED.code)
+        self.assertTrue(CompiledAPITokenPolicy.is_allowed.called)
@@ -51,6 +51,13 @@ def get_archived_review_request_item_url(username, object_id,
         review_request_id=object_id)
 
 
+#
+# BatchResource
+#
+def get_batch_url(local_site_name=None):
+    return resources.batch.get_list_url(local_site_name=local_site_name)
+
+
 #
 # ChangeResource
 #
@@ -0,0 +1,242 @@
+"""Compiled API token access policies.
+
+API token policies (see :ref:`api-token-policies`) are JSON documents that
+restrict which resources and HTTP methods a token can access.
+:py:class:`djblets.webapi.resources.mixins.api_tokens.ResourceAPITokenMixin`
+walks the policy, scanning its allow and block lists, for every resource
+called with a token.
+
+This module compiles a policy once into per-resource lookup tables of
+allowed and blocked methods. Decisions are then memoized by resource policy
+ID, method and object ID. Compiled policies are cached in each process for
+each revision of a token's policy.
+"""
+
+from __future__ import unicode_literals
+
+import hashlib
+import json
+
+from django.utils import six
+from django.utils.encoding import force_bytes
+
+
+#: The maximum number of compiled policies kept in the cache.
+MAX_CACHED_POLICIES = 1000
+
+#: The maximum number of decisions memoized for each compiled policy.
+MAX_CACHED_DECISIONS = 1000
+
+
+_compiled_policies = {}
+
+
+class _PolicyRule(object):
+    """The allowed and blocked methods for a resource or object.
+
+    Explicitly listed methods take precedence over wildcards, and blocked
+    methods take precedence over allowed methods.
+    """
+
+    def __init__(self, rule):
+        """Initialize the rule.
+
+        Args:
+            rule (dict):
+                The rule from the policy, with optional ``allow`` and
+                ``block`` lists of methods.
+        """
+        self.allowed = frozenset(rule.get('allow', []))
+        self.blocked = frozenset(rule.get('block', []))
+
+        if '*' in self.blocked:
+            self.default = False
+        elif '*' in self.allowed:
+            self.default = True
+        else:
+            self.default = None
+
+    def check(self, method):
+        """Return whether the rule allows a method.
+
+        Args:
+            method (unicode):
+                The HTTP method.
+
+        Returns:
+            bool:
+            Whether the method is allowed, or ``None`` if the rule doesn't
+            apply to the method.
+        """
+        if method in self.blocked:
+            return False
+        elif method in self.allowed:
+            return True
+        else:
+            return self.default
+
+
+class CompiledAPITokenPolicy(object):
+    """An API token policy compiled for fast access checks.
+
+    This makes the same decisions as
+    :py:meth:`ResourceAPITokenMixin.is_resource_method_allowed()
+    <djblets.webapi.resources.mixins.api_tokens.ResourceAPITokenMixin.
+    is_resource_method_allowed>`.
+    """
+
+    def __init__(self, policy):
+        """Compile the policy.
+
+        Args:
+            policy (dict):
+                The token's policy.
+        """
+        resources_policy = policy.get('resources') or {}
+
+        self.is_unrestricted = not resources_policy
+        self._global_rule = None
+        self._resource_rules = {}
+        self._decisions = {}
+
+        for policy_id, resource_policy in six.iteritems(resources_policy):
+            if not resource_policy:
+                continue
+
+            if policy_id == '*':
+                self._global_rule = _PolicyRule(resource_policy)
+                continue
+
+            object_rules = {}
+            wildcard_rule = None
+
+            for object_id, rule in six.iteritems(resource_policy):
+                if not rule:
+                    continue
+
+                if object_id == '*':
+                    wildcard_rule = _PolicyRule(rule)
+                else:
+                    object_rules[object_id] = _PolicyRule(rule)
+
+            self._resource_rules[policy_id] = (object_rules, wildcard_rule)
+
+    def is_allowed(self, policy_id, method, object_id=None):
+        """Return whether the policy allows a method on a resource.
+
+        Args:
+            policy_id (unicode):
+                The policy ID of the resource.
+
+            method (unicode):
+                The HTTP method.
+
+            object_id (unicode, optional):
+                The ID of the object being accessed, for item resources.
+
+        Returns:
+            bool:
+            Whether the method is allowed.
+        """
+        if self.is_unrestricted:
+            return True
+
+        key = (policy_id, method, object_id)
+
+        try:
+            return self._decisions[key]
+        except KeyError:
+            pass
+
+        allowed = self._check(policy_id, method, object_id)
+
+        if len(self._decisions) < MAX_CACHED_DECISIONS:
+            self._decisions[key] = allowed
+
+        return allowed
+
+    def _check(self, policy_id, method, object_id):
+        """Return whether the policy allows a method on a resource.
+
+        Rules for the object take precedence over rules for all objects of
+        the resource, which take precedence over the global rule. If no rules
+        apply, the method is allowed.
+
+        Args:
+            policy_id (unicode):
+                The policy ID of the resource.
+
+            method (unicode):
+                The HTTP method.
+
+            object_id (unicode):
+                The ID of the object being accessed, if any.
+
+        Returns:
+            bool:
+            Whether the method is allowed.
+        """
+        rules = []
+
+        try:
+            object_rules, wildcard_rule = self._resource_rules[policy_id]
+        except KeyError:
+            pass
+        else:
+            if object_id is not None:
+                rules.append(object_rules.get(object_id))
+
+            rules.append(wildcard_rule)
+
+        rules.append(self._global_rule)
+
+        for rule in rules:
+            if rule is not None:
+                allowed = rule.check(method)
+
+                if allowed is not None:
+                    return allowed
+
+        return True
+
+
+def get_compiled_policy(webapi_token):
+    """Return the compiled policy for an API token.
+
+    Compiled policies are cached by the token's ID and a hash of its
+    serialized policy, so any change to the policy is picked up by every
+    process.
+
+    Args:
+        webapi_token (reviewboard.webapi.models.WebAPIToken):
+            The API token.
+
+    Returns:
+        CompiledAPITokenPolicy:
+        The compiled policy.
+    """
+    compiled = getattr(webapi_token, '_rb_compiled_policy', None)
+
+    if compiled is None:
+        policy = webapi_token.policy or {}
+        key = (webapi_token.pk,
+               hashlib.sha1(force_bytes(json.dumps(policy, sort_keys=True)))
+               .hexdigest())
+        compiled = _compiled_policies.get(key)
+
+        if compiled is None:
+            compiled = CompiledAPITokenPolicy(policy)
+
+            if len(_compiled_policies) >= MAX_CACHED_POLICIES:
+                _compiled_policies.clear()
+
+            _compiled_policies[key] = compiled
+
+        webapi_token._rb_compiled_policy = compiled
+
+    return compiled
+
+
+def clear_compiled_policy_cache():
+    """Clear the cache of compiled policies."""
+    _compiled_policies.clear()